@@ -0,0 +1,57 @@
+from typing import Dict, Optional
+
+from jose import JWTError, jwt
+
+# Заголовки идентичности, которые выставляет только шлюз
+IDENTITY_HEADERS = ("x-user-uuid", "x-user-email", "x-user-role", "x-gateway-token")
+
+
+class InvalidToken(Exception):
+    """Токен из заголовка Authorization не прошел проверку"""
+
+
+class TokenVerifier:
+    """
+    Проверка JWT на шлюзе.
+
+    Для валидного токена шлюз передает в upstream заголовки X-User-*
+    и X-Gateway-Token, по которым сервисы доверяют идентичности без повторной
+    проверки токена и без запроса в БД.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str, gateway_token: Optional[str]):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.gateway_token = gateway_token
+
+    def claims(self, authorization: Optional[str]) -> Optional[Dict]:
+        """Проверенные claims токена (None для анонимного запроса)"""
+        if not authorization:
+            return None
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError:
+            raise InvalidToken()
+        if payload.get("active") is False:
+            raise InvalidToken()
+        return payload
+
+    def identity_headers(self, authorization: Optional[str]) -> Dict[str, str]:
+        """Заголовки идентичности для upstream (пустой словарь для анонимного запроса)"""
+        payload = self.claims(authorization)
+        # Старые токены без uuid проверяет сам сервис
+        if payload is None or not payload.get("uuid") or not self.gateway_token:
+            return {}
+        headers = {
+            "x-user-uuid": str(payload["uuid"]),
+            "x-gateway-token": self.gateway_token,
+        }
+        if payload.get("sub"):
+            headers["x-user-email"] = str(payload["sub"])
+        if payload.get("role"):
+            headers["x-user-role"] = str(payload["role"])
+        return headers
@@ -0,0 +1,67 @@
+import itertools
+import random
+from typing import Callable, Collection, Sequence
+
+ROUND_ROBIN = "round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+POWER_OF_TWO = "power_of_two"
+
+STRATEGIES = (ROUND_ROBIN, LEAST_OUTSTANDING, POWER_OF_TWO)
+
+
+class LoadBalancer:
+    """
+    Выбор экземпляра upstream для маршрута.
+
+    Стратегии:
+        round_robin - по кругу;
+        least_outstanding - экземпляр с наименьшим числом незавершенных запросов;
+        power_of_two - из двух случайных экземпляров менее загруженный.
+
+    Недоступные экземпляры (health check, разомкнутый предохранитель) пропускаются.
+    Если недоступны все, выбор идет среди всех экземпляров, чтобы не терять
+    запросы при ошибке самих проверок.
+    """
+
+    def __init__(
+        self,
+        instances: Sequence[str],
+        strategy: str,
+        outstanding: Callable[[str], int],
+        is_available: Callable[[str], bool],
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия балансировки: {strategy}")
+        if not instances:
+            raise ValueError("Маршрут должен содержать хотя бы один экземпляр")
+        self.instances = tuple(instances)
+        self.strategy = strategy
+        self._outstanding = outstanding
+        self._is_available = is_available
+        self._counter = itertools.count()
+
+    def _candidates(self, exclude: Collection[str]) -> Sequence[str]:
+        available = [
+            url for url in self.instances
+            if url not in exclude and self._is_available(url)
+        ]
+        if available:
+            return available
+        return [url for url in self.instances if url not in exclude] or self.instances
+
+    def pick(self, exclude: Collection[str] = ()) -> str:
+        """Выбирает экземпляр, по возможности не из exclude (уже опробованные)"""
+        if len(self.instances) == 1:
+            return self.instances[0]
+
+        candidates = self._candidates(exclude)
+        if len(candidates) == 1:
+            return candidates[0]
+
+        if self.strategy == ROUND_ROBIN:
+            return candidates[next(self._counter) % len(candidates)]
+        if self.strategy == LEAST_OUTSTANDING:
+            return min(candidates, key=self._outstanding)
+
+        first, second = random.sample(candidates, 2)
+        return first if self._outstanding(first) <= self._outstanding(second) else second
@@ -0,0 +1,209 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import httpx
+from fastapi import Request
+from fastapi.responses import Response
+
+from headers import HOP_BY_HOP
+
+# Заголовки, которые не сохраняются вместе с закешированным ответом
+_SKIP_HEADERS = HOP_BY_HOP | {"date"}
+
+CacheKey = Tuple[str, str, str, Tuple[str, ...]]
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Разбирает Cache-Control в словарь директив: 'max-age=60, public' -> {...}"""
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+@dataclass
+class CachedResponse:
+    """Закешированный ответ upstream-сервиса"""
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    expires_at: float
+    etag: Optional[str] = None
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        self.size = len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def to_response(self, request: Request) -> Response:
+        if self.etag and request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers={"etag": self.etag})
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            headers=dict(self.headers),
+        )
+
+
+class ResponseCache:
+    """
+    LRU-кеш ответов на идемпотентные GET запросы.
+
+    Ключ - метод, путь, query и выбранные заголовки запроса.
+    Время жизни берется из Cache-Control upstream (max-age / s-maxage),
+    устаревшие записи с ETag перепроверяются условным запросом.
+    Одновременные промахи по одному ключу объединяются в один запрос к upstream.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        max_entry_size: int,
+        default_ttl: float = 0,
+        key_headers: Iterable[str] = (),
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_size = max_entry_size
+        self.default_ttl = default_ttl
+        self.key_headers = tuple(h.lower() for h in key_headers)
+
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    def make_key(self, request: Request, path: str) -> CacheKey:
+        return (
+            request.method,
+            path,
+            request.url.query,
+            tuple(request.headers.get(h, "") for h in self.key_headers),
+        )
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        """Возвращает запись (в том числе устаревшую) и помечает ее как недавно использованную"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def waiter(self, key: CacheKey) -> Optional[asyncio.Future]:
+        """
+        Future уже идущего запроса по этому ключу либо None.
+        Если None - вызывающий становится ведущим и обязан вызвать complete().
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        return None
+
+    def complete(self, key: CacheKey, entry: Optional[CachedResponse]) -> None:
+        """Отдает результат ведущего запроса всем ожидающим"""
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(entry)
+
+    def ttl_for(self, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Время жизни ответа по заголовкам upstream или None, если кешировать нельзя"""
+        if status_code != 200 or "set-cookie" in headers:
+            return None
+        vary = headers.get("vary")
+        if vary:
+            varied = {h.strip().lower() for h in vary.split(",")}
+            if "*" in varied or not varied.issubset(self.key_headers):
+                return None
+
+        directives = parse_cache_control(headers.get("cache-control"))
+        if "no-store" in directives or "private" in directives:
+            return None
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name):
+                try:
+                    return max(float(directives[name]), 0.0)
+                except ValueError:
+                    return None
+        if "no-cache" in directives:
+            return 0.0
+        if self.default_ttl > 0 or "etag" in headers:
+            return self.default_ttl
+        return None
+
+    def cacheable_size(self, response: httpx.Response) -> bool:
+        """
+        Допускает ли Content-Length запись в кеш. Ответ без Content-Length
+        (chunked) допускается: его тело читается в буфер не больше
+        max_entry_size, при превышении ответ отдается потоком без кеширования
+        """
+        length = response.headers.get("content-length")
+        if length is None:
+            return True
+        return length.isdigit() and int(length) <= self.max_entry_size
+
+    def store(
+        self, key: CacheKey, response: httpx.Response, body: bytes, ttl: float
+    ) -> CachedResponse:
+        entry = CachedResponse(
+            status_code=response.status_code,
+            headers=[
+                (k, v) for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS
+            ],
+            body=body,
+            expires_at=time.monotonic() + ttl,
+            etag=response.headers.get("etag"),
+        )
+        self._put(key, entry)
+        return entry
+
+    def refresh(
+        self, key: CacheKey, entry: CachedResponse, response: httpx.Response
+    ) -> CachedResponse:
+        """Продлевает устаревшую запись после ответа 304 Not Modified"""
+        self.revalidated += 1
+        headers = {**dict(entry.headers), **dict(response.headers)}
+        ttl = self.ttl_for(200, headers)
+        entry.etag = headers.get("etag", entry.etag)
+        entry.expires_at = time.monotonic() + (ttl or 0.0)
+        return entry
+
+    def _put(self, key: CacheKey, entry: CachedResponse) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
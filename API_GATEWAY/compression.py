@@ -0,0 +1,172 @@
+import importlib.util
+import zlib
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from headers import RawHeaders
+from infra.monitoring.monitoring import REGISTRY
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+COMPRESSION_BYTES = REGISTRY.counter(
+    "gateway_compression_bytes_total",
+    "Байты тела ответов до (in) и после (out) сжатия",
+    ("encoding", "direction"),
+)
+
+
+def parse_accept_encoding(value: Optional[str]) -> Dict[str, float]:
+    """'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}"""
+    weights: Dict[str, float] = {}
+    if not value:
+        return weights
+    for part in value.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    return weights
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31: формат gzip (заголовок и CRC)
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        import brotli
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ResponseCompressor:
+    """
+    Потоковое сжатие ответов upstream (br или gzip по Accept-Encoding клиента).
+
+    Сжимаются только ответы с подходящим Content-Type, без собственного
+    Content-Encoding и не меньше min_size байт (ответы без Content-Length
+    сжимаются всегда). Тело сжимается по мере чтения из upstream, без
+    буферизации целиком.
+    """
+
+    def __init__(
+        self,
+        min_size: int,
+        content_types: Iterable[str],
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.min_size = min_size
+        self.content_types = frozenset(t.lower() for t in content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings: Tuple[str, ...] = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Кодировка с наибольшим q из поддерживаемых; при равенстве - br"""
+        weights = parse_accept_encoding(accept_encoding)
+        if not weights:
+            return None
+        default = weights.get("*", 0.0)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = weights.get(encoding, default)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def _compressible_type(self, content_type: bytes) -> bool:
+        media_type = content_type.split(b";", 1)[0].strip().lower().decode("latin-1")
+        return media_type in self.content_types or media_type.endswith("+json")
+
+    def select(
+        self,
+        method: str,
+        accept_encoding: Optional[str],
+        status_code: int,
+        raw_headers: RawHeaders,
+    ) -> Optional[str]:
+        """Кодировка для ответа или None, если ответ передается как есть"""
+        if method == "HEAD" or status_code < 200 or status_code in (204, 206, 304):
+            return None
+        content_type = None
+        for name, value in raw_headers:
+            lower = name.lower()
+            if lower == b"content-encoding":
+                return None
+            if lower == b"content-type":
+                content_type = value
+            elif lower == b"content-length":
+                try:
+                    if int(value) < self.min_size:
+                        return None
+                except ValueError:
+                    return None
+        if content_type is None or not self._compressible_type(content_type):
+            return None
+        return self.negotiate(accept_encoding)
+
+    @staticmethod
+    def rewrite_headers(raw_headers: RawHeaders, encoding: str) -> RawHeaders:
+        """
+        Заголовки сжатого ответа: без Content-Length, с Content-Encoding,
+        Vary: Accept-Encoding и ослабленным ETag (тело уже не байт-в-байт)
+        """
+        headers: RawHeaders = []
+        vary_found = False
+        for name, value in raw_headers:
+            lower = name.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"etag" and value.startswith(b'"'):
+                value = b"W/" + value
+            elif lower == b"vary":
+                vary_found = True
+                if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                    value = value + b", Accept-Encoding"
+            headers.append((name, value))
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+        if not vary_found:
+            headers.append((b"vary", b"Accept-Encoding"))
+        return headers
+
+    async def compress(self, chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+        compressor = (
+            _BrotliCompressor(self.brotli_quality)
+            if encoding == "br" else _GzipCompressor(self.gzip_level)
+        )
+        size_in = size_out = 0
+        try:
+            async for chunk in chunks:
+                size_in += len(chunk)
+                data = compressor.compress(chunk)
+                if data:
+                    size_out += len(data)
+                    yield data
+            data = compressor.finish()
+            size_out += len(data)
+            yield data
+        finally:
+            COMPRESSION_BYTES.labels(encoding, "in").inc(size_in)
+            COMPRESSION_BYTES.labels(encoding, "out").inc(size_out)
+
@@ -1,5 +1,32 @@
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
-from typing import Dict
+from typing import Dict, List, Optional, Union
+
+
+class PoolSettings(BaseModel):
+    """Настройки пула соединений к одному upstream (None - значение по умолчанию)"""
+    max_connections: Optional[int] = None
+    max_keepalive_connections: Optional[int] = None
+    keepalive_expiry: Optional[float] = None
+    http2: Optional[bool] = None
+
+
+class RateLimitRule(BaseModel):
+    """
+    Правило ограничения частоты: token bucket на каждое значение ключа.
+    key: ip - адрес клиента, subject - пользователь из JWT, route - общий лимит маршрута
+    """
+    prefix: str = "/"
+    key: str = "ip"
+    rate: float = Field(gt=0)  # Пополнение, запросов в секунду
+    burst: int = Field(ge=1)  # Емкость корзины (допустимый всплеск)
+    methods: Optional[List[str]] = None
+
+
+class TimeoutSettings(BaseModel):
+    """Таймауты маршрута в секундах (None - значение по умолчанию)"""
+    connect: Optional[float] = None
+    read: Optional[float] = None
 
 
 class Settings(BaseSettings):
@@ -7,15 +34,117 @@ class Settings(BaseSettings):
     HOST: str = "localhost"
     PORT: int = 8000
 
-    # Маппинг сервисов
-    SERVICE_ROUTES: Dict[str, str] = {
+    # Запуск (python main.py): число процессов-воркеров (0 - по числу CPU),
+    # event loop и HTTP-парсер (auto - uvloop/httptools при наличии).
+    # Кеш, лимиты частоты и предохранители у каждого воркера свои
+    WORKERS: int = 1
+    LOOP: str = "auto"
+    HTTP: str = "auto"
+    RELOAD: bool = False  # Только для разработки, с одним воркером
+    # Сколько ждать завершения запросов в работе (включая потоковые ответы) при SIGTERM
+    GRACEFUL_SHUTDOWN_TIMEOUT: float = 30.0
+
+    # Маппинг сервисов: префикс -> адрес или список адресов экземпляров
+    SERVICE_ROUTES: Dict[str, Union[str, List[str]]] = {
         "/api/v1/auth": "http://localhost:8005",
     }
+    # Разрешенные методы по префиксу маршрута (нет записи - разрешены все)
+    SERVICE_ROUTE_METHODS: Dict[str, List[str]] = {}
+
+    # Балансировка: round_robin, least_outstanding, power_of_two
+    LOAD_BALANCING_STRATEGY: str = "round_robin"
+    ROUTE_LOAD_BALANCING: Dict[str, str] = {}
+
+    # Активная проверка экземпляров upstream
+    HEALTH_CHECK_INTERVAL: float = 5.0
+    HEALTH_CHECK_TIMEOUT: float = 2.0
+    HEALTH_UNHEALTHY_THRESHOLD: int = 2
 
     # Настройки для httpx
     REQUEST_TIMEOUT: int = 30
+    CONNECT_TIMEOUT: float = 5.0
+    # Таймауты по префиксу маршрута: {"/api/v1/auth": {"connect": 1, "read": 10}}
+    ROUTE_TIMEOUTS: Dict[str, TimeoutSettings] = {}
     MAX_KEEPALIVE_CONNECTIONS: int = 10
     MAX_CONNECTIONS: int = 100
+    KEEPALIVE_EXPIRY: float = 5.0
+    HTTP2_ENABLED: bool = False
+
+    # Пулы соединений по адресу upstream, переопределяют значения выше
+    # например: {"http://localhost:8005": {"max_connections": 200, "http2": true}}
+    SERVICE_POOLS: Dict[str, PoolSettings] = {}
+
+    # Повторы для идемпотентных методов (экспоненциальная задержка с джиттером)
+    RETRY_MAX_ATTEMPTS: int = 2
+    RETRY_BACKOFF_BASE: float = 0.05
+    RETRY_BACKOFF_MAX: float = 1.0
+    # Повторы не превышают RETRY_BUDGET_RATIO от числа запросов
+    RETRY_BUDGET_RATIO: float = 0.2
+    RETRY_BUDGET_MIN: float = 10
+
+    # Предохранитель (circuit breaker) на каждый upstream
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RECOVERY_TIMEOUT: float = 30.0
+    BREAKER_HALF_OPEN_CALLS: int = 1
+
+    # Проверка JWT на шлюзе: upstream получает X-User-* и X-Gateway-Token
+    # (должен совпадать с GATEWAY_SHARED_SECRET сервисов)
+    JWT_VERIFY_ENABLED: bool = False
+    JWT_SECRET_KEY: str = "vacancy_analyt_job"
+    JWT_ALGORITHM: str = "HS256"
+    GATEWAY_SHARED_SECRET: Optional[str] = None
+    # Роль из JWT, которой разрешены служебные операции (POST /routes/reload)
+    ADMIN_ROLE: str = "admin"
+
+    # Доля успешных запросов, попадающих в access-лог (1.0 - все)
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+
+    # Ограничение частоты запросов до обращения к upstream (429 + Retry-After).
+    # RATE_LIMIT_BACKEND: memory (в процессе) или redis (общий для всех экземпляров шлюза)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Число доверенных прокси (балансировщиков) перед шлюзом: адрес клиента берется
+    # из X-Forwarded-For на столько записей левее конца (0 - заголовок игнорируется)
+    RATE_LIMIT_TRUSTED_PROXIES: int = Field(default=0, ge=0)
+    RATE_LIMITS: List[RateLimitRule] = [
+        RateLimitRule(prefix="/api/v1/auth/login", key="ip", rate=5, burst=20, methods=["POST"]),
+        RateLimitRule(prefix="/api/v1/auth/register", key="ip", rate=2, burst=10, methods=["POST"]),
+    ]
+
+    # Сжатие ответов upstream (br при наличии пакета brotli, иначе gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # Ответы с Content-Length меньше порога не сжимаются
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "text/plain",
+        "text/html",
+        "text/css",
+        "text/csv",
+        "text/xml",
+    ]
+
+    # Трассировка: экспортер спанов (none, memory, file, log) и доля записываемых трасс
+    TRACE_EXPORTER: str = "none"
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_FILE: str = "traces/gateway.jsonl"
+
+    # Кеш ответов на GET запросы: срок жизни берется из Cache-Control upstream,
+    # CACHE_DEFAULT_TTL применяется к ответам без max-age (0 - не кешировать)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_MAX_ENTRY_SIZE: int = 1024 * 1024
+    CACHE_DEFAULT_TTL: float = 0
+    CACHE_KEY_HEADERS: List[str] = ["accept", "accept-encoding", "authorization"]
+
+    # Ограничение размера тела запроса (байты), проверяется потоково
+    MAX_REQUEST_BODY_SIZE: int = 100 * 1024 * 1024
 
     class Config:
         env_file = ".env"
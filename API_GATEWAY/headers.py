@@ -0,0 +1,47 @@
+from typing import Container, Iterable, List, Sequence, Tuple
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+# Hop-by-hop заголовки (RFC 9110, 7.6.1): относятся к одному соединению
+# и не передаются прокси дальше
+HOP_BY_HOP = frozenset({
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "proxy-connection",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+})
+_HOP_BY_HOP_RAW = frozenset(name.encode("latin-1") for name in HOP_BY_HOP)
+
+
+def connection_tokens(raw_headers: Iterable[Tuple[bytes, bytes]]) -> frozenset:
+    """Имена заголовков, перечисленных в Connection (тоже hop-by-hop)"""
+    tokens = set()
+    for name, value in raw_headers:
+        if name.lower() == b"connection":
+            tokens.update(token.strip().lower() for token in value.split(b",") if token.strip())
+    return frozenset(tokens)
+
+
+def filter_raw_headers(
+    raw_headers: Sequence[Tuple[bytes, bytes]],
+    drop: Container[bytes] = frozenset(),
+) -> RawHeaders:
+    """
+    Копирует список заголовков без hop-by-hop и без имен из drop.
+    Работает с сырыми парами (bytes, bytes) без сборки словарей, повторяющиеся
+    заголовки (Set-Cookie) сохраняются. Имена приводятся к нижнему регистру (ASGI);
+    имена в drop должны быть в нижнем регистре.
+    """
+    listed = connection_tokens(raw_headers)
+    return [
+        (lower, value)
+        for name, value in raw_headers
+        if (lower := name.lower()) not in _HOP_BY_HOP_RAW
+        and lower not in listed
+        and lower not in drop
+    ]
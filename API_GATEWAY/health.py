@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional
+
+from pools import PoolManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InstanceHealth:
+    """Результат последней проверки экземпляра upstream"""
+    url: str
+    healthy: bool = True
+    status: str = "unknown"
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+    checked_at: Optional[float] = None
+    consecutive_failures: int = 0
+
+
+class HealthChecker:
+    """
+    Активная проверка экземпляров upstream в фоне.
+
+    Все экземпляры опрашиваются параллельно раз в interval секунд.
+    Экземпляр исключается из балансировки после unhealthy_threshold
+    неудачных проверок подряд и возвращается после первой успешной.
+    После каждого опроса собирается снимок состояния, который
+    /health отдает без обращений к сервисам.
+    """
+
+    def __init__(
+        self,
+        pools: PoolManager,
+        interval: float,
+        timeout: float,
+        unhealthy_threshold: int = 2,
+        path: str = "/health",
+    ):
+        self.pools = pools
+        self.interval = interval
+        self.timeout = timeout
+        self.unhealthy_threshold = unhealthy_threshold
+        self.path = path
+        self.state: Dict[str, InstanceHealth] = {}
+        self.last_run_at: Optional[float] = None
+        self._snapshot: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def set_instances(self, urls: Iterable[str]) -> None:
+        """Обновляет список проверяемых экземпляров, сохраняя известное состояние"""
+        self.state = {url: self.state.get(url) or InstanceHealth(url) for url in urls}
+        self._build_snapshot()
+
+    def _build_snapshot(self) -> None:
+        self._snapshot = {url: asdict(health) for url, health in self.state.items()}
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Состояние экземпляров на момент последнего опроса"""
+        return self._snapshot
+
+    def is_healthy(self, url: str) -> bool:
+        health = self.state.get(url)
+        return health is None or health.healthy
+
+    async def check(self, health: InstanceHealth) -> None:
+        start = time.perf_counter()
+        try:
+            response = await self.pools.get(health.url).client.get(
+                f"{health.url}{self.path}", timeout=self.timeout
+            )
+            ok = response.status_code == 200
+            health.status = "healthy" if ok else "unhealthy"
+            health.status_code = response.status_code
+            health.error = None
+        except Exception as e:
+            ok = False
+            health.status = "unreachable"
+            health.status_code = None
+            health.error = str(e) or type(e).__name__
+        health.latency_ms = round((time.perf_counter() - start) * 1000, 3)
+        health.checked_at = time.time()
+
+        if ok:
+            if not health.healthy:
+                logger.info("Upstream %s снова доступен", health.url)
+            health.consecutive_failures = 0
+            health.healthy = True
+        else:
+            health.consecutive_failures += 1
+            if health.healthy and health.consecutive_failures >= self.unhealthy_threshold:
+                logger.warning("Upstream %s исключен из балансировки: %s", health.url, health.status)
+                health.healthy = False
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(health) for health in list(self.state.values())))
+        self.last_run_at = time.time()
+        self._build_snapshot()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                logger.error("Health check failed: %r", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,11 +1,29 @@
-import uvicorn
 import httpx
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import StreamingResponse, Response
+from fastapi import Depends, FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse, Response
 from starlette.background import BackgroundTask
-from config import configs
-from middleware import LoggingMiddleware
+from config import configs, Settings, PoolSettings
+from middleware import LoggingMiddleware, setup_access_log
+from router import Route, RouteTable, normalize_prefix
+from pools import PoolManager, UpstreamPool
+from cache import ResponseCache
+from resilience import CircuitBreakers, CircuitOpenError, RetryBudget, backoff_delay
+from balancer import LoadBalancer
+from health import HealthChecker
+from auth import IDENTITY_HEADERS, InvalidToken, TokenVerifier
+from ratelimit import RateLimited, RateLimiter, create_backend
+from headers import RawHeaders, filter_raw_headers
+from compression import ResponseCompressor
+from infra.monitoring.monitoring import CONTENT_TYPE, REGISTRY, MetricsMiddleware, render_metrics
+from infra.monitoring.tracing import HttpxTrace, Tracer, TracingMiddleware, create_exporter
+from infra.server import serve
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import logging
+import math
+import time
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,84 +31,648 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Запуск: асинхронная запись access-лога и фоновая проверка upstream.
+    Остановка выполняется после того, как сервер дождался запросов в работе:
+    закрываются пулы httpx клиентов и остальные ресурсы.
+    """
+    access_log_listener = setup_access_log()
+    health_checker.start()
+    try:
+        yield
+    finally:
+        await health_checker.stop()
+        await pools.aclose()
+        if rate_limiter is not None:
+            await rate_limiter.backend.aclose()
+        access_log_listener.stop()
+        tracer.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=configs.PROJECT_NAME,
     docs_url="/docs",
     openapi_url="/openapi.json",
     description="API Gateway для микросервисной архитектуры"
 )
 
-app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware, service="gateway")
+app.add_middleware(LoggingMiddleware, sample_rate=configs.ACCESS_LOG_SAMPLE_RATE)
 
+tracer = Tracer(
+    "gateway",
+    exporter=create_exporter(configs.TRACE_EXPORTER, configs.TRACE_FILE),
+    sample_rate=configs.TRACE_SAMPLE_RATE,
+)
+app.add_middleware(TracingMiddleware, tracer=tracer)
 
-client = httpx.AsyncClient(
-    timeout=configs.REQUEST_TIMEOUT,
-    limits=httpx.Limits(
+
+# Отдельный пул соединений на каждый upstream
+pools = PoolManager(
+    defaults=PoolSettings(
+        max_connections=configs.MAX_CONNECTIONS,
         max_keepalive_connections=configs.MAX_KEEPALIVE_CONNECTIONS,
-        max_connections=configs.MAX_CONNECTIONS
+        keepalive_expiry=configs.KEEPALIVE_EXPIRY,
+        http2=configs.HTTP2_ENABLED,
+    ),
+    overrides=configs.SERVICE_POOLS,
+    timeout=configs.REQUEST_TIMEOUT,
+)
+
+
+# Кеш ответов на GET запросы (None - кеш выключен)
+response_cache = (
+    ResponseCache(
+        max_entries=configs.CACHE_MAX_ENTRIES,
+        max_bytes=configs.CACHE_MAX_BYTES,
+        max_entry_size=configs.CACHE_MAX_ENTRY_SIZE,
+        default_ttl=configs.CACHE_DEFAULT_TTL,
+        key_headers=configs.CACHE_KEY_HEADERS,
+    )
+    if configs.CACHE_ENABLED else None
+)
+
+
+def build_route_timeouts() -> Dict[str, httpx.Timeout]:
+    """Таймауты httpx по префиксу маршрута из ROUTE_TIMEOUTS"""
+    return {
+        normalize_prefix(prefix): httpx.Timeout(
+            configs.REQUEST_TIMEOUT,
+            connect=timeout.connect if timeout.connect is not None else configs.CONNECT_TIMEOUT,
+            read=timeout.read if timeout.read is not None else configs.REQUEST_TIMEOUT,
+        )
+        for prefix, timeout in configs.ROUTE_TIMEOUTS.items()
+    }
+
+
+default_timeout = httpx.Timeout(configs.REQUEST_TIMEOUT, connect=configs.CONNECT_TIMEOUT)
+
+# Повторы выполняются только для идемпотентных методов без тела
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+breakers = CircuitBreakers(
+    failure_threshold=configs.BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=configs.BREAKER_RECOVERY_TIMEOUT,
+    half_open_max_calls=configs.BREAKER_HALF_OPEN_CALLS,
+)
+retry_budget = RetryBudget(
+    ratio=configs.RETRY_BUDGET_RATIO,
+    min_reserve=configs.RETRY_BUDGET_MIN,
+)
+
+# Проверка JWT на шлюзе (None - токены проверяют сами сервисы)
+token_verifier = (
+    TokenVerifier(
+        secret_key=configs.JWT_SECRET_KEY,
+        algorithm=configs.JWT_ALGORITHM,
+        gateway_token=configs.GATEWAY_SHARED_SECRET,
+    )
+    if configs.JWT_VERIFY_ENABLED else None
+)
+# Служебные эндпоинты требуют JWT с ролью ADMIN_ROLE и при выключенной проверке на шлюзе;
+# тем же проверяется пользователь для лимитов частоты по subject
+admin_verifier = token_verifier or TokenVerifier(
+    secret_key=configs.JWT_SECRET_KEY,
+    algorithm=configs.JWT_ALGORITHM,
+    gateway_token=None,
+)
+
+# Сжатие ответов для клиентов с Accept-Encoding (None - выключено)
+response_compressor = (
+    ResponseCompressor(
+        min_size=configs.COMPRESSION_MIN_SIZE,
+        content_types=configs.COMPRESSION_CONTENT_TYPES,
+        gzip_level=configs.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=configs.COMPRESSION_BROTLI_QUALITY,
     )
+    if configs.COMPRESSION_ENABLED else None
+)
+
+# Ограничение частоты запросов (None - выключено)
+rate_limiter = (
+    RateLimiter(
+        configs.RATE_LIMITS,
+        create_backend(
+            configs.RATE_LIMIT_BACKEND,
+            configs.RATE_LIMIT_REDIS_URL,
+            configs.RATE_LIMIT_MAX_KEYS,
+        ),
+        trusted_proxies=configs.RATE_LIMIT_TRUSTED_PROXIES,
+        verifier=admin_verifier,
+    )
+    if configs.RATE_LIMIT_ENABLED else None
+)
+
+# Фоновая проверка экземпляров upstream
+health_checker = HealthChecker(
+    pools,
+    interval=configs.HEALTH_CHECK_INTERVAL,
+    timeout=configs.HEALTH_CHECK_TIMEOUT,
+    unhealthy_threshold=configs.HEALTH_UNHEALTHY_THRESHOLD,
 )
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Закрываем httpx клиент при остановке приложения"""
-    await client.aclose()
+def is_instance_available(url: str) -> bool:
+    return health_checker.is_healthy(url) and not breakers.get(url).is_open()
 
 
-def get_target_service(path: str) -> str:
+def instance_outstanding(url: str) -> int:
+    return pools.get(url).in_flight
+
+
+def build_balancers(route_table: RouteTable) -> Dict[str, LoadBalancer]:
+    """Балансировщики по префиксу маршрута; также обновляет список проверяемых экземпляров"""
+    strategies = {
+        normalize_prefix(prefix): strategy
+        for prefix, strategy in configs.ROUTE_LOAD_BALANCING.items()
+    }
+    health_checker.set_instances(
+        {url for route in route_table.routes for url in route.targets}
+    )
+    return {
+        route.prefix: LoadBalancer(
+            route.targets,
+            strategies.get(route.prefix, configs.LOAD_BALANCING_STRATEGY),
+            outstanding=instance_outstanding,
+            is_available=is_instance_available,
+        )
+        for route in route_table.routes
+    }
+
+
+@dataclass(frozen=True)
+class Routing:
+    """
+    Снимок маршрутизации: таблица маршрутов, балансировщики и таймауты по префиксу.
+    Перезагрузка собирает новый снимок и подменяет его одним присваиванием;
+    запрос берет снимок один раз, поэтому маршрут и балансировщик всегда
+    из одной версии конфигурации.
     """
-    Определяет целевой сервис на основе пути запроса
+    table: RouteTable
+    balancers: Dict[str, LoadBalancer]
+    timeouts: Dict[str, httpx.Timeout]
+
+
+def build_routing() -> Routing:
+    """Собирает снимок маршрутизации из текущих configs"""
+    table = RouteTable(configs.SERVICE_ROUTES, configs.SERVICE_ROUTE_METHODS)
+    return Routing(table, build_balancers(table), build_route_timeouts())
+
+
+routing = build_routing()
+
+
+# Метрики upstream-запросов и состояния компонентов шлюза
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "gateway_upstream_duration_seconds",
+    "Время до получения заголовков ответа upstream",
+    ("route", "upstream"),
+)
+RATE_LIMITED = REGISTRY.counter(
+    "gateway_rate_limited_total", "Запросы, отклоненные лимитом частоты", ("rule", "key"),
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "gateway_upstream_errors_total",
+    "Ошибки обращения к upstream: transport, status_5xx, overloaded, circuit_open",
+    ("route", "upstream", "kind"),
+)
+REGISTRY.gauge(
+    "gateway_upstream_pool_in_flight", "Запросы в работе по пулу upstream", ("upstream",),
+    function=lambda: [((url,), stats["in_flight"]) for url, stats in pools.stats().items()],
+)
+REGISTRY.gauge(
+    "gateway_upstream_pool_connections", "Открытые соединения пула upstream", ("upstream",),
+    function=lambda: [
+        ((url,), stats["connections"])
+        for url, stats in pools.stats().items() if "connections" in stats
+    ],
+)
+REGISTRY.gauge(
+    "gateway_circuit_open", "Предохранитель upstream разомкнут (1) или нет (0)", ("upstream",),
+    function=lambda: [
+        ((url,), float(stats["state"] == "open")) for url, stats in breakers.stats().items()
+    ],
+)
+REGISTRY.gauge(
+    "gateway_upstream_healthy", "Экземпляр upstream проходит health check", ("upstream",),
+    function=lambda: [
+        ((url,), float(health["healthy"])) for url, health in health_checker.snapshot().items()
+    ],
+)
+REGISTRY.gauge(
+    "gateway_cache_events", "Счетчики кеша ответов", ("event",),
+    function=lambda: (
+        [((name,), value) for name, value in response_cache.stats().items()]
+        if response_cache is not None else []
+    ),
+)
+
+
+def resolve_route(path: str, method: str = None, table: Optional[RouteTable] = None) -> Route:
+    """
+    Определяет маршрут на основе пути запроса
 
     Args:
         path: Путь запроса
+        method: HTTP метод (для фильтрации маршрутов по методам)
+        table: Таблица маршрутов (по умолчанию - текущая)
 
     Returns:
-        URL целевого сервиса
+        Маршрут с самым длинным совпавшим префиксом
 
     """
-    for route_prefix, service_url in configs.SERVICE_ROUTES.items():
-        if path.startswith(route_prefix):
-            return service_url
+    route, path_matched = (table or routing.table).match(path, method)
+    if route is not None:
+        return route
 
+    if path_matched:
+        raise HTTPException(
+            status_code=405,
+            detail=f"Метод {method} не разрешен для пути '{path}'"
+        )
     raise HTTPException(
         status_code=404,
         detail=f"Сервис для пути '{path}' не найден"
     )
 
 
-async def proxy_request(request: Request, path: str):
-    try:
-        target_service = get_target_service(path)
+def get_target_service(path: str, method: str = None) -> str:
+    """URL экземпляра целевого сервиса для пути запроса (с учетом балансировки)"""
+    current = routing
+    return current.balancers[resolve_route(path, method, current.table).prefix].pick()
+
+
+def reload_routes() -> None:
+    """Перечитывает маршруты из окружения/.env и подменяет снимок маршрутизации без рестарта"""
+    fresh = Settings()
+    configs.SERVICE_ROUTES = fresh.SERVICE_ROUTES
+    configs.SERVICE_ROUTE_METHODS = fresh.SERVICE_ROUTE_METHODS
+    configs.ROUTE_TIMEOUTS = fresh.ROUTE_TIMEOUTS
+    configs.ROUTE_LOAD_BALANCING = fresh.ROUTE_LOAD_BALANCING
+    configs.RATE_LIMITS = fresh.RATE_LIMITS
+
+    global routing
+    routing = build_routing()
+    if rate_limiter is not None:
+        rate_limiter.load(configs.RATE_LIMITS)
+
+
+class RequestBodyTooLarge(Exception):
+    """Тело запроса превысило MAX_REQUEST_BODY_SIZE"""
+
+
+def _body_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Тело запроса превышает {configs.MAX_REQUEST_BODY_SIZE} байт"
+    )
+
+
+async def stream_request_body(request: Request, max_size: int):
+    """
+    Потоково отдает тело входящего запроса без буферизации в памяти.
+    Прерывает передачу, если суммарный размер превысил max_size
+    (актуально для chunked-запросов без Content-Length).
+    """
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_size:
+            raise RequestBodyTooLarge()
+        if chunk:
+            yield chunk
+
+
+def get_request_content(request: Request):
+    """
+    Возвращает источник тела для upstream-запроса.
+    Запросы без тела (нет Content-Length и Transfer-Encoding) проксируются без него,
+    иначе тело передается потоком из request.stream().
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            length = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный Content-Length")
+        if length > configs.MAX_REQUEST_BODY_SIZE:
+            raise _body_too_large()
+        if length == 0:
+            return None
+    elif "transfer-encoding" not in request.headers:
+        return None
+
+    return stream_request_body(request, configs.MAX_REQUEST_BODY_SIZE)
+
+
+# Заголовки, которые шлюз выставляет сам и не принимает от клиента
+_GATEWAY_HEADERS = frozenset(
+    name.encode("latin-1") for name in (*IDENTITY_HEADERS, "host", "x-forwarded-for")
+)
+
+
+def _encode_headers(headers: Dict[str, str]) -> RawHeaders:
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+
+def build_upstream_headers(
+    request: Request,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> RawHeaders:
+    """
+    Заголовки запроса к upstream из сырых заголовков ASGI, без промежуточного словаря.
+    Hop-by-hop заголовки отбрасываются: в том числе transfer-encoding -
+    httpx сам выставит chunked-кодирование для потокового тела.
+    """
+    drop = set(_GATEWAY_HEADERS)
+    if extra_headers:
+        drop.update(name.lower().encode("latin-1") for name in extra_headers)
+    if tracer.enabled:
+        # traceparent выставляется для каждой попытки заново
+        drop.add(b"traceparent")
+
+    headers = filter_raw_headers(request.scope["headers"], drop)
+    client_host = request.client.host if request.client else "unknown"
+    headers.append((b"x-forwarded-for", client_host.encode("latin-1")))
+    # Заголовки идентичности выставляет только шлюз
+    headers.extend(_encode_headers(getattr(request.state, "identity_headers", {})))
+    if extra_headers:
+        headers.extend(_encode_headers(extra_headers))
+    return headers
+
+
+def is_load_shed(rp_resp: httpx.Response) -> bool:
+    """503 с Retry-After - upstream отклонил запрос по admission control (например, HashingOverloaded)"""
+    return rp_resp.status_code == 503 and "retry-after" in rp_resp.headers
+
+
+async def send_upstream(
+    request: Request,
+    path: str,
+    route: Route,
+    current: Routing,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> Tuple[UpstreamPool, httpx.Response]:
+    """
+    Отправляет запрос в экземпляр upstream и возвращает пул и потоковый ответ.
+
+    Экземпляр выбирается балансировщиком маршрута, при повторе - по возможности
+    другой. Запросы к upstream с разомкнутым предохранителем отклоняются сразу.
+    Идемпотентные запросы без тела повторяются при ошибках соединения,
+    таймаутах и ответах 502/503/504 в пределах бюджета повторов. 503 с
+    Retry-After (сброс нагрузки сервисом) не размыкает предохранитель.
+    """
+    content = get_request_content(request)
+    query = request.url.query.encode("utf-8") if request.url.query else None
+
+    headers = build_upstream_headers(request, extra_headers)
+
+    balancer = current.balancers[route.prefix]
+    timeout = current.timeouts.get(route.prefix, default_timeout)
+    retryable = request.method in IDEMPOTENT_METHODS and content is None
+    retry_budget.record_request()
+    tried = []
+    while True:
+        target_service = balancer.pick(exclude=tried)
+        tried.append(target_service)
+        breaker = breakers.get(target_service)
+        if not breaker.allow():
+            UPSTREAM_ERRORS.labels(route.prefix, target_service, "circuit_open").inc()
+            raise CircuitOpenError(target_service, breaker.retry_after())
 
         # Надежное создание URL
-        base_url = httpx.URL(target_service)
-        target_url = base_url.copy_with(
-            path=path,
-            query=request.url.query.encode("utf-8") if request.url.query else None
+        target_url = httpx.URL(target_service).copy_with(path=path, query=query)
+        logger.debug("Proxying %s to %s", request.method, target_url)
+
+        pool = pools.get(target_service)
+        trace = None
+        can_retry = retryable and len(tried) <= configs.RETRY_MAX_ATTEMPTS
+        try:
+            attempt_headers = headers
+            if tracer.enabled:
+                span = tracer.start_span("upstream.request")
+                span.set_attribute("upstream", target_service)
+                span.set_attribute("attempt", len(tried))
+                carrier: Dict[str, str] = {}
+                tracer.inject(carrier, span)
+                attempt_headers = headers + [
+                    (name.encode("latin-1"), value.encode("latin-1")) for name, value in carrier.items()
+                ]
+                if span.sampled:
+                    trace = HttpxTrace(tracer, span)
+            rp_req = pool.client.build_request(
+                method=request.method,
+                url=target_url,
+                headers=attempt_headers,
+                content=content,  # Тело передается потоком, без request.body()
+                timeout=timeout,
+            )
+            if trace is not None:
+                rp_req.extensions["trace"] = trace
+
+            started = time.perf_counter()
+            rp_resp = await pool.send(rp_req)
+        except httpx.TransportError as e:
+            if trace is not None:
+                trace.finish(e)
+            UPSTREAM_ERRORS.labels(route.prefix, target_service, "transport").inc()
+            breaker.record_failure()
+            if not (can_retry and retry_budget.try_withdraw()):
+                raise
+        except BaseException as e:
+            # Отмена клиентом, слишком большое тело, ошибка шлюза: о здоровье
+            # upstream ничего не известно, но пробный слот предохранителя
+            # нужно вернуть
+            breaker.release()
+            if trace is not None:
+                trace.finish(e)
+            raise
+        else:
+            UPSTREAM_LATENCY.labels(route.prefix, target_service).observe(
+                time.perf_counter() - started
+            )
+            if trace is not None:
+                trace.response_started(rp_resp.status_code)
+            if rp_resp.status_code not in RETRYABLE_STATUS_CODES:
+                breaker.record_success()
+                return pool, rp_resp
+            if is_load_shed(rp_resp):
+                # Сервис жив и сам сбрасывает нагрузку: это не отказ экземпляра
+                UPSTREAM_ERRORS.labels(route.prefix, target_service, "overloaded").inc()
+                breaker.release()
+            else:
+                UPSTREAM_ERRORS.labels(route.prefix, target_service, "status_5xx").inc()
+                breaker.record_failure()
+            if not (can_retry and retry_budget.try_withdraw()):
+                return pool, rp_resp
+            await release_upstream(pool, rp_resp)
+
+        await asyncio.sleep(
+            backoff_delay(len(tried), configs.RETRY_BACKOFF_BASE, configs.RETRY_BACKOFF_MAX)
         )
 
-        logger.info(f"Proxying {request.method} to {target_url}")
 
-        headers = dict(request.headers)
-        headers.pop("host", None)
-        headers["X-Forwarded-For"] = request.client.host if request.client else "unknown"
+async def release_upstream(pool: UpstreamPool, rp_resp: httpx.Response) -> None:
+    """Возвращает соединение в пул и завершает спан запроса к upstream"""
+    try:
+        await pool.release(rp_resp)
+    finally:
+        trace = rp_resp.request.extensions.get("trace")
+        if isinstance(trace, HttpxTrace):
+            trace.finish()
 
-        rp_req = client.build_request(
-            method=request.method,
-            url=target_url,
-            headers=headers,
-            content=await request.body(),  # Важно: await получения тела
+
+def stream_upstream_response(
+    request: Request,
+    pool: UpstreamPool,
+    rp_resp: httpx.Response,
+    body: Optional[AsyncIterator[bytes]] = None,
+) -> StreamingResponse:
+    """
+    Потоковый ответ клиенту. Заголовки upstream передаются сырыми парами
+    (без hop-by-hop), тело при необходимости сжимается на лету.
+    body - тело, если его начало уже прочитано (по умолчанию - rp_resp.aiter_raw()).
+    """
+    raw_headers = filter_raw_headers(rp_resp.headers.raw)
+    if body is None:
+        body = rp_resp.aiter_raw()
+    if response_compressor is not None:
+        encoding = response_compressor.select(
+            request.method,
+            request.headers.get("accept-encoding"),
+            rp_resp.status_code,
+            raw_headers,
         )
+        if encoding is not None:
+            raw_headers = response_compressor.rewrite_headers(raw_headers, encoding)
+            body = response_compressor.compress(body, encoding)
+
+    response = StreamingResponse(
+        body,
+        status_code=rp_resp.status_code,
+        background=BackgroundTask(release_upstream, pool, rp_resp),
+    )
+    response.raw_headers = raw_headers
+    return response
+
+
+async def _prepend(head: List[bytes], tail: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in head:
+        yield chunk
+    async for chunk in tail:
+        yield chunk
+
+
+async def cached_proxy(request: Request, path: str, route: Route, current: Routing) -> Response:
+    """
+    Проксирование GET запроса через кеш ответов.
+    Свежая запись отдается сразу, одновременные промахи по одному ключу
+    ждут результата единственного запроса к upstream.
+    """
+    key = response_cache.make_key(request, path)
+    entry = response_cache.get(key)
+    if entry is not None and entry.is_fresh(time.monotonic()):
+        response_cache.hits += 1
+        return entry.to_response(request)
 
-        rp_resp = await client.send(rp_req, stream=True)
+    waiter = response_cache.waiter(key)
+    if waiter is not None:
+        entry = await waiter
+        if entry is not None:
+            return entry.to_response(request)
+        # Ответ ведущего запроса не кешируется - идем в upstream сами
+        pool, rp_resp = await send_upstream(request, path, route, current)
+        return stream_upstream_response(request, pool, rp_resp)
 
-        return StreamingResponse(
-            rp_resp.aiter_raw(),
-            status_code=rp_resp.status_code,
-            headers=dict(rp_resp.headers),
-            background=BackgroundTask(rp_resp.aclose),
+    response_cache.misses += 1
+    result = None
+    try:
+        extra_headers = {"if-none-match": entry.etag} if entry is not None and entry.etag else None
+        pool, rp_resp = await send_upstream(request, path, route, current, extra_headers)
+
+        if rp_resp.status_code == 304 and extra_headers:
+            await release_upstream(pool, rp_resp)
+            result = response_cache.refresh(key, entry, rp_resp)
+            return result.to_response(request)
+
+        ttl = response_cache.ttl_for(rp_resp.status_code, rp_resp.headers)
+        if ttl is None or not response_cache.cacheable_size(rp_resp):
+            return stream_upstream_response(request, pool, rp_resp)
+
+        chunks = rp_resp.aiter_raw()
+        body: List[bytes] = []
+        size = 0
+        try:
+            async for chunk in chunks:
+                body.append(chunk)
+                size += len(chunk)
+                if size > response_cache.max_entry_size:
+                    break
+        except BaseException:
+            await release_upstream(pool, rp_resp)
+            raise
+        if size > response_cache.max_entry_size:
+            # Без Content-Length размер выяснился при чтении: остаток отдается потоком
+            return stream_upstream_response(request, pool, rp_resp, _prepend(body, chunks))
+        await release_upstream(pool, rp_resp)
+        result = response_cache.store(key, rp_resp, b"".join(body), ttl)
+        return result.to_response(request)
+    finally:
+        response_cache.complete(key, result)
+
+
+async def proxy_request(request: Request, path: str):
+    current = routing
+    try:
+        with tracer.span("gateway.routing"):
+            route = resolve_route(path, request.method, current.table)
+            if token_verifier is not None:
+                request.state.identity_headers = token_verifier.identity_headers(
+                    request.headers.get("authorization")
+                )
+
+        # До чтения тела и выбора соединения к upstream
+        if rate_limiter is not None:
+            await rate_limiter.check(request, path, route)
+
+        if response_cache is not None and request.method == "GET":
+            return await cached_proxy(request, path, route, current)
+
+        pool, rp_resp = await send_upstream(request, path, route, current)
+        return stream_upstream_response(request, pool, rp_resp)
+    except HTTPException:
+        raise
+    except RequestBodyTooLarge:
+        raise _body_too_large()
+    except RateLimited as e:
+        RATE_LIMITED.labels(e.rule.prefix, e.rule.key).inc()
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(math.ceil(e.retry_after), 1))},
+        )
+    except InvalidToken:
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
         )
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(int(e.retry_after), 1))},
+        )
+    except httpx.TimeoutException as e:
+        logger.warning("Upstream timeout: %r", e)
+        raise HTTPException(status_code=504, detail="Превышено время ожидания ответа сервиса")
+    except httpx.TransportError as e:
+        logger.warning("Upstream unavailable: %r", e)
+        raise HTTPException(status_code=502, detail="Сервис недоступен")
     except Exception as e:
         # ... обработка ошибок
         logger.error(f"Error: {e}")
@@ -110,31 +692,117 @@ async def api_gateway(request: Request, path: str):
     return await proxy_request(request, full_path)
 
 
+def service_status(total: int, checked: int, healthy: int) -> str:
+    """
+    Статус маршрута по экземплярам. Непроверенный экземпляр не считается
+    здоровым: до первого опроса маршрут в статусе unknown, а не healthy
+    """
+    if healthy and healthy == total:
+        return "healthy"
+    if healthy:
+        return "degraded"
+    if checked < total or not total:
+        return "unknown"
+    return "unavailable"
+
+
 @app.get("/health")
 async def health_check():
-    """Проверка здоровья API Gateway"""
+    """
+    Проверка здоровья API Gateway.
+    Отдает снимок фоновой проверки экземпляров, не опрашивая сервисы на каждый вызов.
+    """
+    snapshot = health_checker.snapshot()
     services_status = {}
-    for route, service_url in configs.SERVICE_ROUTES.items():
-        try:
-            response = await client.get(f"{service_url}/health", timeout=5.0)
-            services_status[route] = {
-                "url": service_url,
-                "status": "healthy" if response.status_code == 200 else "unhealthy",
-                "status_code": response.status_code
-            }
-        except Exception as e:
-            services_status[route] = {
-                "url": service_url,
-                "status": "unreachable",
-                "error": str(e)
-            }
+    for route in routing.table.routes:
+        instances = [snapshot.get(url) or {"url": url, "checked_at": None} for url in route.targets]
+        checked = [instance for instance in instances if instance["checked_at"] is not None]
+        healthy = sum(1 for instance in checked if instance["healthy"])
+        services_status[route.prefix] = {
+            "status": service_status(len(instances), len(checked), healthy),
+            "healthy_instances": healthy,
+            "instances": instances,
+        }
 
     return {
         "gateway": "ok",
+        "checked_at": health_checker.last_run_at,
         "services": services_status
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики шлюза в формате Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/pools")
+async def pool_stats():
+    """Состояние пулов соединений к upstream-сервисам"""
+    return pools.stats()
+
+
+@app.get("/circuit-breakers")
+async def circuit_breaker_stats():
+    """Состояние предохранителей upstream-сервисов и бюджета повторов"""
+    return {"breakers": breakers.stats(), "retry_budget": retry_budget.stats()}
+
+
+@app.get("/rate-limits")
+async def rate_limit_stats():
+    """Правила ограничения частоты и число отклоненных запросов"""
+    if rate_limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **rate_limiter.stats()}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Счетчики кеша ответов"""
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+
+@app.get("/routes")
+async def list_routes():
+    """Текущая таблица маршрутизации"""
+    current = routing
+    return [
+        {
+            "prefix": route.prefix,
+            "targets": list(route.targets),
+            "strategy": current.balancers[route.prefix].strategy,
+            "methods": sorted(route.methods) if route.methods else None,
+        }
+        for route in current.table.routes
+    ]
+
+
+def require_admin(request: Request) -> None:
+    """Служебные операции: только JWT с ролью ADMIN_ROLE"""
+    try:
+        claims = admin_verifier.claims(request.headers.get("authorization"))
+    except InvalidToken:
+        claims = None
+    if claims is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if claims.get("role") != configs.ADMIN_ROLE:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+
+
+@app.post("/routes/reload", dependencies=[Depends(require_admin)])
+async def reload_routes_endpoint():
+    """Горячая перезагрузка таблицы маршрутизации"""
+    reload_routes()
+    return await list_routes()
+
+
 @app.get("/")
 async def root():
     """Корневой путь API Gateway"""
@@ -145,10 +813,13 @@ async def root():
     }
 
 if __name__ == "__main__":
-    uvicorn.run(
+    serve(
         "main:app",
         host=configs.HOST,
         port=configs.PORT,
-        reload=True,
-        log_level="info"
+        workers=configs.WORKERS,
+        loop=configs.LOOP,
+        http=configs.HTTP,
+        reload=configs.RELOAD,
+        graceful_timeout=configs.GRACEFUL_SHUTDOWN_TIMEOUT,
     )
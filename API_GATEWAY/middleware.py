@@ -1,26 +1,75 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from logging.handlers import QueueHandler, QueueListener
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
+import queue
+import random
 import time
 
-logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("gateway.access")
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware для логирования всех запросов"""
+def setup_access_log() -> QueueListener:
+    """
+    Переводит access-лог на QueueHandler: запись в лог из обработчика запроса
+    сводится к помещению записи в очередь, а форматирование и вывод
+    выполняются в отдельном потоке QueueListener.
+    Возвращает запущенный listener, его нужно остановить при завершении.
+    """
+    log_queue = queue.SimpleQueue()
+    handlers = logging.getLogger().handlers or [logging.StreamHandler()]
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
 
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        logger.info(
-            f"Входящий запрос: {request.method} {request.url.path} "
-            f"От {request.client.host if request.client else 'unknown'}"
-        )
+    access_logger.handlers = [QueueHandler(log_queue)]
+    access_logger.propagate = False
+    listener.start()
+    return listener
 
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(
-            f"Запрос выполнен: {request.method} {request.url.path} "
-            f"Статус: {response.status_code} Time: {process_time:.2f}s"
-        )
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
+
+class LoggingMiddleware:
+    """
+    ASGI middleware для логирования всех запросов.
+
+    Пишет одну строку на запрос после завершения ответа (включая стриминг тела)
+    и добавляет заголовок X-Process-Time со временем до начала ответа.
+    sample_rate < 1 логирует только долю успешных запросов, ошибки 5xx пишутся всегда.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = (time.perf_counter_ns() - start) / 1e9
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{process_time:.6f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if (
+                status_code >= 500
+                or self.sample_rate >= 1
+                or random.random() < self.sample_rate
+            ):
+                client = scope.get("client")
+                access_logger.info(
+                    "method=%s path=%s status=%d duration_ms=%.3f client=%s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    (time.perf_counter_ns() - start) / 1e6,
+                    client[0] if client else "unknown",
+                )
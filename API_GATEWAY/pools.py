@@ -0,0 +1,141 @@
+import importlib.util
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from config import PoolSettings
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class UpstreamPool:
+    """Отдельный httpx клиент со своим пулом соединений для одного upstream"""
+
+    def __init__(
+        self,
+        base_url: str,
+        settings: PoolSettings,
+        timeout: float,
+    ):
+        self.base_url = base_url
+        self.settings = settings
+        self.http2 = bool(settings.http2) and HTTP2_AVAILABLE
+        if settings.http2 and not HTTP2_AVAILABLE:
+            logger.warning(
+                "HTTP/2 для %s не включен: пакет h2 не установлен (pip install httpx[http2])",
+                base_url,
+            )
+
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=settings.keepalive_expiry,
+            ),
+        )
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_total = 0
+        self.errors_total = 0
+
+    async def send(self, request: httpx.Request) -> httpx.Response:
+        """Отправляет запрос в потоковом режиме; ответ нужно освободить через release()"""
+        self.in_flight += 1
+        self.requests_total += 1
+        if self.in_flight > self.peak_in_flight:
+            self.peak_in_flight = self.in_flight
+        try:
+            return await self.client.send(request, stream=True)
+        except Exception:
+            self.in_flight -= 1
+            self.errors_total += 1
+            raise
+        except BaseException:
+            # Отмена (CancelledError) - не ошибка upstream, но запрос больше не в работе
+            self.in_flight -= 1
+            raise
+
+    async def release(self, response: httpx.Response) -> None:
+        """Закрывает потоковый ответ и возвращает соединение в пул"""
+        try:
+            await response.aclose()
+        finally:
+            self.in_flight -= 1
+
+    def _connection_stats(self) -> Dict[str, int]:
+        # httpx не предоставляет публичного API для состояния пула,
+        # поэтому читаем httpcore-пул транспорта, если он доступен
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return {}
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+        }
+
+    def stats(self) -> dict:
+        max_connections = self.settings.max_connections
+        return {
+            "url": self.base_url,
+            "http2": self.http2,
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.settings.max_keepalive_connections,
+            "keepalive_expiry": self.settings.keepalive_expiry,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "saturation": (
+                round(self.in_flight / max_connections, 3) if max_connections else None
+            ),
+            **self._connection_stats(),
+        }
+
+
+class PoolManager:
+    """
+    Держит по одному пулу соединений на каждый upstream,
+    чтобы загруженный сервис не выбирал соединения у остальных.
+    """
+
+    def __init__(
+        self,
+        defaults: PoolSettings,
+        overrides: Optional[Dict[str, PoolSettings]] = None,
+        timeout: float = 30,
+    ):
+        self.defaults = defaults
+        self.overrides = overrides or {}
+        self.timeout = timeout
+        self._pools: Dict[str, UpstreamPool] = {}
+
+    def _settings_for(self, base_url: str) -> PoolSettings:
+        override = self.overrides.get(base_url)
+        if override is None:
+            return self.defaults
+        return self.defaults.model_copy(update=override.model_dump(exclude_none=True))
+
+    def get(self, base_url: str) -> UpstreamPool:
+        """Возвращает пул для upstream, создавая его при первом обращении"""
+        pool = self._pools.get(base_url)
+        if pool is None:
+            pool = UpstreamPool(base_url, self._settings_for(base_url), self.timeout)
+            self._pools[base_url] = pool
+        return pool
+
+    def stats(self) -> Dict[str, dict]:
+        return {url: pool.stats() for url, pool in self._pools.items()}
+
+    async def aclose(self) -> None:
+        for pool in self._pools.values():
+            await pool.client.aclose()
+        self._pools.clear()
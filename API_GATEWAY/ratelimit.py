@@ -0,0 +1,237 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import Request
+
+from auth import InvalidToken, TokenVerifier
+from config import RateLimitRule
+from router import Route, normalize_prefix
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """Запрос отклонен: исчерпан лимит правила"""
+
+    def __init__(self, rule: RateLimitRule, retry_after: float):
+        super().__init__(f"Превышен лимит запросов для {rule.prefix}")
+        self.rule = rule
+        self.retry_after = retry_after
+
+
+class RateLimitBackend:
+    """
+    Хранилище корзин. acquire списывает cost токенов и возвращает 0,
+    либо, если токенов не хватает, время в секундах до их появления.
+    """
+
+    async def acquire(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Корзины в памяти процесса. Число ключей ограничено max_keys: вытесняются
+    давно не использованные корзины (к этому моменту они обычно уже полны).
+    При нескольких воркерах у каждого свои корзины.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(burst)
+        else:
+            tokens, updated_at = bucket
+            tokens = min(float(burst), tokens + (now - updated_at) * rate)
+            self._buckets.move_to_end(key)
+
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Атомарное пополнение и списание на стороне Redis; время берется с сервера,
+# чтобы экземпляры шлюза не зависели от расхождения часов
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Общие корзины в Redis для нескольких экземпляров шлюза.
+    Требует пакет redis (pip install redis). При недоступности Redis
+    запросы пропускаются: лимитер не должен останавливать шлюз.
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis требует пакет redis (pip install redis)"
+            ) from e
+        self.client = redis_asyncio.from_url(url)
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        try:
+            wait = await self._script(keys=[key], args=[rate, burst, cost])
+        except Exception as e:
+            logger.warning("Rate limit backend unavailable: %r", e)
+            return 0.0
+        return float(wait)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def create_backend(kind: str, redis_url: str, max_keys: int) -> RateLimitBackend:
+    if kind == "redis":
+        return RedisBackend(redis_url)
+    return InMemoryBackend(max_keys=max_keys)
+
+
+class RateLimiter:
+    """
+    Проверка правил для запроса к /api/*.
+
+    Вызывается после сопоставления маршрута и до чтения тела и обращения
+    к upstream, поэтому лишняя нагрузка отсекается без затрат на соединения.
+    Запрос должен пройти все подходящие правила.
+
+    trusted_proxies - число доверенных прокси перед шлюзом: адрес клиента
+    берется из X-Forwarded-For на столько записей левее конца списка
+    (0 - заголовок не учитывается). verifier проверяет подпись токена для
+    ключа subject; без него такие правила считаются по адресу.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[RateLimitRule],
+        backend: RateLimitBackend,
+        trusted_proxies: int = 0,
+        verifier: Optional[TokenVerifier] = None,
+    ):
+        self.backend = backend
+        self.trusted_proxies = trusted_proxies
+        self.verifier = verifier
+        self.rejected_total = 0
+        self.load(rules)
+
+    def load(self, rules: Sequence[RateLimitRule]) -> None:
+        self.rules: List[Tuple[int, str, RateLimitRule, Optional[frozenset]]] = [
+            (
+                index,
+                normalize_prefix(rule.prefix),
+                rule,
+                frozenset(m.upper() for m in rule.methods) if rule.methods else None,
+            )
+            for index, rule in enumerate(rules)
+        ]
+
+    def client_ip(self, request: Request) -> str:
+        if self.trusted_proxies > 0:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                # Левые записи подставляет сам клиент, доверять можно только
+                # записи, добавленной ближайшим к клиенту доверенным прокси
+                entries = [entry.strip() for entry in forwarded.split(",")]
+                address = entries[max(len(entries) - self.trusted_proxies, 0)]
+                if address:
+                    return address
+        return request.client.host if request.client else "unknown"
+
+    def subject(self, request: Request) -> Optional[str]:
+        """
+        Пользователь запроса: проверенный шлюзом uuid, иначе uuid или sub из
+        токена с проверенной подписью. Непроверенным claims верить нельзя:
+        поддельный токен давал бы клиенту новую корзину на каждый запрос
+        """
+        identity = getattr(request.state, "identity_headers", None)
+        if identity and identity.get("x-user-uuid"):
+            return identity["x-user-uuid"]
+        if self.verifier is None:
+            return None
+        try:
+            claims = self.verifier.claims(request.headers.get("authorization"))
+        except InvalidToken:
+            return None
+        if claims is None:
+            return None
+        subject = claims.get("uuid") or claims.get("sub")
+        return str(subject) if subject else None
+
+    def _key(self, request: Request, route: Route, rule: RateLimitRule) -> str:
+        if rule.key == "route":
+            return f"route:{route.prefix}"
+        if rule.key == "subject":
+            subject = self.subject(request)
+            # Анонимные запросы ограничиваются по адресу
+            if subject is not None:
+                return f"subject:{subject}"
+        return f"ip:{self.client_ip(request)}"
+
+    async def check(self, request: Request, path: str, route: Route) -> None:
+        """Списывает токены по всем подходящим правилам; RateLimited при превышении"""
+        for index, prefix, rule, methods in self.rules:
+            if methods is not None and request.method not in methods:
+                continue
+            if prefix != "/" and path != prefix and not path.startswith(prefix + "/"):
+                continue
+            key = f"ratelimit:{index}:{self._key(request, route, rule)}"
+            wait = await self.backend.acquire(key, rule.rate, rule.burst)
+            if wait > 0:
+                self.rejected_total += 1
+                raise RateLimited(rule, wait)
+
+    def stats(self) -> dict:
+        stats = {
+            "rules": [rule.model_dump() for _, _, rule, _ in self.rules],
+            "rejected_total": self.rejected_total,
+            "backend": type(self.backend).__name__,
+        }
+        if isinstance(self.backend, InMemoryBackend):
+            stats["keys"] = len(self.backend)
+        return stats
@@ -0,0 +1,159 @@
+import random
+import time
+from typing import Dict
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонен: цепь upstream-сервиса разомкнута"""
+
+    def __init__(self, service_url: str, retry_after: float):
+        super().__init__(f"Сервис {service_url} временно недоступен")
+        self.service_url = service_url
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для одного upstream.
+
+    После failure_threshold ошибок подряд цепь размыкается и запросы сразу
+    отклоняются в течение recovery_timeout секунд. Затем пропускается
+    half_open_max_calls пробных запросов: успех замыкает цепь, ошибка - снова размыкает.
+    Каждый пропущенный allow() запрос завершается record_success, record_failure
+    или release.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.rejected_total = 0
+
+    def is_open(self) -> bool:
+        """Цепь разомкнута и время восстановления еще не прошло (без изменения состояния)"""
+        return (
+            self.state == self.OPEN
+            and time.monotonic() - self.opened_at < self.recovery_timeout
+        )
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.rejected_total += 1
+                return False
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+
+        if self.state == self.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected_total += 1
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def release(self) -> None:
+        """
+        Запрос, пропущенный allow(), завершился без результата (отмена,
+        ошибка до ответа upstream): пробный слот освобождается, иначе цепь
+        осталась бы полуоткрытой и отклоняла запросы без единой пробы.
+        """
+        if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self.recovery_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected_total": self.rejected_total,
+            "retry_after": round(self.retry_after(), 3),
+        }
+
+
+class CircuitBreakers:
+    """Реестр предохранителей по адресу upstream"""
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float, half_open_max_calls: int):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, service_url: str) -> CircuitBreaker:
+        breaker = self._breakers.get(service_url)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                self.failure_threshold, self.recovery_timeout, self.half_open_max_calls
+            )
+            self._breakers[service_url] = breaker
+        return breaker
+
+    def stats(self) -> Dict[str, dict]:
+        return {url: breaker.stats() for url, breaker in self._breakers.items()}
+
+
+class RetryBudget:
+    """
+    Бюджет повторов: каждый запрос пополняет бюджет на ratio повтора,
+    каждый повтор тратит единицу. Так повторы не превышают заданную долю
+    трафика и не умножают нагрузку на уже перегруженный сервис.
+    min_reserve гарантирует немного повторов при малом трафике.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_reserve: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = min_reserve
+        self.tokens = min_reserve
+        self.retries_total = 0
+        self.exhausted_total = 0
+
+    def record_request(self) -> None:
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def try_withdraw(self) -> bool:
+        if self.tokens < 1:
+            self.exhausted_total += 1
+            return False
+        self.tokens -= 1
+        self.retries_total += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "tokens": round(self.tokens, 3),
+            "retries_total": self.retries_total,
+            "exhausted_total": self.exhausted_total,
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Экспоненциальная задержка с полным джиттером (attempt начинается с 1)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
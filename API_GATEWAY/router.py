@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+@dataclass(frozen=True)
+class Route:
+    """Маршрут: префикс пути, экземпляры сервиса и разрешенные методы (None - любые)"""
+    prefix: str
+    targets: Tuple[str, ...]
+    methods: Optional[FrozenSet[str]] = None
+
+    @property
+    def target(self) -> str:
+        return self.targets[0]
+
+    def allows(self, method: str) -> bool:
+        return self.methods is None or method.upper() in self.methods
+
+
+@dataclass
+class _Node:
+    children: Dict[str, "_Node"] = field(default_factory=dict)
+    route: Optional[Route] = None
+
+
+def split_path(path: str) -> List[str]:
+    """Разбивает путь на непустые сегменты: '/api/v1/' -> ['api', 'v1']"""
+    return [segment for segment in path.split("/") if segment]
+
+
+def normalize_prefix(prefix: str) -> str:
+    """Приводит префикс к каноническому виду: 'api/v1/' -> '/api/v1'"""
+    return "/" + "/".join(split_path(prefix))
+
+
+class RouteTable:
+    """
+    Таблица маршрутизации на основе префиксного дерева по сегментам пути.
+
+    Поиск выполняется за O(количество сегментов пути) и возвращает
+    самый длинный совпавший префикс, а не первый по порядку в SERVICE_ROUTES.
+    Таблица собирается целиком и подменяется одной операцией присваивания,
+    поэтому перезагрузка безопасна для конкурентных запросов.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, Union[str, Sequence[str]]],
+        methods: Optional[Dict[str, Iterable[str]]] = None,
+    ):
+        self._root = _Node()
+        self._routes: Tuple[Route, ...] = ()
+        self.load(routes, methods)
+
+    @staticmethod
+    def _build(routes: Iterable[Route]) -> _Node:
+        root = _Node()
+        for route in routes:
+            node = root
+            for segment in split_path(route.prefix):
+                node = node.children.setdefault(segment, _Node())
+            node.route = route
+        return root
+
+    def load(
+        self,
+        routes: Dict[str, Union[str, Sequence[str]]],
+        methods: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> None:
+        """Пересобирает таблицу из конфигурации и атомарно подменяет текущую"""
+        methods = methods or {}
+        compiled = tuple(
+            Route(
+                prefix=normalize_prefix(prefix),
+                targets=(target,) if isinstance(target, str) else tuple(target),
+                methods=(
+                    frozenset(m.upper() for m in methods[prefix])
+                    if prefix in methods else None
+                ),
+            )
+            for prefix, target in routes.items()
+        )
+        root = self._build(compiled)
+        self._root, self._routes = root, compiled
+
+    @property
+    def routes(self) -> Tuple[Route, ...]:
+        return self._routes
+
+    def match(self, path: str, method: Optional[str] = None) -> Tuple[Optional[Route], bool]:
+        """
+        Ищет маршрут с самым длинным префиксом, разрешающий метод.
+
+        Returns:
+            (маршрут или None, найден ли путь без учета метода)
+        """
+        node = self._root
+        best: Optional[Route] = None
+        path_matched = False
+
+        if node.route is not None:
+            path_matched = True
+            if method is None or node.route.allows(method):
+                best = node.route
+
+        for segment in split_path(path):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.route is not None:
+                path_matched = True
+                if method is None or node.route.allows(method):
+                    best = node.route
+
+        return best, path_matched
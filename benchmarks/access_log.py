@@ -0,0 +1,117 @@
+"""
+Бенчмарк access-лога шлюза на маршруте проксирования.
+
+Для каждого варианта из --variants поднимается шлюз (benchmarks/access_log_app.py)
+с заглушкой upstream, затем прогоняются proxy_get и proxy_post из
+benchmarks.run. Варианты: base_http - прежний LoggingMiddleware на
+BaseHTTPMiddleware, asgi - текущий чистый ASGI с записью через очередь,
+asgi_sampled - он же с ACCESS_LOG_SAMPLE_RATE=--sample-rate, none - без
+access-лога (потолок). Лог пишется в файл сервиса, как в контейнере - в stderr.
+
+Запуск из корня репозитория:
+    pip install -r API_GATEWAY/requirements.txt -r benchmarks/requirements.txt
+    python -m benchmarks.access_log --concurrency 32 --duration 10
+    python -m benchmarks.access_log --variants base_http,asgi --payload-bytes 65536
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.load import Scenario, run_scenario
+from benchmarks.report import ROOT_DIR, default_output, metadata, print_table, write_results
+from benchmarks.run import Service, wait_ready
+
+VARIANTS = ("base_http", "asgi", "asgi_sampled", "none")
+
+
+def build_services(args, variant: str) -> List[Service]:
+    stub = Service(
+        "stub", os.path.join(ROOT_DIR, "benchmarks"), "stub_upstream:app", args.stub_port,
+        env={"STUB_PAYLOAD_BYTES": str(args.payload_bytes)},
+        workers=2,
+    )
+    gateway = Service(
+        f"gateway-{variant}", os.path.join(ROOT_DIR, "API_GATEWAY"), "benchmarks.access_log_app:app",
+        args.gateway_port,
+        env={
+            "SERVICE_ROUTES": json.dumps({"/api/v1/stub": stub.url}),
+            "RATE_LIMIT_ENABLED": "false",
+            "ACCESS_LOG_VARIANT": "asgi" if variant == "asgi_sampled" else variant,
+            "ACCESS_LOG_SAMPLE_RATE": str(args.sample_rate if variant == "asgi_sampled" else 1.0),
+        },
+    )
+    return [stub, gateway]
+
+
+def build_scenarios(gateway_url: str, payload: bytes) -> List[Scenario]:
+    return [
+        Scenario("proxy_get", lambda client, i: client.get(f"{gateway_url}/api/v1/stub/items")),
+        Scenario(
+            "proxy_post",
+            lambda client, i: client.post(
+                f"{gateway_url}/api/v1/stub/items",
+                content=payload,
+                headers={"content-type": "application/octet-stream"},
+            ),
+        ),
+    ]
+
+
+async def main(args) -> int:
+    variants = [name.strip() for name in args.variants.split(",") if name.strip()]
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        print(f"Неизвестные варианты: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    work_dir = tempfile.mkdtemp(prefix="bench-access-log-")
+    results: Dict[str, dict] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    for variant in variants:
+        services = build_services(args, variant)
+        try:
+            for service in services:
+                service.start(work_dir)
+            await wait_ready(services)
+            async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+                for scenario in build_scenarios(services[1].url, b"x" * args.payload_bytes):
+                    key = f"{scenario.name}@{variant}"
+                    print(f"-> {key} (concurrency={args.concurrency}, {args.duration}s)", file=sys.stderr)
+                    results[key] = await run_scenario(
+                        client, scenario, args.concurrency, args.duration, args.warmup
+                    )
+                    results[key]["variant"] = variant
+        finally:
+            for service in reversed(services):
+                service.stop()
+
+    meta = metadata({**vars(args), "variants": variants})
+    output = write_results(args.output or default_output("access-log", meta), "access-log", meta, results)
+    print_table(results)
+    print(f"\nРезультаты: {output}", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк access-лога шлюза на маршруте проксирования")
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера, сек")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Прогрев без учета, сек")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут запроса, сек")
+    parser.add_argument("--payload-bytes", type=int, default=1024)
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="ACCESS_LOG_SAMPLE_RATE в asgi_sampled")
+    parser.add_argument("--output", help="Файл результатов (по умолчанию benchmarks/results/access-log-<commit>.json)")
+    parser.add_argument("--gateway-port", type=int, default=18000)
+    parser.add_argument("--stub-port", type=int, default=18101)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,61 @@
+"""
+Шлюз для бенчмарка access-лога: приложение API_GATEWAY/main.py, в котором
+LoggingMiddleware заменяется по ACCESS_LOG_VARIANT:
+
+    asgi       текущий LoggingMiddleware (чистый ASGI, очередь, одна строка)
+    base_http  прежний LoggingMiddleware на BaseHTTPMiddleware (две f-строки, time.time)
+    none       без access-лога
+
+Запускается uvicorn из каталога API_GATEWAY (модули шлюза - верхнего уровня).
+"""
+import logging
+import os
+import time
+
+from fastapi import Request
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import main as gateway
+from middleware import LoggingMiddleware
+
+logger = logging.getLogger("gateway.access.legacy")
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """LoggingMiddleware шлюза до перехода на чистый ASGI"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        logger.info(
+            f"Входящий запрос: {request.method} {request.url.path} "
+            f"От {request.client.host if request.client else 'unknown'}"
+        )
+
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        logger.info(
+            f"Запрос выполнен: {request.method} {request.url.path} "
+            f"Статус: {response.status_code} Time: {process_time:.2f}s"
+        )
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+
+
+def select_access_log(variant: str) -> None:
+    middleware = []
+    for entry in gateway.app.user_middleware:
+        if entry.cls is not LoggingMiddleware:
+            middleware.append(entry)
+        elif variant == "asgi":
+            middleware.append(entry)
+        elif variant == "base_http":
+            middleware.append(Middleware(LegacyLoggingMiddleware))
+        elif variant != "none":
+            raise ValueError(f"Неизвестный ACCESS_LOG_VARIANT: {variant}")
+    # Стек middleware собирается при первом запросе, до него список можно подменить
+    gateway.app.user_middleware = middleware
+
+
+select_access_log(os.getenv("ACCESS_LOG_VARIANT", "asgi"))
+app = gateway.app
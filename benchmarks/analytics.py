@@ -0,0 +1,251 @@
+"""
+Бенчмарк колоночного хранилища аналитики dataMining_service.
+
+Генерирует синтетический набор вакансий прямо в колонках (распределения
+регионов, работодателей и навыков с длинным хвостом, часть зарплат не указана,
+часть - в другой валюте), записывает его во временный каталог хранилища и
+замеряет запись и запросы. Результаты - в том же формате, что у benchmarks.run,
+их можно сравнивать через benchmarks/compare.py (rps - операций в секунду).
+
+Запуск из корня репозитория:
+    pip install -r services/dataMining_service/requirements.txt
+    python -m benchmarks.analytics --rows 5000000
+    python -m benchmarks.analytics --rows 1000000 --repeat 50 --scenarios agg_by_skill,scan_by_skill
+
+Сценарии:
+    ingest_columns      append_batch готовых колонок пачками по --batch строк
+    ingest_records      append из VacancyRecord (кодирование в Python), --record-rows строк
+    agg_by_skill        статистика по навыкам из агрегатов
+    agg_by_area         статистика по регионам из агрегатов
+    scan_by_skill       то же по навыкам с точными перцентилями (сканирование всех строк)
+    scan_filtered       по регионам для навыка Python за один месяц (отсечение партиций)
+    histogram_filtered  гистограмма зарплат навыка Python в регионе за квартал
+    python_by_skill     scan_by_skill циклом Python по --baseline-rows строк (ориентир)
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.report import default_output, metadata, print_table, summarize, write_results
+from services.dataMining_service.analytics.store import (
+    EPOCH,
+    SINGLE_DIMENSIONS,
+    ColumnarStore,
+    ColumnBatch,
+)
+from services.dataMining_service.models.vacancy import VacancyRecord
+
+SCENARIOS = (
+    "ingest_columns",
+    "ingest_records",
+    "agg_by_skill",
+    "agg_by_area",
+    "scan_by_skill",
+    "scan_filtered",
+    "histogram_filtered",
+    "python_by_skill",
+)
+FIRST_DAY = (date(2024, 1, 1) - EPOCH).days
+DAYS = 365
+
+# Размеры словарей синтетического набора
+CARDINALITY = {
+    "source": 2,
+    "area": 80,
+    "experience": 4,
+    "schedule": 5,
+    "employer": 20000,
+    "skill": 300,
+}
+CURRENCIES = (("RUR", 0.9), ("USD", 0.07), ("EUR", 0.03))
+# Самые частые значения, по которым фильтруют запросы сценариев
+TOP_VALUES = {"skill": "Python", "area": "Москва"}
+
+
+def zipf_weights(n: int) -> np.ndarray:
+    weights = 1 / np.arange(1, n + 1)
+    return weights / weights.sum()
+
+
+class SyntheticVacancies:
+    """Генератор пачек в колонках; значения измерений заранее занесены в словари хранилища"""
+
+    def __init__(self, store: ColumnarStore, seed: int):
+        self.rng = np.random.default_rng(seed)
+        self.values: Dict[str, List[str]] = {}
+        for name, size in CARDINALITY.items():
+            self.values[name] = [TOP_VALUES.get(name, f"{name}-0")] + [f"{name}-{i}" for i in range(1, size)]
+        self.values["currency"] = [currency for currency, _ in CURRENCIES]
+        self.codes = {
+            name: np.array([store.dictionaries[name].encode(v) for v in values], dtype=np.uint32)
+            for name, values in self.values.items()
+        }
+        self.names = {
+            name: dict(zip(self.codes[name].tolist(), values)) for name, values in self.values.items()
+        }
+        self.weights = {name: zipf_weights(len(values)) for name, values in self.values.items()}
+        self.weights["currency"] = np.array([share for _, share in CURRENCIES])
+
+    def choice(self, name: str, size: int) -> np.ndarray:
+        return self.codes[name][self.rng.choice(len(self.codes[name]), size=size, p=self.weights[name])]
+
+    def batch(self, rows: int) -> ColumnBatch:
+        rng = self.rng
+        salary = rng.lognormal(np.log(150000), 0.5, size=rows).astype(np.float32)
+        salary[rng.random(rows) < 0.4] = np.nan
+        skill_counts = rng.integers(0, 8, size=rows)
+        offsets = np.zeros(rows + 1, dtype=np.int64)
+        np.cumsum(skill_counts, out=offsets[1:])
+        return ColumnBatch(
+            published_day=rng.integers(FIRST_DAY, FIRST_DAY + DAYS, size=rows).astype(np.int32),
+            salary=salary,
+            salary_from=salary * np.float32(0.85),
+            salary_to=salary * np.float32(1.15),
+            codes={name: self.choice(name, rows) for name in SINGLE_DIMENSIONS},
+            skill_offsets=offsets,
+            skill_codes=self.choice("skill", int(offsets[-1])),
+        )
+
+    def records(self, rows: int) -> List[VacancyRecord]:
+        batch = self.batch(rows)
+
+        def value(name: str, code: int) -> str:
+            return self.names[name][int(code)]
+
+        records = []
+        for i in range(rows):
+            salary = batch.salary[i]
+            skills = batch.skill_codes[batch.skill_offsets[i]:batch.skill_offsets[i + 1]]
+            records.append(VacancyRecord(
+                source=value("source", batch.codes["source"][i]),
+                external_id=str(i),
+                title="Разработчик",
+                employer=value("employer", batch.codes["employer"][i]),
+                area=value("area", batch.codes["area"][i]),
+                salary_from=None if np.isnan(salary) else int(salary * 0.85),
+                salary_to=None if np.isnan(salary) else int(salary * 1.15),
+                currency=value("currency", batch.codes["currency"][i]),
+                salary_gross=None,
+                experience=value("experience", batch.codes["experience"][i]),
+                schedule=value("schedule", batch.codes["schedule"][i]),
+                skills=tuple(value("skill", code) for code in skills),
+                published_at=str(np.datetime64(int(batch.published_day[i]), "D")),
+                url=None,
+            ))
+        return records
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    fn()  # Прогрев: страничный кэш и mmap колонок
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def measure_ingest(append: Callable[[object], int], batches) -> dict:
+    latencies = []
+    rows = 0
+    started = time.perf_counter()
+    for batch in batches:
+        call_started = time.perf_counter()
+        rows += append(batch)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    return {**summarize(latencies, elapsed), "rows": rows, "rows_per_s": round(rows / elapsed) if elapsed else 0}
+
+
+def python_by_skill(salary: List[float], currency: List[int], skills: List[List[int]], base_code: int) -> dict:
+    """Группировка по навыку с медианой циклом Python - ориентир для векторного сканирования"""
+    groups = defaultdict(list)
+    counts = defaultdict(int)
+    for value, cur, row_skills in zip(salary, currency, skills):
+        for skill in row_skills:
+            counts[skill] += 1
+            if cur == base_code and value == value:
+                groups[skill].append(value)
+    return {skill: (counts[skill], statistics.mean(v), statistics.median(v)) for skill, v in groups.items()}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк колоночного хранилища аналитики")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Синтетических вакансий")
+    parser.add_argument("--batch", type=int, default=250_000, help="Строк в пачке записи")
+    parser.add_argument("--record-rows", type=int, default=50_000, help="Строк для ingest_records")
+    parser.add_argument("--baseline-rows", type=int, default=200_000, help="Строк для python_by_skill")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого запроса")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="Каталог хранилища (по умолчанию временный)")
+    parser.add_argument("--output", help="JSON с результатами (по умолчанию benchmarks/results/analytics-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="analytics-bench-") as tmp_dir:
+        store = ColumnarStore(args.data_dir or os.path.join(tmp_dir, "store"))
+        data = SyntheticVacancies(store, args.seed)
+        results: Dict[str, dict] = {}
+
+        sizes = [min(args.batch, args.rows - offset) for offset in range(0, args.rows, args.batch)]
+        ingest = measure_ingest(store.append_batch, (data.batch(size) for size in sizes))
+        if "ingest_columns" in scenarios:
+            results["ingest_columns"] = ingest
+        if "ingest_records" in scenarios:
+            records_store = ColumnarStore(os.path.join(tmp_dir, "records"))
+            records_data = SyntheticVacancies(records_store, args.seed)
+            record_batches = [records_data.records(size) for size in
+                              [min(args.batch, args.record_rows - o) for o in range(0, args.record_rows, args.batch)]]
+            results["ingest_records"] = measure_ingest(records_store.append, record_batches)
+        print(f"rows: {store.rows}, segments: {len(store.segments)}")
+
+        month = (date(2024, 3, 1), date(2024, 3, 31))
+        quarter = (date(2024, 4, 1), date(2024, 6, 30))
+        queries = {
+            "agg_by_skill": lambda: store.salary_stats("skill"),
+            "agg_by_area": lambda: store.salary_stats("area"),
+            "scan_by_skill": lambda: store.salary_stats("skill", exact=True),
+            "scan_filtered": lambda: store.salary_stats(
+                "area", filters={"skill": "Python"}, since=month[0], until=month[1],
+            ),
+            "histogram_filtered": lambda: store.salary_histogram(
+                "skill", "Python", filters={"area": TOP_VALUES["area"]}, since=quarter[0], until=quarter[1],
+            ),
+        }
+        for name, query in queries.items():
+            if name in scenarios:
+                results[name] = measure(query, args.repeat)
+
+        if "python_by_skill" in scenarios:
+            sample = data.batch(args.baseline_rows)
+            salary = sample.salary.tolist()
+            currency = sample.codes["currency"].tolist()
+            skills = np.split(sample.skill_codes, sample.skill_offsets[1:-1])
+            skills = [row.tolist() for row in skills]
+            base_code = store.dictionaries["currency"].code(store.base_currency)
+            results["python_by_skill"] = {
+                **measure(lambda: python_by_skill(salary, currency, skills, base_code), max(args.repeat // 4, 1)),
+                "rows": args.baseline_rows,
+            }
+
+    meta = metadata({**vars(args), "scenarios": scenarios})
+    print_table(results)
+    path = write_results(args.output or default_output("analytics", meta), "analytics", meta, results)
+    print(f"\nРезультаты: {path}")
+
+
+if __name__ == "__main__":
+    main()
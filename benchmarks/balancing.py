@@ -0,0 +1,118 @@
+"""
+Нагрузочный тест балансировки: масштабирование пропускной способности по
+числу экземпляров upstream.
+
+Для каждого числа экземпляров из --instances поднимается столько заглушек
+(один процесс, STUB_BUSY_MS мс процессора на запрос - пропускная
+способность экземпляра ограничена) и шлюз с маршрутом /api/v1/stub на все
+экземпляры, затем прогоняется proxy_get с каждой стратегией из --strategies.
+В результатах, кроме сводки benchmarks.run, - доля запросов, которую
+получил каждый экземпляр (по /pools шлюза).
+
+Запуск из корня репозитория:
+    pip install -r API_GATEWAY/requirements.txt -r benchmarks/requirements.txt
+    python -m benchmarks.balancing --instances 1,2,4 --concurrency 32
+    python -m benchmarks.balancing --instances 4 --strategies round_robin,power_of_two --busy-ms 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.load import Scenario, run_scenario
+from benchmarks.report import ROOT_DIR, default_output, metadata, print_table, write_results
+from benchmarks.run import Service, wait_ready
+
+STRATEGIES = ("round_robin", "least_outstanding", "power_of_two")
+
+
+def build_services(args, instances: int, strategy: str) -> List[Service]:
+    stubs = [
+        Service(
+            f"stub-{i}", os.path.join(ROOT_DIR, "benchmarks"), "stub_upstream:app", args.stub_port + i,
+            env={"STUB_PAYLOAD_BYTES": str(args.payload_bytes), "STUB_BUSY_MS": str(args.busy_ms)},
+        )
+        for i in range(instances)
+    ]
+    gateway = Service(
+        f"gateway-{instances}-{strategy}", os.path.join(ROOT_DIR, "API_GATEWAY"), "main:app", args.gateway_port,
+        env={
+            "SERVICE_ROUTES": json.dumps({"/api/v1/stub": [stub.url for stub in stubs]}),
+            "LOAD_BALANCING_STRATEGY": strategy,
+            "RATE_LIMIT_ENABLED": "false",
+            "CACHE_ENABLED": "false",
+            "ACCESS_LOG_SAMPLE_RATE": "0",
+        },
+        workers=args.gateway_workers,
+    )
+    return [*stubs, gateway]
+
+
+async def main(args) -> int:
+    counts = [int(count) for count in args.instances.split(",") if count]
+    strategies = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        print(f"Неизвестные стратегии: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    work_dir = tempfile.mkdtemp(prefix="bench-balancing-")
+    results: Dict[str, dict] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    for instances in counts:
+        for strategy in strategies:
+            services = build_services(args, instances, strategy)
+            gateway = services[-1]
+            try:
+                for service in services:
+                    service.start(work_dir)
+                await wait_ready(services)
+                scenario = Scenario("proxy_get", lambda client, i: client.get(f"{gateway.url}/api/v1/stub/items"))
+                key = f"{instances}x@{strategy}"
+                print(f"-> {key} (concurrency={args.concurrency}, {args.duration}s)", file=sys.stderr)
+                async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+                    results[key] = await run_scenario(
+                        client, scenario, args.concurrency, args.duration, args.warmup
+                    )
+                    pools = (await client.get(f"{gateway.url}/pools")).json()
+                total = sum(stats["requests_total"] for stats in pools.values()) or 1
+                results[key].update(
+                    instances=instances,
+                    strategy=strategy,
+                    share={url: round(stats["requests_total"] / total, 3) for url, stats in sorted(pools.items())},
+                )
+            finally:
+                for service in reversed(services):
+                    service.stop()
+
+    meta = metadata({**vars(args), "instances": counts, "strategies": strategies})
+    output = write_results(args.output or default_output("balancing", meta), "balancing", meta, results)
+    print_table(results)
+    print(f"\nРезультаты: {output}", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Масштабирование пропускной способности по числу экземпляров upstream")
+    parser.add_argument("--instances", default="1,2,4", help="Числа экземпляров через запятую")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--busy-ms", type=float, default=2.0, help="STUB_BUSY_MS: мс процессора на запрос в заглушке")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера, сек")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Прогрев без учета, сек")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут запроса, сек")
+    parser.add_argument("--payload-bytes", type=int, default=1024)
+    parser.add_argument("--gateway-workers", type=int, default=2, help="Воркеры шлюза (шлюз не должен быть узким местом)")
+    parser.add_argument("--output", help="Файл результатов (по умолчанию benchmarks/results/balancing-<commit>.json)")
+    parser.add_argument("--gateway-port", type=int, default=18000)
+    parser.add_argument("--stub-port", type=int, default=18101, help="Порт первой заглушки, следующие - по порядку")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,199 @@
+"""
+Бенчмарк конвейера на шине сообщений без брокеров (InMemoryBus).
+
+Продюсер публикует --rows сообщений во входной топик пачками по
+--publish-batch с темпом --rate сообщений в секунду (0 - без ограничения,
+тогда его сдерживает --max-pending непрочитанных сообщений). Обработчик
+читает входной топик через BatchConsumer и пишет результат в выходной,
+сборщик на выходном топике считает сквозную задержку от публикации.
+Раз в --sample-ms фиксируются отставание группы обработчика (сообщения
+после зафиксированного смещения) и число сообщений в работе. Результаты -
+в формате benchmarks.run: запросы - сообщения, задержки - от публикации до
+выходного топика, rows_per_s - сообщений в секунду от первой публикации до
+последнего сообщения в выходном топике.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bus --rows 200000
+    python -m benchmarks.bus --rows 100000 --rate 20000 --scenarios sequential,concurrent
+    pip install -r services/Ml_processing_service/requirements.txt
+    python -m benchmarks.bus --rows 50000 --scenarios enrich_sequential,enrich
+
+Сценарии:
+    sequential         обработка с задержкой --handler-ms на пачку (запись, ответ сервиса), concurrency=1
+    concurrent         то же, --concurrency пачек одновременно
+    enrich_sequential  StreamEnricher ML-сервиса с движком инференса, concurrency=1
+    enrich             StreamEnricher, --concurrency пачек одновременно
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from benchmarks.report import default_output, metadata, percentile, print_table, summarize, write_results
+from infra.messaging.bus import BatchConsumer, InMemoryBus, Message
+
+SCENARIOS = ("sequential", "concurrent", "enrich_sequential", "enrich")
+INPUT_TOPIC, OUTPUT_TOPIC = "vacancies.raw", "vacancies.enriched"
+
+
+def synthetic_records(rows: int, seed: int) -> List[dict]:
+    if rows == 0:
+        return []
+    # Тот же корпус, что у бенчмарка кэша признаков, но с короткими описаниями
+    from benchmarks.feature_cache import DEFAULT_MODEL, synthetic_corpus
+    from services.Ml_processing_service.inference.model import InferenceModel
+
+    aliases = sorted(InferenceModel(DEFAULT_MODEL).featurizer.extractor.canonical)
+    return synthetic_corpus(rows, aliases, seed, description_words=60)
+
+
+async def publish(bus: InMemoryBus, records: List[dict], rows: int, batch: int, rate: float) -> None:
+    producer = bus.producer()
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        if rate:
+            # Темп выдерживается по времени от начала, а не паузами после пачек
+            delay = started + offset / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        values, keys = [], []
+        for i in range(offset, min(offset + batch, rows)):
+            record = records[i % len(records)] if records else {"id": i}
+            values.append(json.dumps({**record, "published_at_ts": time.time()}, ensure_ascii=False).encode("utf-8"))
+            keys.append(str(i).encode("utf-8"))
+        await producer.publish(INPUT_TOPIC, values, keys)
+
+
+class Collector:
+    """Потребитель выходного топика: сквозная задержка и число сообщений"""
+
+    def __init__(self, bus: InMemoryBus, expected: int):
+        self.latencies: List[float] = []
+        self.done = asyncio.Event()
+        self.expected = expected
+        self.consumer = BatchConsumer(bus.consumer([OUTPUT_TOPIC], "collector"), self._handle, batch_size=1000)
+
+    async def _handle(self, messages: List[Message]) -> None:
+        now = time.time()
+        self.latencies.extend(now - json.loads(message.value)["published_at_ts"] for message in messages)
+        if len(self.latencies) >= self.expected:
+            self.done.set()
+
+
+async def sample(stage: BatchConsumer, interval: float, lags: List[int], in_flight: List[int]) -> None:
+    while True:
+        lags.append(sum(stage.consumer.lag().values()))
+        in_flight.append(stage.in_flight)
+        await asyncio.sleep(interval)
+
+
+async def run_scenario(name: str, args, records: List[dict]) -> dict:
+    bus = InMemoryBus(partitions=args.partitions, max_pending=args.max_pending)
+    concurrency = 1 if name in ("sequential", "enrich_sequential") else args.concurrency
+    collector = Collector(bus, args.rows)
+    engine = None
+    if name.startswith("enrich"):
+        from services.Ml_processing_service.core.config import Configs
+        from services.Ml_processing_service.inference.consumer import StreamEnricher
+        from services.Ml_processing_service.inference.engine import InferenceEngine
+
+        configs = Configs(
+            INFERENCE_PROCESSES=args.processes,
+            FEATURE_CACHE_ENABLED=False,
+            KAFKA_INPUT_TOPIC=INPUT_TOPIC,
+            KAFKA_OUTPUT_TOPIC=OUTPUT_TOPIC,
+            KAFKA_BATCH_SIZE=args.batch,
+            KAFKA_CONSUMER_CONCURRENCY=concurrency,
+            KAFKA_MAX_IN_FLIGHT=args.max_in_flight,
+        )
+        engine = InferenceEngine(configs)
+        engine.start()
+        stage = StreamEnricher(configs, engine, bus)
+        stage_consumer = stage.consumer
+    else:
+        producer = bus.producer()
+
+        async def handle(messages: List[Message]) -> None:
+            await asyncio.sleep(args.handler_ms / 1000)
+            await producer.publish(OUTPUT_TOPIC, [message.value for message in messages], [message.key for message in messages])
+
+        stage = stage_consumer = BatchConsumer(
+            bus.consumer([INPUT_TOPIC], name),
+            handle,
+            batch_size=args.batch,
+            concurrency=concurrency,
+            max_in_flight=args.max_in_flight,
+        )
+    # Группы подписываются до публикации: max_pending считает их отставание
+    await collector.consumer.start()
+    await stage.start()
+    lags: List[int] = []
+    in_flight: List[int] = []
+    sampler = asyncio.create_task(sample(stage_consumer, args.sample_ms / 1000, lags, in_flight))
+    started = time.perf_counter()
+    await publish(bus, records, args.rows, args.publish_batch, args.rate)
+    await collector.done.wait()
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    await asyncio.gather(sampler, return_exceptions=True)
+    await stage.stop()
+    await collector.consumer.stop()
+    if engine is not None:
+        await engine.stop()
+
+    latencies = sorted(collector.latencies)
+    sorted_lags = sorted(lags)
+    return {
+        **summarize(latencies, elapsed),
+        "rows": len(latencies),
+        "batches": stage_consumer.batches,
+        "rows_per_s": round(len(latencies) / elapsed) if elapsed else 0,
+        "concurrency": concurrency,
+        "lag_max": sorted_lags[-1] if sorted_lags else 0,
+        "lag_p95": percentile(sorted_lags, 95),
+        "in_flight_max": max(in_flight, default=0),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера на шине сообщений в процессе")
+    parser.add_argument("--rows", type=int, default=200_000, help="Сообщений во входном топике")
+    parser.add_argument("--rate", type=float, default=0, help="Сообщений в секунду от продюсера (0 - без ограничения)")
+    parser.add_argument("--publish-batch", type=int, default=500, help="Сообщений в пачке продюсера (BATCH_SIZE)")
+    parser.add_argument("--batch", type=int, default=256, help="Сообщений в пачке обработчика (KAFKA_BATCH_SIZE)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Пачек в обработке одновременно")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="KAFKA_MAX_IN_FLIGHT (0 - 2 * пачка * concurrency)")
+    parser.add_argument("--max-pending", type=int, default=50_000, help="Непрочитанных сообщений, сверх - продюсер ждет")
+    parser.add_argument("--partitions", type=int, default=4)
+    parser.add_argument("--handler-ms", type=float, default=20, help="Задержка обработки пачки в sequential/concurrent")
+    parser.add_argument("--processes", type=int, default=0, help="INFERENCE_PROCESSES в сценариях enrich")
+    parser.add_argument("--sample-ms", type=float, default=50, help="Интервал замера отставания")
+    parser.add_argument("--scenarios", default="sequential,concurrent")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON с результатами (по умолчанию benchmarks/results/bus-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    # Корпус вакансий нужен только инференсу; повторяется по кругу до --rows
+    records = synthetic_records(min(args.rows, 20_000), args.seed) if any(
+        name.startswith("enrich") for name in scenarios
+    ) else []
+    results: Dict[str, dict] = {}
+    for name in scenarios:
+        results[name] = asyncio.run(run_scenario(name, args, records))
+        print(f"{name}: {results[name]['rows_per_s']} rows/s, "
+              f"lag max {results[name]['lag_max']}, p99 {results[name]['p99_ms']} ms")
+
+    meta = metadata({**vars(args), "scenarios": scenarios})
+    print_table(results)
+    path = write_results(args.output or default_output("bus", meta), "bus", meta, results)
+    print(f"\nРезультаты: {path}")
+
+
+if __name__ == "__main__":
+    main()
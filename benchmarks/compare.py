@@ -0,0 +1,77 @@
+"""
+Сравнение двух файлов результатов benchmarks.
+
+    python -m benchmarks.compare benchmarks/results/http-abc123.json benchmarks/results/http-def456.json
+    python -m benchmarks.compare base.json head.json --threshold 0.1
+
+Код возврата 1, если в каком-либо сценарии RPS упал или p99 вырос больше
+чем на threshold (доля, по умолчанию 10%).
+"""
+import argparse
+import json
+import sys
+from typing import List, Tuple
+
+METRICS = (
+    # (поле, больше - лучше)
+    ("rps", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+)
+GATED = ("rps", "p99_ms")
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change(base: float, head: float) -> float:
+    if base == 0:
+        return 0.0
+    return (head - base) / base
+
+
+def compare(base: dict, head: dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Строки таблицы и список регрессий сверх threshold"""
+    lines = []
+    regressions = []
+    for name, head_result in head["results"].items():
+        base_result = base["results"].get(name)
+        if base_result is None:
+            lines.append(f"{name:<28}нет в базовом запуске")
+            continue
+        cells = []
+        for metric, higher_is_better in METRICS:
+            delta = change(base_result[metric], head_result[metric])
+            worse = -delta if higher_is_better else delta
+            mark = " !" if metric in GATED and worse > threshold else ""
+            if mark:
+                regressions.append(f"{name}.{metric}: {base_result[metric]} -> {head_result[metric]}")
+            cells.append(f"{head_result[metric]:>10.2f} ({delta:+7.1%}){mark:<2}")
+        lines.append(f"{name:<28}" + "".join(cells))
+    return lines, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Сравнение результатов benchmarks")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    print(f"base: {base['meta']['commit']}  head: {head['meta']['commit']}  suite: {head.get('suite')}")
+    print(f"{'scenario':<28}" + "".join(f"{metric:>24}" for metric, _ in METRICS))
+    lines, regressions = compare(base, head, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nРегрессии больше {args.threshold:.0%}:")
+        print("\n".join(f"  {item}" for item in regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Бенчмарк индекса дубликатов dataMining_service.
+
+Генерирует синтетический поток вакансий в модельном времени: новые вакансии
+(работодатели, регионы и навыки с длинным хвостом), перепубликации уже
+встречавшихся без изменений (новый id и ссылка) и отредактированные
+перепубликации (другая зарплата, уточнение в названии, пунктуация, навык
+убран или добавлен). Поток проверяется пачками по --batch записей, как в
+конвейере: check, затем commit. Разметка потока известна, поэтому кроме
+скорости считаются точность и полнота. Результаты - в формате benchmarks.run
+(rps - пачек в секунду, rows_per_s - вакансий в секунду).
+
+Запуск из корня репозитория:
+    pip install -r services/dataMining_service/requirements.txt
+    python -m benchmarks.dedup --rows 2000000
+    python -m benchmarks.dedup --rows 500000 --scenarios dedup,exact_only
+
+Сценарии:
+    dedup       DedupIndex: точные и почти дубликаты, вытеснение по ttl
+    exact_only  DedupIndex с DEDUP_NEAR_THRESHOLD > 1 - только точные дубликаты
+    python_set  множество Python из content_hash без вытеснения (ориентир)
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from benchmarks.report import default_output, metadata, print_table, summarize, write_results
+from services.dataMining_service.dedup import minhash
+from services.dataMining_service.dedup.index import UNIQUE, DedupIndex
+from services.dataMining_service.models.vacancy import VacancyRecord
+
+SCENARIOS = ("dedup", "exact_only", "python_set")
+
+GRADES = ("Junior", "Middle", "Senior", "Lead", "Стажер")
+ROLES = ("разработчик", "developer", "инженер", "программист", "архитектор", "аналитик", "тестировщик")
+TEAMS = ("платежей", "поиска", "рекомендаций", "логистики", "маркетплейса", "CRM", "биллинга", "антифрода")
+EXPERIENCE = ("Нет опыта", "От 1 года до 3 лет", "От 3 до 6 лет", "Более 6 лет")
+SCHEDULES = ("Полный день", "Удаленная работа", "Гибкий график", "Сменный график")
+SUFFIXES = (" (удаленно)", " в команду", " / гибрид", " - срочно")
+
+# Доли записей потока: новые, перепубликации без изменений, отредактированные
+NEW_SHARE, REPOST_SHARE = 0.7, 0.2
+
+
+def zipf_weights(n: int) -> np.ndarray:
+    weights = 1 / np.arange(1, n + 1)
+    return weights / weights.sum()
+
+
+class SyntheticStream:
+    """
+    Поток пачек (записи, признак дубликата). Перепубликуется одна из --window
+    последних новых вакансий; окно короче ttl, поэтому повтор всегда дубликат.
+    """
+
+    def __init__(self, seed: int, window: int, employers: int = 20000, areas: int = 80, skills: int = 300):
+        self.rng = np.random.default_rng(seed)
+        self.employers = [f"Компания {i}" for i in range(employers)]
+        self.areas = [f"Регион {i}" for i in range(areas)]
+        self.skills = [f"skill-{i}" for i in range(skills)]
+        self.weights = {
+            "employer": zipf_weights(employers),
+            "area": zipf_weights(areas),
+            "skill": zipf_weights(skills),
+        }
+        self.recent: deque = deque(maxlen=window)
+        self.next_id = 0
+
+    def _new(self, employer: int, area: int, skills: np.ndarray) -> VacancyRecord:
+        rng = self.rng
+        title = f"{GRADES[rng.integers(len(GRADES))]} {self.skills[skills[0]]} {ROLES[rng.integers(len(ROLES))]}"
+        if rng.random() < 0.5:
+            title += f" в команду {TEAMS[rng.integers(len(TEAMS))]}"
+        salary = int(rng.integers(5, 60)) * 10000
+        return self._record(
+            title, self.employers[employer], self.areas[area], salary,
+            EXPERIENCE[rng.integers(len(EXPERIENCE))], SCHEDULES[rng.integers(len(SCHEDULES))],
+            tuple(self.skills[code] for code in skills),
+        )
+
+    def _record(self, title, employer, area, salary, experience, schedule, skills) -> VacancyRecord:
+        self.next_id += 1
+        return VacancyRecord(
+            source="hh",
+            external_id=str(self.next_id),
+            title=title,
+            employer=employer,
+            area=area,
+            salary_from=salary,
+            salary_to=salary + 50000,
+            currency="RUR",
+            salary_gross=None,
+            experience=experience,
+            schedule=schedule,
+            skills=skills,
+            published_at="2024-01-01",
+            url=f"https://example.org/vacancy/{self.next_id}",
+        )
+
+    def _edit(self, record: VacancyRecord) -> VacancyRecord:
+        rng = self.rng
+        title, skills, salary = record.title, record.skills, record.salary_from
+        kind = rng.integers(4)
+        if kind == 0:
+            salary += int(rng.integers(1, 5)) * 10000
+        elif kind == 1:
+            title += SUFFIXES[rng.integers(len(SUFFIXES))]
+        elif kind == 2:
+            title = title.replace(" ", ", ", 1).upper()
+        elif len(skills) > 3:
+            skills = skills[:-1]
+        else:
+            skills = skills + (self.skills[rng.integers(len(self.skills))],)
+        return self._record(title, record.employer, record.area, salary, record.experience, record.schedule, skills)
+
+    def batch(self, rows: int) -> Tuple[List[VacancyRecord], np.ndarray]:
+        rng = self.rng
+        kinds = rng.random(rows)
+        employers = rng.choice(len(self.employers), size=rows, p=self.weights["employer"])
+        areas = rng.choice(len(self.areas), size=rows, p=self.weights["area"])
+        skill_counts = rng.integers(2, 8, size=rows)
+        skill_codes = rng.choice(len(self.skills), size=int(skill_counts.sum()), p=self.weights["skill"])
+        offsets = np.concatenate(([0], np.cumsum(skill_counts)))
+        records, duplicate = [], np.zeros(rows, dtype=bool)
+        for i in range(rows):
+            if kinds[i] < NEW_SHARE or not self.recent:
+                skills = np.unique(skill_codes[offsets[i]:offsets[i + 1]])
+                record = self._new(int(employers[i]), int(areas[i]), skills)
+                self.recent.append(record)
+            else:
+                origin = self.recent[int(rng.integers(len(self.recent)))]
+                record = (
+                    self._record(origin.title, origin.employer, origin.area, origin.salary_from,
+                                 origin.experience, origin.schedule, origin.skills)
+                    if kinds[i] < NEW_SHARE + REPOST_SHARE else self._edit(origin)
+                )
+                duplicate[i] = True
+            records.append(record)
+        return records, duplicate
+
+    def batches(self, rows: int, batch: int) -> Iterator[Tuple[List[VacancyRecord], np.ndarray]]:
+        for offset in range(0, rows, batch):
+            yield self.batch(min(batch, rows - offset))
+
+
+def quality(found: int, true_positive: int, actual: int) -> Dict[str, float]:
+    return {
+        "precision": round(true_positive / found, 4) if found else 1.0,
+        "recall": round(true_positive / actual, 4) if actual else 1.0,
+    }
+
+
+def run_index(stream, index: DedupIndex, rows_per_hour: float) -> dict:
+    latencies = []
+    rows = found = true_positive = actual = 0
+    elapsed = 0.0
+    for records, duplicate in stream:
+        now = rows / rows_per_hour * 3600
+        started = time.perf_counter()
+        result = index.check(records, now=now)
+        index.commit(result, now=now)
+        latency = time.perf_counter() - started
+        latencies.append(latency)
+        elapsed += latency
+        flagged = result.results != UNIQUE
+        rows += len(records)
+        found += int(flagged.sum())
+        true_positive += int((flagged & duplicate).sum())
+        actual += int(duplicate.sum())
+    return {
+        **summarize(latencies, elapsed),
+        "rows": rows,
+        "rows_per_s": round(rows / elapsed) if elapsed else 0,
+        **quality(found, true_positive, actual),
+        "index_entries": index.entries,
+        "index_mb": round(index.nbytes / 2 ** 20, 1),
+        "bytes_per_entry": round(index.nbytes / index.entries) if index.entries else 0,
+    }
+
+
+def run_python_set(stream) -> dict:
+    """Точные дубликаты через set: та же хеш-функция, без mmap, поколений и вытеснения"""
+    seen = set()
+    latencies = []
+    rows = found = true_positive = actual = 0
+    elapsed = 0.0
+    for records, duplicate in stream:
+        started = time.perf_counter()
+        flagged = np.zeros(len(records), dtype=bool)
+        for i, key in enumerate(minhash.record_keys(records)[0].tolist()):
+            if key in seen:
+                flagged[i] = True
+            else:
+                seen.add(key)
+        latency = time.perf_counter() - started
+        latencies.append(latency)
+        elapsed += latency
+        rows += len(records)
+        found += int(flagged.sum())
+        true_positive += int((flagged & duplicate).sum())
+        actual += int(duplicate.sum())
+    # Таблица множества плюс объекты int
+    nbytes = sys.getsizeof(seen) + sum(sys.getsizeof(key) for key in seen)
+    return {
+        **summarize(latencies, elapsed),
+        "rows": rows,
+        "rows_per_s": round(rows / elapsed) if elapsed else 0,
+        **quality(found, true_positive, actual),
+        "index_entries": len(seen),
+        "index_mb": round(nbytes / 2 ** 20, 1),
+        "bytes_per_entry": round(nbytes / len(seen)) if seen else 0,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк индекса дубликатов")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Вакансий в потоке")
+    parser.add_argument("--batch", type=int, default=500, help="Вакансий в пачке (BATCH_SIZE)")
+    parser.add_argument("--rows-per-hour", type=float, default=20_000, help="Скорость потока в модельном времени")
+    parser.add_argument("--window", type=int, default=200_000, help="Из скольких последних новых вакансий берутся повторы")
+    parser.add_argument("--ttl-hours", type=float, default=72)
+    parser.add_argument("--generations", type=int, default=6)
+    parser.add_argument("--max-entries", type=int, default=1_000_000)
+    parser.add_argument("--near-threshold", type=float, default=0.8)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON с результатами (по умолчанию benchmarks/results/dedup-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+    if args.window > args.ttl_hours * args.rows_per_hour * NEW_SHARE:
+        parser.error("--window должно укладываться в ttl, иначе повторы из-за окна не являются дубликатами")
+
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="dedup-bench-") as tmp_dir:
+        for name in scenarios:
+            # Каждый сценарий получает тот же поток: генератор с тем же seed
+            stream = SyntheticStream(args.seed, args.window).batches(args.rows, args.batch)
+            if name == "python_set":
+                results[name] = run_python_set(stream)
+                continue
+            index = DedupIndex(
+                os.path.join(tmp_dir, name),
+                ttl=args.ttl_hours * 3600,
+                generations=args.generations,
+                max_entries=args.max_entries,
+                near_threshold=args.near_threshold if name == "dedup" else 1.01,
+                save_interval=float("inf"),
+            )
+            results[name] = run_index(stream, index, args.rows_per_hour)
+            print(f"{name}: {results[name]['rows_per_s']} rows/s, "
+                  f"precision {results[name]['precision']}, recall {results[name]['recall']}")
+
+    meta = metadata({**vars(args), "scenarios": scenarios})
+    print_table(results)
+    path = write_results(args.output or default_output("dedup", meta), "dedup", meta, results)
+    print(f"\nРезультаты: {path}")
+
+
+if __name__ == "__main__":
+    main()
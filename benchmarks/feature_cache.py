@@ -0,0 +1,157 @@
+"""
+Бенчмарк кэша признаков Ml_processing_service.
+
+Генерирует синтетический корпус вакансий с HTML-описаниями (навыки из
+словаря встроенной модели вперемешку с обычным текстом) и замеряет повторную
+оценку корпуса пачками по --batch: без кэша, с пустым кэшем (холодный
+прогон: признаки считаются и записываются) и с заполненным (теплый прогон:
+признаки читаются из кэша). Результаты - в формате benchmarks.run (rps -
+пачек в секунду, rows_per_s - вакансий в секунду, speedup - относительно
+прогона без кэша).
+
+Запуск из корня репозитория:
+    pip install -r services/Ml_processing_service/requirements.txt
+    python -m benchmarks.feature_cache --rows 50000
+    python -m benchmarks.feature_cache --rows 20000 --changed 0.2 --scenarios no_cache,warm,warm_changed
+
+Сценарии:
+    no_cache      признаки каждой вакансии считаются заново
+    cold          пустой кэш: get_many (промахи), признаки, put_many
+    warm          корпус целиком в кэше
+    warm_changed  корпус в кэше, но у доли --changed вакансий изменено описание
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.report import default_output, metadata, print_table, summarize, write_results
+from services.Ml_processing_service.core.config import SERVICE_DIR
+from services.Ml_processing_service.inference.feature_cache import FeatureCache
+from services.Ml_processing_service.inference.model import Features, InferenceModel
+
+SCENARIOS = ("no_cache", "cold", "warm", "warm_changed")
+DEFAULT_MODEL = os.path.join(SERVICE_DIR, "ml_models", "default")
+
+WORDS = (
+    "команда", "продукт", "сервис", "разработка", "поддержка", "высоконагруженный", "архитектура",
+    "опыт", "знание", "понимание", "участие", "проектирование", "оптимизация", "код", "ревью",
+    "тестирование", "релизы", "клиенты", "данные", "платформа", "микросервисы", "бизнес", "задачи",
+)
+TITLES = ("Python разработчик", "Backend developer", "Data engineer", "Go разработчик", "DevOps инженер")
+GRADES = ("Junior", "Middle", "Senior", "Lead")
+AREAS = ("Москва", "Санкт-Петербург", "Казань", "Новосибирск")
+EXPERIENCE = ("Нет опыта", "От 1 года до 3 лет", "От 3 до 6 лет", "Более 6 лет")
+
+
+def synthetic_corpus(rows: int, aliases: List[str], seed: int, description_words: int) -> List[dict]:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(rows):
+        words = rng.choices(WORDS, k=description_words)
+        for _ in range(rng.randint(3, 10)):
+            words.insert(rng.randrange(len(words)), rng.choice(aliases))
+        paragraphs = [" ".join(words[start:start + 40]) for start in range(0, len(words), 40)]
+        corpus.append({
+            "title": f"{rng.choice(GRADES)} {rng.choice(TITLES)}",
+            "description": "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs),
+            "skills": rng.sample(aliases, rng.randint(0, 4)),
+            "experience": rng.choice(EXPERIENCE),
+            "area": rng.choice(AREAS),
+            "schedule": None,
+        })
+    return corpus
+
+
+def rescore(
+    model: InferenceModel,
+    corpus: List[dict],
+    batch: int,
+    cache: Optional[FeatureCache],
+) -> dict:
+    """Оценка корпуса пачками, как в движке: кэш, признаки для промахов, оценка"""
+    featurizer = model.featurizer
+    latencies = []
+    started = time.perf_counter()
+    for offset in range(0, len(corpus), batch):
+        items = corpus[offset:offset + batch]
+        call_started = time.perf_counter()
+        cached: Optional[List[Optional[Features]]] = None
+        if cache is not None:
+            keys = featurizer.keys(items)
+            cached = cache.get_many(keys)
+        features, computed = model.featurize(items, cached)
+        if cache is not None and computed:
+            rows = list(computed)
+            cache.put_many(keys[rows], [computed[row] for row in rows])
+        model.score(features)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    summary = {**summarize(latencies, elapsed), "rows": len(corpus), "rows_per_s": round(len(corpus) / elapsed)}
+    if cache is not None:
+        summary["cache"] = cache.stats()
+    return summary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк кэша признаков")
+    parser.add_argument("--rows", type=int, default=50_000, help="Вакансий в корпусе")
+    parser.add_argument("--batch", type=int, default=64, help="Вакансий в пачке (MAX_BATCH_SIZE)")
+    parser.add_argument("--description-words", type=int, default=200, help="Слов в описании")
+    parser.add_argument("--changed", type=float, default=0.1, help="Доля измененных вакансий для warm_changed")
+    parser.add_argument("--cache-mb", type=int, default=1024, help="Бюджет кэша на диске")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Каталог модели")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON с результатами (по умолчанию benchmarks/results/feature_cache-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    model = InferenceModel(args.model)
+    aliases = sorted(model.featurizer.extractor.canonical)
+    corpus = synthetic_corpus(args.rows, aliases, args.seed, args.description_words)
+    rng = random.Random(args.seed + 1)
+    changed = [
+        {**item, "description": item["description"] + "<p>обновлено</p>"} if rng.random() < args.changed else item
+        for item in corpus
+    ]
+    print(f"rows: {len(corpus)}, featurizer: {model.featurizer.id}")
+
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="feature-cache-bench-") as tmp_dir:
+        cache_path = os.path.join(tmp_dir, "cache")
+        if "no_cache" in scenarios:
+            results["no_cache"] = rescore(model, corpus, args.batch, None)
+        cache = FeatureCache(cache_path, args.cache_mb << 20)
+        cold = rescore(model, corpus, args.batch, cache)
+        if "cold" in scenarios:
+            results["cold"] = cold
+        cache.close()
+        # Теплые прогоны - как новый запуск: кэш открывается заново и читается с диска
+        for name, warm_corpus in (("warm", corpus), ("warm_changed", changed)):
+            if name in scenarios:
+                cache = FeatureCache(cache_path, args.cache_mb << 20)
+                results[name] = rescore(model, warm_corpus, args.batch, cache)
+                cache.close()
+
+    if "no_cache" in results:
+        baseline = results["no_cache"]["rows_per_s"]
+        for summary in results.values():
+            summary["speedup"] = round(summary["rows_per_s"] / baseline, 2) if baseline else 0.0
+    for name, summary in results.items():
+        print(f"{name}: {summary['rows_per_s']} rows/s, speedup {summary.get('speedup', '-')}")
+
+    meta = metadata({**vars(args), "scenarios": scenarios})
+    print_table(results)
+    path = write_results(args.output or default_output("feature_cache", meta), "feature_cache", meta, results)
+    print(f"\nРезультаты: {path}")
+
+
+if __name__ == "__main__":
+    main()
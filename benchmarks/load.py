@@ -0,0 +1,97 @@
+"""
+Генератор нагрузки: замкнутый цикл из concurrency воркеров, каждый отправляет
+следующий запрос сразу после ответа на предыдущий.
+"""
+import asyncio
+import itertools
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+import httpx
+
+from benchmarks.report import summarize
+
+RequestFactory = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: RequestFactory
+    # Подготовка перед замером (регистрация пользователей, получение токена)
+    setup: Optional[Callable[[httpx.AsyncClient], Awaitable[None]]] = None
+    expected_status: int = 200
+    # Фоновая нагрузка на время прогрева и замера (например, всплеск /login);
+    # ее сводка попадает в результат под ключом background
+    background: Optional["Scenario"] = None
+    background_concurrency: int = 0
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+    sequence: "itertools.count",
+):
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, next(sequence))
+            except httpx.HTTPError as e:
+                errors += 1
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[str(response.status_code)] += 1
+            if response.status_code != scenario.expected_status:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started, errors, statuses
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+    warmup: float = 0.0,
+) -> dict:
+    """Прогрев (результаты отбрасываются), затем замер в течение duration секунд"""
+    if scenario.setup is not None:
+        await scenario.setup(client)
+    background = None
+    if scenario.background is not None:
+        if scenario.background.setup is not None:
+            await scenario.background.setup(client)
+        background = asyncio.create_task(_drive(
+            client, scenario.background, scenario.background_concurrency,
+            warmup + duration, itertools.count(),
+        ))
+    sequence = itertools.count()
+    if warmup > 0:
+        await _drive(client, scenario, concurrency, warmup, sequence)
+    latencies, elapsed, errors, statuses = await _drive(
+        client, scenario, concurrency, duration, sequence
+    )
+    result = summarize(latencies, elapsed, errors, dict(statuses))
+    result["concurrency"] = concurrency
+    if background is not None:
+        bg_latencies, bg_elapsed, bg_errors, bg_statuses = await background
+        result["background"] = {
+            "scenario": scenario.background.name,
+            **summarize(bg_latencies, bg_elapsed, bg_errors, dict(bg_statuses)),
+            "concurrency": scenario.background_concurrency,
+        }
+    return result
@@ -0,0 +1,102 @@
+"""
+Сводка замеров и запись результатов в JSON.
+
+Файл результатов содержит метаданные запуска (коммит, окружение, параметры)
+и по каждому сценарию: число запросов, RPS и перцентили задержки в мс.
+Два файла сравниваются через benchmarks/compare.py.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, Optional, Sequence
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль по методу nearest-rank для отсортированной выборки"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(
+    latencies: Sequence[float],
+    elapsed: float,
+    errors: int = 0,
+    statuses: Optional[Dict[str, int]] = None,
+) -> dict:
+    """Сводка по задержкам в секундах за elapsed секунд работы"""
+    values = sorted(latencies)
+    count = len(values)
+    summary = {
+        "requests": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+    if statuses is not None:
+        summary["statuses"] = dict(sorted(statuses.items()))
+    return summary
+
+
+def git_revision() -> dict:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def metadata(params: dict) -> dict:
+    return {
+        **git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+    }
+
+
+def default_output(suite: str, meta: dict) -> str:
+    suffix = "-dirty" if meta.get("dirty") else ""
+    return os.path.join(RESULTS_DIR, f"{suite}-{meta['commit']}{suffix}.json")
+
+
+def write_results(path: str, suite: str, meta: dict, results: Dict[str, dict]) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"suite": suite, "meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def print_table(results: Dict[str, dict]) -> None:
+    header = f"{'scenario':<28}{'requests':>10}{'errors':>8}{'rps':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:<28}{r['requests']:>10}{r['errors']:>8}{r['rps']:>11.1f}"
+            f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+        )
@@ -0,0 +1,111 @@
+"""
+Микробенчмарк поиска маршрута шлюза.
+
+Таблица из --routes префиксов (по умолчанию 10, 100, 500 и 2000) вида
+/api/v<N>/<сервис>/<ресурс>; запросы - пути на 1-3 сегмента глубже
+случайного префикса и пути без маршрута. Сравниваются RouteTable
+(префиксное дерево, O(сегментов пути)) и линейный перебор префиксов по
+самому длинному совпадению, как до дерева (O(маршрутов)). Результаты - в
+формате benchmarks.run: requests - поиски, задержки - на один поиск.
+
+Запуск из корня репозитория:
+    python -m benchmarks.routing
+    python -m benchmarks.routing --routes 100,1000,10000 --lookups 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.report import ROOT_DIR, default_output, metadata, print_table, summarize, write_results
+
+# Модули шлюза импортируются как в контейнере - верхнего уровня
+sys.path.insert(0, os.path.join(ROOT_DIR, "API_GATEWAY"))
+from router import Route, RouteTable, split_path  # noqa: E402
+
+SERVICES = ("auth", "vacancies", "analytics", "ml", "mining", "users", "reports", "billing")
+
+
+def synthetic_routes(count: int, rng: random.Random) -> Dict[str, str]:
+    routes: Dict[str, str] = {}
+    while len(routes) < count:
+        prefix = f"/api/v{rng.randint(1, 9)}/{rng.choice(SERVICES)}/r{rng.randrange(count)}"
+        routes[prefix] = f"http://upstream-{len(routes) % 16}:8000"
+    return routes
+
+
+def synthetic_paths(routes: Dict[str, str], count: int, rng: random.Random) -> List[str]:
+    prefixes = list(routes)
+    paths = []
+    for i in range(count):
+        # Каждый десятый путь - без маршрута: перебор проходит всю таблицу
+        base = "/api/v0/unknown" if i % 10 == 0 else rng.choice(prefixes)
+        tail = "/".join(f"s{rng.randrange(1000)}" for _ in range(rng.randint(1, 3)))
+        paths.append(f"{base}/{tail}")
+    return paths
+
+
+class LinearTable:
+    """Перебор всех префиксов с выбором самого длинного совпавшего по сегментам"""
+
+    def __init__(self, table: RouteTable):
+        self.routes = [(split_path(route.prefix), route) for route in table.routes]
+
+    def match(self, path: str) -> Tuple[Optional[Route], bool]:
+        segments = split_path(path)
+        best, best_len = None, -1
+        for prefix, route in self.routes:
+            if len(prefix) > best_len and segments[:len(prefix)] == prefix:
+                best, best_len = route, len(prefix)
+        return best, best is not None
+
+
+def measure(match: Callable[[str], tuple], paths: List[str], batch: int) -> dict:
+    # Время одного поиска слишком мало для perf_counter: замер пачками
+    latencies = []
+    started = time.perf_counter()
+    for offset in range(0, len(paths), batch):
+        chunk = paths[offset:offset + batch]
+        t0 = time.perf_counter()
+        for path in chunk:
+            match(path)
+        latencies.extend([(time.perf_counter() - t0) / len(chunk)] * len(chunk))
+    elapsed = time.perf_counter() - started
+    # mean_ms округляется до микросекунд, поэтому среднее еще и в наносекундах
+    return {**summarize(latencies, elapsed), "ns_per_lookup": round(elapsed / len(paths) * 1e9)}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Микробенчмарк поиска маршрута шлюза")
+    parser.add_argument("--routes", default="10,100,500,2000", help="Размеры таблицы через запятую")
+    parser.add_argument("--lookups", type=int, default=100_000, help="Поисков на каждый размер")
+    parser.add_argument("--batch", type=int, default=100, help="Поисков в одном замере времени")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON с результатами (по умолчанию benchmarks/results/routing-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.routes.split(",") if size]
+    results: Dict[str, dict] = {}
+    for size in sizes:
+        rng = random.Random(args.seed)
+        routes = synthetic_routes(size, rng)
+        paths = synthetic_paths(routes, args.lookups, rng)
+        table = RouteTable(routes)
+        linear = LinearTable(table)
+        # Обе реализации должны находить одни и те же маршруты
+        for path in paths[:1000]:
+            assert table.match(path)[0] == linear.match(path)[0], path
+        for name, match in (("trie", table.match), ("linear", linear.match)):
+            results[f"{name}_{size}"] = {**measure(match, paths, args.batch), "routes": size}
+            print(f"{name} {size} routes: {results[f'{name}_{size}']['ns_per_lookup']} ns/lookup")
+
+    meta = metadata({**vars(args), "routes": sizes})
+    print_table(results)
+    path = write_results(args.output or default_output("routing", meta), "routing", meta, results)
+    print(f"\nРезультаты: {path}")
+
+
+if __name__ == "__main__":
+    main()
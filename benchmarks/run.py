@@ -0,0 +1,325 @@
+"""
+Нагрузочный тест шлюза и auth_service.
+
+Поднимает локально заглушку upstream, auth_service (SQLite через aiosqlite)
+и шлюз, прогоняет сценарии и пишет результаты в JSON для сравнения между
+коммитами (benchmarks/compare.py).
+
+Запуск из корня репозитория:
+    pip install -r API_GATEWAY/requirements.txt -r services/auth_service/requirements.txt \
+        -r benchmarks/requirements.txt
+    python -m benchmarks.run --concurrency 32 --duration 15
+    python -m benchmarks.run --scenarios proxy_get,proxy_post --concurrency 64
+    python -m benchmarks.run --scenarios me,me_under_login --burst-concurrency 64
+    python -m benchmarks.run --scenarios proxy_get,login --workers 1,2,4   # масштабирование по воркерам
+
+Сценарии:
+    register        POST /api/v1/auth/register с уникальным email (пропускная способность bcrypt + INSERT)
+    login           POST /api/v1/auth/login для заранее зарегистрированных пользователей
+    me              GET /api/v1/auth/me с токеном
+    me_under_login  то же во время всплеска login (--burst-concurrency воркеров): задержка /me
+                    должна остаться как в me, пока bcrypt занят в пуле потоков
+    proxy_get       GET через шлюз к заглушке (чистые накладные расходы проксирования)
+    proxy_post      POST с телом PAYLOAD_BYTES через шлюз к заглушке
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.load import Scenario, run_scenario
+from benchmarks.report import (
+    ROOT_DIR,
+    default_output,
+    metadata,
+    print_table,
+    write_results,
+)
+
+SCENARIOS = ("register", "login", "me", "me_under_login", "proxy_get", "proxy_post")
+PASSWORD = "benchmark-password"
+
+# Схема users для SQLite (в Postgres таблица создается из services/auth_service/sql/user.sql)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    uuid CHAR(32) PRIMARY KEY,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    hashed_password VARCHAR(255) NOT NULL,
+    full_name VARCHAR(100),
+    role VARCHAR(7) NOT NULL DEFAULT 'user',
+    is_active BOOLEAN NOT NULL DEFAULT 1,
+    is_verified BOOLEAN NOT NULL DEFAULT 0,
+    created_at DATETIME,
+    updated_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+"""
+
+
+@dataclass
+class Service:
+    name: str
+    cwd: str
+    app: str
+    port: int
+    env: Dict[str, str] = field(default_factory=dict)
+    workers: int = 1
+    process: Optional[subprocess.Popen] = None
+    log_path: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, log_dir: str) -> None:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT_DIR, env.get("PYTHONPATH")]))
+        env.update(self.env)
+        self.log_path = os.path.join(log_dir, f"{self.name}.log")
+        log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", self.app,
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--log-level", "warning", "--no-access-log",
+                "--workers", str(self.workers),
+            ],
+            cwd=self.cwd, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+
+    def stop(self) -> None:
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+async def wait_ready(services: List[Service], timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        for service in services:
+            while True:
+                if service.process is not None and service.process.poll() is not None:
+                    raise RuntimeError(f"{service.name} завершился, лог: {service.log_path}")
+                try:
+                    if (await client.get(f"{service.url}/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{service.name} не запустился, лог: {service.log_path}")
+                await asyncio.sleep(0.2)
+
+
+def create_sqlite_schema(path: str) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SQLITE_SCHEMA)
+
+
+def build_services(args, work_dir: str, workers: int) -> List[Service]:
+    db_path = os.path.join(work_dir, "auth.db")
+    create_sqlite_schema(db_path)
+    # Заглушка не должна быть узким местом при замере масштабирования шлюза
+    stub = Service(
+        "stub", os.path.join(ROOT_DIR, "benchmarks"), "stub_upstream:app", args.stub_port,
+        env={"STUB_PAYLOAD_BYTES": str(args.payload_bytes)},
+        workers=max(workers, 2),
+    )
+    auth = Service(
+        "auth_service", os.path.join(ROOT_DIR, "services", "auth_service"), "main:app", args.auth_port,
+        env={"DATABASE_URL": f"sqlite+aiosqlite:///{db_path}"},
+        workers=workers,
+    )
+    gateway = Service(
+        "gateway", os.path.join(ROOT_DIR, "API_GATEWAY"), "main:app", args.gateway_port,
+        env={
+            "SERVICE_ROUTES": json.dumps({
+                "/api/v1/auth": auth.url,
+                "/api/v1/stub": stub.url,
+            }),
+            # Лимиты частоты исказили бы замер пропускной способности
+            "RATE_LIMIT_ENABLED": "false",
+        },
+        workers=workers,
+    )
+    return [stub, auth, gateway]
+
+
+def build_scenarios(
+    gateway_url: str, auth_url: str, users: int, payload: bytes, burst_concurrency: int,
+) -> Dict[str, Scenario]:
+    run_id = uuid.uuid4().hex[:8]
+    login_users = [f"bench-login-{run_id}-{i}@loadtest.io" for i in range(users)]
+    token: Dict[str, str] = {}
+
+    def email(i: int) -> str:
+        return f"bench-{run_id}-{i}@loadtest.io"
+
+    async def register_users(client: httpx.AsyncClient) -> None:
+        for address in login_users:
+            response = await client.post(
+                f"{auth_url}/api/v1/auth/register", json={"email": address, "password": PASSWORD}
+            )
+            if response.status_code not in (201, 400):
+                raise RuntimeError(f"Регистрация для сценария не удалась: {response.status_code}")
+
+    async def obtain_token(client: httpx.AsyncClient) -> None:
+        await register_users(client)
+        response = await client.post(
+            f"{auth_url}/api/v1/auth/login",
+            data={"username": login_users[0], "password": PASSWORD},
+        )
+        response.raise_for_status()
+        token["value"] = response.json()["access_token"]
+
+    login = Scenario(
+        "login",
+        lambda client, i: client.post(
+            f"{auth_url}/api/v1/auth/login",
+            data={"username": login_users[i % users], "password": PASSWORD},
+        ),
+        setup=register_users,
+    )
+
+    def me(name: str, **kwargs) -> Scenario:
+        return Scenario(
+            name,
+            lambda client, i: client.get(
+                f"{auth_url}/api/v1/auth/me",
+                headers={"Authorization": f"Bearer {token['value']}"},
+            ),
+            setup=obtain_token,
+            **kwargs,
+        )
+
+    return {
+        "register": Scenario(
+            "register",
+            lambda client, i: client.post(
+                f"{auth_url}/api/v1/auth/register",
+                json={"email": email(i), "password": PASSWORD, "full_name": "Benchmark"},
+            ),
+            expected_status=201,
+        ),
+        "login": login,
+        "me": me("me"),
+        # Сброс нагрузки (503 + Retry-After) в фоне ожидаем, он попадает в statuses
+        "me_under_login": me("me_under_login", background=login, background_concurrency=burst_concurrency),
+        "proxy_get": Scenario(
+            "proxy_get",
+            lambda client, i: client.get(f"{gateway_url}/api/v1/stub/items"),
+        ),
+        "proxy_post": Scenario(
+            "proxy_post",
+            lambda client, i: client.post(
+                f"{gateway_url}/api/v1/stub/items",
+                content=payload,
+                headers={"content-type": "application/octet-stream"},
+            ),
+        ),
+    }
+
+
+async def main(args) -> int:
+    scenario_names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenario_names) - set(SCENARIOS)
+    if unknown:
+        print(f"Неизвестные сценарии: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    if args.no_start:
+        worker_counts = worker_counts[:1]
+    work_dir = tempfile.mkdtemp(prefix="bench-")
+    results: Dict[str, dict] = {}
+    for workers in worker_counts:
+        services: List[Service] = []
+        try:
+            if args.no_start:
+                gateway_url, auth_url = args.gateway_url, args.auth_url
+            else:
+                services = build_services(args, work_dir, workers)
+                for service in services:
+                    service.start(work_dir)
+                await wait_ready(services)
+                gateway_url, auth_url = services[2].url, services[1].url
+            # Сценарии auth по умолчанию идут через шлюз, --direct - напрямую в сервис
+            auth_target = auth_url if args.direct else gateway_url
+
+            scenarios = build_scenarios(
+                gateway_url, auth_target, args.users, b"x" * args.payload_bytes, args.burst_concurrency
+            )
+            connections = args.concurrency + args.burst_concurrency
+            limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+            async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+                for name in scenario_names:
+                    key = f"{name}@{workers}w" if len(worker_counts) > 1 else name
+                    print(f"-> {key} (concurrency={args.concurrency}, {args.duration}s)", file=sys.stderr)
+                    results[key] = await run_scenario(
+                        client, scenarios[name], args.concurrency, args.duration, args.warmup
+                    )
+                    results[key]["workers"] = workers
+        finally:
+            for service in reversed(services):
+                service.stop()
+
+    params = {
+        "scenarios": scenario_names,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "users": args.users,
+        "burst_concurrency": args.burst_concurrency,
+        "payload_bytes": args.payload_bytes,
+        "direct": args.direct,
+        "workers": worker_counts,
+        "database": "external" if args.no_start else "sqlite",
+    }
+    meta = metadata(params)
+    output = write_results(args.output or default_output("http", meta), "http", meta, results)
+    print_table(results)
+    print(f"\nРезультаты: {output}", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест шлюза и auth_service")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера, сек")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Прогрев без учета, сек")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут запроса, сек")
+    parser.add_argument("--users", type=int, default=20, help="Пользователей для сценария login")
+    parser.add_argument("--burst-concurrency", type=int, default=32, help="Воркеров login в me_under_login")
+    parser.add_argument("--payload-bytes", type=int, default=1024)
+    parser.add_argument("--direct", action="store_true", help="Сценарии auth напрямую, без шлюза")
+    parser.add_argument(
+        "--workers", default="1",
+        help="Число воркеров шлюза и auth_service; список через запятую - замер для каждого",
+    )
+    parser.add_argument("--output", help="Файл результатов (по умолчанию benchmarks/results/http-<commit>.json)")
+    parser.add_argument("--gateway-port", type=int, default=18000)
+    parser.add_argument("--auth-port", type=int, default=18005)
+    parser.add_argument("--stub-port", type=int, default=18101)
+    parser.add_argument("--no-start", action="store_true", help="Использовать уже запущенные сервисы")
+    parser.add_argument("--gateway-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--auth-url", default="http://127.0.0.1:8005")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
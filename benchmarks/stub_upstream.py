@@ -0,0 +1,67 @@
+"""
+Заглушка upstream-сервиса для нагрузочных тестов шлюза.
+
+GET отдает JSON фиксированного размера (STUB_PAYLOAD_BYTES), POST читает
+тело и возвращает его размер. Ответы не кешируются шлюзом (no-store), чтобы
+замер проходил через весь путь проксирования. STUB_DELAY - пауза перед
+ответом без нагрузки на процесс, STUB_BUSY_MS - занятость процессора на
+запрос (экземпляр с ограниченной пропускной способностью).
+"""
+import asyncio
+import json
+import os
+import time
+
+PAYLOAD_BYTES = int(os.getenv("STUB_PAYLOAD_BYTES", "1024"))
+STUB_DELAY = float(os.getenv("STUB_DELAY", "0"))
+STUB_BUSY_MS = float(os.getenv("STUB_BUSY_MS", "0"))
+
+_item = {"id": 0, "title": "Python developer", "company": "Benchmark", "salary": 250000}
+_items = []
+while len(json.dumps(_items)) < PAYLOAD_BYTES:
+    _items.append(dict(_item, id=len(_items)))
+GET_BODY = json.dumps({"items": _items}).encode("utf-8")
+
+HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"cache-control", b"no-store"),
+]
+
+
+async def _respond(send, status: int, body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": HEADERS + [(b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if STUB_DELAY:
+        await asyncio.sleep(STUB_DELAY)
+    if STUB_BUSY_MS and scope["path"] != "/health":
+        busy_until = time.perf_counter() + STUB_BUSY_MS / 1000
+        while time.perf_counter() < busy_until:
+            pass
+
+    if scope["method"] in ("GET", "HEAD"):
+        await _respond(send, 200, b'{"status": "ok"}' if scope["path"] == "/health" else GET_BODY)
+        return
+
+    received = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        received += len(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    await _respond(send, 200, json.dumps({"received": received}).encode("utf-8"))
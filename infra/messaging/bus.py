@@ -0,0 +1,640 @@
+"""
+Шина сообщений для сервисов: общий интерфейс поверх Kafka и очереди в процессе.
+
+Producer.publish отправляет пачку сообщений и возвращается, когда
+подтверждена вся пачка. Consumer читает сообщения группы потребителей и
+фиксирует смещения только явно (commit): после рестарта чтение
+продолжается с зафиксированного смещения, необработанное доставляется
+повторно (at-least-once).
+
+BatchConsumer - цикл обработки поверх Consumer: сообщения читаются, пока
+в работе меньше max_in_flight (иначе чтение ждет - обратное давление на
+брокер, а не рост памяти), делятся на пачки по batch_size и обрабатываются
+не больше concurrency пачек одновременно. Пачки завершаются в любом
+порядке, а смещение партиции фиксируется только до первого
+необработанного сообщения. При concurrency > 1 порядок обработки внутри
+партиции не гарантируется. Сообщение, которое не удается обработать
+(poison message), передается в dead_letter и не останавливает чтение.
+
+InMemoryBus - партиционированный журнал в процессе с группами
+потребителей и зафиксированными смещениями: для тестов и бенчмарков
+пропускной способности и отставания без брокеров. KafkaBus - пакет
+aiokafka.
+"""
+import asyncio
+import logging
+import time
+import weakref
+import zlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from infra.monitoring.monitoring import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# (топик, партиция)
+TopicPartition = Tuple[str, int]
+Handler = Callable[[List["Message"]], Awaitable[None]]
+DeadLetterHandler = Callable[["Message", Exception], Awaitable[None]]
+
+MESSAGES = REGISTRY.counter(
+    "bus_messages_total", "Сообщения шины", ("topic", "status"),
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "bus_in_flight_messages", "Прочитанные и еще не обработанные сообщения", ("group",),
+)
+BATCH_LATENCY = REGISTRY.histogram(
+    "bus_batch_duration_seconds", "Время обработки пачки сообщений", ("group",),
+)
+
+# Работающие BatchConsumer для метрики отставания
+_ACTIVE: "weakref.WeakSet[BatchConsumer]" = weakref.WeakSet()
+
+
+def _lag_samples():
+    for batch_consumer in list(_ACTIVE):
+        consumer = batch_consumer.consumer
+        for (topic, partition), lag in consumer.lag().items():
+            yield (consumer.group, topic, str(partition)), lag
+
+
+CONSUMER_LAG = REGISTRY.gauge(
+    "bus_consumer_lag", "Сообщения партиции после зафиксированного смещения", ("group", "topic", "partition"),
+    function=_lag_samples,
+)
+
+
+@dataclass(slots=True, frozen=True)
+class Message:
+    topic: str
+    partition: int
+    offset: int
+    key: Optional[bytes]
+    value: bytes
+
+
+class Producer:
+    async def start(self) -> None:
+        pass
+
+    async def publish(
+        self,
+        topic: str,
+        values: Sequence[bytes],
+        keys: Optional[Sequence[Optional[bytes]]] = None,
+    ) -> None:
+        """Пачка сообщений; сообщения с одним ключом попадают в одну партицию"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class Consumer:
+    group: str
+
+    async def start(self) -> None:
+        pass
+
+    async def fetch(self, max_records: int, timeout: float) -> List[Message]:
+        """До max_records сообщений; пустой список, если за timeout секунд сообщений нет"""
+        raise NotImplementedError
+
+    async def commit(self, offsets: Dict[TopicPartition, int]) -> None:
+        """Фиксация смещений: смещение - номер следующего непрочитанного сообщения"""
+        raise NotImplementedError
+
+    def lag(self) -> Dict[TopicPartition, int]:
+        """Отставание по назначенным партициям: сообщений после зафиксированного смещения"""
+        return {}
+
+    async def close(self) -> None:
+        pass
+
+
+class MessageBus:
+    """Фабрика продюсеров и потребителей одной шины"""
+
+    def producer(self) -> Producer:
+        raise NotImplementedError
+
+    def consumer(self, topics: Sequence[str], group: str) -> Consumer:
+        raise NotImplementedError
+
+
+class BatchConsumer:
+    """
+    Обработка сообщений пачками. handler получает пачку и должен
+    вернуться после ее обработки (например, после подтверждения записи в
+    выходной топик); исключение - повтор пачки через retry_backoff * 2^n
+    секунд. После retries повторов сообщения пачки обрабатываются по
+    одному, и не прошедшие передаются в dead_letter (например, запись в
+    отдельный топик) и считаются обработанными. Без dead_letter или при его
+    ошибке чтение останавливается (running - False), а пачка и все
+    следующие за ней незафиксированные сообщения будут доставлены снова.
+    """
+
+    def __init__(
+        self,
+        consumer: Consumer,
+        handler: Handler,
+        batch_size: int = 100,
+        concurrency: int = 1,
+        max_in_flight: int = 0,
+        fetch_timeout: float = 1.0,
+        retries: int = 3,
+        retry_backoff: float = 0.5,
+        dead_letter: Optional[DeadLetterHandler] = None,
+    ):
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("batch_size и concurrency должны быть положительными")
+        self.consumer = consumer
+        self.handler = handler
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        # По умолчанию - пачки в обработке и столько же прочитанных заранее
+        self.max_in_flight = max_in_flight or 2 * batch_size * concurrency
+        if self.max_in_flight < batch_size:
+            raise ValueError("max_in_flight не может быть меньше batch_size")
+        self.fetch_timeout = fetch_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.dead_letter = dead_letter
+        self.in_flight = 0
+        self.batches = 0
+        self.processed = 0
+        self.dead_lettered = 0
+        self.error: Optional[BaseException] = None
+        # Смещения в работе по партициям в порядке чтения и уже обработанные
+        self._pending: Dict[TopicPartition, List[int]] = {}
+        self._done: Dict[TopicPartition, Set[int]] = {}
+        self._changed = asyncio.Condition()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._commit_lock = asyncio.Lock()
+        self._batches: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight_metric = IN_FLIGHT.labels(consumer.group)
+
+    async def start(self) -> None:
+        await self.consumer.start()
+        self._task = asyncio.create_task(self._run())
+        _ACTIVE.add(self)
+
+    @property
+    def running(self) -> bool:
+        """Чтение идет: запущено и не остановлено ошибкой"""
+        return self._task is not None and not self._task.done() and self.error is None
+
+    async def _run(self) -> None:
+        while self.error is None:
+            async with self._changed:
+                # Следующее чтение - не меньше пачки, иначе пачки мельчают
+                await self._changed.wait_for(
+                    lambda: self.in_flight + self.batch_size <= self.max_in_flight or self.error is not None
+                )
+            if self.error is not None:
+                break
+            messages = await self.consumer.fetch(self.max_in_flight - self.in_flight, self.fetch_timeout)
+            if not messages:
+                continue
+            self._track(messages)
+            for start in range(0, len(messages), self.batch_size):
+                task = asyncio.create_task(self._process(messages[start:start + self.batch_size]))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+        logger.error("Consumer %s stopped: %r", self.consumer.group, self.error)
+
+    def _track(self, messages: List[Message]) -> None:
+        for message in messages:
+            tp = (message.topic, message.partition)
+            self._pending.setdefault(tp, []).append(message.offset)
+            self._done.setdefault(tp, set())
+        self.in_flight += len(messages)
+        self._in_flight_metric.inc(len(messages))
+
+    async def _isolate(self, batch: List[Message], error: Exception) -> bool:
+        """
+        Пачка после всех повторов: сообщения по одному, не прошедшие - в
+        dead_letter. False, если dead_letter не задан или сам завершился ошибкой
+        """
+        if self.dead_letter is None:
+            return False
+        failed = [(batch[0], error)] if len(batch) == 1 else []
+        for message in batch if len(batch) > 1 else ():
+            try:
+                await self.handler([message])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed.append((message, e))
+        for message, e in failed:
+            logger.warning("Dead-lettering message at %s:%s: %r", message.partition, message.offset, e)
+            try:
+                await self.dead_letter(message, e)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Dead letter handler failed")
+                return False
+            MESSAGES.labels(message.topic, "dead_letter").inc()
+            self.dead_lettered += 1
+        return True
+
+    async def _process(self, batch: List[Message]) -> None:
+        async with self._slots:
+            if self.error is not None:
+                return
+            started = time.perf_counter()
+            for attempt in range(self.retries + 1):
+                try:
+                    await self.handler(batch)
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if attempt == self.retries:
+                        MESSAGES.labels(batch[0].topic, "failed").inc(len(batch))
+                        logger.exception("Batch of %s messages failed after %s retries", len(batch), attempt)
+                        if await self._isolate(batch, e):
+                            break
+                        async with self._changed:
+                            self.error = e
+                            self._changed.notify_all()
+                        return
+                    logger.warning("Batch of %s messages failed: %r", len(batch), e)
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            BATCH_LATENCY.labels(self.consumer.group).observe(time.perf_counter() - started)
+        topics: Dict[str, int] = {}
+        for message in batch:
+            self._done[(message.topic, message.partition)].add(message.offset)
+            topics[message.topic] = topics.get(message.topic, 0) + 1
+        for topic, count in topics.items():
+            MESSAGES.labels(topic, "processed").inc(count)
+        self.batches += 1
+        self.processed += len(batch)
+        async with self._changed:
+            self.in_flight -= len(batch)
+            self._in_flight_metric.dec(len(batch))
+            self._changed.notify_all()
+        await self._commit()
+
+    def _watermarks(self) -> Dict[TopicPartition, int]:
+        """Сдвиг смещений партиций по непрерывному префиксу обработанных сообщений"""
+        offsets = {}
+        for tp, pending in self._pending.items():
+            done = self._done[tp]
+            advanced = 0
+            while advanced < len(pending) and pending[advanced] in done:
+                done.discard(pending[advanced])
+                advanced += 1
+            if advanced:
+                offsets[tp] = pending[advanced - 1] + 1
+                del pending[:advanced]
+        return offsets
+
+    async def _commit(self) -> None:
+        # Фиксации идут по очереди: более старое смещение не перезапишет новое
+        async with self._commit_lock:
+            offsets = self._watermarks()
+            if not offsets:
+                return
+            try:
+                await self.consumer.commit(offsets)
+            except Exception as e:
+                # Следующая фиксация передаст смещения не меньше этих
+                logger.warning("Commit of %s failed: %r", self.consumer.group, e)
+
+    async def stop(self) -> None:
+        """Чтение прекращается, прочитанные пачки дообрабатываются и фиксируются"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        # После ошибки пачки остаются незавершенными: их доставят снова
+        self._in_flight_metric.dec(self.in_flight)
+        self.in_flight = 0
+        _ACTIVE.discard(self)
+        await self.consumer.close()
+
+    def stats(self) -> dict:
+        lag = self.consumer.lag()
+        return {
+            "group": self.consumer.group,
+            "batches": self.batches,
+            "processed": self.processed,
+            "dead_lettered": self.dead_lettered,
+            "in_flight": self.in_flight,
+            "running": self.running,
+            "lag": sum(lag.values()),
+            "partitions": len(lag),
+            "error": repr(self.error) if self.error is not None else None,
+        }
+
+
+# ------------ Шина в процессе ------------
+
+
+class _Partition:
+    __slots__ = ("base", "messages")
+
+    def __init__(self):
+        self.base = 0  # Смещение первого хранимого сообщения
+        self.messages: List[Message] = []
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.messages)
+
+    def read(self, offset: int, limit: int) -> List[Message]:
+        start = max(offset - self.base, 0)
+        return self.messages[start:start + limit]
+
+    def trim(self, offset: int) -> None:
+        """Удаление сообщений до offset; копирование списка окупается только для большого префикса"""
+        count = offset - self.base
+        if count >= 1024 and count * 2 >= len(self.messages):
+            del self.messages[:count]
+            self.base = offset
+
+
+class InMemoryBus(MessageBus):
+    """
+    Топики из partitions партиций в памяти процесса. Сообщение с ключом
+    попадает в партицию crc32(key) % partitions, без ключа - по кругу.
+    Партиции топика делятся между потребителями группы по номеру;
+    сообщения, прочитанные всеми группами топика, удаляются. max_pending
+    ограничивает непрочитанный хвост самой отстающей группы: publish ждет,
+    пока группы не догонят (0 - без ограничения).
+    """
+
+    def __init__(self, partitions: int = 4, max_pending: int = 0):
+        self.partitions = partitions
+        self.max_pending = max_pending
+        self.topics: Dict[str, List[_Partition]] = {}
+        # Группа -> топики и члены группы; (группа, топик, партиция) -> смещение
+        self.groups: Dict[str, Set[str]] = {}
+        self.members: Dict[str, List["InMemoryConsumer"]] = {}
+        self.committed: Dict[Tuple[str, str, int], int] = {}
+        self._changed = asyncio.Condition()
+        self._round_robin = 0
+
+    def producer(self) -> "InMemoryProducer":
+        return InMemoryProducer(self)
+
+    def consumer(self, topics: Sequence[str], group: str) -> "InMemoryConsumer":
+        return InMemoryConsumer(self, topics, group)
+
+    def topic(self, name: str) -> List[_Partition]:
+        partitions = self.topics.get(name)
+        if partitions is None:
+            partitions = self.topics[name] = [_Partition() for _ in range(self.partitions)]
+        return partitions
+
+    def _partition_for(self, key: Optional[bytes]) -> int:
+        if key is None:
+            self._round_robin += 1
+            return self._round_robin % self.partitions
+        return zlib.crc32(key) % self.partitions
+
+    def pending(self, topic: str) -> int:
+        """Непрочитанные сообщения топика у самой отстающей группы"""
+        groups = [group for group, topics in self.groups.items() if topic in topics]
+        if not groups:
+            return 0
+        return max(
+            sum(partition.end - self.committed.get((group, topic, number), 0)
+                for number, partition in enumerate(self.topic(topic)))
+            for group in groups
+        )
+
+    async def publish(self, topic: str, values: Sequence[bytes], keys: Optional[Sequence[Optional[bytes]]]) -> None:
+        partitions = self.topic(topic)
+        async with self._changed:
+            if self.max_pending:
+                await self._changed.wait_for(lambda: self.pending(topic) < self.max_pending)
+            for i, value in enumerate(values):
+                key = keys[i] if keys is not None else None
+                number = self._partition_for(key)
+                partition = partitions[number]
+                partition.messages.append(Message(topic, number, partition.end, key, value))
+            self._changed.notify_all()
+        MESSAGES.labels(topic, "published").inc(len(values))
+
+    def join(self, consumer: "InMemoryConsumer") -> None:
+        self.groups.setdefault(consumer.group, set()).update(consumer.topics)
+        self.members.setdefault(consumer.group, []).append(consumer)
+        self._rebalance(consumer.group)
+
+    def leave(self, consumer: "InMemoryConsumer") -> None:
+        members = self.members.get(consumer.group, [])
+        if consumer in members:
+            members.remove(consumer)
+            self._rebalance(consumer.group)
+
+    def _rebalance(self, group: str) -> None:
+        """Партиции по кругу между членами группы; новые партиции читаются с зафиксированного смещения"""
+        members = self.members[group]
+        for index, member in enumerate(members):
+            assignment = {
+                (topic, number)
+                for topic in member.topics
+                for number in range(self.partitions)
+                if number % len(members) == index
+            }
+            member.positions = {
+                tp: member.positions.get(tp, self.committed.get((group, *tp), 0)) for tp in sorted(assignment)
+            }
+
+    def commit(self, group: str, offsets: Dict[TopicPartition, int]) -> None:
+        for (topic, number), offset in offsets.items():
+            self.committed[(group, topic, number)] = offset
+            groups = [name for name, topics in self.groups.items() if topic in topics]
+            self.topic(topic)[number].trim(min(self.committed.get((name, topic, number), 0) for name in groups))
+
+
+class InMemoryProducer(Producer):
+    def __init__(self, bus: InMemoryBus):
+        self.bus = bus
+
+    async def publish(
+        self,
+        topic: str,
+        values: Sequence[bytes],
+        keys: Optional[Sequence[Optional[bytes]]] = None,
+    ) -> None:
+        await self.bus.publish(topic, values, keys)
+
+
+class InMemoryConsumer(Consumer):
+    def __init__(self, bus: InMemoryBus, topics: Sequence[str], group: str):
+        self.bus = bus
+        self.topics = list(topics)
+        self.group = group
+        # Назначенные партиции и позиция чтения в каждой
+        self.positions: Dict[TopicPartition, int] = {}
+        self._next = 0
+
+    async def start(self) -> None:
+        self.bus.join(self)
+
+    async def fetch(self, max_records: int, timeout: float) -> List[Message]:
+        bus = self.bus
+        deadline = time.monotonic() + timeout
+        async with bus._changed:
+            while True:
+                messages = self._read(max_records)
+                remaining = deadline - time.monotonic()
+                if messages or remaining <= 0:
+                    return messages
+                try:
+                    await asyncio.wait_for(bus._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _read(self, max_records: int) -> List[Message]:
+        """Партиции по очереди, начиная каждый раз со следующей: ни одна не простаивает"""
+        assigned = list(self.positions)
+        messages: List[Message] = []
+        for i in range(len(assigned)):
+            if len(messages) >= max_records:
+                break
+            topic, number = tp = assigned[(self._next + i) % len(assigned)]
+            batch = self.bus.topic(topic)[number].read(self.positions[tp], max_records - len(messages))
+            if batch:
+                messages.extend(batch)
+                self.positions[tp] = batch[-1].offset + 1
+        self._next += 1
+        return messages
+
+    async def commit(self, offsets: Dict[TopicPartition, int]) -> None:
+        # Партиции, переданные другому члену группы, фиксирует он
+        owned = {tp: offset for tp, offset in offsets.items() if tp in self.positions}
+        async with self.bus._changed:
+            self.bus.commit(self.group, owned)
+            self.bus._changed.notify_all()
+
+    def lag(self) -> Dict[TopicPartition, int]:
+        return {
+            (topic, number): self.bus.topic(topic)[number].end - self.bus.committed.get((self.group, topic, number), 0)
+            for topic, number in self.positions
+        }
+
+    async def close(self) -> None:
+        async with self.bus._changed:
+            self.bus.leave(self)
+            self.positions = {}
+            self.bus._changed.notify_all()
+
+
+# ------------ Kafka ------------
+
+
+def _aiokafka():
+    try:
+        import aiokafka
+    except ImportError as e:
+        raise RuntimeError("KafkaBus требует пакет aiokafka (pip install aiokafka)") from e
+    return aiokafka
+
+
+class KafkaBus(MessageBus):
+    """
+    Kafka через aiokafka. Продюсер ждет подтверждения всех реплик (acks=all)
+    и собирает сообщения в пакеты до linger_ms; потребитель читает с
+    начала топика, если у группы нет зафиксированного смещения.
+    """
+
+    def __init__(self, bootstrap_servers: str, linger_ms: int = 20, compression_type: Optional[str] = "gzip"):
+        _aiokafka()
+        self.bootstrap_servers = bootstrap_servers
+        self.linger_ms = linger_ms
+        self.compression_type = compression_type
+
+    def producer(self) -> "KafkaProducer":
+        return KafkaProducer(self)
+
+    def consumer(self, topics: Sequence[str], group: str) -> "KafkaConsumer":
+        return KafkaConsumer(self, topics, group)
+
+
+class KafkaProducer(Producer):
+    def __init__(self, bus: KafkaBus):
+        self.producer = _aiokafka().AIOKafkaProducer(
+            bootstrap_servers=bus.bootstrap_servers,
+            acks="all",
+            linger_ms=bus.linger_ms,
+            compression_type=bus.compression_type,
+        )
+
+    async def start(self) -> None:
+        await self.producer.start()
+
+    async def publish(
+        self,
+        topic: str,
+        values: Sequence[bytes],
+        keys: Optional[Sequence[Optional[bytes]]] = None,
+    ) -> None:
+        # Сообщения пачки отправляются без ожидания каждого, затем пачка подтверждается целиком
+        futures = [
+            await self.producer.send(topic, value=value, key=keys[i] if keys is not None else None)
+            for i, value in enumerate(values)
+        ]
+        await asyncio.gather(*futures)
+        MESSAGES.labels(topic, "published").inc(len(values))
+
+    async def close(self) -> None:
+        await self.producer.stop()
+
+
+class KafkaConsumer(Consumer):
+    def __init__(self, bus: KafkaBus, topics: Sequence[str], group: str):
+        self.group = group
+        self.consumer = _aiokafka().AIOKafkaConsumer(
+            *topics,
+            bootstrap_servers=bus.bootstrap_servers,
+            group_id=group,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+        )
+        # Зафиксированные смещения известны после первой фиксации или первого чтения партиции
+        self._committed: Dict[TopicPartition, int] = {}
+
+    async def start(self) -> None:
+        await self.consumer.start()
+
+    async def fetch(self, max_records: int, timeout: float) -> List[Message]:
+        partitions = await self.consumer.getmany(timeout_ms=int(timeout * 1000), max_records=max_records)
+        messages = [
+            Message(record.topic, record.partition, record.offset, record.key, record.value)
+            for records in partitions.values()
+            for record in records
+        ]
+        for message in messages:
+            self._committed.setdefault((message.topic, message.partition), message.offset)
+        return messages
+
+    async def commit(self, offsets: Dict[TopicPartition, int]) -> None:
+        aiokafka = _aiokafka()
+        try:
+            await self.consumer.commit({aiokafka.TopicPartition(*tp): offset for tp, offset in offsets.items()})
+        except (aiokafka.errors.CommitFailedError, aiokafka.errors.IllegalStateError) as e:
+            # Партиции переданы другому члену группы: он прочитает их с последней фиксации
+            logger.warning("Commit of %s failed after rebalance: %r", self.group, e)
+            return
+        self._committed.update(offsets)
+
+    def lag(self) -> Dict[TopicPartition, int]:
+        lag = {}
+        for tp in self.consumer.assignment():
+            highwater = self.consumer.highwater(tp)
+            committed = self._committed.get((tp.topic, tp.partition))
+            if highwater is not None and committed is not None:
+                lag[(tp.topic, tp.partition)] = highwater - committed
+        return lag
+
+    async def close(self) -> None:
+        await self.consumer.stop()
+
@@ -0,0 +1,320 @@
+"""
+Общий модуль метрик в формате Prometheus для шлюза и сервисов.
+
+Запись значений не берет блокировок: у каждого потока своя копия (shard)
+счетчиков, при выдаче /metrics копии суммируются. Это важно для горячего
+пути - метрики пишутся на каждый запрос.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы бакетов для задержек в секундах
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """Значения по потокам: запись без блокировок, блокировка только при создании shard"""
+
+    def __init__(self, factory: Callable[[], list]):
+        self._factory = factory
+        self._shards: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def local(self) -> list:
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(threading.get_ident(), self._factory())
+        return shard
+
+    def shards(self) -> List[list]:
+        return list(self._shards.values())
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Дочерняя метрика для набора значений меток (кешируется)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, Sequence[str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, values, extra_names, value in self.samples():
+            names = self.labelnames + tuple(extra_names)
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("_values",)
+
+    def __init__(self):
+        self._values = _Sharded(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._values.local()[0] += amount
+
+    def get(self) -> float:
+        return sum(shard[0] for shard in self._values.shards())
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._values.local()[0] -= amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield "_total" if not self.name.endswith("_total") else "", values, (), child.get()
+
+
+class Gauge(_Metric):
+    """
+    Gauge с inc/dec (например, запросы в работе) либо с функцией,
+    значение которой вычисляется при выдаче /metrics (состояние пулов).
+    """
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set_function(self, function: Callable[[], Iterable[Tuple[LabelValues, float]]]) -> None:
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            for values, value in self._function():
+                yield "", tuple(values), (), value
+            return
+        for values, child in list(self._children.items()):
+            yield "", values, (), child.get()
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_values")
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = buckets
+        # [счетчики бакетов..., +Inf, сумма]
+        self._values = _Sharded(lambda: [0.0] * (len(buckets) + 2))
+
+    def observe(self, value: float) -> None:
+        shard = self._values.local()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> List[float]:
+        total = [0.0] * (len(self._buckets) + 2)
+        for shard in self._values.shards():
+            for i, value in enumerate(shard):
+                total[i] += value
+        return total
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self):
+        bounds = self.buckets + (float("inf"),)
+        for values, child in list(self._children.items()):
+            snapshot = child.snapshot()
+            cumulative = 0.0
+            for bound, count in zip(bounds, snapshot):
+                cumulative += count
+                yield "_bucket", values + (_format_value(bound),), ("le",), cumulative
+            yield "_count", values, (), cumulative
+            yield "_sum", values, (), snapshot[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Регистрирует метрику; повторная регистрация возвращает существующую"""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), function=None) -> Gauge:
+        gauge = self.register(Gauge(name, documentation, labelnames))
+        if function is not None:
+            gauge.set_function(function)
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP запросы по маршруту, методу и статусу",
+    ("service", "route", "method", "status"),
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Время обработки HTTP запроса",
+    ("service", "route", "method"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP запросы в обработке", ("service",),
+)
+HTTP_ERRORS = REGISTRY.counter(
+    "http_request_errors_total", "Необработанные исключения в обработчиках", ("service", "route"),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: число запросов, задержка (до конца отправки тела) и запросы
+    в обработке. Метка route - шаблон пути маршрута, а не сам путь,
+    чтобы число временных рядов не росло с числом уникальных URL.
+    """
+
+    def __init__(self, app: ASGIApp, service: str):
+        self.app = app
+        self.service = service
+        self.in_flight = HTTP_IN_FLIGHT.labels(service)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            HTTP_ERRORS.labels(self.service, _route_label(scope)).inc()
+            raise
+        finally:
+            self.in_flight.dec()
+            route = _route_label(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(self.service, route, method, str(status_code)).inc()
+            HTTP_LATENCY.labels(self.service, route, method).observe(time.perf_counter() - start)
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
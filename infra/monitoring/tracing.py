@@ -0,0 +1,340 @@
+"""
+Легковесная трассировка запросов с передачей контекста в формате W3C traceparent.
+
+Спаны отправляются в подключаемый экспортер (в память, в JSONL-файл, в лог),
+а длительность каждого спана дополнительно пишется в гистограмму
+trace_span_duration_seconds - это дает разбивку задержки по фазам даже без
+внешней системы трассировки.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from infra.monitoring.monitoring import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SPAN_LATENCY = REGISTRY.histogram(
+    "trace_span_duration_seconds", "Длительность фаз обработки запроса", ("service", "span"),
+)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    service: str
+    sampled: bool
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["duration_ms"] = self.duration_ms
+        return data
+
+
+class SpanExporter:
+    """Базовый экспортер: получает каждый завершенный записываемый спан"""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Хранит последние max_spans спанов в памяти (для тестов и отладки)"""
+
+    def __init__(self, max_spans: int = 10000):
+        self.spans: deque = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def by_trace(self, trace_id: str) -> List[Span]:
+        return [span for span in self.spans if span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class FileExporter(SpanExporter):
+    """Пишет спаны в JSONL-файл, по строке на спан"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class LoggingExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        logger.info("span %s", json.dumps(span.to_dict(), ensure_ascii=False))
+
+
+def create_exporter(kind: str, path: Optional[str] = None) -> Optional[SpanExporter]:
+    """Экспортер по имени из настроек: memory, file, log или none"""
+    if kind == "memory":
+        return InMemoryExporter()
+    if kind == "file":
+        return FileExporter(path or "traces.jsonl")
+    if kind == "log":
+        return LoggingExporter()
+    return None
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """'00-<trace_id>-<parent_id>-<flags>' -> (trace_id, parent_id, sampled)"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Tracer:
+    """
+    Создает спаны одного сервиса.
+
+    Решение о записи трассы принимается один раз на корневом спане
+    (sample_rate) либо берется из входящего traceparent; дочерние спаны его наследуют.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        exporter: Optional[SpanExporter] = None,
+        sample_rate: float = 1.0,
+    ):
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        remote: Optional[Tuple[str, str, bool]] = None,
+        start_ns: Optional[int] = None,
+    ) -> Span:
+        parent = parent if parent is not None else _current_span.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        elif remote is not None:
+            trace_id, parent_id, sampled = remote
+        else:
+            trace_id, parent_id = _new_id(128), None
+            sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        span = Span(
+            trace_id=trace_id,
+            span_id=_new_id(64),
+            parent_id=parent_id,
+            name=name,
+            service=self.service,
+            sampled=sampled and self.enabled,
+        )
+        if start_ns is not None:
+            span.start_ns = start_ns
+        return span
+
+    def end_span(self, span: Span, end_ns: Optional[int] = None) -> None:
+        span.end_ns = end_ns if end_ns is not None else time.time_ns()
+        if not span.sampled:
+            return
+        SPAN_LATENCY.labels(self.service, span.name).observe((span.end_ns - span.start_ns) / 1e9)
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.warning("Span export failed: %r", e)
+
+    def record_span(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        parent: Optional[Span] = None,
+        **attributes,
+    ) -> None:
+        """Записывает уже завершившуюся фазу (например, по событиям httpx trace)"""
+        span = self.start_span(name, parent=parent, start_ns=start_ns)
+        if span.sampled:
+            span.attributes.update(attributes)
+        self.end_span(span, end_ns)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Спан вокруг блока кода; внутри блока он становится текущим"""
+        if not self.enabled:
+            # Трассировка выключена: без генерации идентификаторов на горячем пути
+            yield _DISABLED_SPAN
+            return
+        span = self.start_span(name)
+        if span.sampled:
+            span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_attribute("error", repr(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def inject(self, headers: MutableMapping[str, str], span: Optional[Span] = None) -> None:
+        """Добавляет traceparent текущего спана в заголовки исходящего запроса"""
+        span = span if span is not None else _current_span.get()
+        if span is not None:
+            flags = "01" if span.sampled else "00"
+            headers["traceparent"] = f"00-{span.trace_id}-{span.span_id}-{flags}"
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+_DISABLED_SPAN = Span(
+    trace_id="0" * 32, span_id="0" * 16, parent_id=None, name="", service="", sampled=False,
+)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class HttpxTrace:
+    """
+    Обработчик request.extensions["trace"] для httpx.
+
+    По событиям httpcore записывает дочерние спаны фаз исходящего запроса:
+    upstream.connect (TCP + TLS, если соединение не из пула),
+    upstream.ttfb (от отправки заголовков до получения заголовков ответа)
+    и upstream.body (чтение тела до закрытия ответа).
+    Обработчик асинхронный: httpcore в httpx.AsyncClient ждет от него корутину
+    (для синхронного httpx.Client нужен обычный вызываемый объект).
+    """
+
+    def __init__(self, tracer: Tracer, span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.events: Dict[str, int] = {}
+        self.headers_received_ns: Optional[int] = None
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        # http11.send_request_headers.started -> send_request_headers.started
+        self.events[event_name.split(".", 1)[1]] = time.time_ns()
+
+    def response_started(self, status_code: int) -> None:
+        events = self.events
+        self.span.set_attribute("http.status_code", status_code)
+        if "connect_tcp.started" in events:
+            connected = events.get("start_tls.complete") or events.get("connect_tcp.complete")
+            if connected:
+                self.tracer.record_span(
+                    "upstream.connect", events["connect_tcp.started"], connected, parent=self.span
+                )
+        sent = events.get("send_request_headers.started")
+        received = events.get("receive_response_headers.complete")
+        if sent and received:
+            self.tracer.record_span("upstream.ttfb", sent, received, parent=self.span)
+        self.headers_received_ns = received or time.time_ns()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if error is not None:
+            self.span.set_attribute("error", repr(error))
+        if self.headers_received_ns is not None:
+            self.tracer.record_span(
+                "upstream.body", self.headers_received_ns, time.time_ns(), parent=self.span
+            )
+        self.tracer.end_span(self.span)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: корневой спан на запрос с учетом входящего traceparent.
+    Спан завершается после отправки всего тела ответа.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        remote = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                remote = parse_traceparent(value.decode("latin-1"))
+                break
+
+        # Имя спана постоянное: оно же метка гистограммы, путь хранится в атрибутах
+        span = self.tracer.start_span("http.request", remote=remote)
+        span.set_attribute("http.method", scope["method"])
+        span.set_attribute("http.path", scope["path"])
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        token = _current_span.set(span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_span.reset(token)
+            self.tracer.end_span(span)
@@ -0,0 +1,71 @@
+"""
+Запуск сервисов под uvicorn в режиме для продакшена.
+
+N процессов-воркеров (каждый со своим event loop и своими пулами соединений),
+uvloop/httptools при наличии и корректная остановка: по SIGTERM воркер
+перестает принимать соединения, дожидается завершения запросов в работе,
+включая потоковые ответы, не дольше graceful_timeout секунд, и только после
+этого выполняет завершение lifespan (закрытие пулов и клиентов).
+"""
+import importlib.util
+import logging
+import os
+from typing import Optional
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_loop(loop: str) -> str:
+    if loop == "auto":
+        return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    return loop
+
+
+def resolve_http(http: str) -> str:
+    if http == "auto":
+        return "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return http
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def serve(
+    app: str,
+    host: str,
+    port: int,
+    workers: Optional[int] = 1,
+    loop: str = "auto",
+    http: str = "auto",
+    reload: bool = False,
+    graceful_timeout: Optional[float] = 30.0,
+    log_level: str = "info",
+    access_log: bool = False,
+) -> None:
+    """
+    app - строка импорта ("main:app"): без нее uvicorn не может запускать воркеров.
+    workers=None или 0 - по числу CPU. reload только для разработки, с одним процессом.
+    """
+    workers = workers or default_workers()
+    if reload and workers > 1:
+        logger.warning("reload несовместим с несколькими воркерами, запускается один процесс")
+        workers = 1
+
+    loop, http = resolve_loop(loop), resolve_http(http)
+    logger.info("Starting %s on %s:%s: workers=%s loop=%s http=%s", app, host, port, workers, loop, http)
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        reload=reload,
+        lifespan="on",
+        timeout_graceful_shutdown=graceful_timeout,
+        log_level=log_level,
+        access_log=access_log,
+    )
@@ -0,0 +1,78 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field
+import os
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Configs(BaseSettings):
+    # ------------ Веб-сервер ------------
+    HOST: str = "localhost"
+    PORT: int = 8020
+    WORKERS: int = Field(
+        default=1, env="WORKERS"
+    )  # Масштабирование по ядрам - через INFERENCE_PROCESSES, а не воркеры uvicorn
+    LOOP: str = Field(default="auto", env="LOOP")
+    HTTP: str = Field(default="auto", env="HTTP")
+    RELOAD: bool = Field(default=False, env="RELOAD")
+    GRACEFUL_SHUTDOWN_TIMEOUT: float = Field(default=30, env="GRACEFUL_SHUTDOWN_TIMEOUT")
+
+    PROJECT_NAME: str = "Сервис обработки вакансий (ML)"
+
+    # ------------ Модель ------------
+    MODEL_PATH: str = Field(
+        default=os.path.join(SERVICE_DIR, "ml_models", "default"), env="MODEL_PATH"
+    )  # Каталог модели (в docker-compose - /ml_service/models/<имя>)
+
+    # ------------ Инференс ------------
+    INFERENCE_PROCESSES: int = Field(
+        default=os.cpu_count() or 1, env="INFERENCE_PROCESSES"
+    )  # Процессы пула инференса (0 - в потоке основного процесса)
+    MAX_BATCH_SIZE: int = Field(default=64, env="MAX_BATCH_SIZE")
+    MAX_BATCH_DELAY_MS: float = Field(
+        default=5, env="MAX_BATCH_DELAY_MS"
+    )  # Пачка отправляется по размеру или через столько мс после первого элемента
+    MAX_QUEUE_SIZE: int = Field(
+        default=10000, env="MAX_QUEUE_SIZE"
+    )  # Элементов в очереди на инференс, сверх - 503
+    MAX_BATCHES_IN_FLIGHT: int = Field(
+        default=0, env="MAX_BATCHES_IN_FLIGHT"
+    )  # Пачек в обработке одновременно (0 - 2 * INFERENCE_PROCESSES)
+    STATS_WINDOW: float = Field(
+        default=60, env="STATS_WINDOW"
+    )  # Окно расчета пропускной способности и задержек, сек
+
+    # ------------ Кэш признаков ------------
+    FEATURE_CACHE_ENABLED: bool = Field(
+        default=True, env="FEATURE_CACHE_ENABLED"
+    )  # Признаки вакансий с неизменным текстом не считаются повторно
+    FEATURE_CACHE_PATH: str = Field(default="data/feature_cache", env="FEATURE_CACHE_PATH")
+    FEATURE_CACHE_MAX_MB: int = Field(
+        default=1024, env="FEATURE_CACHE_MAX_MB"
+    )  # Бюджет на диске; при превышении вытесняются давно не читанные записи
+
+    # ------------ Kafka ------------
+    KAFKA_ENABLED: bool = Field(
+        default=False, env="KAFKA_ENABLED"
+    )  # Обогащение потока вакансий от dataMining_service
+    KAFKA_BOOTSTRAP_SERVERS: str = Field(default="localhost:9092", env="KAFKA_BOOTSTRAP_SERVERS")
+    KAFKA_INPUT_TOPIC: str = Field(default="vacancies.raw", env="KAFKA_INPUT_TOPIC")
+    KAFKA_OUTPUT_TOPIC: str = Field(default="vacancies.enriched", env="KAFKA_OUTPUT_TOPIC")
+    KAFKA_GROUP_ID: str = Field(default="ml-service", env="KAFKA_GROUP_ID")
+    KAFKA_DEAD_LETTER_TOPIC: str = Field(
+        default="vacancies.raw.dlq", env="KAFKA_DEAD_LETTER_TOPIC"
+    )  # Сообщения, которые не удалось обработать (пустая строка - только пропуск в логе)
+    KAFKA_BATCH_SIZE: int = Field(default=256, env="KAFKA_BATCH_SIZE")  # Сообщений в пачке на инференс
+    KAFKA_CONSUMER_CONCURRENCY: int = Field(
+        default=2, env="KAFKA_CONSUMER_CONCURRENCY"
+    )  # Пачек в обработке одновременно: инференс следующей идет во время записи предыдущей
+    KAFKA_MAX_IN_FLIGHT: int = Field(
+        default=0, env="KAFKA_MAX_IN_FLIGHT"
+    )  # Прочитанных и необработанных сообщений, сверх - чтение ждет (0 - 2 * пачка * concurrency)
+
+    model_config = SettingsConfigDict(
+        env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
+    )
+
+
+configs = Configs()
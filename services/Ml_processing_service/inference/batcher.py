@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class Overloaded(Exception):
+    """Очередь на обработку заполнена"""
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Собирает элементы отдельных запросов в пачки: пачка уходит в process,
+    когда набрано max_batch_size элементов или прошло max_delay секунд
+    с первого элемента. Одновременно обрабатывается не больше max_in_flight
+    пачек; пока они заняты, элементы копятся в очереди и следующая пачка
+    выходит полнее - под нагрузкой размер пачки растет сам.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[T]], Awaitable[Sequence[R]]],
+        max_batch_size: int,
+        max_delay: float,
+        max_queue_size: int,
+        max_in_flight: int,
+    ):
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: "asyncio.Queue[Tuple[T, asyncio.Future]]" = asyncio.Queue(maxsize=max_queue_size)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._collector: Optional[asyncio.Task] = None
+        self._batches: "set[asyncio.Task]" = set()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._batches)
+
+    def start(self) -> None:
+        self._collector = asyncio.create_task(self._collect())
+
+    async def submit_many(self, items: Sequence[T]) -> List[R]:
+        if self._queue.maxsize and self._queue.qsize() + len(items) > self._queue.maxsize:
+            raise Overloaded(f"В очереди {self._queue.qsize()} элементов")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self._queue.put_nowait((item, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def submit(self, item: T) -> R:
+        return (await self.submit_many([item]))[0]
+
+    async def _collect(self) -> None:
+        batch: List[Tuple[T, asyncio.Future]] = []
+        try:
+            while True:
+                # Элементы копятся в batch: при отмене посреди сбора они не теряются
+                await self._next_batch(batch)
+                await self._slots.acquire()
+                task = asyncio.create_task(self._run(batch))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+                batch = []
+        except asyncio.CancelledError:
+            self._fail(batch, Overloaded("Сервис останавливается"))
+            raise
+
+    async def _next_batch(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results = await self.process([item for item, _ in batch])
+        except Exception as e:
+            self._fail(batch, e)
+        except BaseException:
+            self._fail(batch, Overloaded("Сервис останавливается"))
+            raise
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def stop(self) -> None:
+        """Новые элементы не собираются; пачки в обработке дорабатывают"""
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, return_exceptions=True)
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        while not self._queue.empty():
+            self._fail([self._queue.get_nowait()], Overloaded("Сервис останавливается"))
+
+    @staticmethod
+    def _fail(batch: List[Tuple[T, asyncio.Future]], error: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
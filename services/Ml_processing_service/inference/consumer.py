@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+from typing import List
+
+from pydantic import ValidationError
+
+from services.Ml_processing_service.core.config import Configs
+from services.Ml_processing_service.inference.batcher import Overloaded
+from services.Ml_processing_service.inference.engine import InferenceEngine
+from services.Ml_processing_service.schemas.inference_schema import VacancyText
+from infra.messaging.bus import BatchConsumer, Message, MessageBus
+from infra.monitoring.monitoring import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MESSAGES = REGISTRY.counter(
+    "ml_kafka_messages_total", "Сообщения из входного топика", ("status",),
+)
+
+
+class StreamEnricher:
+    """
+    Обогащение потока вакансий: сообщения входного топика читаются пачками
+    по KAFKA_BATCH_SIZE, проходят инференс тем же движком, что и
+    HTTP-запросы, и пишутся в выходной топик; одновременно обрабатывается
+    до KAFKA_CONSUMER_CONCURRENCY пачек. Смещения фиксируются после
+    подтверждения записи - при сбое пачка обрабатывается повторно, а не
+    теряется. Сообщения, не прошедшие проверку VacancyText или обработку,
+    уходят в KAFKA_DEAD_LETTER_TOPIC и не останавливают поток.
+    """
+
+    def __init__(self, configs: Configs, engine: InferenceEngine, bus: MessageBus):
+        self.configs = configs
+        self.engine = engine
+        self.producer = bus.producer()
+        self.consumer = BatchConsumer(
+            bus.consumer([configs.KAFKA_INPUT_TOPIC], configs.KAFKA_GROUP_ID),
+            self._handle,
+            batch_size=configs.KAFKA_BATCH_SIZE,
+            concurrency=configs.KAFKA_CONSUMER_CONCURRENCY,
+            max_in_flight=configs.KAFKA_MAX_IN_FLIGHT,
+            dead_letter=self._dead_letter,
+        )
+
+    async def start(self) -> None:
+        await self.producer.start()
+        await self.consumer.start()
+
+    async def _handle(self, messages: List[Message]) -> None:
+        valid, records, items, invalid = [], [], [], []
+        for message in messages:
+            try:
+                record = json.loads(message.value)
+                item = VacancyText.model_validate(record)
+            except ValueError as e:
+                # ValidationError - подкласс ValueError: не объект JSON или нет нужных полей
+                error = "validation" if isinstance(e, ValidationError) else "json"
+                logger.warning("Invalid message at %s:%s (%s)", message.partition, message.offset, error)
+                invalid.append(message)
+                continue
+            valid.append(message)
+            records.append(record)
+            items.append(item.model_dump())
+        if invalid:
+            MESSAGES.labels("invalid").inc(len(invalid))
+            await self._publish_dead_letters(invalid)
+        if not records:
+            return
+        results = await self._predict(items)
+        await self.producer.publish(
+            self.configs.KAFKA_OUTPUT_TOPIC,
+            [json.dumps({**record, **result}, ensure_ascii=False).encode("utf-8")
+             for record, result in zip(records, results)],
+            [message.key for message in valid],
+        )
+        MESSAGES.labels("ok").inc(len(records))
+
+    async def _predict(self, records: list) -> list:
+        # HTTP-запросы заполнили очередь: ждем, а не теряем сообщения
+        while True:
+            try:
+                return await self.engine.predict(records)
+            except Overloaded:
+                await asyncio.sleep(1)
+
+    async def _dead_letter(self, message: Message, error: Exception) -> None:
+        """Сообщение, на котором падает обработка (после повторов BatchConsumer)"""
+        await self._publish_dead_letters([message])
+
+    async def _publish_dead_letters(self, messages: List[Message]) -> None:
+        # Исходные сообщения без изменений: их можно разобрать и переотправить вручную
+        if self.configs.KAFKA_DEAD_LETTER_TOPIC:
+            await self.producer.publish(
+                self.configs.KAFKA_DEAD_LETTER_TOPIC,
+                [message.value for message in messages],
+                [message.key for message in messages],
+            )
+        MESSAGES.labels("dead_letter").inc(len(messages))
+
+    @property
+    def running(self) -> bool:
+        return self.consumer.running
+
+    def stats(self) -> dict:
+        return self.consumer.stats()
+
+    async def stop(self) -> None:
+        # Прочитанные пачки дописываются в выходной топик до остановки продюсера
+        await self.consumer.stop()
+        await self.producer.close()
@@ -0,0 +1,215 @@
+"""
+Движок инференса: микропакетирование запросов и пул процессов по ядрам CPU.
+
+Запросы (HTTP и поток из Kafka) отдают вакансии в MicroBatcher, пачки
+выполняются в ProcessPoolExecutor: извлечение навыков и признаки - чистый
+Python, поэтому масштабирование по ядрам - процессами, а не потоками.
+Процессы запускаются через spawn (безопасно при работающем event loop) и
+загружают модель лениво, веса - через mmap.
+
+Если процесс пула погиб (OOM, сигнал), пул становится непригодным
+(BrokenProcessPool): он пересоздается, а пачка повторяется один раз.
+
+Кэш признаков живет в основном процессе: перед отправкой пачки в пул из
+него берутся признаки вакансий с уже встречавшимся текстом, процесс пула
+считает только остальные и возвращает их для записи в кэш.
+"""
+import asyncio
+import math
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.Ml_processing_service.core.config import Configs
+from services.Ml_processing_service.inference import worker
+from services.Ml_processing_service.inference.batcher import MicroBatcher
+from services.Ml_processing_service.inference.feature_cache import FeatureCache
+from services.Ml_processing_service.inference.model import Features, InferenceModel
+from infra.monitoring.monitoring import REGISTRY
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+ITEMS = REGISTRY.counter(
+    "ml_items_total", "Обработанные вакансии", ("status",),
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "ml_batch_size", "Размер пачки инференса", (), buckets=BATCH_SIZE_BUCKETS,
+)
+BATCH_LATENCY = REGISTRY.histogram(
+    "ml_batch_duration_seconds", "Время пачки: от отправки в пул до результата", (),
+)
+BATCH_COMPUTE = REGISTRY.histogram(
+    "ml_batch_compute_seconds", "Время вычисления пачки в процессе пула", (),
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "ml_queue_depth", "Вакансии в очереди на инференс", (),
+)
+POOL_RESTARTS = REGISTRY.counter(
+    "ml_pool_restarts_total", "Пересоздания пула процессов после гибели процесса", (),
+)
+
+
+class WindowStats:
+    """Пачки за последние window секунд: пропускная способность и перцентили задержки"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._started = time.monotonic()
+        self._batches: Deque[Tuple[float, int, float]] = deque()  # (время, размер, задержка)
+        self.total_items = 0
+        self.total_batches = 0
+
+    def add(self, size: int, latency: float) -> None:
+        now = time.monotonic()
+        self._batches.append((now, size, latency))
+        self.total_items += size
+        self.total_batches += 1
+        self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._batches and self._batches[0][0] < now - self.window:
+            self._batches.popleft()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        self._trim(now)
+        # Первые window секунд после старта делим на фактически прошедшее время
+        elapsed = min(self.window, now - self._started)
+        sizes = [size for _, size, _ in self._batches]
+        latencies = sorted(latency for _, _, latency in self._batches)
+
+        def percentile(q: float) -> float:
+            if not latencies:
+                return 0.0
+            rank = max(math.ceil(q / 100 * len(latencies)) - 1, 0)
+            return round(latencies[rank] * 1000, 3)
+
+        return {
+            "window_s": self.window,
+            "items_per_second": round(sum(sizes) / elapsed, 2) if elapsed > 0 else 0.0,
+            "batches": len(sizes),
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "batch_latency_ms": {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99)},
+            "total_items": self.total_items,
+            "total_batches": self.total_batches,
+        }
+
+
+class InferenceEngine:
+    def __init__(self, configs: Configs):
+        self.configs = configs
+        self.model = InferenceModel(configs.MODEL_PATH)
+        self.processes = configs.INFERENCE_PROCESSES
+        self.executor: Optional[Executor] = None
+        self.cache: Optional[FeatureCache] = None
+        self.stats = WindowStats(configs.STATS_WINDOW)
+        self.pids: set = set()
+        max_in_flight = configs.MAX_BATCHES_IN_FLIGHT or 2 * max(self.processes, 1)
+        self.batcher: MicroBatcher[dict, dict] = MicroBatcher(
+            self._run_batch,
+            max_batch_size=configs.MAX_BATCH_SIZE,
+            max_delay=configs.MAX_BATCH_DELAY_MS / 1000,
+            max_queue_size=configs.MAX_QUEUE_SIZE,
+            max_in_flight=max_in_flight,
+        )
+
+    def start(self) -> None:
+        if self.configs.FEATURE_CACHE_ENABLED:
+            self.cache = FeatureCache(self.configs.FEATURE_CACHE_PATH, self.configs.FEATURE_CACHE_MAX_MB << 20)
+        self.executor = self._create_executor()
+        self.batcher.start()
+        QUEUE_DEPTH.set_function(lambda: [((), self.batcher.queued)])
+
+    def _create_executor(self) -> Executor:
+        if self.processes > 0:
+            return ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=worker.init_worker,
+                initargs=(self.configs.MODEL_PATH,),
+            )
+        return ThreadPoolExecutor(
+            max_workers=1,
+            initializer=worker.init_worker,
+            initargs=(self.configs.MODEL_PATH,),
+        )
+
+    def _replace_executor(self, broken: Executor) -> None:
+        """Новый пул вместо упавшего; пачки, увидевшие тот же пул, пересоздают его один раз"""
+        if self.executor is not broken:
+            return
+        POOL_RESTARTS.inc()
+        self.executor = self._create_executor()
+        self.pids = set()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def _predict_in_pool(
+        self,
+        items: List[dict],
+        cached: Optional[List[Optional[Features]]],
+    ) -> Tuple[List[dict], Dict[int, Features], float, int]:
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self.executor
+            try:
+                return await loop.run_in_executor(executor, worker.predict_batch, items, cached)
+            except BrokenProcessPool:
+                self._replace_executor(executor)
+                # Повторно падает на той же пачке - вероятно, пачка и убивает процесс
+                if attempt:
+                    raise
+
+    async def stop(self) -> None:
+        await self.batcher.stop()
+        if self.executor is not None:
+            await asyncio.to_thread(self.executor.shutdown, wait=True, cancel_futures=True)
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.close)
+
+    async def predict(self, items: List[dict]) -> List[dict]:
+        return await self.batcher.submit_many(items)
+
+    async def _run_batch(self, items: List[dict]) -> List[dict]:
+        started = time.perf_counter()
+        try:
+            keys, cached = None, None
+            if self.cache is not None:
+                keys, cached = await asyncio.to_thread(self._cached_features, items)
+            results, computed, compute, pid = await self._predict_in_pool(items, cached)
+            if self.cache is not None and computed:
+                rows = list(computed)
+                await asyncio.to_thread(self.cache.put_many, keys[rows], [computed[row] for row in rows])
+        except Exception:
+            ITEMS.labels("error").inc(len(items))
+            raise
+        latency = time.perf_counter() - started
+        self.pids.add(pid)
+        BATCH_SIZE.observe(len(items))
+        BATCH_LATENCY.observe(latency)
+        BATCH_COMPUTE.observe(compute)
+        ITEMS.labels("ok").inc(len(items))
+        self.stats.add(len(items), latency)
+        return results
+
+    def _cached_features(self, items: List[dict]) -> Tuple[np.ndarray, List[Optional[Features]]]:
+        # Хеширование описаний (до 100 КБ) - вне event loop
+        keys = self.model.featurizer.keys(items)
+        return keys, self.cache.get_many(keys)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats.snapshot(),
+            "queued": self.batcher.queued,
+            "batches_in_flight": self.batcher.in_flight,
+            "processes": self.processes,
+            "active_processes": len(self.pids),
+            "max_batch_size": self.batcher.max_batch_size,
+            "max_batch_delay_ms": self.configs.MAX_BATCH_DELAY_MS,
+            "feature_cache": self.cache.stats() if self.cache is not None else None,
+        }
+
@@ -0,0 +1,241 @@
+"""
+Кэш признаков вакансий по содержимому.
+
+Ключ - Featurizer.key: хеш текстовых полей вакансии и Featurizer.id, поэтому
+переобучение и смена версии модели с тем же кодом признаков и словарем
+навыков попадают в кэш, а изменение признаков дает новые ключи (старые
+записи вытесняются как неиспользуемые).
+
+Хранение - журнал сегментов. Новые записи копятся в открытом сегменте в
+памяти; при достижении segment_bytes он записывается на диск (data.bin -
+номера признаков uint32 и навыки в UTF-8 подряд, index.npy - ключи по
+возрастанию со смещениями) и дальше читается через mmap. Поиск пачки -
+np.searchsorted по индексам сегментов от новых к старым.
+
+Вытеснение - LRU с точностью до сегмента: при превышении max_bytes удаляется
+самый старый сегмент целиком, а записи, прочитанные из сегментов, которые
+будут вытеснены следующими (старейшая четверть бюджета при заполненном
+кэше), копируются в открытый - используемые записи не стареют, а повторный
+проход по корпусу, умещающемуся в бюджет, ничего не переписывает.
+Открытый сегмент сохраняется при close(); после сбоя теряется только он.
+"""
+import json
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.Ml_processing_service.inference.model import Features
+from infra.monitoring.monitoring import REGISTRY
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "ml_feature_cache_requests_total", "Запросы признаков к кэшу", ("result",),
+)
+CACHE_BYTES = REGISTRY.gauge(
+    "ml_feature_cache_bytes", "Размер кэша признаков", (),
+)
+
+INDEX_DTYPE = np.dtype([("key", "<u8"), ("offset", "<u8"), ("columns", "<u4"), ("skill_bytes", "<u4")])
+_SKILL_SEPARATOR = "\x1f"
+
+
+def encode_entry(features: Features) -> bytes:
+    skills, columns = features
+    return columns.astype("<u4").tobytes() + _SKILL_SEPARATOR.join(skills).encode("utf-8")
+
+
+def decode_entry(data, offset: int, columns: int, skill_bytes: int) -> Features:
+    end = offset + 4 * columns
+    column_values = np.frombuffer(data[offset:end], dtype="<u4").astype(np.uint32)
+    text = bytes(data[end:end + skill_bytes]).decode("utf-8")
+    return (text.split(_SKILL_SEPARATOR) if text else []), column_values
+
+
+class Segment:
+    """Закрытый сегмент на диске: индекс и данные открываются через mmap"""
+
+    def __init__(self, seg_id: int, path: str):
+        self.id = seg_id
+        self.path = path
+        self.index = np.load(os.path.join(path, "index.npy"), mmap_mode="r")
+        data_path = os.path.join(path, "data.bin")
+        size = os.path.getsize(data_path)
+        self.data = np.memmap(data_path, dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+        self.nbytes = size + self.index.nbytes
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Номера строк индекса для ключей (-1, если ключа нет)"""
+        index_keys = self.index["key"]
+        if not len(index_keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(index_keys, keys), len(index_keys) - 1)
+        return np.where(index_keys[positions] == keys, positions, -1)
+
+    def read(self, position: int) -> Features:
+        entry = self.index[position]
+        return decode_entry(self.data, int(entry["offset"]), int(entry["columns"]), int(entry["skill_bytes"]))
+
+    @staticmethod
+    def write(path: str, entries: Dict[int, Tuple[int, int, int]], data: bytearray) -> None:
+        """Запись во временный каталог и переименование: сегмент появляется целиком"""
+        index = np.array(
+            [(key, offset, columns, skill_bytes) for key, (offset, columns, skill_bytes) in entries.items()],
+            dtype=INDEX_DTYPE,
+        )
+        index.sort(order="key")
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        with open(os.path.join(tmp_path, "data.bin"), "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        np.save(os.path.join(tmp_path, "index.npy"), index)
+        os.replace(tmp_path, path)
+
+
+class FeatureCache:
+    def __init__(self, path: str, max_bytes: int = 1 << 30, segment_bytes: Optional[int] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Не меньше 16 сегментов в бюджете: вытеснение сегмента - малая доля кэша
+        self.segment_bytes = segment_bytes or max(min(max_bytes // 16, 64 << 20), 1 << 20)
+        self.segments: List[Segment] = []  # От старых к новым
+        self._next_id = 1
+        # Открытый сегмент: ключ -> (смещение, число признаков, байты навыков)
+        self._entries: Dict[int, Tuple[int, int, int]] = {}
+        self._data = bytearray()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+        self._load()
+        CACHE_BYTES.set_function(lambda: [((), self.nbytes)])
+
+    @property
+    def nbytes(self) -> int:
+        current = len(self._data) + len(self._entries) * INDEX_DTYPE.itemsize
+        return sum(segment.nbytes for segment in self.segments) + current
+
+    def get_many(self, keys: np.ndarray) -> List[Optional[Features]]:
+        """Признаки по ключам (None - нет в кэше)"""
+        results: List[Optional[Features]] = [None] * len(keys)
+        with self._lock:
+            pending = []
+            for row, key in enumerate(keys.tolist()):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    results[row] = decode_entry(self._data, *entry)
+                else:
+                    pending.append(row)
+            pending = np.array(pending, dtype=np.int64)
+            promote = []
+            expiring = self._expiring()
+            for segment in reversed(self.segments):
+                if not len(pending):
+                    break
+                positions = segment.lookup(keys[pending])
+                found = positions >= 0
+                for row, position in zip(pending[found].tolist(), positions[found].tolist()):
+                    results[row] = segment.read(position)
+                    if segment.id in expiring:
+                        promote.append(row)
+                pending = pending[~found]
+            for row in promote:
+                self._append(int(keys[row]), results[row])
+            hits = len(keys) - len(pending)
+            self.hits += hits
+            self.misses += len(pending)
+        CACHE_REQUESTS.labels("hit").inc(hits)
+        CACHE_REQUESTS.labels("miss").inc(len(pending))
+        return results
+
+    def _expiring(self) -> set:
+        """Сегменты, которые вытеснятся, когда кэш вырастет на четверть бюджета"""
+        excess = self.nbytes - self.max_bytes * 3 // 4
+        expiring = set()
+        for segment in self.segments:
+            if excess <= 0:
+                break
+            expiring.add(segment.id)
+            excess -= segment.nbytes
+        return expiring
+
+    def put_many(self, keys: Sequence[int], features: Sequence[Features]) -> None:
+        with self._lock:
+            for key, item_features in zip(keys, features):
+                self._append(int(key), item_features)
+
+    def _append(self, key: int, features: Features) -> None:
+        if key in self._entries:
+            return
+        encoded = encode_entry(features)
+        columns = len(features[1])
+        self._entries[key] = (len(self._data), columns, len(encoded) - 4 * columns)
+        self._data += encoded
+        if len(self._data) >= self.segment_bytes:
+            self._seal()
+
+    def _seal(self) -> None:
+        if not self._entries:
+            return
+        seg_id = self._next_id
+        path = self._segment_path(seg_id)
+        Segment.write(path, self._entries, self._data)
+        self.segments.append(Segment(seg_id, path))
+        self._next_id += 1
+        self._entries = {}
+        self._data = bytearray()
+        removed = []
+        while len(self.segments) > 1 and self.nbytes > self.max_bytes:
+            removed.append(self.segments.pop(0))
+        self._save_manifest()
+        for segment in removed:
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+    def close(self) -> None:
+        """Сохранение открытого сегмента"""
+        with self._lock:
+            self._seal()
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests, 4) if requests else 0.0,
+            "segments": len(self.segments),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    # ------------ Манифест ------------
+
+    def _save_manifest(self) -> None:
+        """cache.json - точка фиксации: сегменты вне списка удаляются при загрузке"""
+        payload = {"next_id": self._next_id, "segments": [segment.id for segment in self.segments]}
+        tmp_path = os.path.join(self.path, "cache.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, "cache.json"))
+
+    def _load(self) -> None:
+        manifest_path = os.path.join(self.path, "cache.json")
+        listed = set()
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._next_id = manifest["next_id"]
+            listed = set(manifest["segments"])
+            self.segments = [Segment(seg_id, self._segment_path(seg_id)) for seg_id in manifest["segments"]]
+        # Сегменты, записанные до сбоя, но не попавшие в манифест
+        for name in os.listdir(self.path):
+            if name.startswith("seg-") and (name.endswith(".tmp") or int(name[4:]) not in listed):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def _segment_path(self, seg_id: int) -> str:
+        return os.path.join(self.path, f"seg-{seg_id:06d}")
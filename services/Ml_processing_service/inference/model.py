@@ -0,0 +1,212 @@
+"""
+Модель обогащения вакансий: извлечение навыков и оценка зарплаты.
+
+Каталог модели:
+    model.json          - параметры: число признаков, смещение, разброс остатков
+    skills.json         - словарь навыков: каноническое имя -> синонимы
+    salary_weights.npy  - веса линейной модели log(зарплаты) по хешированным признакам
+
+Признаки - слова названия, навыки (указанные и найденные в тексте), опыт,
+регион и график; номер признака - crc32 строки по модулю n_features
+(одинаковый во всех процессах, в отличие от hash()). Веса открываются через
+mmap при первом предсказании: процессы пула делят одни страницы в кэше ОС.
+Оценка пачки - одна векторная свертка весов через np.bincount.
+
+Признаки вакансии зависят только от ее текстовых полей (FEATURE_FIELDS) и
+Featurizer.id - версии кода признаков, размера пространства и словаря
+навыков, но не от весов. Поэтому их можно кэшировать между версиями модели
+(feature_cache.FeatureCache) по ключу Featurizer.key.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"[\w+#]+(?:[.-][\w+#]+)*")
+
+# z-оценки нормального распределения для p10/p90
+_Z90 = 1.2816
+
+# Увеличивается при любом изменении tokenize, vacancy_features или Featurizer:
+# старые записи кэша признаков перестают совпадать по ключу
+FEATURIZER_VERSION = 1
+FEATURE_FIELDS = ("title", "description", "skills", "experience", "area", "schedule")
+
+# Навыки вакансии и номера ее признаков (uint32 по возрастанию)
+Features = Tuple[List[str], np.ndarray]
+
+
+def clean_text(text: Optional[str]) -> str:
+    return _TAG_RE.sub(" ", text or "")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def feature_index(feature: str, n_features: int) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % n_features
+
+
+class SkillExtractor:
+    """Поиск навыков по словарю синонимов одним регулярным выражением"""
+
+    def __init__(self, skills: Dict[str, Sequence[str]]):
+        self.canonical: Dict[str, str] = {}
+        for name, aliases in skills.items():
+            for alias in (name, *aliases):
+                self.canonical[alias.lower()] = name
+        # Длинные синонимы раньше коротких: "node.js" не должен совпасть как "node"
+        alternatives = sorted(self.canonical, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<![\w+#])(" + "|".join(re.escape(alias) for alias in alternatives) + r")(?![\w+#])",
+            re.IGNORECASE,
+        )
+
+    def extract(self, text: str) -> List[str]:
+        found = (self.canonical[match.lower()] for match in self._pattern.findall(text))
+        return list(dict.fromkeys(found))
+
+    def normalize(self, skills: Iterable[str]) -> List[str]:
+        """Указанные навыки: известные синонимы -> каноническое имя, остальные как есть"""
+        return list(dict.fromkeys(self.canonical.get(skill.strip().lower(), skill.strip()) for skill in skills))
+
+
+def vacancy_features(item: dict, skills: Sequence[str]) -> List[str]:
+    features = [f"title:{token}" for token in dict.fromkeys(tokenize(item.get("title") or ""))]
+    features += [f"skill:{skill.lower()}" for skill in skills]
+    for name in ("experience", "area", "schedule"):
+        value = item.get(name)
+        if value:
+            features.append(f"{name}:{value.lower()}")
+    return features
+
+
+class Featurizer:
+    """Извлечение навыков и хешированных признаков вакансии"""
+
+    def __init__(self, skills: Dict[str, Sequence[str]], n_features: int):
+        self.extractor = SkillExtractor(skills)
+        self.n_features = n_features
+        digest = zlib.crc32(json.dumps(skills, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        self.id = f"v{FEATURIZER_VERSION}-{n_features}-{digest:08x}"
+        self._key_prefix = self.id.encode("utf-8") + b"\x1f"
+
+    def featurize(self, item: dict) -> Features:
+        extractor = self.extractor
+        text = f"{item.get('title') or ''}\n{clean_text(item.get('description'))}"
+        skills = list(dict.fromkeys(extractor.normalize(item.get("skills") or ()) + extractor.extract(text)))
+        indices = {feature_index(feature, self.n_features) for feature in vacancy_features(item, skills)}
+        return skills, np.array(sorted(indices), dtype=np.uint32)
+
+    def key(self, item: dict) -> int:
+        """64-битный ключ кэша признаков: хеш id и полей FEATURE_FIELDS"""
+        values = []
+        for name in FEATURE_FIELDS:
+            value = item.get(name)
+            values.append("\x1e".join(value) if isinstance(value, (list, tuple)) else value or "")
+        digest = hashlib.blake2b(self._key_prefix + "\x1f".join(values).encode("utf-8"), digest_size=8)
+        return int.from_bytes(digest.digest(), "little")
+
+    def keys(self, items: Sequence[dict]) -> np.ndarray:
+        return np.fromiter((self.key(item) for item in items), dtype=np.uint64, count=len(items))
+
+
+class InferenceModel:
+    """Загрузка ленивая: файлы читаются при первом предсказании в процессе"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._meta: Optional[dict] = None
+        self._featurizer: Optional[Featurizer] = None
+        self._weights: Optional[np.ndarray] = None
+
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            with open(os.path.join(self.path, "model.json"), encoding="utf-8") as f:
+                self._meta = json.load(f)
+        return self._meta
+
+    @property
+    def featurizer(self) -> Featurizer:
+        if self._featurizer is None:
+            with open(os.path.join(self.path, self.meta.get("skills", "skills.json")), encoding="utf-8") as f:
+                self._featurizer = Featurizer(json.load(f), self.meta["n_features"])
+        return self._featurizer
+
+    @property
+    def weights(self) -> np.ndarray:
+        if self._weights is None:
+            weights = np.load(os.path.join(self.path, self.meta.get("weights", "salary_weights.npy")), mmap_mode="r")
+            if weights.shape != (self.meta["n_features"],):
+                raise ValueError(f"salary_weights: ожидалось {self.meta['n_features']} весов, получено {weights.shape}")
+            self._weights = weights
+        return self._weights
+
+    @property
+    def loaded(self) -> bool:
+        return self._weights is not None
+
+    def featurize(
+        self,
+        items: Sequence[dict],
+        cached: Optional[Sequence[Optional[Features]]] = None,
+    ) -> Tuple[List[Features], Dict[int, Features]]:
+        """
+        Признаки пачки: из cached (признаки из кэша, None - нет в кэше) или
+        посчитанные заново; вторым значением - посчитанные по номерам вакансий
+        """
+        featurizer = self.featurizer
+        cached = cached or [None] * len(items)
+        computed = {row: featurizer.featurize(item) for row, item in enumerate(items) if cached[row] is None}
+        return [computed[row] if found is None else found for row, found in enumerate(cached)], computed
+
+    def score(self, features: Sequence[Features]) -> List[dict]:
+        """Оценка пачки: сумма весов признаков каждой вакансии через np.bincount"""
+        meta = self.meta
+        columns = [item_columns for _, item_columns in features]
+        rows = np.repeat(np.arange(len(features)), [len(c) for c in columns])
+        columns = np.concatenate(columns) if columns else np.zeros(0, dtype=np.uint32)
+        scores = meta["bias"] + np.bincount(rows, weights=self.weights[columns], minlength=len(features))
+        spread = _Z90 * meta.get("residual_std", 0.0)
+        currency = meta.get("currency", "RUR")
+        results = []
+        for (item_skills, _), score in zip(features, scores.tolist()):
+            results.append({
+                "skills": item_skills,
+                "salary": {
+                    "currency": currency,
+                    "p10": round_salary(math.exp(score - spread)),
+                    "p50": round_salary(math.exp(score)),
+                    "p90": round_salary(math.exp(score + spread)),
+                },
+            })
+        return results
+
+    def predict(self, items: Sequence[dict]) -> List[dict]:
+        features, _ = self.featurize(items)
+        return self.score(features)
+
+    def info(self) -> dict:
+        return {key: value for key, value in self.meta.items() if key not in ("weights", "skills")}
+
+
+def round_salary(value: float) -> int:
+    return int(round(value, -3))
+
+
+def write_model(path: str, meta: dict, weights: np.ndarray, skills: Dict[str, Sequence[str]]) -> None:
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "salary_weights.npy"), weights.astype(np.float32))
+    with open(os.path.join(path, "skills.json"), "w", encoding="utf-8") as f:
+        json.dump(skills, f, ensure_ascii=False, indent=2)
+    meta = {**meta, "n_features": len(weights), "weights": "salary_weights.npy", "skills": "skills.json"}
+    with open(os.path.join(path, "model.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
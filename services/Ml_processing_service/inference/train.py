@@ -0,0 +1,248 @@
+"""
+Сборка модели оценки зарплаты.
+
+Обучение на вакансиях из JSONL (формат JsonlSink из dataMining_service):
+гребневая регрессия log(середины вилки) на хешированных признаках
+(model.vacancy_features). Матрица признаков разреженная (строка, столбец),
+решение - методом сопряженных градиентов: X·w и Xᵀ·r считаются через
+np.bincount, плотная матрица и XᵀX не строятся.
+
+    python -m services.Ml_processing_service.inference.train --data data/vacancies.jsonl --output ml_models/2026-10
+
+С --feature-cache признаки берутся из кэша признаков (тот же каталог, что
+FEATURE_CACHE_PATH сервиса): повторное обучение на том же корпусе не
+извлекает навыки из описаний заново.
+
+Встроенная модель ml_models/default собирается без данных из PRIOR_WEIGHTS -
+экспертных поправок к log(зарплаты) - чтобы сервис работал сразу после
+развертывания:
+
+    python -m services.Ml_processing_service.inference.train --prior --output services/Ml_processing_service/ml_models/default
+"""
+import argparse
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.Ml_processing_service.core.config import SERVICE_DIR
+from services.Ml_processing_service.inference.feature_cache import FeatureCache
+from services.Ml_processing_service.inference.model import (
+    Featurizer,
+    InferenceModel,
+    feature_index,
+    write_model,
+)
+
+DEFAULT_SKILLS = os.path.join(SERVICE_DIR, "ml_models", "default", "skills.json")
+CHUNK_SIZE = 4096  # Вакансий на один запрос к кэшу признаков
+
+PRIOR_BIAS = math.log(120000)
+PRIOR_RESIDUAL_STD = 0.35
+PRIOR_WEIGHTS = {
+    # Опыт: названия и идентификаторы hh.ru
+    "experience:нет опыта": -0.5,
+    "experience:noexperience": -0.5,
+    "experience:от 3 до 6 лет": 0.4,
+    "experience:between3and6": 0.4,
+    "experience:более 6 лет": 0.65,
+    "experience:morethan6": 0.65,
+    # Уровень в названии
+    "title:стажер": -0.8,
+    "title:intern": -0.8,
+    "title:junior": -0.35,
+    "title:младший": -0.35,
+    "title:middle": 0.05,
+    "title:senior": 0.4,
+    "title:старший": 0.3,
+    "title:ведущий": 0.35,
+    "title:lead": 0.5,
+    "title:тимлид": 0.55,
+    "title:руководитель": 0.45,
+    "title:head": 0.6,
+    "title:architect": 0.55,
+    "title:архитектор": 0.55,
+    # Регион и график
+    "area:москва": 0.2,
+    "area:санкт-петербург": 0.1,
+    "schedule:удаленная работа": 0.05,
+    # Навыки
+    "skill:kubernetes": 0.15,
+    "skill:go": 0.15,
+    "skill:rust": 0.15,
+    "skill:scala": 0.15,
+    "skill:kafka": 0.1,
+    "skill:spark": 0.12,
+    "skill:machine learning": 0.12,
+    "skill:pytorch": 0.12,
+    "skill:clickhouse": 0.08,
+    "skill:terraform": 0.08,
+    "skill:1с": -0.05,
+    "skill:php": -0.05,
+}
+
+
+def load_skills(path: str) -> Dict[str, List[str]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def prior_weights(n_features: int) -> np.ndarray:
+    weights = np.zeros(n_features, dtype=np.float32)
+    for feature, weight in PRIOR_WEIGHTS.items():
+        weights[feature_index(feature, n_features)] += weight
+    return weights
+
+
+def salary_target(record: dict, currency: str) -> float:
+    """log(середины вилки) или NaN, если зарплаты нет или она в другой валюте"""
+    if record.get("currency") != currency:
+        return math.nan
+    bounds = [record[k] for k in ("salary_from", "salary_to") if record.get(k)]
+    if not bounds:
+        return math.nan
+    return math.log(sum(bounds) / len(bounds))
+
+
+def load_dataset(
+    path: str,
+    featurizer: Featurizer,
+    currency: str,
+    cache: Optional[FeatureCache] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(строки, столбцы) разреженной матрицы признаков и цель log(зарплаты)"""
+    columns: List[np.ndarray] = []
+    targets: List[float] = []
+    chunk: List[dict] = []
+
+    def featurize_chunk() -> None:
+        if cache is None:
+            columns.extend(featurizer.featurize(record)[1] for record in chunk)
+        else:
+            keys = featurizer.keys(chunk)
+            cached = cache.get_many(keys)
+            missing = [row for row, found in enumerate(cached) if found is None]
+            computed = [featurizer.featurize(chunk[row]) for row in missing]
+            cache.put_many(keys[missing], computed)
+            for row, features in zip(missing, computed):
+                cached[row] = features
+            columns.extend(item_columns for _, item_columns in cached)
+        chunk.clear()
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            target = salary_target(record, currency)
+            if math.isnan(target):
+                continue
+            chunk.append(record)
+            targets.append(target)
+            if len(chunk) >= CHUNK_SIZE:
+                featurize_chunk()
+    featurize_chunk()
+    rows = np.repeat(np.arange(len(targets)), [len(c) for c in columns])
+    all_columns = np.concatenate(columns).astype(np.int64) if columns else np.zeros(0, dtype=np.int64)
+    return rows, all_columns, np.array(targets)
+
+
+def fit_ridge(
+    rows: np.ndarray,
+    columns: np.ndarray,
+    y: np.ndarray,
+    n_features: int,
+    l2: float,
+    iterations: int = 200,
+    tolerance: float = 1e-6,
+) -> np.ndarray:
+    """Решение (XᵀX + l2·I)·w = Xᵀy методом сопряженных градиентов"""
+    n = len(y)
+
+    def matvec(w: np.ndarray) -> np.ndarray:
+        xw = np.bincount(rows, weights=w[columns], minlength=n)
+        return np.bincount(columns, weights=xw[rows], minlength=n_features) + l2 * w
+
+    w = np.zeros(n_features)
+    r = np.bincount(columns, weights=y[rows], minlength=n_features)
+    p = r.copy()
+    rs = r @ r
+    threshold = tolerance * tolerance * rs
+    for _ in range(iterations):
+        ap = matvec(p)
+        alpha = rs / (p @ ap)
+        w += alpha * p
+        r -= alpha * ap
+        rs_next = r @ r
+        if rs_next <= threshold:
+            break
+        p = r + (rs_next / rs) * p
+        rs = rs_next
+    return w
+
+
+def train(args: argparse.Namespace) -> dict:
+    skills = load_skills(args.skills)
+    n_features = args.features
+    if args.prior:
+        write_model(args.output, {
+            "name": os.path.basename(os.path.normpath(args.output)),
+            "version": args.version or "prior",
+            "trained_on": "prior",
+            "currency": args.currency,
+            "bias": PRIOR_BIAS,
+            "residual_std": PRIOR_RESIDUAL_STD,
+        }, prior_weights(n_features), skills)
+        return {"rows": 0}
+
+    started = time.perf_counter()
+    cache = FeatureCache(args.feature_cache, args.feature_cache_mb << 20) if args.feature_cache else None
+    try:
+        rows, columns, y = load_dataset(args.data, Featurizer(skills, n_features), args.currency, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    if not len(y):
+        raise SystemExit(f"В {args.data} нет вакансий с зарплатой в {args.currency}")
+    bias = float(y.mean())
+    weights = fit_ridge(rows, columns, y - bias, n_features, args.l2)
+    predicted = bias + np.bincount(rows, weights=weights[columns], minlength=len(y))
+    residual_std = float(np.std(y - predicted))
+    write_model(args.output, {
+        "name": os.path.basename(os.path.normpath(args.output)),
+        "version": args.version or time.strftime("%Y-%m-%d"),
+        "trained_on": len(y),
+        "currency": args.currency,
+        "bias": bias,
+        "residual_std": residual_std,
+        "l2": args.l2,
+    }, weights, skills)
+    summary = {"rows": len(y), "residual_std": residual_std, "seconds": round(time.perf_counter() - started, 2)}
+    if cache is not None:
+        summary["feature_cache"] = cache.stats()
+    return summary
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Сборка модели оценки зарплаты")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="JSONL с вакансиями (JsonlSink dataMining_service)")
+    source.add_argument("--prior", action="store_true", help="Модель из PRIOR_WEIGHTS без обучения")
+    parser.add_argument("--output", required=True, help="Каталог модели")
+    parser.add_argument("--skills", default=DEFAULT_SKILLS, help="Словарь навыков")
+    parser.add_argument("--features", type=int, default=1 << 16, help="Размер пространства признаков")
+    parser.add_argument("--l2", type=float, default=1.0)
+    parser.add_argument("--currency", default="RUR")
+    parser.add_argument("--version")
+    parser.add_argument("--feature-cache", help="Каталог кэша признаков (FEATURE_CACHE_PATH)")
+    parser.add_argument("--feature-cache-mb", type=int, default=1024, help="Бюджет кэша признаков на диске")
+    args = parser.parse_args(argv)
+
+    summary = train(args)
+    model = InferenceModel(args.output)
+    print(json.dumps({**summary, **model.info()}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Функции процесса пула инференса.
+
+Модуль импортируется в дочерних процессах (spawn), поэтому не тянет FastAPI
+и настройки сервиса. Модель создается в initializer, а файлы читает при
+первой пачке.
+"""
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.Ml_processing_service.inference.model import Features, InferenceModel
+
+_model: Optional[InferenceModel] = None
+
+
+def init_worker(model_path: str) -> None:
+    global _model
+    _model = InferenceModel(model_path)
+
+
+def predict_batch(
+    items: List[dict],
+    cached: Optional[Sequence[Optional[Features]]] = None,
+) -> Tuple[List[dict], Dict[int, Features], float, int]:
+    """
+    Результаты пачки, признаки, посчитанные для вакансий без cached (для
+    кэша признаков), время обработки в процессе и pid (для статистики по процессам)
+    """
+    started = time.perf_counter()
+    features, computed = _model.featurize(items, cached)
+    results = _model.score(features)
+    return results, computed, time.perf_counter() - started, os.getpid()
@@ -0,0 +1,102 @@
+# main.py
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from services.Ml_processing_service.core.config import configs
+from services.Ml_processing_service.inference.batcher import Overloaded
+from services.Ml_processing_service.inference.consumer import StreamEnricher
+from services.Ml_processing_service.inference.engine import InferenceEngine
+from services.Ml_processing_service.schemas.inference_schema import PredictRequest, PredictResponse
+from infra.messaging.bus import KafkaBus
+from infra.monitoring.monitoring import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from infra.server import serve
+
+logger = logging.getLogger(__name__)
+
+engine: Optional[InferenceEngine] = None
+enricher: Optional[StreamEnricher] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global engine, enricher
+    engine = InferenceEngine(configs)
+    engine.start()
+    if configs.KAFKA_ENABLED:
+        enricher = StreamEnricher(configs, engine, KafkaBus(configs.KAFKA_BOOTSTRAP_SERVERS))
+        await enricher.start()
+    try:
+        yield
+    finally:
+        if enricher is not None:
+            await enricher.stop()
+        await engine.stop()
+
+
+app = FastAPI(
+    lifespan=lifespan,
+    title=configs.PROJECT_NAME,
+    docs_url="/api/v1/ml/docs",
+    openapi_url="/api/v1/ml/openapi.json"
+)
+
+app.add_middleware(MetricsMiddleware, service="Ml_processing_service")
+
+
+@app.post("/api/v1/ml/predict", response_model=PredictResponse)
+async def predict(request: PredictRequest):
+    """Навыки и оценка зарплаты для пачки вакансий"""
+    try:
+        results = await engine.predict([item.model_dump() for item in request.items])
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return {"model": engine.model.meta.get("version", ""), "items": results}
+
+
+@app.get("/api/v1/ml/model")
+async def model_info():
+    """Параметры модели"""
+    return engine.model.info()
+
+
+@app.get("/api/v1/ml/stats")
+async def inference_stats():
+    """Пропускная способность (вакансий в секунду) и задержка пачек за окно STATS_WINDOW"""
+    snapshot = engine.snapshot()
+    if enricher is not None:
+        snapshot["stream"] = enricher.stats()
+    return snapshot
+
+
+@app.get("/health")
+async def health_check():
+    # Остановленное ошибкой чтение входного топика само не восстановится
+    if enricher is not None and not enricher.running:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "stream": enricher.stats()},
+        )
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики сервиса в формате Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+if __name__ == "__main__":
+    serve(
+        "main:app",
+        host=configs.HOST,
+        port=configs.PORT,
+        workers=configs.WORKERS,
+        loop=configs.LOOP,
+        http=configs.HTTP,
+        reload=configs.RELOAD,
+        graceful_timeout=configs.GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=True,
+    )
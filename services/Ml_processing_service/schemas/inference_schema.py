@@ -0,0 +1,34 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class VacancyText(BaseModel):
+    """Вакансия для обработки (поля VacancyRecord dataMining_service плюс описание)"""
+    title: str = Field(..., min_length=1, max_length=500, description="Название вакансии")
+    description: Optional[str] = Field(None, max_length=100000, description="Описание, допускается HTML")
+    skills: List[str] = Field(default_factory=list, description="Указанные навыки")
+    experience: Optional[str] = Field(None, description="Требуемый опыт")
+    area: Optional[str] = Field(None, description="Регион")
+    schedule: Optional[str] = Field(None, description="График работы")
+
+
+class PredictRequest(BaseModel):
+    items: List[VacancyText] = Field(..., min_length=1, max_length=1000)
+
+
+class SalaryEstimate(BaseModel):
+    currency: str
+    p10: int
+    p50: int
+    p90: int
+
+
+class VacancyPrediction(BaseModel):
+    skills: List[str] = Field(..., description="Указанные и найденные в тексте навыки")
+    salary: SalaryEstimate
+
+
+class PredictResponse(BaseModel):
+    model: str
+    items: List[VacancyPrediction]
@@ -0,0 +1,160 @@
+# admin_router.py
+import csv
+import json
+import tempfile
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Iterable, Iterator, List, Sequence, Tuple, Union
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, File, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from repository import UserRepository
+from deps import get_current_admin
+from services.auth_service.core.config import configs
+from services.auth_service.core.database import async_session_maker
+from services.auth_service.schemas.users_schema import UserRegister, UsersBatch
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+NDJSON = "application/x-ndjson"
+MAX_REPORTED_ERRORS = 100
+IMPORT_READ_CHUNK = 1024 * 1024
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024  # Больше - копия загрузки уходит во временный файл
+
+
+def _progress(**fields) -> bytes:
+    return (json.dumps(fields, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def iter_import_rows(lines: Iterable[bytes], is_csv: bool) -> Iterator[Tuple[int, Union[dict, ValueError]]]:
+    """
+    Строки файла импорта: CSV с заголовком (email,password,full_name) или JSONL.
+    Каждая строка декодируется отдельно: вместо строки, которая не
+    декодируется или не разбирается, отдается ошибка, и разбор продолжается.
+    """
+    if not is_csv:
+        for line_no, raw in enumerate(lines, start=1):
+            try:
+                line = raw.decode("utf-8")
+                if line.strip():
+                    yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, e
+        return
+
+    line_no = 0
+    broken: List[Tuple[int, ValueError]] = []
+
+    def decoded() -> Iterator[str]:
+        nonlocal line_no
+        for line_no, raw in enumerate(lines, start=1):
+            try:
+                yield raw.decode("utf-8")
+            except UnicodeDecodeError as e:
+                broken.append((line_no, e))
+
+    for row in csv.DictReader(decoded()):
+        yield from broken
+        broken.clear()
+        yield line_no, row
+    yield from broken
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def stream_import(source: BinaryIO, is_csv: bool) -> AsyncIterator[bytes]:
+    """
+    Импорт пользователей пачками по BULK_BATCH_SIZE.
+    После каждой пачки в ответ пишется строка с прогрессом.
+    Файл читается построчно и закрывается по завершении.
+    """
+    created = skipped = invalid = processed = line_no = 0
+    errors: List[dict] = []
+    batch: List[UserRegister] = []
+
+    async with async_session_maker() as session:
+        repo = UserRepository(session)
+
+        async def flush() -> bytes:
+            nonlocal created, skipped, processed
+            batch_created, batch_skipped = await repo.bulk_register(batch)
+            created += batch_created
+            skipped += batch_skipped
+            processed += len(batch)
+            batch.clear()
+            return _progress(processed=processed, created=created, skipped=skipped, invalid=invalid)
+
+        try:
+            for line_no, row in iter_import_rows(source, is_csv):
+                try:
+                    if isinstance(row, ValueError):
+                        raise row
+                    batch.append(UserRegister.model_validate(row))
+                except (ValidationError, ValueError) as e:
+                    invalid += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"line": line_no, "error": str(e)})
+                    continue
+                if len(batch) >= configs.BULK_BATCH_SIZE:
+                    yield await flush()
+        except csv.Error as e:
+            # Структура CSV нарушена - сохраняем уже прочитанное и сообщаем об ошибке
+            errors.append({"line": line_no, "error": f"Ошибка разбора файла: {e}"})
+        finally:
+            source.close()
+        if batch:
+            yield await flush()
+
+    yield _progress(
+        done=True, processed=processed, created=created,
+        skipped=skipped, invalid=invalid, errors=errors,
+    )
+
+
+async def stream_batches(
+    uuids: Sequence[UUID],
+    operation: Callable[[UserRepository, Sequence[UUID]], Awaitable[List[UUID]]],
+) -> AsyncIterator[bytes]:
+    """Применяет операцию к uuid пачками по BULK_BATCH_SIZE с построчным прогрессом"""
+    affected = processed = 0
+    unique_uuids = list(dict.fromkeys(uuids))
+    async with async_session_maker() as session:
+        repo = UserRepository(session)
+        for chunk in _chunks(unique_uuids, configs.BULK_BATCH_SIZE):
+            affected += len(await operation(repo, chunk))
+            processed += len(chunk)
+            yield _progress(processed=processed, total=len(unique_uuids), affected=affected)
+    yield _progress(done=True, processed=processed, affected=affected)
+
+
+@router.post("/users/import", name="Массовый импорт пользователей")
+async def import_users(file: UploadFile = File(..., description="CSV (email,password,full_name) или JSONL")):
+    """Массовая регистрация из CSV/JSONL с потоковым прогрессом (NDJSON)"""
+    # Файл копируется до начала ответа: UploadFile закрывается раньше, чем завершится
+    # стриминг. Копия читается частями и сверх IMPORT_SPOOL_SIZE хранится на диске
+    source = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE)
+    while chunk := await file.read(IMPORT_READ_CHUNK):
+        source.write(chunk)
+    source.seek(0)
+    is_csv = (file.filename or "").lower().endswith(".csv") or file.content_type == "text/csv"
+    return StreamingResponse(stream_import(source, is_csv), media_type=NDJSON)
+
+
+@router.post("/users/deactivate", name="Массовая деактивация пользователей")
+async def deactivate_users(batch: UsersBatch):
+    """Деактивация пользователей пачками с потоковым прогрессом (NDJSON)"""
+    return StreamingResponse(
+        stream_batches(batch.uuids, UserRepository.deactivate_users), media_type=NDJSON
+    )
+
+
+@router.post("/users/delete", name="Массовое удаление пользователей")
+async def delete_users(batch: UsersBatch):
+    """Удаление пользователей пачками с потоковым прогрессом (NDJSON)"""
+    return StreamingResponse(
+        stream_batches(batch.uuids, UserRepository.delete_users), media_type=NDJSON
+    )
@@ -22,16 +22,13 @@ async def register_user(
     user_data: UserRegister,
     user_repo: UserRepository = Depends(get_user_repository),
 ):
-    """Регистрация нового пользователя"""
-    if await user_repo.user_exists(user_data.email):
+    """Регистрация нового пользователя (один запрос к БД, конфликт email -> 400)"""
+    new_user = await user_repo.create_user(user_data)
+    if not new_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Пользователь с таким email уже существует",
         )
-
-    new_user = await user_repo.create_user(user_data)
-    if not new_user:
-        raise HTTPException(status_code=500, detail="Ошибка создания пользователя")
     return new_user
 
 @router.post("/login", response_model=Token, name="Логин")
@@ -55,7 +52,12 @@ async def login_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value}
+        data={
+            "sub": user.email,
+            "uuid": str(user.uuid),
+            "role": user.role.value,
+            "active": user.is_active,
+        }
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
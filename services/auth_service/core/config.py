@@ -8,6 +8,15 @@ class Configs(BaseSettings):
     # ------------ Веб-сервер ------------
     HOST: str = "localhost"
     PORT: int = 8005
+    WORKERS: int = Field(
+        default=1, env="WORKERS"
+    )  # Процессы-воркеры (0 - по числу CPU); кеш профилей и deny-лист у каждого свои
+    LOOP: str = Field(default="auto", env="LOOP")  # auto - uvloop при наличии
+    HTTP: str = Field(default="auto", env="HTTP")  # auto - httptools при наличии
+    RELOAD: bool = Field(default=False, env="RELOAD")  # Только для разработки
+    GRACEFUL_SHUTDOWN_TIMEOUT: float = Field(
+        default=30, env="GRACEFUL_SHUTDOWN_TIMEOUT"
+    )  # Ожидание запросов в работе (включая потоковый импорт) при SIGTERM, сек
 
     PROJECT_NAME: str = "Модуль авторизации"
 
@@ -19,8 +28,41 @@ class Configs(BaseSettings):
         default="HS256", env="ALGORITHM"
     )
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(
-        default=60000, env="ACCESS_TOKEN_EXPIRE_MINUTES"
-    )  # Время жизни токена
+        default=60, env="ACCESS_TOKEN_EXPIRE_MINUTES"
+    )  # Время жизни токена (и записей deny-листа); обновления токена нет, держим коротким
+
+    # ------------ Проверка токенов ------------
+    USER_CACHE_TTL_SECONDS: float = Field(
+        default=30, env="USER_CACHE_TTL_SECONDS"
+    )  # Время жизни профиля пользователя в кеше процесса
+    USER_CACHE_MAX_SIZE: int = Field(default=10000, env="USER_CACHE_MAX_SIZE")
+    DENY_LIST_MAX_SIZE: int = Field(default=100000, env="DENY_LIST_MAX_SIZE")
+    GATEWAY_SHARED_SECRET: Optional[str] = Field(
+        default=None, env="GATEWAY_SHARED_SECRET"
+    )  # Если задан, заголовки X-User-* от шлюза принимаются без проверки JWT
+
+    # ------------ Хеширование паролей ------------
+    BCRYPT_WORKERS: int = Field(
+        default=os.cpu_count() or 1, env="BCRYPT_WORKERS"
+    )  # Потоки для bcrypt (bcrypt отпускает GIL)
+    BCRYPT_MAX_PENDING: int = Field(
+        default=64, env="BCRYPT_MAX_PENDING"
+    )  # Максимум операций в работе и в очереди, сверх - 503
+    BCRYPT_BULK_CONCURRENCY: int = Field(
+        default=max((os.cpu_count() or 1) // 2, 1), env="BCRYPT_BULK_CONCURRENCY"
+    )  # Отдельный пул потоков bcrypt для массового импорта, потоки логинов он не занимает
+    BULK_BATCH_SIZE: int = Field(
+        default=500, env="BULK_BATCH_SIZE"
+    )  # Размер пачки для массовых операций с пользователями
+
+    # ------------ Трассировка ------------
+    TRACE_EXPORTER: str = Field(
+        default="none", env="TRACE_EXPORTER"
+    )  # Экспортер спанов: none, memory, file, log
+    TRACE_SAMPLE_RATE: float = Field(
+        default=1.0, env="TRACE_SAMPLE_RATE"
+    )  # Доля записываемых трасс для запросов без traceparent
+    TRACE_FILE: str = Field(default="traces/auth_service.jsonl", env="TRACE_FILE")
 
     # ------------ БД ------------
     DB_HOST: Optional[str] = Field(default="localhost", env="DB_HOST")
@@ -28,6 +70,25 @@ class Configs(BaseSettings):
     DB_USER: Optional[str] = Field(default="postgres", env="DATABASE_USERNAME")
     DB_NAME: Optional[str] = Field(default="job_vacancy", env="DATABASE_NAME")
     DB_PASS: Optional[str] = Field(default="admin", env="DATABASE_PASSWORD")
+    DATABASE_URL: Optional[str] = Field(
+        default=None, env="DATABASE_URL"
+    )  # Полный URL БД (например, sqlite+aiosqlite:///auth.db), перекрывает DB_*
+
+    # ------------ Пул соединений БД ------------
+    DB_POOL_SIZE: int = Field(default=10, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(
+        default=30, env="DB_POOL_TIMEOUT"
+    )  # Ожидание свободного соединения, сек
+    DB_POOL_RECYCLE: int = Field(
+        default=1800, env="DB_POOL_RECYCLE"
+    )  # Пересоздание соединений старше N секунд (-1 - никогда)
+    DB_POOL_PRE_PING: bool = Field(
+        default=False, env="DB_POOL_PRE_PING"
+    )  # Проверка соединения при каждой выдаче из пула (лишний запрос)
+    DB_STATEMENT_CACHE_SIZE: int = Field(
+        default=256, env="DB_STATEMENT_CACHE_SIZE"
+    )  # Кеш подготовленных выражений asyncpg на соединение
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
@@ -38,6 +99,8 @@ configs = Configs()
 
 
 def get_db_url():
+    if configs.DATABASE_URL:
+        return configs.DATABASE_URL
     return (
         f"postgresql+asyncpg://{configs.DB_USER}:{configs.DB_PASS}@"
         f"{configs.DB_HOST}:{configs.DB_PORT}/{configs.DB_NAME}"
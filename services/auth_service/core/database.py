@@ -1,3 +1,6 @@
+import time
+
+from sqlalchemy import Engine, event
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -5,16 +8,93 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
 from sqlalchemy.orm import DeclarativeBase, declared_attr
-from services.auth_service.core.config import get_db_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from services.auth_service.core.config import configs, get_db_url
+from services.auth_service.core.tracing import tracer
+from infra.monitoring.monitoring import REGISTRY
+from infra.monitoring.tracing import Tracer
 
 DATABASE_URL = get_db_url()
 
+DB_CHECKOUT_WAIT = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds", "Ожидание соединения из пула БД",
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, считающий число выдач и время ожидания соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            DB_CHECKOUT_WAIT.observe(waited)
+            self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+
 engine = create_async_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
+    poolclass=TimedQueuePool,
+    pool_size=configs.DB_POOL_SIZE,
+    max_overflow=configs.DB_MAX_OVERFLOW,
+    pool_timeout=configs.DB_POOL_TIMEOUT,
+    pool_recycle=configs.DB_POOL_RECYCLE,
+    pool_pre_ping=configs.DB_POOL_PRE_PING,
+    connect_args=(
+        {"prepared_statement_cache_size": configs.DB_STATEMENT_CACHE_SIZE}
+        if DATABASE_URL.startswith("postgresql+asyncpg") else {}
+    ),
     future=True
 )
 
+
+def trace_queries(sync_engine: Engine, tracer: Tracer = tracer) -> None:
+    """
+    Спан db.query на каждый SQL запрос: время выполнения на стороне драйвера.
+    Начало запроса хранится в info соединения, которое живет дольше
+    запроса, поэтому снимается и при ошибке запроса (handle_error).
+    """
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_ns", []).append(time.time_ns())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_ns = conn.info["query_start_ns"].pop()
+        tracer.record_span(
+            "db.query", start_ns, time.time_ns(),
+            statement=statement[:200], executemany=executemany,
+        )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(context):
+        # after_cursor_execute не вызывается для упавшего запроса
+        conn = context.connection
+        stack = conn.info.get("query_start_ns") if conn is not None else None
+        if not stack:
+            return
+        tracer.record_span(
+            "db.query", stack.pop(), time.time_ns(),
+            statement=(context.statement or "")[:200],
+            error=type(context.original_exception).__name__,
+        )
+
+
+if tracer.enabled:
+    trace_queries(engine.sync_engine)
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -29,12 +109,69 @@ class Base(AsyncAttrs, DeclarativeBase):
         return f"{cls.__name__.lower()}s"
 
 
+class LazySession:
+    """
+    Сессия, которая создается при первом обращении.
+    Запросы, не дошедшие до БД (например, /me из кеша), не создают сессию
+    и не берут соединение из пула.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker = async_session_maker):
+        self._session_maker = session_maker
+        self._session: AsyncSession | None = None
+
+    @property
+    def created(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._session_maker()
+        return getattr(self._session, name)
+
+    async def rollback(self) -> None:
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
 async def get_async_session() -> AsyncSession:
-    async with async_session_maker() as session:
-        try:
-            yield session
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+    session = LazySession()
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+def _pool_gauges():
+    stats = get_pool_stats()
+    return [((name,), stats[name]) for name in ("size", "checked_out", "checked_in", "overflow")]
+
+
+REGISTRY.gauge("db_pool_connections", "Соединения пула БД по состоянию", ("state",), function=_pool_gauges)
+
+
+def get_pool_stats() -> dict:
+    """Состояние пула соединений БД"""
+    pool = engine.sync_engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": configs.DB_MAX_OVERFLOW,
+    }
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            wait_avg_ms=round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+            wait_max_ms=round(pool.wait_max * 1000, 3),
+        )
+    return stats
@@ -0,0 +1,8 @@
+from infra.monitoring.tracing import Tracer, create_exporter
+from services.auth_service.core.config import configs
+
+tracer = Tracer(
+    "auth_service",
+    exporter=create_exporter(configs.TRACE_EXPORTER, configs.TRACE_FILE),
+    sample_rate=configs.TRACE_SAMPLE_RATE,
+)
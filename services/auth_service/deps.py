@@ -1,35 +1,125 @@
 # deps.py
-from fastapi import Depends, HTTPException, status
+import hmac
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from repository import UserRepository
 from services.auth_service.core.database import get_async_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.auth_service.core.config import configs
+from services.auth_service.core.tracing import tracer
+from services.auth_service.schemas.users_schema import TokenData, UserResponse, UserRole
+from services.auth_service.utils.identity import is_revoked, revoke_user, user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
 async def get_user_repository(session: AsyncSession = Depends(get_async_session)):
     return UserRepository(session)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    repo: UserRepository = Depends(get_user_repository),
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
+def _token_data_from_gateway(request: Request) -> TokenData | None:
+    """
+    Идентичность, уже проверенная API Gateway.
+    Принимается только с верным X-Gateway-Token, шлюз удаляет эти заголовки у клиентов.
+    """
+    secret = configs.GATEWAY_SHARED_SECRET
+    gateway_token = request.headers.get("x-gateway-token")
+    if not secret or not gateway_token or "x-user-uuid" not in request.headers:
+        return None
+    if not hmac.compare_digest(gateway_token, secret):
+        return None
+    return TokenData(
+        uuid=request.headers["x-user-uuid"],
+        email=request.headers.get("x-user-email"),
+        role=request.headers.get("x-user-role"),
     )
-    try:
-        payload = jwt.decode(token, configs.SECRET_KEY, algorithms=[configs.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+
+async def get_token_data(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+) -> TokenData:
+    """
+    Проверка токена без обращения к БД: данные пользователя (uuid, роль, активность)
+    берутся из claims, отозванные пользователи отсекаются по deny-листу.
+    """
+    token_data = _token_data_from_gateway(request)
+    if token_data is None:
+        try:
+            with tracer.span("jwt.decode"):
+                payload = jwt.decode(token, configs.SECRET_KEY, algorithms=[configs.ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+            token_data = TokenData(
+                uuid=payload.get("uuid"),
+                email=email,
+                role=payload.get("role"),
+                is_active=payload.get("active", True),
+            )
+        except (JWTError, ValueError):
             raise credentials_exception
-    except JWTError:
+
+    if not token_data.is_active:
+        raise credentials_exception
+    if token_data.uuid is not None and is_revoked(token_data.uuid):
+        raise credentials_exception
+    return token_data
+
+async def get_current_user(
+    token_data: TokenData = Depends(get_token_data),
+    repo: UserRepository = Depends(get_user_repository),
+) -> UserResponse:
+    """
+    Профиль текущего пользователя. БД запрашивается только при промахе
+    короткоживущего кеша (или для токенов, выданных до появления uuid в claims).
+    """
+    if token_data.uuid is not None:
+        cached = user_cache.get(token_data.uuid)
+        if cached is not None:
+            return cached
+        user = await repo.get_user_by_uuid(token_data.uuid)
+    else:
+        user = await repo.get_user_by_email(token_data.email)
+
+    if user is None:
         raise credentials_exception
+    if not user.is_active:
+        revoke_user(user.uuid)
+        raise credentials_exception
+
+    profile = UserResponse.model_validate(user)
+    user_cache.set(user.uuid, profile)
+    return profile
+
+async def get_current_admin(
+    token_data: TokenData = Depends(get_token_data),
+    repo: UserRepository = Depends(get_user_repository),
+) -> TokenData:
+    """
+    Доступ только для администраторов. Роль и активность проверяются по БД
+    на каждый запрос, минуя кеш профилей: deny-лист у каждого процесса свой,
+    и разжалованный или деактивированный администратор не должен сохранять
+    доступ до истечения токена
+    """
+    if token_data.uuid is not None:
+        user = await repo.get_user_by_uuid(token_data.uuid)
+    else:
+        user = await repo.get_user_by_email(token_data.email)
 
-    user = await repo.get_user_by_email(email)
     if user is None:
         raise credentials_exception
-    return user
+    if not user.is_active:
+        revoke_user(user.uuid)
+        raise credentials_exception
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав",
+        )
+    return token_data
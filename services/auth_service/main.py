@@ -1,24 +1,82 @@
 # main.py
-import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from services.auth_service.core.config import configs
+from services.auth_service.core.database import engine, get_pool_stats
+from services.auth_service.utils.security import HashingOverloaded
+from services.auth_service.core.tracing import tracer
+from infra.monitoring.monitoring import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from infra.monitoring.tracing import TracingMiddleware
+from infra.server import serve
 from auth_router import router as auth_router
+from admin_router import router as admin_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Остановка после завершения запросов в работе: закрываем пул БД и трассировку"""
+    try:
+        yield
+    finally:
+        await engine.dispose()
+        tracer.shutdown()
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title=configs.PROJECT_NAME,
     docs_url="/api/v1/auth/docs",
     openapi_url="/api/v1/auth/openapi.json"
 )
 
+app.add_middleware(MetricsMiddleware, service="auth_service")
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 app.include_router(
     auth_router,
     prefix="/api/v1/auth",
     tags=["Auth"]
 )
 
+app.include_router(
+    admin_router,
+    prefix="/api/v1/auth/admin",
+    tags=["Admin"]
+)
+
+@app.exception_handler(HashingOverloaded)
+async def hashing_overloaded_handler(request: Request, exc: HashingOverloaded):
+    """Очередь bcrypt переполнена - просим клиента повторить позже"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Сервис перегружен, повторите запрос позже"},
+        headers={"Retry-After": "1"},
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики сервиса в формате Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/db/pool")
+async def db_pool_stats():
+    """Метрики пула соединений БД: занятые соединения и время ожидания"""
+    return get_pool_stats()
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host=configs.HOST, port=configs.PORT, reload=True)
+    serve(
+        "main:app",
+        host=configs.HOST,
+        port=configs.PORT,
+        workers=configs.WORKERS,
+        loop=configs.LOOP,
+        http=configs.HTTP,
+        reload=configs.RELOAD,
+        graceful_timeout=configs.GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=True,
+    )
@@ -1,30 +1,53 @@
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
 from uuid import UUID
+import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from services.auth_service.models.users_model import User
 from services.auth_service.schemas.users_schema import UserRegister
-from services.auth_service.utils.security import get_password_hash, verify_password
+from services.auth_service.utils.security import (
+    get_password_hash_async,
+    hash_passwords_async,
+    verify_password_async,
+)
+from services.auth_service.utils.identity import revoke_user, user_cache
 
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    def _insert(self):
+        """INSERT с поддержкой ON CONFLICT для диалекта текущей БД"""
+        if self.session.bind.dialect.name == "sqlite":
+            return sqlite_insert(User)
+        return pg_insert(User)
+
     async def create_user(self, user_data: UserRegister) -> Optional[User]:
-        """Создание нового пользователя"""
+        """
+        Создание нового пользователя за один запрос к БД:
+        INSERT ... ON CONFLICT (email) DO NOTHING RETURNING.
+        Возвращает None, если email уже занят.
+        """
         try:
-            hashed = get_password_hash(user_data.password)
-            new_user = User(
-                email=user_data.email,
-                hashed_password=hashed,
-                full_name=user_data.full_name
+            hashed = await get_password_hash_async(user_data.password)
+            query = (
+                self._insert()
+                .values(
+                    email=user_data.email,
+                    hashed_password=hashed,
+                    full_name=user_data.full_name
+                )
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User)
             )
-
-            self.session.add(new_user)
+            result = await self.session.execute(query)
+            new_user = result.scalar_one_or_none()
             await self.session.commit()
-            await self.session.refresh(new_user)
             return new_user
         except IntegrityError:
             await self.session.rollback()
@@ -33,6 +56,88 @@ class UserRepository:
             await self.session.rollback()
             raise e
 
+    async def bulk_register(self, users: Sequence[UserRegister]) -> Tuple[int, int]:
+        """
+        Массовая регистрация пачки пользователей: пароли хешируются параллельно,
+        вставка - одним INSERT ... ON CONFLICT DO NOTHING.
+        Возвращает (создано, пропущено из-за занятого email).
+        """
+        if not users:
+            return 0, 0
+        try:
+            hashes = await hash_passwords_async([user.password for user in users])
+            query = (
+                self._insert()
+                .values([
+                    {
+                        "email": user.email,
+                        "hashed_password": hashed,
+                        "full_name": user.full_name,
+                    }
+                    for user, hashed in zip(users, hashes)
+                ])
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.uuid)
+            )
+            result = await self.session.execute(query)
+            created = len(result.all())
+            await self.session.commit()
+            return created, len(users) - created
+        except Exception as e:
+            await self.session.rollback()
+            raise e
+
+    def _uuid_in(self, user_uuids: Sequence[UUID]):
+        """Условие uuid = ANY(:uuids) - один параметр-массив вместо списка IN"""
+        if self.session.bind.dialect.name == "postgresql":
+            return User.uuid == sa.any_(
+                sa.literal(list(user_uuids), ARRAY(sa.UUID(as_uuid=True)))
+            )
+        return User.uuid.in_(user_uuids)
+
+    async def deactivate_users(self, user_uuids: Sequence[UUID]) -> List[UUID]:
+        """Деактивация пачки пользователей одним UPDATE, возвращает затронутые uuid"""
+        if not user_uuids:
+            return []
+        try:
+            query = (
+                update(User)
+                .where(self._uuid_in(user_uuids))
+                .values(is_active=False)
+                .returning(User.uuid)
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.session.execute(query)
+            updated = list(result.scalars())
+            await self.session.commit()
+            for user_uuid in updated:
+                revoke_user(user_uuid)
+            return updated
+        except Exception as e:
+            await self.session.rollback()
+            raise e
+
+    async def delete_users(self, user_uuids: Sequence[UUID]) -> List[UUID]:
+        """Удаление пачки пользователей одним DELETE, возвращает удаленные uuid"""
+        if not user_uuids:
+            return []
+        try:
+            query = (
+                delete(User)
+                .where(self._uuid_in(user_uuids))
+                .returning(User.uuid)
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.session.execute(query)
+            deleted = list(result.scalars())
+            await self.session.commit()
+            for user_uuid in deleted:
+                revoke_user(user_uuid)
+            return deleted
+        except Exception as e:
+            await self.session.rollback()
+            raise e
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Получение пользователя по Email (вместо username)"""
         query = select(User).where(User.email == email)
@@ -49,7 +154,7 @@ class UserRepository:
         """Аутентификация пользователя"""
         # 1. Ищем по email
         user = await self.get_user_by_email(email)
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             return None
 
         return user
@@ -62,9 +167,10 @@ class UserRepository:
             user = await self.get_user_by_uuid(user_uuid)
             if not user:
                 return None
-            user.hashed_password = get_password_hash(new_password)
+            user.hashed_password = await get_password_hash_async(new_password)
 
             await self.session.commit()
+            user_cache.invalidate(user_uuid)
             await self.session.refresh(user)
             return user
         except Exception as e:
@@ -73,30 +179,10 @@ class UserRepository:
 
     async def delete_user(self, user_uuid: UUID) -> bool:
         """Удаление пользователя (Soft Delete предпочтительнее)"""
-        try:
-            user = await self.get_user_by_uuid(user_uuid)
-            if not user:
-                return False
-
-            await self.session.delete(user)
-            await self.session.commit()
-            return True
-        except Exception as e:
-            await self.session.rollback()
-            raise e
+        return bool(await self.delete_users([user_uuid]))
 
     async def deactivate_user(self, user_uuid: UUID) -> bool:
-        try:
-            user = await self.get_user_by_uuid(user_uuid)
-            if not user:
-                return False
-
-            user.is_active = False
-            await self.session.commit()
-            return True
-        except Exception as e:
-            await self.session.rollback()
-            raise e
+        return bool(await self.deactivate_users([user_uuid]))
 
     async def user_exists(self, email: str) -> bool:
         """Проверка существования по email"""
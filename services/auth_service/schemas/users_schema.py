@@ -1,5 +1,5 @@
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -20,6 +20,10 @@ class UserRegister(BaseModel):
     )
     full_name: Optional[str] = Field(None, max_length=100, description="Полное имя")
 
+class UsersBatch(BaseModel):
+    """Список пользователей для массовых операций"""
+    uuids: List[UUID] = Field(..., min_length=1, description="UUID пользователей")
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -48,3 +52,4 @@ class TokenData(BaseModel):
     uuid: Optional[UUID] = None
     email: Optional[str] = None
     role: Optional[UserRole] = None
+    is_active: bool = True
@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+from uuid import UUID
+
+from services.auth_service.core.config import configs
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """Небольшой LRU-кеш в памяти процесса с ограниченным временем жизни записей"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, tuple[float, T]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: T, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Профили пользователей для /me: попадание в кеш избавляет от запроса в БД
+user_cache: TTLCache = TTLCache(
+    ttl=configs.USER_CACHE_TTL_SECONDS, max_size=configs.USER_CACHE_MAX_SIZE
+)
+
+# Деактивированные и удаленные пользователи, чьи токены еще не истекли.
+# Хранится в памяти процесса: при нескольких воркерах каждый ведет свой список,
+# поэтому доступ администратора проверяется по БД (deps.get_current_admin)
+deny_list: TTLCache = TTLCache(
+    ttl=configs.ACCESS_TOKEN_EXPIRE_MINUTES * 60, max_size=configs.DENY_LIST_MAX_SIZE
+)
+
+
+def revoke_user(user_uuid: UUID) -> None:
+    """Отзывает все выданные токены пользователя"""
+    user_cache.invalidate(user_uuid)
+    deny_list.set(user_uuid, True)
+
+
+def is_revoked(user_uuid: UUID) -> bool:
+    return deny_list.get(user_uuid) is not None
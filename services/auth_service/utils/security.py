@@ -1,7 +1,12 @@
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
 from jose import jwt
 from datetime import datetime, timedelta, timezone
 from services.auth_service.core.config import configs # Убрал get_auth_data, если он не нужен
+from infra.monitoring.monitoring import REGISTRY
+from services.auth_service.core.tracing import tracer
 
 # --- НОВЫЙ КОД ХЕШИРОВАНИЯ (БЕЗ passlib) ---
 
@@ -19,6 +24,77 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     # checkpw сама безопасно сравнивает хеши
     return bcrypt.checkpw(pwd_bytes, hashed_bytes)
 
+# --- ВЫНОС BCRYPT ИЗ EVENT LOOP ---
+
+# bcrypt занимает ~100-300 мс CPU, поэтому выполняется в отдельном пуле потоков,
+# а число операций в работе и в очереди ограничено BCRYPT_MAX_PENDING
+_hash_executor = ThreadPoolExecutor(
+    max_workers=configs.BCRYPT_WORKERS, thread_name_prefix="bcrypt"
+)
+# Массовый импорт хеширует в своем пуле: он не занимает потоки и очередь логинов
+_bulk_hash_executor = ThreadPoolExecutor(
+    max_workers=configs.BCRYPT_BULK_CONCURRENCY, thread_name_prefix="bcrypt-bulk"
+)
+_hash_pending = 0
+
+
+class HashingOverloaded(Exception):
+    """Очередь на хеширование паролей переполнена"""
+
+
+async def _run_hashing(func, *args):
+    global _hash_pending
+    if _hash_pending >= configs.BCRYPT_MAX_PENDING:
+        raise HashingOverloaded()
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        # Спан включает ожидание свободного потока в пуле
+        with tracer.span("bcrypt", operation=func.__name__):
+            return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Хеширование пароля в пуле потоков, не блокируя event loop"""
+    return await _run_hashing(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Проверка пароля в пуле потоков, не блокируя event loop"""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def hash_passwords_async(passwords: Sequence[str]) -> List[str]:
+    """
+    Параллельное хеширование пачки паролей для массового импорта в отдельном
+    пуле из BCRYPT_BULK_CONCURRENCY потоков. Admission control логинов
+    (BCRYPT_MAX_PENDING) импорт не проходит и не расходует: пачка ждет своих
+    потоков, а логины и регистрации - только друг друга.
+    """
+    loop = asyncio.get_running_loop()
+    with tracer.span("bcrypt.bulk", count=len(passwords)):
+        return await asyncio.gather(*(
+            loop.run_in_executor(_bulk_hash_executor, get_password_hash, password)
+            for password in passwords
+        ))
+
+
+def hashing_stats() -> dict:
+    return {
+        "workers": configs.BCRYPT_WORKERS,
+        "pending": _hash_pending,
+        "max_pending": configs.BCRYPT_MAX_PENDING,
+        "bulk_workers": configs.BCRYPT_BULK_CONCURRENCY,
+    }
+
+
+REGISTRY.gauge(
+    "bcrypt_pool", "Пул bcrypt: потоки, операции в работе и лимит очереди", ("state",),
+    function=lambda: [((name,), value) for name, value in hashing_stats().items()],
+)
+
 # --- JWT ОСТАЕТСЯ БЕЗ ИЗМЕНЕНИЙ ---
 
 def create_access_token(data: dict) -> str:
@@ -0,0 +1,697 @@
+"""
+Колоночное хранилище вакансий для аналитики.
+
+Каталог хранилища:
+    manifest.json                 - список сегментов и имя файла агрегатов (точка фиксации)
+    dictionaries.json             - словари измерений: строка <-> код (0 - значение не указано)
+    aggregates-<N>.npz            - агрегаты по измерениям
+    part=2024-01/seg-000001/*.npy - колонки сегмента, партиции по месяцу публикации
+
+Каждая пачка записывается новыми неизменяемыми сегментами (по одному на месяц)
+в формате .npy; при чтении колонки открываются через np.load(mmap_mode="r") и
+не копируются в память целиком. Мелкие сегменты партиции сливаются по
+уровням размера (size-tiered): compact_segments сегментов одного уровня
+(размеры в пределах множителя 4) сливаются в один сегмент следующего уровня,
+крупные слитые сегменты не переписываются заново. Каждая строка переписывается
+не больше log4(строк партиции) раз. Слияние не входит в append: его вызывает
+фоновая задача (ColumnarSink) или явный вызов compact.
+
+Агрегаты (число вакансий, сумма и сумма квадратов зарплат, минимум, максимум и
+гистограмма) по AGGREGATED_DIMENSIONS обновляются при каждой записи, поэтому
+группировка без фильтров отвечает за время, пропорциональное числу групп, а не
+строк. Запросы с фильтрами и точными перцентилями сканируют колонки векторными
+ядрами из kernels.py, пропуская партиции вне диапазона дат.
+
+Зарплаты в агрегатах и запросах - середина вилки в base_currency; вакансии
+в других валютах учитываются в числе вакансий, но не в статистике зарплат.
+Писатель один (конвейер сбора), читать можно параллельно с записью: запрос
+работает со снимком (список сегментов и неизменяемые агрегаты на момент
+начала), запись публикует новый снимок целиком. Слитые сегменты удаляются,
+когда их не читает ни один снимок.
+"""
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.dataMining_service.analytics import kernels
+from services.dataMining_service.models.vacancy import VacancyRecord
+
+SINGLE_DIMENSIONS = ("source", "area", "experience", "schedule", "currency", "employer")
+DIMENSIONS = SINGLE_DIMENSIONS + ("skill",)
+AGGREGATED_DIMENSIONS = ("skill", "area", "experience", "schedule", "source")
+AGGREGATE_FIELDS = ("count", "salary_count", "sum", "sumsq", "min", "max", "hist")
+
+# Уровень сегмента при слиянии - номер степени 4 его числа строк
+COMPACTION_TIER_BITS = 2
+
+SALARY_BIN_WIDTH = 10_000
+SALARY_BINS = 100  # Последняя корзина - зарплаты от 990 000 и выше
+
+UNKNOWN_PARTITION = "unknown"
+EPOCH = date(1970, 1, 1)
+
+
+class Dictionary:
+    """Словарное кодирование строк измерения; код 0 зарезервирован под None"""
+
+    def __init__(self, values: Iterable[Optional[str]] = (None,)):
+        self.values: List[Optional[str]] = list(values)
+        self._codes: Dict[str, int] = {v: i for i, v in enumerate(self.values) if v is not None}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value: str) -> Optional[int]:
+        """Код существующего значения без добавления нового"""
+        return self._codes.get(value)
+
+
+def parse_day(published_at: Optional[str]) -> int:
+    """Дата публикации ISO 8601 -> номер дня от 1970-01-01 (-1, если даты нет)"""
+    if not published_at:
+        return -1
+    try:
+        return (date.fromisoformat(published_at[:10]) - EPOCH).days
+    except ValueError:
+        return -1
+
+
+def salary_midpoint(salary_from: Optional[int], salary_to: Optional[int]) -> float:
+    if salary_from is not None and salary_to is not None:
+        return (salary_from + salary_to) / 2
+    if salary_from is not None:
+        return float(salary_from)
+    if salary_to is not None:
+        return float(salary_to)
+    return np.nan
+
+
+@dataclass
+class ColumnBatch:
+    """
+    Пачка вакансий в колоночном виде. Навыки - в формате CSR:
+    навыки строки i - skill_codes[skill_offsets[i]:skill_offsets[i + 1]].
+    """
+    published_day: np.ndarray  # int32, -1 - дата неизвестна
+    salary: np.ndarray  # float32, NaN - зарплата не указана
+    salary_from: np.ndarray
+    salary_to: np.ndarray
+    codes: Dict[str, np.ndarray]  # uint32 по SINGLE_DIMENSIONS
+    skill_offsets: np.ndarray  # int64, длина rows + 1
+    skill_codes: np.ndarray  # uint32
+
+    def __len__(self) -> int:
+        return len(self.published_day)
+
+    @property
+    def skill_rows(self) -> np.ndarray:
+        """Номер строки для каждого элемента skill_codes"""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.skill_offsets))
+
+    def take(self, rows: np.ndarray) -> "ColumnBatch":
+        """Подмножество строк (в порядке rows)"""
+        counts = np.diff(self.skill_offsets)[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        source_starts = self.skill_offsets[:-1][rows]
+        index = np.repeat(source_starts - offsets[:-1], counts) + np.arange(offsets[-1], dtype=np.int64)
+        return ColumnBatch(
+            published_day=self.published_day[rows],
+            salary=self.salary[rows],
+            salary_from=self.salary_from[rows],
+            salary_to=self.salary_to[rows],
+            codes={name: column[rows] for name, column in self.codes.items()},
+            skill_offsets=offsets,
+            skill_codes=self.skill_codes[index],
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["ColumnBatch"]) -> "ColumnBatch":
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for batch in batches:
+            offsets.append(batch.skill_offsets[1:] + base)
+            base += int(batch.skill_offsets[-1])
+        return cls(
+            published_day=np.concatenate([b.published_day for b in batches]),
+            salary=np.concatenate([b.salary for b in batches]),
+            salary_from=np.concatenate([b.salary_from for b in batches]),
+            salary_to=np.concatenate([b.salary_to for b in batches]),
+            codes={name: np.concatenate([b.codes[name] for b in batches]) for name in SINGLE_DIMENSIONS},
+            skill_offsets=np.concatenate(offsets),
+            skill_codes=np.concatenate([b.skill_codes for b in batches]),
+        )
+
+
+class Segment:
+    """
+    Неизменяемый сегмент партиции; колонки открываются через mmap при первом обращении.
+    readers - число снимков, читающих сегмент; retired - сегмент слит и удаляется,
+    когда readers станет 0 (счетчики меняются под блокировкой хранилища).
+    """
+
+    def __init__(self, root: str, name: str, partition: str, rows: int):
+        self.name = name
+        self.partition = partition
+        self.rows = rows
+        self.path = os.path.join(root, f"part={partition}", name)
+        self.readers = 0
+        self.retired = False
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return column
+
+    def load(self) -> ColumnBatch:
+        return ColumnBatch(
+            published_day=self.column("published_day"),
+            salary=self.column("salary"),
+            salary_from=self.column("salary_from"),
+            salary_to=self.column("salary_to"),
+            codes={name: self.column(name) for name in SINGLE_DIMENSIONS},
+            skill_offsets=self.column("skill_offsets"),
+            skill_codes=self.column("skill_codes"),
+        )
+
+    @staticmethod
+    def write(path: str, batch: ColumnBatch) -> None:
+        """Запись во временный каталог и переименование: сегмент появляется целиком"""
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        columns = {
+            "published_day": batch.published_day,
+            "salary": batch.salary,
+            "salary_from": batch.salary_from,
+            "salary_to": batch.salary_to,
+            "skill_offsets": batch.skill_offsets,
+            "skill_codes": batch.skill_codes,
+            **batch.codes,
+        }
+        for name, column in columns.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(column))
+        os.replace(tmp_path, path)
+
+    def remove(self) -> None:
+        self._columns.clear()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def month_range(self) -> Tuple[int, int]:
+        """Дни первого и последнего числа месяца партиции"""
+        month = np.datetime64(self.partition, "M")
+        first = int(month.astype("datetime64[D]").astype(np.int64))
+        last = int((month + 1).astype("datetime64[D]").astype(np.int64)) - 1
+        return first, last
+
+
+class Aggregates:
+    """
+    Агрегаты по измерению: массивы, индексированные кодом словаря.
+    Неизменяемы (массивы только для чтения): запись строит новый объект через
+    updated, поэтому запрос может читать массивы без блокировки.
+    """
+
+    def __init__(self, arrays: Optional[Dict[str, np.ndarray]] = None):
+        self.arrays = arrays or {
+            "count": np.zeros(0, dtype=np.int64),
+            "salary_count": np.zeros(0, dtype=np.int64),
+            "sum": np.zeros(0),
+            "sumsq": np.zeros(0),
+            "min": np.zeros(0),
+            "max": np.zeros(0),
+            "hist": np.zeros((0, SALARY_BINS), dtype=np.int64),
+        }
+        for array in self.arrays.values():
+            array.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.arrays["count"])
+
+    def _grown(self, size: int) -> Dict[str, np.ndarray]:
+        """Копии массивов, дополненные до size групп"""
+        extra = max(size - len(self), 0)
+        arrays = {}
+        for name, array in self.arrays.items():
+            fill = np.nan if name in ("min", "max") else 0
+            pad = np.full((extra,) + array.shape[1:], fill, dtype=array.dtype)
+            arrays[name] = np.concatenate([array, pad])
+        return arrays
+
+    def updated(self, codes: np.ndarray, values: np.ndarray, n_groups: int) -> "Aggregates":
+        """Новые агрегаты с учетом пачки; текущие не меняются"""
+        arrays = self._grown(n_groups)
+        codes = codes.astype(np.int64, copy=False)
+        for name, array in kernels.group_sums(codes, values, n_groups).items():
+            arrays[name][:n_groups] += array
+        sorted_values, starts, counts = kernels.sorted_groups(codes, values, n_groups)
+        minimum, maximum = kernels.group_extremes(sorted_values, starts, counts)
+        arrays["min"][:n_groups] = np.fmin(arrays["min"][:n_groups], minimum)
+        arrays["max"][:n_groups] = np.fmax(arrays["max"][:n_groups], maximum)
+        arrays["hist"][:n_groups] += kernels.group_histograms(codes, values, n_groups, SALARY_BIN_WIDTH, SALARY_BINS)
+        return Aggregates(arrays)
+
+
+class ColumnarStore:
+    def __init__(self, root: str, base_currency: str = "RUR", compact_segments: int = 16):
+        self.root = root
+        self.base_currency = base_currency
+        self.compact_segments = compact_segments
+        self.compacted_rows = 0  # Строки, переписанные слиянием с открытия хранилища
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        manifest = self._read_json("manifest.json") or {}
+        self._next_segment: int = manifest.get("next_segment", 1)
+        self._generation: int = manifest.get("generation", 0)
+        self.segments: List[Segment] = [
+            Segment(root, s["name"], s["partition"], s["rows"]) for s in manifest.get("segments", [])
+        ]
+        stored = self._read_json("dictionaries.json") or {}
+        self.dictionaries: Dict[str, Dictionary] = {
+            name: Dictionary(stored[name]) if name in stored else Dictionary() for name in DIMENSIONS
+        }
+        self.aggregates: Dict[str, Aggregates] = {name: Aggregates() for name in AGGREGATED_DIMENSIONS}
+        if manifest.get("aggregates"):
+            with np.load(os.path.join(root, manifest["aggregates"])) as data:
+                for name in AGGREGATED_DIMENSIONS:
+                    self.aggregates[name] = Aggregates({f: data[f"{name}.{f}"] for f in AGGREGATE_FIELDS})
+        self._remove_orphans()
+
+    # ------------ Запись ------------
+
+    def encode(self, records: Sequence[VacancyRecord]) -> ColumnBatch:
+        """VacancyRecord -> колонки; новые значения измерений добавляются в словари"""
+        rows = len(records)
+        codes = {name: np.zeros(rows, dtype=np.uint32) for name in SINGLE_DIMENSIONS}
+        salary_from = np.full(rows, np.nan, dtype=np.float32)
+        salary_to = np.full(rows, np.nan, dtype=np.float32)
+        salary = np.full(rows, np.nan, dtype=np.float32)
+        published_day = np.empty(rows, dtype=np.int32)
+        skill_offsets = np.zeros(rows + 1, dtype=np.int64)
+        skill_codes: List[int] = []
+        skills = self.dictionaries["skill"]
+        with self._lock:
+            for i, record in enumerate(records):
+                for name in SINGLE_DIMENSIONS:
+                    codes[name][i] = self.dictionaries[name].encode(getattr(record, name))
+                if record.salary_from is not None:
+                    salary_from[i] = record.salary_from
+                if record.salary_to is not None:
+                    salary_to[i] = record.salary_to
+                salary[i] = salary_midpoint(record.salary_from, record.salary_to)
+                published_day[i] = parse_day(record.published_at)
+                skill_codes.extend(skills.encode(skill) for skill in dict.fromkeys(record.skills))
+                skill_offsets[i + 1] = len(skill_codes)
+        return ColumnBatch(
+            published_day=published_day,
+            salary=salary,
+            salary_from=salary_from,
+            salary_to=salary_to,
+            codes=codes,
+            skill_offsets=skill_offsets,
+            skill_codes=np.array(skill_codes, dtype=np.uint32),
+        )
+
+    def append(self, records: Sequence[VacancyRecord]) -> int:
+        return self.append_batch(self.encode(records))
+
+    def append_batch(self, batch: ColumnBatch) -> int:
+        """
+        Запись пачки: сегменты по месяцам, затем словари, агрегаты и манифест.
+        Пока манифест не перезаписан, пачки в хранилище нет (сегменты-сироты
+        удаляются при следующем открытии).
+        """
+        if not len(batch):
+            return 0
+        with self._lock:
+            new_segments = []
+            for partition, rows in self._partition_rows(batch.published_day):
+                segment = self._new_segment(partition, len(rows))
+                Segment.write(segment.path, batch.take(rows) if len(rows) < len(batch) else batch)
+                new_segments.append(segment)
+            self._write_json("dictionaries.json", {name: d.values for name, d in self.dictionaries.items()})
+            self._commit(self.segments + new_segments, aggregates=self._updated_aggregates(batch))
+        return len(batch)
+
+    def _partition_rows(self, published_day: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+        known = published_day >= 0
+        months = published_day.astype("datetime64[D]").astype("datetime64[M]")
+        parts = []
+        if known.any():
+            unique, inverse = np.unique(months[known], return_inverse=True)
+            known_rows = np.nonzero(known)[0]
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(unique) + 1))
+            for i, month in enumerate(unique):
+                parts.append((str(month), known_rows[order[bounds[i]:bounds[i + 1]]]))
+        if not known.all():
+            parts.append((UNKNOWN_PARTITION, np.nonzero(~known)[0]))
+        return parts
+
+    def _new_segment(self, partition: str, rows: int) -> Segment:
+        segment = Segment(self.root, f"seg-{self._next_segment:06d}", partition, rows)
+        self._next_segment += 1
+        os.makedirs(os.path.dirname(segment.path), exist_ok=True)
+        return segment
+
+    def _updated_aggregates(self, batch: ColumnBatch) -> Dict[str, Aggregates]:
+        salary = self._base_salary(batch.salary, batch.codes["currency"])
+        aggregates = {}
+        for name in AGGREGATED_DIMENSIONS:
+            n_groups = len(self.dictionaries[name])
+            if name == "skill":
+                aggregates[name] = self.aggregates[name].updated(batch.skill_codes, salary[batch.skill_rows], n_groups)
+            else:
+                aggregates[name] = self.aggregates[name].updated(batch.codes[name], salary, n_groups)
+        return aggregates
+
+    def _base_salary(self, salary: np.ndarray, currency: np.ndarray) -> np.ndarray:
+        """Зарплаты только в base_currency, остальные - NaN"""
+        base_code = self.dictionaries["currency"].code(self.base_currency)
+        if base_code is None:
+            return np.full(len(salary), np.nan, dtype=np.float32)
+        return np.where(currency == base_code, salary, np.float32(np.nan))
+
+    @staticmethod
+    def _tier(rows: int) -> int:
+        return (max(rows, 1).bit_length() - 1) // COMPACTION_TIER_BITS
+
+    def _compaction_group(self, partition: Optional[str]) -> Optional[List[Segment]]:
+        """Сегменты одного уровня одной партиции, набравшие compact_segments (None - сливать нечего)"""
+        if self.compact_segments < 2:
+            return None
+        tiers: Dict[Tuple[str, int], List[Segment]] = {}
+        for segment in self.segments:
+            if partition is None or segment.partition == partition:
+                tiers.setdefault((segment.partition, self._tier(segment.rows)), []).append(segment)
+        # Сначала самые мелкие уровни: их слияние может набрать группу следующего
+        for _, group in sorted(tiers.items(), key=lambda item: item[0][1]):
+            if len(group) >= self.compact_segments:
+                return group
+        return None
+
+    def compact(self, partition: Optional[str] = None) -> int:
+        """
+        Слияние мелких сегментов по уровням размера (всех партиций или одной),
+        пока есть уровень с compact_segments сегментами; агрегаты не меняются.
+        Сегменты читаются и пишутся без блокировки хранилища - запись и
+        запросы ждут только фиксации манифеста. Старые сегменты удаляются
+        сразу, только если их не читает ни один снимок, иначе - последним
+        освободившим их снимком (после сбоя - при открытии). Возвращает число
+        переписанных строк.
+        """
+        rewritten = 0
+        with self._compact_lock:
+            while True:
+                with self._lock:
+                    old = self._compaction_group(partition)
+                    if old is None:
+                        break
+                    segment = self._new_segment(old[0].partition, sum(s.rows for s in old))
+                # Сегменты группы удаляет только слияние, а оно идет по одному
+                Segment.write(segment.path, ColumnBatch.concat([s.load() for s in old]))
+                with self._lock:
+                    merged = set(map(id, old))
+                    self._commit([s for s in self.segments if id(s) not in merged] + [segment])
+                    for s in old:
+                        s.retired = True
+                        if not s.readers:
+                            s.remove()
+                rewritten += segment.rows
+                self.compacted_rows += segment.rows
+        return rewritten
+
+    @contextmanager
+    def _snapshot(self) -> Iterator[List[Segment]]:
+        """Сегменты текущего манифеста; пока снимок открыт, compact их не удалит"""
+        with self._lock:
+            segments = list(self.segments)
+            for segment in segments:
+                segment.readers += 1
+        try:
+            yield segments
+        finally:
+            with self._lock:
+                for segment in segments:
+                    segment.readers -= 1
+                    if segment.retired and not segment.readers:
+                        segment.remove()
+
+    def _commit(self, segments: List[Segment], aggregates: Optional[Dict[str, Aggregates]] = None) -> None:
+        """Манифест с новыми сегментами (и агрегатами), затем публикация в памяти"""
+        previous = self._aggregates_file()
+        if aggregates is not None:
+            self._generation += 1
+            arrays = {
+                f"{name}.{f}": dimension.arrays[f]
+                for name, dimension in aggregates.items() for f in AGGREGATE_FIELDS
+            }
+            tmp_path = os.path.join(self.root, "aggregates.tmp.npz")
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, os.path.join(self.root, self._aggregates_file()))
+        self._write_json("manifest.json", {
+            "next_segment": self._next_segment,
+            "generation": self._generation,
+            "aggregates": self._aggregates_file(),
+            "segments": [{"name": s.name, "partition": s.partition, "rows": s.rows} for s in segments],
+        })
+        self.segments = segments
+        if aggregates is not None:
+            self.aggregates = aggregates
+        if aggregates is not None and previous != self._aggregates_file():
+            try:
+                os.remove(os.path.join(self.root, previous))
+            except FileNotFoundError:
+                pass
+
+    def _aggregates_file(self) -> str:
+        return f"aggregates-{self._generation}.npz"
+
+    def _remove_orphans(self) -> None:
+        """Сегменты и файлы агрегатов, не попавшие в манифест (сбой во время записи)"""
+        known = {segment.path for segment in self.segments}
+        for entry in os.listdir(self.root):
+            path = os.path.join(self.root, entry)
+            if entry.startswith("part=") and os.path.isdir(path):
+                for name in os.listdir(path):
+                    if os.path.join(path, name) not in known:
+                        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+            elif entry.startswith("aggregates") and entry != self._aggregates_file():
+                os.remove(path)
+
+    def _read_json(self, name: str):
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, name: str, payload) -> None:
+        path = os.path.join(self.root, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # ------------ Чтение ------------
+
+    @property
+    def rows(self) -> int:
+        return sum(segment.rows for segment in self.segments)
+
+    def summary(self) -> dict:
+        partitions: Dict[str, int] = {}
+        for segment in self.segments:
+            partitions[segment.partition] = partitions.get(segment.partition, 0) + segment.rows
+        return {
+            "rows": self.rows,
+            "segments": len(self.segments),
+            "compacted_rows": self.compacted_rows,
+            "partitions": dict(sorted(partitions.items())),
+            "dimensions": {name: len(d) - 1 for name, d in self.dictionaries.items()},
+        }
+
+    def salary_stats(
+        self,
+        by: str,
+        filters: Optional[Dict[str, str]] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        percentiles: Sequence[float] = (25, 50, 75),
+        exact: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Статистика зарплат с группировкой по измерению by, по убыванию числа вакансий.
+        Без фильтров и дат (и без exact) ответ строится из агрегатов, перцентили
+        приближенные - по гистограмме; иначе колонки сканируются, перцентили точные.
+        """
+        self._check_dimension(by)
+        if not filters and since is None and until is None and not exact and by in AGGREGATED_DIMENSIONS:
+            with self._lock:
+                values = list(self.dictionaries[by].values)
+                arrays = dict(self.aggregates[by].arrays)
+            n_groups = len(arrays["count"])
+            stats = {name: arrays[name] for name in ("count", "salary_count", "sum", "sumsq", "min", "max")}
+            quantiles = kernels.histogram_percentiles(arrays["hist"], SALARY_BIN_WIDTH, percentiles)
+        else:
+            values, codes, salary = self._scan(by, filters or {}, since, until)
+            n_groups = len(values)
+            stats = kernels.group_sums(codes, salary, n_groups)
+            sorted_values, starts, counts = kernels.sorted_groups(codes, salary, n_groups)
+            stats["min"], stats["max"] = kernels.group_extremes(sorted_values, starts, counts)
+            quantiles = kernels.group_percentiles(sorted_values, starts, counts, percentiles)
+        return self._stats_rows(by, values[:n_groups], stats, quantiles, percentiles, limit)
+
+    def salary_histogram(
+        self,
+        by: str,
+        value: str,
+        filters: Optional[Dict[str, str]] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> dict:
+        """Гистограмма зарплат для значения измерения (корзины по SALARY_BIN_WIDTH)"""
+        self._check_dimension(by)
+        if not filters and since is None and until is None and by in AGGREGATED_DIMENSIONS:
+            with self._lock:
+                code = self.dictionaries[by].code(value)
+                hist = self.aggregates[by].arrays["hist"]
+                counts = hist[code].copy() if code is not None and code < len(hist) else np.zeros(SALARY_BINS, dtype=np.int64)
+        else:
+            filters = {**(filters or {}), by: value}
+            _, codes, salary = self._scan(by, filters, since, until)
+            counts = kernels.group_histograms(np.zeros(len(codes), dtype=np.int64), salary, 1, SALARY_BIN_WIDTH, SALARY_BINS)[0]
+        return {by: value, "bin_width": SALARY_BIN_WIDTH, "counts": counts.tolist()}
+
+    def _scan(
+        self,
+        by: str,
+        filters: Dict[str, str],
+        since: Optional[date],
+        until: Optional[date],
+    ) -> Tuple[List[Optional[str]], np.ndarray, np.ndarray]:
+        """Коды группы и зарплаты (в base_currency) отфильтрованных строк всех сегментов"""
+        for name in filters:
+            self._check_dimension(name)
+        with self._lock:
+            values = list(self.dictionaries[by].values)
+            filter_codes = {name: self.dictionaries[name].code(v) for name, v in filters.items()}
+            base_code = self.dictionaries["currency"].code(self.base_currency)
+        if any(code is None for code in filter_codes.values()):
+            return values, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        first_day = (since - EPOCH).days if since else None
+        last_day = (until - EPOCH).days if until else None
+        with self._snapshot() as segments:
+            codes_parts, salary_parts = [], []
+            for segment in segments:
+                if not self._segment_in_range(segment, first_day, last_day):
+                    continue
+                mask = np.ones(segment.rows, dtype=bool)
+                if first_day is not None or last_day is not None:
+                    day = segment.column("published_day")
+                    if first_day is not None:
+                        mask &= day >= first_day
+                    if last_day is not None:
+                        mask &= day <= last_day
+                skill_rows = None
+                for name, code in filter_codes.items():
+                    if name == "skill":
+                        skill_rows = np.repeat(np.arange(segment.rows), np.diff(segment.column("skill_offsets")))
+                        has_skill = np.zeros(segment.rows, dtype=bool)
+                        has_skill[skill_rows[segment.column("skill_codes") == code]] = True
+                        mask &= has_skill
+                    else:
+                        mask &= segment.column(name) == code
+                if base_code is None:
+                    salary = np.full(segment.rows, np.nan, dtype=np.float32)
+                else:
+                    salary = np.where(segment.column("currency") == base_code, segment.column("salary"), np.float32(np.nan))
+
+                if by == "skill":
+                    if skill_rows is None:
+                        skill_rows = np.repeat(np.arange(segment.rows), np.diff(segment.column("skill_offsets")))
+                    selected = mask[skill_rows]
+                    codes_parts.append(segment.column("skill_codes")[selected])
+                    salary_parts.append(salary[skill_rows[selected]])
+                else:
+                    codes_parts.append(segment.column(by)[mask])
+                    salary_parts.append(salary[mask])
+            if not codes_parts:
+                return values, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            return values, np.concatenate(codes_parts).astype(np.int64), np.concatenate(salary_parts)
+
+    @staticmethod
+    def _segment_in_range(segment: Segment, first_day: Optional[int], last_day: Optional[int]) -> bool:
+        if first_day is None and last_day is None:
+            return True
+        if segment.partition == UNKNOWN_PARTITION:
+            return False
+        month_first, month_last = segment.month_range()
+        return (first_day is None or month_last >= first_day) and (last_day is None or month_first <= last_day)
+
+    @staticmethod
+    def _check_dimension(name: str) -> None:
+        if name not in DIMENSIONS:
+            raise ValueError(f"Неизвестное измерение: {name}")
+
+    @staticmethod
+    def _stats_rows(
+        by: str,
+        values: List[Optional[str]],
+        stats: Dict[str, np.ndarray],
+        quantiles: np.ndarray,
+        percentiles: Sequence[float],
+        limit: Optional[int],
+    ) -> List[dict]:
+        count = stats["count"]
+        salary_count = stats["salary_count"]
+        present = np.nonzero(count > 0)[0]
+        present = present[np.argsort(-count[present], kind="stable")]
+        if limit is not None:
+            present = present[:limit]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = stats["sum"] / salary_count
+            std = np.sqrt(np.maximum(stats["sumsq"] / salary_count - mean * mean, 0))
+
+        def number(value: float) -> Optional[float]:
+            return None if np.isnan(value) else round(float(value), 2)
+
+        rows = []
+        for code in present:
+            row = {
+                by: values[code],
+                "count": int(count[code]),
+                "salary_count": int(salary_count[code]),
+                "mean": number(mean[code]),
+                "std": number(std[code]),
+                "min": number(stats["min"][code]),
+                "max": number(stats["max"][code]),
+            }
+            for column, q in enumerate(percentiles):
+                row[f"p{q:g}"] = number(quantiles[code, column])
+            rows.append(row)
+        return rows
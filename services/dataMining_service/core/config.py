@@ -0,0 +1,104 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import BaseModel, Field
+from typing import Dict
+import os
+
+
+class SourceSettings(BaseModel):
+    """Источник вакансий: постраничный JSON API (формат hh.ru)"""
+    base_url: str
+    params: Dict[str, str] = {}  # Постоянные параметры запроса (text, area, ...)
+    per_page: int = 100
+    max_pages: int = 20  # hh.ru отдает не больше 2000 вакансий на запрос
+    rate: float = 5.0  # Запросов в секунду к источнику
+    burst: int = 5
+    concurrency: int = 4  # Одновременных запросов к источнику
+
+
+class Configs(BaseSettings):
+    # ------------ Веб-сервер ------------
+    HOST: str = "localhost"
+    PORT: int = 8010
+    WORKERS: int = Field(
+        default=1, env="WORKERS"
+    )  # Сбор по расписанию запускается в каждом воркере - для него нужен один
+    LOOP: str = Field(default="auto", env="LOOP")
+    HTTP: str = Field(default="auto", env="HTTP")
+    RELOAD: bool = Field(default=False, env="RELOAD")
+    GRACEFUL_SHUTDOWN_TIMEOUT: float = Field(default=30, env="GRACEFUL_SHUTDOWN_TIMEOUT")
+
+    PROJECT_NAME: str = "Сервис сбора вакансий"
+
+    # ------------ Источники ------------
+    SOURCES: Dict[str, SourceSettings] = Field(
+        default={
+            "hh": SourceSettings(
+                base_url="https://api.hh.ru/vacancies",
+                params={"text": "python"},
+            ),
+        },
+        env="SOURCES",
+    )
+    FETCH_TIMEOUT: float = Field(default=10, env="FETCH_TIMEOUT")
+    FETCH_RETRIES: int = Field(
+        default=3, env="FETCH_RETRIES"
+    )  # Повторы при 429/5xx и ошибках соединения
+    USER_AGENT: str = Field(default="vacancy-analysis/1.0", env="USER_AGENT")
+
+    # ------------ Запись ------------
+    SINK: str = Field(default="kafka", env="SINK")  # kafka, jsonl, memory, columnar
+    BATCH_SIZE: int = Field(default=500, env="BATCH_SIZE")
+    BATCH_FLUSH_INTERVAL: float = Field(
+        default=2, env="BATCH_FLUSH_INTERVAL"
+    )  # Неполная пачка записывается не реже раза в N секунд
+    QUEUE_MAX_PAGES: int = Field(
+        default=64, env="QUEUE_MAX_PAGES"
+    )  # Страниц в очереди на запись: загрузка ждет, если запись отстает
+    JSONL_PATH: str = Field(default="data/vacancies.jsonl", env="JSONL_PATH")
+    KAFKA_BOOTSTRAP_SERVERS: str = Field(default="localhost:9092", env="KAFKA_BOOTSTRAP_SERVERS")
+    KAFKA_TOPIC: str = Field(default="vacancies.raw", env="KAFKA_TOPIC")
+
+    # ------------ Аналитика ------------
+    ANALYTICS_PATH: str = Field(
+        default="data/analytics", env="ANALYTICS_PATH"
+    )  # Колоночное хранилище (SINK=columnar пишет в него)
+    ANALYTICS_BASE_CURRENCY: str = Field(
+        default="RUR", env="ANALYTICS_BASE_CURRENCY"
+    )  # Статистика зарплат считается только по вакансиям в этой валюте
+    ANALYTICS_COMPACT_SEGMENTS: int = Field(
+        default=16, env="ANALYTICS_COMPACT_SEGMENTS"
+    )  # Сегменты партиции одного уровня размера сливаются в один, когда их становится столько
+
+    # ------------ Дедупликация ------------
+    DEDUP_ENABLED: bool = Field(
+        default=True, env="DEDUP_ENABLED"
+    )  # Повторные публикации и почти дубликаты не передаются в SINK
+    DEDUP_PATH: str = Field(default="data/dedup", env="DEDUP_PATH")
+    DEDUP_TTL_HOURS: float = Field(
+        default=72, env="DEDUP_TTL_HOURS"
+    )  # Вакансия, не встречавшаяся столько часов, снова считается новой
+    DEDUP_GENERATIONS: int = Field(
+        default=6, env="DEDUP_GENERATIONS"
+    )  # Индекс делится на поколения по DEDUP_TTL_HOURS / N часов, устаревшее удаляется целиком
+    DEDUP_MAX_ENTRIES: int = Field(
+        default=1_000_000, env="DEDUP_MAX_ENTRIES"
+    )  # До 310 байт на запись; при переполнении вытесняется старейшее поколение
+    DEDUP_NEAR_THRESHOLD: float = Field(
+        default=0.8, env="DEDUP_NEAR_THRESHOLD"
+    )  # Сходство Жаккара названия и навыков для почти дубликата (1 - только точные)
+    DEDUP_SAVE_INTERVAL: float = Field(
+        default=30, env="DEDUP_SAVE_INTERVAL"
+    )  # Индекс сохраняется на диск не чаще раза в N секунд
+
+    # ------------ Расписание и контрольные точки ------------
+    CHECKPOINT_PATH: str = Field(default="data/checkpoints.json", env="CHECKPOINT_PATH")
+    INGEST_INTERVAL: float = Field(
+        default=0, env="INGEST_INTERVAL"
+    )  # Период запуска сбора, сек (0 - только по POST /ingestion/run)
+
+    model_config = SettingsConfigDict(
+        env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
+    )
+
+
+configs = Configs()
@@ -0,0 +1,455 @@
+"""
+Инкрементальный индекс дубликатов вакансий.
+
+Индекс состоит из поколений. Поколение - компактные хеш-таблицы на NumPy
+(открытая адресация, линейное пробирование, заполнение не больше половины):
+точные хеши содержания -> номер записи, ключи полос LSH -> номер первой
+записи с этим ключом, 8-битные скетчи MinHash и ключи guard_key для
+проверки кандидатов. 220-310 байт на запись (таблицы - степени двойки),
+без объектов Python на запись.
+
+Новые записи пишутся в текущее поколение; оно закрывается, когда проходит
+ttl / generations секунд или заполняется емкость. Закрытые поколения
+неизменяемы, хранятся на диске в .npy и открываются через mmap. Вытеснение
+по времени - удаление целого поколения старше ttl за O(1); при превышении
+числа поколений удаляется самое старое, поэтому память ограничена
+max_entries записей. Поиск - фиксированное число поколений и проб на запись,
+векторно для всей пачки.
+
+Запись, найденная в старом поколении, повторно заносится в текущее: вакансия,
+которую перепубликуют постоянно, не выпадает из индекса по ttl.
+
+Каждое сохранение пишет поколение в новый каталог, а каталоги, на которые
+больше не ссылается index.json, удаляются только после его перезаписи:
+сбой посреди сохранения оставляет на диске предыдущее целое состояние.
+"""
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.dataMining_service.dedup import minhash
+from services.dataMining_service.models.vacancy import VacancyRecord
+from infra.monitoring.monitoring import REGISTRY
+
+DEDUP_RECORDS = REGISTRY.counter(
+    "dedup_records_total", "Проверенные вакансии по результату", ("result",),
+)
+DEDUP_ENTRIES = REGISTRY.gauge(
+    "dedup_index_entries", "Записи в индексе дубликатов", (),
+)
+
+UNIQUE, EXACT, NEAR = 0, 1, 2
+RESULT_NAMES = ("unique", "exact", "near")
+
+_FIBONACCI = np.uint64(0x9E3779B97F4A7C15)
+
+
+class HashTable:
+    """Ключ -> int32 на массивах NumPy; ключ 0 означает пустую ячейку"""
+
+    def __init__(self, capacity: int, key_dtype, keys: np.ndarray = None, values: np.ndarray = None):
+        size = 1 << max(int(2 * capacity - 1).bit_length(), 4)
+        self.key_dtype = np.dtype(key_dtype)
+        self.keys = keys if keys is not None else np.zeros(size, dtype=self.key_dtype)
+        self.values = values if values is not None else np.full(size, -1, dtype=np.int32)
+        self.shift = np.uint64(64 - (len(self.keys).bit_length() - 1))
+        self.mask = len(self.keys) - 1
+
+    def _prepare(self, keys: np.ndarray) -> np.ndarray:
+        # Младший бит всегда 1: 0 зарезервирован под пустую ячейку
+        return keys.astype(self.key_dtype) | self.key_dtype.type(1)
+
+    def _slots(self, keys: np.ndarray) -> np.ndarray:
+        return ((keys.astype(np.uint64) * _FIBONACCI) >> self.shift).astype(np.int64)
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Значения для ключей (-1, если ключа нет)"""
+        keys = self._prepare(keys)
+        result = np.full(len(keys), -1, dtype=np.int32)
+        positions = self._slots(keys)
+        pending = np.arange(len(keys))
+        while len(pending):
+            slots = positions[pending]
+            found = self.keys[slots]
+            hit = found == keys[pending]
+            result[pending[hit]] = self.values[slots[hit]]
+            pending = pending[~hit & (found != 0)]
+            positions[pending] = (positions[pending] + 1) & self.mask
+        return result
+
+    def insert(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """Вставка ключей, которых нет в таблице (ключи в keys различны)"""
+        keys = self._prepare(keys)
+        positions = self._slots(keys)
+        pending = np.arange(len(keys))
+        while len(pending):
+            slots = positions[pending]
+            free = self.keys[slots] == 0
+            # На одну свободную ячейку претендуют несколько ключей - занимает первый
+            claimed_slots, first = np.unique(slots[free], return_index=True)
+            winners = pending[free][first]
+            self.keys[claimed_slots] = keys[winners]
+            self.values[claimed_slots] = values[winners]
+            placed = np.zeros(len(keys), dtype=bool)
+            placed[winners] = True
+            pending = pending[~placed[pending]]
+            positions[pending] = (positions[pending] + 1) & self.mask
+
+
+class Generation:
+    """Записи индекса за интервал времени"""
+
+    FILES = ("exact_keys", "exact_values", "band_keys", "band_values", "sketches", "guards")
+
+    def __init__(self, gen_id: int, capacity: int, created_at: float):
+        self.id = gen_id
+        self.capacity = capacity
+        self.created_at = created_at
+        self.last_at = created_at
+        self.count = 0
+        self.sealed = False
+        self.directory: Optional[str] = None  # Каталог последнего сохранения
+        self.exact = HashTable(capacity, np.uint64)
+        self.bands = HashTable(capacity * minhash.BANDS, np.uint32)
+        self.sketches = np.zeros((capacity, minhash.NUM_PERM), dtype=np.uint8)
+        self.guards = np.zeros(capacity, dtype=np.uint32)
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.count
+
+    @property
+    def nbytes(self) -> int:
+        tables = (self.exact.keys, self.exact.values, self.bands.keys, self.bands.values)
+        return sum(array.nbytes for array in tables) + self.sketches.nbytes + self.guards.nbytes
+
+    def add(self, hashes: np.ndarray, bands: np.ndarray, sketches: np.ndarray, guards: np.ndarray, now: float) -> None:
+        entries = np.arange(self.count, self.count + len(hashes), dtype=np.int32)
+        self.sketches[entries] = sketches
+        self.guards[entries] = guards
+        unique_hashes, first = np.unique(hashes, return_index=True)
+        missing = self.exact.lookup(unique_hashes) < 0
+        self.exact.insert(unique_hashes[missing], entries[first[missing]])
+        # Для полосы хранится первая запись с ключом: кандидата достаточно одного
+        flat_keys = bands.reshape(-1)
+        flat_entries = np.repeat(entries, minhash.BANDS)
+        unique_keys, first = np.unique(flat_keys, return_index=True)
+        missing = self.bands.lookup(unique_keys) < 0
+        self.bands.insert(unique_keys[missing], flat_entries[first[missing]])
+        self.count += len(hashes)
+        self.last_at = now
+
+    def save(self, path: str) -> None:
+        """Запись в новый каталог path (временный каталог + переименование)"""
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        arrays = {
+            "exact_keys": self.exact.keys,
+            "exact_values": self.exact.values,
+            "band_keys": self.bands.keys,
+            "band_values": self.bands.values,
+            "sketches": self.sketches[:self.count],
+            "guards": self.guards[:self.count],
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, meta: dict) -> "Generation":
+        """Закрытое поколение открывается через mmap, текущее - читается в память для записи"""
+        generation = cls.__new__(cls)
+        generation.id = meta["id"]
+        generation.capacity = meta["capacity"]
+        generation.created_at = meta["created_at"]
+        generation.last_at = meta["last_at"]
+        generation.count = meta["count"]
+        generation.sealed = meta["sealed"]
+        generation.directory = os.path.basename(path)
+        mode = "r" if generation.sealed else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in cls.FILES}
+        generation.exact = HashTable(0, np.uint64, arrays["exact_keys"], arrays["exact_values"])
+        generation.bands = HashTable(0, np.uint32, arrays["band_keys"], arrays["band_values"])
+        if generation.sealed:
+            generation.sketches = arrays["sketches"]
+            generation.guards = arrays["guards"]
+        else:
+            generation.sketches = np.zeros((generation.capacity, minhash.NUM_PERM), dtype=np.uint8)
+            generation.sketches[:generation.count] = arrays["sketches"]
+            generation.guards = np.zeros(generation.capacity, dtype=np.uint32)
+            generation.guards[:generation.count] = arrays["guards"]
+        return generation
+
+    def meta(self) -> dict:
+        return {
+            "id": self.id,
+            "capacity": self.capacity,
+            "created_at": self.created_at,
+            "last_at": self.last_at,
+            "count": self.count,
+            "sealed": self.sealed,
+            "directory": self.directory,
+        }
+
+
+@dataclass
+class DedupResult:
+    """Результат проверки пачки; commit заносит в индекс уникальные записи"""
+    records: Sequence[VacancyRecord]
+    results: np.ndarray  # UNIQUE / EXACT / NEAR по записям
+    refresh: np.ndarray  # Дубликаты из старых поколений - перенести в текущее
+    hashes: np.ndarray
+    bands: np.ndarray
+    sketches: np.ndarray
+    guards: np.ndarray
+
+    @property
+    def unique(self) -> List[VacancyRecord]:
+        return [record for record, result in zip(self.records, self.results) if result == UNIQUE]
+
+    def counts(self) -> Dict[str, int]:
+        return {name: int((self.results == code).sum()) for code, name in enumerate(RESULT_NAMES)}
+
+
+class DedupIndex:
+    def __init__(
+        self,
+        path: Optional[str],
+        ttl: float = 72 * 3600,
+        generations: int = 6,
+        max_entries: int = 1_000_000,
+        near_threshold: float = 0.8,
+        save_interval: float = 30,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_generations = generations
+        self.generation_span = ttl / generations
+        self.generation_capacity = max(max_entries // generations, 1)
+        self.near_threshold = near_threshold
+        self.save_interval = save_interval
+        self.generations: List[Generation] = []  # От старых к новым
+        self._next_id = 1
+        self._next_save = 1
+        self._saved_at = time.monotonic()
+        self._removed: List[str] = []  # Каталоги удаленных поколений
+        if path and os.path.exists(os.path.join(path, "index.json")):
+            self._load()
+        DEDUP_ENTRIES.set_function(lambda: [((), self.entries)])
+
+    @property
+    def entries(self) -> int:
+        return sum(generation.count for generation in self.generations)
+
+    @property
+    def nbytes(self) -> int:
+        """Размер массивов индекса (закрытые поколения - в страничном кэше через mmap)"""
+        return sum(generation.nbytes for generation in self.generations)
+
+    # ------------ Проверка и запись ------------
+
+    def check(self, records: Sequence[VacancyRecord], now: Optional[float] = None) -> DedupResult:
+        """
+        Классификация пачки без изменения индекса: точный дубликат, почти
+        дубликат (сходство MinHash >= near_threshold) или уникальная запись.
+        Дубликаты внутри пачки определяются относительно более ранних записей.
+        Поколения старше ttl не учитываются, удаляет их commit.
+        """
+        now = time.time() if now is None else now
+        generations = [g for g in self.generations if g.last_at >= now - self.ttl]
+        n = len(records)
+        hashes, guards, texts = minhash.record_keys(records)
+        signatures = minhash.minhash_signatures(texts)
+        bands = minhash.band_keys(signatures, guards)
+        sketches = minhash.sketches(signatures)
+        results = np.full(n, UNIQUE, dtype=np.int8)
+        refresh = np.zeros(n, dtype=bool)
+        current = generations[-1] if generations and not generations[-1].sealed else None
+
+        # Новые поколения раньше старых: совпадение в текущем не требует переноса
+        for generation in reversed(generations):
+            pending = results == UNIQUE
+            if not pending.any():
+                break
+            exact = np.zeros(n, dtype=bool)
+            exact[pending] = generation.exact.lookup(hashes[pending]) >= 0
+            near = np.zeros(n, dtype=bool)
+            candidates = pending & ~exact
+            if candidates.any():
+                near[candidates] = self._near_matches(
+                    generation, bands[candidates], sketches[candidates], guards[candidates]
+                )
+            results[exact] = EXACT
+            results[near] = NEAR
+            if generation is not current:
+                refresh |= exact | near
+
+        self._mark_batch_duplicates(results, hashes, bands, sketches, guards)
+        refresh &= results != UNIQUE
+        result = DedupResult(records, results, refresh, hashes, bands, sketches, guards)
+        for name, count in result.counts().items():
+            if count:
+                DEDUP_RECORDS.labels(name).inc(count)
+        return result
+
+    def _near_matches(
+        self,
+        generation: Generation,
+        bands: np.ndarray,
+        sketches: np.ndarray,
+        guards: np.ndarray,
+    ) -> np.ndarray:
+        n = len(bands)
+        entries = generation.bands.lookup(bands.reshape(-1)).reshape(n, minhash.BANDS)
+        matched = np.zeros(n, dtype=bool)
+        # Кандидаты по полосам проверяются оценкой сходства по скетчам
+        for band in range(minhash.BANDS):
+            candidate = entries[:, band]
+            rows = np.nonzero((candidate >= 0) & ~matched)[0]
+            if not len(rows):
+                continue
+            found = candidate[rows]
+            similarity = minhash.estimate_similarity(sketches[rows], generation.sketches[found])
+            same_guard = generation.guards[found] == guards[rows]
+            matched[rows[(similarity >= self.near_threshold) & same_guard]] = True
+        return matched
+
+    def _mark_batch_duplicates(
+        self,
+        results: np.ndarray,
+        hashes: np.ndarray,
+        bands: np.ndarray,
+        sketches: np.ndarray,
+        guards: np.ndarray,
+    ) -> None:
+        """Повторы внутри пачки: сравнение с первой записью с тем же хешем или ключом полосы"""
+        _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+        exact = (first[inverse] != np.arange(len(hashes))) & (results == UNIQUE)
+        results[exact] = EXACT
+        for band in range(minhash.BANDS):
+            _, first, inverse = np.unique(bands[:, band], return_index=True, return_inverse=True)
+            earlier = first[inverse]
+            rows = np.nonzero((earlier != np.arange(len(hashes))) & (results == UNIQUE))[0]
+            if not len(rows):
+                continue
+            similarity = minhash.estimate_similarity(sketches[rows], sketches[earlier[rows]])
+            same_guard = guards[earlier[rows]] == guards[rows]
+            results[rows[(similarity >= self.near_threshold) & same_guard]] = NEAR
+
+    def commit(self, result: DedupResult, now: Optional[float] = None) -> None:
+        """
+        Занесение уникальных (и перенос найденных в старых поколениях) записей.
+        Вызывается после надежной записи пачки: иначе при повторе после сбоя
+        записи оказались бы в индексе, но не в хранилище, и потерялись бы.
+        """
+        now = time.time() if now is None else now
+        self._evict(now)
+        rows = np.nonzero((result.results == UNIQUE) | result.refresh)[0]
+        while len(rows):
+            generation = self._writable(now)
+            chunk, rows = rows[:generation.free], rows[generation.free:]
+            generation.add(
+                result.hashes[chunk], result.bands[chunk], result.sketches[chunk], result.guards[chunk], now
+            )
+        self.maybe_save()
+
+    def _writable(self, now: float) -> Generation:
+        current = self.generations[-1] if self.generations else None
+        if current is not None and not current.sealed:
+            if current.free > 0 and now - current.created_at < self.generation_span:
+                return current
+            current.sealed = True
+        generation = Generation(self._next_id, self.generation_capacity, now)
+        self._next_id += 1
+        self.generations.append(generation)
+        while len(self.generations) > self.max_generations:
+            self._remove_oldest()
+        return generation
+
+    def _evict(self, now: float) -> None:
+        while self.generations and self.generations[0].last_at < now - self.ttl:
+            self._remove_oldest()
+
+    def _remove_oldest(self) -> None:
+        directory = self.generations.pop(0).directory
+        if directory is not None:
+            self._removed.append(directory)
+
+    # ------------ Хранение ------------
+
+    def maybe_save(self) -> None:
+        if self.path and time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def save(self) -> None:
+        """
+        Новые и текущее поколения на диск (каждое - в новый каталог), затем
+        index.json (точка фиксации) и удаление каталогов, на которые он больше
+        не ссылается
+        """
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        saved = self._read_index()
+        saved_sealed = {meta["id"] for meta in saved.get("generations", []) if meta["sealed"]}
+        stale = []
+        for i, generation in enumerate(self.generations):
+            if generation.id in saved_sealed:
+                continue
+            directory = f"gen-{generation.id:06d}-{self._next_save:06d}"
+            path = os.path.join(self.path, directory)
+            generation.save(path)
+            if generation.directory is not None:
+                stale.append(generation.directory)
+            generation.directory = directory
+            if generation.sealed:
+                # Закрытое поколение дальше читается с диска через mmap
+                self.generations[i] = Generation.load(path, generation.meta())
+        self._next_save += 1
+        payload = {
+            "next_id": self._next_id,
+            "next_save": self._next_save,
+            "generations": [g.meta() for g in self.generations],
+        }
+        tmp_path = os.path.join(self.path, "index.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, "index.json"))
+        for directory in stale + self._removed:
+            shutil.rmtree(os.path.join(self.path, directory), ignore_errors=True)
+        self._removed.clear()
+        self._saved_at = time.monotonic()
+
+    def _load(self) -> None:
+        saved = self._read_index()
+        self._next_id = saved["next_id"]
+        self._next_save = saved.get("next_save", 1)
+        self.generations = [
+            Generation.load(os.path.join(self.path, self._generation_directory(meta)), meta)
+            for meta in saved["generations"]
+        ]
+        # Каталоги, не попавшие в index.json (сбой во время сохранения)
+        known = {generation.directory for generation in self.generations}
+        for entry in os.listdir(self.path):
+            if entry.startswith("gen-") and entry not in known:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    def _read_index(self) -> dict:
+        path = os.path.join(self.path, "index.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _generation_directory(meta: dict) -> str:
+        # Индексы, сохраненные до появления поля directory, - каталог по id
+        return meta.get("directory") or f"gen-{meta['id']:06d}"
@@ -0,0 +1,143 @@
+"""
+Признаки дедупликации вакансий, посчитанные сразу для пачки (record_keys).
+
+Хеш содержания - 64-битный хеш нормализованных полей вакансии без
+идентификаторов, ссылок и даты: перепубликация с новым id дает тот же хеш.
+
+minhash_signatures - MinHash по шинглам из SHINGLE символов текста
+"название навыки". Почти дубликатами считаются только записи с одинаковым
+guard_key (работодатель, регион, опыт): похожие названия разных позиций
+одного работодателя ("Middle"/"Senior") различаются требуемым опытом.
+Текст всей пачки склеивается в один массив кодовых точек, хеши окон и
+NUM_PERM перестановок (multiply-shift по модулю 2^64) считаются матрично,
+минимум по записи - np.minimum.reduceat.
+"""
+import hashlib
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.dataMining_service.models.vacancy import VacancyRecord
+
+SHINGLE = 4
+NUM_PERM = 64
+BANDS = 8
+ROWS = 4  # Полосы LSH строятся по первым BANDS * ROWS значениям подписи
+SKETCH_BITS = 8  # Для проверки кандидатов хранится младший байт каждого значения
+
+_SPACE_RE = re.compile(r"[\W_]+")
+
+_rng = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+_WINDOW_POWERS = (np.uint64(1_000_003) ** np.arange(SHINGLE - 1, -1, -1, dtype=np.uint64)).astype(np.uint64)
+_BAND_MIX = _rng.integers(1, 2 ** 63, size=ROWS, dtype=np.uint64) | np.uint64(1)
+_BAND_SALT = _rng.integers(0, 2 ** 63, size=BANDS, dtype=np.uint64)
+_GUARD_MIX = np.uint64(_rng.integers(1, 2 ** 63, dtype=np.uint64) | 1)
+
+
+def normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.lower()).strip()
+
+
+# Навыки, работодатели и регионы повторяются из записи в запись
+_normalize_value = lru_cache(maxsize=1 << 16)(normalize)
+
+
+def record_keys(records: Sequence[VacancyRecord]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Хеши содержания, ключи guard_key и тексты для MinHash пачки; поля
+    каждой записи нормализуются один раз.
+    """
+    hashes = np.empty(len(records), dtype=np.uint64)
+    guards = np.empty(len(records), dtype=np.uint32)
+    texts = []
+    for i, record in enumerate(records):
+        title = normalize(record.title)
+        employer = _normalize_value(record.employer or "")
+        area = _normalize_value(record.area or "")
+        skills = sorted(_normalize_value(skill) for skill in record.skills)
+        content = "\x1f".join((
+            title,
+            employer,
+            area,
+            str(record.salary_from or ""),
+            str(record.salary_to or ""),
+            record.currency or "",
+            record.experience or "",
+            record.schedule or "",
+            "|".join(skills),
+        ))
+        hashes[i] = int.from_bytes(hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest(), "little")
+        guards[i] = zlib.crc32("\x1f".join((employer, area, record.experience or "")).encode("utf-8"))
+        texts.append(" ".join((title, *skills)).strip())
+    return hashes, guards, texts
+
+
+def content_hash(record: VacancyRecord) -> int:
+    return int(record_keys([record])[0][0])
+
+
+def _shingle_hashes(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Хеши всех шинглов пачки и индекс первого шингла каждой записи"""
+    padded = [text.ljust(SHINGLE) for text in texts]
+    lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+    points = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    windows = sliding_window_view(points, SHINGLE)
+    hashes = (windows * _WINDOW_POWERS).sum(axis=1, dtype=np.uint64)
+    # Окна, пересекающие границу записей, отбрасываются
+    record_starts = np.zeros(len(padded), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=record_starts[1:])
+    windows_per_record = lengths - SHINGLE + 1
+    record_of_window = np.repeat(np.arange(len(padded)), windows_per_record)
+    offset = np.arange(len(record_of_window)) - np.repeat(
+        np.concatenate(([0], np.cumsum(windows_per_record)[:-1])), windows_per_record
+    )
+    valid_positions = record_starts[record_of_window] + offset
+    starts = np.zeros(len(padded), dtype=np.int64)
+    np.cumsum(windows_per_record[:-1], out=starts[1:])
+    return hashes[valid_positions], starts
+
+
+def minhash_signatures(texts: Sequence[str]) -> np.ndarray:
+    """Подписи MinHash текстов record_keys: массив (len(texts), NUM_PERM) uint32"""
+    if not texts:
+        return np.zeros((0, NUM_PERM), dtype=np.uint32)
+    hashes, starts = _shingle_hashes(texts)
+    # Перестановки по строкам: reduceat вдоль непрерывной оси в разы быстрее,
+    # операции на месте не создают промежуточных матриц
+    permuted = _PERM_A[:, None] * hashes[None, :]
+    permuted += _PERM_B[:, None]
+    permuted >>= np.uint64(32)
+    return np.minimum.reduceat(permuted, starts, axis=1).T.astype(np.uint32)
+
+
+def band_keys(signatures: np.ndarray, guards: np.ndarray) -> np.ndarray:
+    """
+    Ключи полос LSH: массив (n, BANDS) uint32. В ключ входят номер полосы и
+    guard_key: типовые названия у разных работодателей не занимают ячейки
+    друг друга, кандидат по полосе - запись с тем же guard_key.
+    """
+    bands = signatures[:, :BANDS * ROWS].reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    mixed = (bands * _BAND_MIX).sum(axis=2, dtype=np.uint64) + _BAND_SALT
+    mixed += guards.astype(np.uint64)[:, None] * _GUARD_MIX
+    return (mixed >> np.uint64(32)).astype(np.uint32)
+
+
+def sketches(signatures: np.ndarray) -> np.ndarray:
+    """Младшие SKETCH_BITS бит подписи для оценки сходства кандидатов"""
+    return (signatures & ((1 << SKETCH_BITS) - 1)).astype(np.uint8)
+
+
+def estimate_similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Оценка сходства Жаккара по b-битным скетчам (построчно): совпадение
+    байта случайно с вероятностью 1/256, поправка вычитает эту долю
+    """
+    matches = (left == right).mean(axis=-1)
+    chance = 1 / (1 << SKETCH_BITS)
+    return np.clip((matches - chance) / (1 - chance), 0, 1)
@@ -0,0 +1,68 @@
+import json
+import os
+from typing import Dict, Optional, Set
+
+
+class CheckpointStore:
+    """
+    Контрольные точки сбора в JSON-файле: для каждого источника номер
+    последней страницы, все записи которой (и всех предыдущих) уже записаны.
+    Файл перезаписывается атомарно (временный файл + os.replace).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._cursors: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._cursors = {k: int(v) for k, v in json.load(f).items()}
+
+    def get(self, source: str) -> Optional[int]:
+        return self._cursors.get(source)
+
+    def set(self, source: str, page: int) -> None:
+        self._cursors[source] = page
+        self._save()
+
+    def reset(self, source: str) -> None:
+        """Сбор источника начнется с первой страницы (после полного прохода)"""
+        if self._cursors.pop(source, None) is not None:
+            self._save()
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self._cursors)
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._cursors, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class PageWatermark:
+    """
+    Страницы загружаются параллельно и записываются не по порядку.
+    Контрольная точка сдвигается только по непрерывному префиксу записанных
+    страниц, чтобы после рестарта ни одна страница не потерялась.
+    """
+
+    def __init__(self, last_done: int):
+        self.last_done = last_done
+        self._done: Set[int] = set()
+
+    def mark_done(self, page: int) -> bool:
+        """Отмечает страницу; True, если контрольная точка сдвинулась"""
+        if page <= self.last_done:
+            return False
+        self._done.add(page)
+        moved = False
+        while self.last_done + 1 in self._done:
+            self.last_done += 1
+            self._done.remove(self.last_done)
+            moved = True
+        return moved
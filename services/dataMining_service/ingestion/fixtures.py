@@ -0,0 +1,91 @@
+"""
+Фикстурный источник вакансий в формате hh.ru для локального прогона конвейера.
+
+ASGI-приложение без зависимостей: его можно запустить под uvicorn
+    uvicorn services.dataMining_service.ingestion.fixtures:app --port 8090
+и указать в SOURCES base_url=http://127.0.0.1:8090/vacancies, либо подключить
+к httpx.AsyncClient в процессе через httpx.ASGITransport(app=FixtureSource(...)).
+"""
+import json
+from typing import Dict, Optional, Set
+from urllib.parse import parse_qs
+
+_SKILLS = ("Python", "SQL", "FastAPI", "Docker", "Kafka", "PostgreSQL", "Git", "Linux")
+_AREAS = ("Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Удаленно")
+
+
+def fixture_vacancy(index: int) -> dict:
+    salary_from = 80000 + (index % 20) * 10000
+    return {
+        "id": str(100000 + index),
+        "name": f"Python разработчик #{index}",
+        "employer": {"id": str(index % 50), "name": f"Компания {index % 50}"},
+        "area": {"id": str(index % 5), "name": _AREAS[index % len(_AREAS)]},
+        "salary": {
+            "from": salary_from,
+            "to": salary_from + 50000 if index % 3 else None,
+            "currency": "RUR",
+            "gross": bool(index % 2),
+        } if index % 4 else None,
+        "experience": {"id": "between1And3", "name": "От 1 года до 3 лет"},
+        "schedule": {"id": "remote", "name": "Удаленная работа"},
+        "key_skills": [{"name": _SKILLS[(index + i) % len(_SKILLS)]} for i in range(index % 4 + 1)],
+        "published_at": "2024-01-01T10:00:00+0300",
+        "alternate_url": f"https://example.org/vacancy/{100000 + index}",
+    }
+
+
+class FixtureSource:
+    """
+    total_items вакансий, разбитых на страницы по per_page из запроса.
+    fail_once - номера страниц, которые с первого раза отвечают 503
+    (проверка повторов), с заголовком Retry-After, если задан retry_after;
+    malformed - страницы, которые отвечают 200 с телом, не являющимся JSON;
+    requests - счетчик запросов по номеру страницы.
+    """
+
+    def __init__(
+        self,
+        total_items: int = 1000,
+        fail_once: Set[int] = frozenset(),
+        retry_after: Optional[str] = None,
+        malformed: Set[int] = frozenset(),
+    ):
+        self.total_items = total_items
+        self.fail_once = set(fail_once)
+        self.retry_after = retry_after
+        self.malformed = set(malformed)
+        self.requests: Dict[int, int] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        page = int(query.get("page", ["0"])[0])
+        per_page = int(query.get("per_page", ["20"])[0])
+        self.requests[page] = self.requests.get(page, 0) + 1
+
+        headers = [(b"content-type", b"application/json")]
+        if page in self.fail_once:
+            self.fail_once.discard(page)
+            status, body = 503, b'{"error": "temporarily unavailable"}'
+            if self.retry_after is not None:
+                headers.append((b"retry-after", self.retry_after.encode("latin-1")))
+        elif page in self.malformed:
+            status, body = 200, b"<html>502 Bad Gateway</html>"
+        else:
+            start = page * per_page
+            items = [fixture_vacancy(i) for i in range(start, min(start + per_page, self.total_items))]
+            pages = (self.total_items + per_page - 1) // per_page
+            payload = {"items": items, "found": self.total_items, "pages": pages, "page": page, "per_page": per_page}
+            status, body = 200, json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [*headers, (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+app = FixtureSource()
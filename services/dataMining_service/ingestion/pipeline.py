@@ -0,0 +1,287 @@
+"""
+Конвейер сбора вакансий.
+
+Для каждого источника загрузчик получает первую непрочитанную страницу
+(из нее известно число страниц), остальные загружаются параллельно
+(не больше concurrency одновременно, не чаще rate в секунду). Страницы
+нормализуются в VacancyRecord и через ограниченную очередь попадают
+к единственному писателю, который пишет пачками по BATCH_SIZE (или по
+таймеру BATCH_FLUSH_INTERVAL). Перед записью пачка проходит индекс
+дубликатов: перепубликации и почти дубликаты не записываются, новые
+вакансии заносятся в индекс только после записи. Контрольная точка
+источника сдвигается только после записи страницы, поэтому рестарт
+продолжает сбор с места остановки, не загружая заново уже записанное.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from services.dataMining_service.core.config import Configs
+from services.dataMining_service.dedup.index import UNIQUE, DedupIndex
+from services.dataMining_service.ingestion.checkpoint import CheckpointStore, PageWatermark
+from services.dataMining_service.ingestion.ratelimit import AsyncTokenBucket
+from services.dataMining_service.ingestion.sinks import RecordSink
+from services.dataMining_service.ingestion.sources import PageResult, PagedJsonSource
+from services.dataMining_service.models.vacancy import VacancyRecord
+from infra.monitoring.monitoring import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PAGES_FETCHED = REGISTRY.counter(
+    "ingest_pages_total", "Загруженные страницы источников", ("source", "status"),
+)
+RECORDS_WRITTEN = REGISTRY.counter(
+    "ingest_records_total", "Записанные вакансии", ("source",),
+)
+FETCH_LATENCY = REGISTRY.histogram(
+    "ingest_fetch_duration_seconds", "Время загрузки страницы источника", ("source",),
+)
+BATCH_LATENCY = REGISTRY.histogram(
+    "ingest_batch_write_seconds", "Время записи пачки", (),
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Страница в очереди на запись; None - сигнал того, что загрузка завершена
+QueueItem = Optional[Tuple[str, int, List[VacancyRecord]]]
+
+
+class FetchError(Exception):
+    """Страница не загружена после всех повторов"""
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After в секундах: число секунд или HTTP-дата (None - не разобран)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class SourceStats:
+    pages: int = 0
+    records: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    failed_pages: List[int] = field(default_factory=list)
+    completed: bool = False
+
+
+@dataclass
+class IngestionStats:
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    batches: int = 0
+    sources: Dict[str, SourceStats] = field(default_factory=dict)
+
+
+class IngestionPipeline:
+    def __init__(
+        self,
+        configs: Configs,
+        sink: RecordSink,
+        checkpoints: CheckpointStore,
+        client: Optional[httpx.AsyncClient] = None,
+        dedup: Optional[DedupIndex] = None,
+    ):
+        self.configs = configs
+        self.sink = sink
+        self.checkpoints = checkpoints
+        self.dedup = dedup
+        self.sources = [PagedJsonSource(name, settings) for name, settings in configs.SOURCES.items()]
+        self.limiters = {
+            source.name: AsyncTokenBucket(source.settings.rate, source.settings.burst)
+            for source in self.sources
+        }
+        self._own_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=configs.FETCH_TIMEOUT,
+            headers={"User-Agent": configs.USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=sum(s.settings.concurrency for s in self.sources) or 1
+            ),
+        )
+
+    async def aclose(self) -> None:
+        if self._own_client:
+            await self.client.aclose()
+
+    async def fetch_page(self, source: PagedJsonSource, page: int) -> PageResult:
+        """Загрузка страницы с учетом лимита источника и повторами при 429/5xx"""
+        limiter = self.limiters[source.name]
+        for attempt in range(self.configs.FETCH_RETRIES + 1):
+            await limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = await self.client.get(source.settings.base_url, params=source.page_params(page))
+            except httpx.TransportError as e:
+                logger.warning("Fetch %s page %s failed: %r", source.name, page, e)
+                delay = 2 ** attempt
+            else:
+                FETCH_LATENCY.labels(source.name).observe(time.perf_counter() - started)
+                if response.status_code == 200:
+                    try:
+                        result = source.parse_page(response.json())
+                    except (ValueError, TypeError, AttributeError) as e:
+                        # Не JSON или JSON не той формы: повтор вернет то же самое
+                        PAGES_FETCHED.labels(source.name, "error").inc()
+                        raise FetchError(f"{source.name} page {page}: неразбираемый ответ: {e!r}") from e
+                    PAGES_FETCHED.labels(source.name, "ok").inc()
+                    return result
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    PAGES_FETCHED.labels(source.name, "error").inc()
+                    raise FetchError(f"{source.name} page {page}: HTTP {response.status_code}")
+                delay = retry_after_seconds(response.headers.get("retry-after"))
+                if delay is None:
+                    delay = 2 ** attempt
+                if response.status_code == 429:
+                    limiter.pause(delay)
+                    delay = 0
+            PAGES_FETCHED.labels(source.name, "retry").inc()
+            await asyncio.sleep(delay)
+        PAGES_FETCHED.labels(source.name, "error").inc()
+        raise FetchError(f"{source.name} page {page}: повторы исчерпаны")
+
+    async def _fetch_source(
+        self,
+        source: PagedJsonSource,
+        queue: "asyncio.Queue[QueueItem]",
+        stats: SourceStats,
+    ) -> None:
+        last_done = self.checkpoints.get(source.name)
+        start_page = 0 if last_done is None else last_done + 1
+        if start_page >= source.settings.max_pages:
+            stats.completed = True
+            return
+
+        async def fetch_into_queue(page: int) -> Optional[PageResult]:
+            try:
+                result = await self.fetch_page(source, page)
+            except FetchError as e:
+                logger.warning("%s", e)
+                stats.failed_pages.append(page)
+                return None
+            stats.pages += 1
+            stats.invalid += result.invalid
+            await queue.put((source.name, page, result.records))
+            return result
+
+        first = await fetch_into_queue(start_page)
+        if first is None:
+            return
+        total_pages = first.total_pages or 0
+        # Дальше страницы грузятся параллельно, не больше concurrency одновременно
+        slots = asyncio.Semaphore(source.settings.concurrency)
+
+        async def fetch_limited(page: int) -> None:
+            async with slots:
+                await fetch_into_queue(page)
+
+        await asyncio.gather(*(fetch_limited(page) for page in range(start_page + 1, total_pages)))
+        stats.completed = not stats.failed_pages
+
+    async def _write(self, queue: "asyncio.Queue[QueueItem]", stats: IngestionStats) -> None:
+        """Пачки по BATCH_SIZE; страница считается записанной, когда записаны все ее записи"""
+        watermarks = {}
+        for source in self.sources:
+            last_done = self.checkpoints.get(source.name)
+            watermarks[source.name] = PageWatermark(-1 if last_done is None else last_done)
+        buffer: List[VacancyRecord] = []
+        pending_pages: List[Tuple[str, int]] = []
+
+        async def flush() -> None:
+            batch_size = self.configs.BATCH_SIZE
+            records, result = buffer, None
+            if self.dedup is not None and buffer:
+                result = await asyncio.to_thread(self.dedup.check, buffer)
+                records = result.unique
+                for record, code in zip(result.records, result.results):
+                    if code != UNIQUE:
+                        stats.sources[record.source].duplicates += 1
+            for offset in range(0, len(records), batch_size):
+                started = time.perf_counter()
+                await self.sink.write_batch(records[offset:offset + batch_size])
+                BATCH_LATENCY.observe(time.perf_counter() - started)
+                stats.batches += 1
+            if result is not None:
+                await asyncio.to_thread(self.dedup.commit, result)
+            for record in records:
+                RECORDS_WRITTEN.labels(record.source).inc()
+            buffer.clear()
+            for source_name, page in pending_pages:
+                if watermarks[source_name].mark_done(page):
+                    self.checkpoints.set(source_name, watermarks[source_name].last_done)
+            pending_pages.clear()
+
+        interval = self.configs.BATCH_FLUSH_INTERVAL
+        deadline = time.monotonic() + interval
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                # Неполная пачка по таймеру: контрольные точки не отстают надолго
+                if pending_pages:
+                    await flush()
+                deadline = time.monotonic() + interval
+                continue
+
+            if item is None:
+                break
+            source_name, page, records = item
+            buffer.extend(records)
+            pending_pages.append((source_name, page))
+            stats.sources[source_name].records += len(records)
+            if len(buffer) >= self.configs.BATCH_SIZE:
+                await flush()
+                deadline = time.monotonic() + interval
+        if pending_pages:
+            await flush()
+
+    async def run(self) -> IngestionStats:
+        """Один проход по всем источникам"""
+        stats = IngestionStats(sources={source.name: SourceStats() for source in self.sources})
+        queue: "asyncio.Queue[QueueItem]" = asyncio.Queue(maxsize=self.configs.QUEUE_MAX_PAGES)
+
+        writer = asyncio.create_task(self._write(queue, stats))
+        tasks = [
+            asyncio.create_task(self._fetch_source(source, queue, stats.sources[source.name]))
+            for source in self.sources
+        ]
+        fetching = asyncio.gather(*tasks)
+        try:
+            await asyncio.wait((writer, fetching), return_when=asyncio.FIRST_COMPLETED)
+            if not writer.done():
+                await fetching
+                # Сигнал завершения ждет места в очереди отдельной задачей:
+                # если писатель упадет, ее отменят вместе с остальными
+                tasks.append(asyncio.create_task(queue.put(None)))
+            await writer
+        finally:
+            # Писатель упал или run отменен: загрузчики иначе зависнут на заполненной очереди
+            pending = [task for task in (writer, fetching, *tasks) if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        # Полный проход завершен - следующий запуск начнет с первой страницы
+        for source in self.sources:
+            if stats.sources[source.name].completed:
+                self.checkpoints.reset(source.name)
+        stats.finished_at = time.time()
+        return stats
@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """Ограничение частоты запросов к источнику: acquire ждет свободный токен"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Под блокировкой ожидающие получают токены по очереди
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Источник ответил 429: обнуляем токены, чтобы не слать запросы seconds секунд"""
+        self._tokens = -seconds * self.rate
+        self._updated_at = time.monotonic()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+import os
+from typing import List, Optional, Sequence
+
+from services.dataMining_service.analytics.store import ColumnarStore
+from services.dataMining_service.core.config import Configs
+from services.dataMining_service.models.vacancy import VacancyRecord
+from infra.messaging.bus import KafkaBus, Producer
+
+logger = logging.getLogger(__name__)
+
+
+def encode_record(record: VacancyRecord) -> bytes:
+    return json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RecordSink:
+    """Получатель пачек записей; write_batch возвращается после надежной записи"""
+
+    async def start(self) -> None:
+        pass
+
+    async def write_batch(self, records: Sequence[VacancyRecord]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemorySink(RecordSink):
+    """
+    Очередь в процессе вместо Kafka: для локального запуска и проверки конвейера.
+    Пачки можно читать из queue; batches хранит все записанные пачки.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.batches: List[List[VacancyRecord]] = []
+
+    async def write_batch(self, records: Sequence[VacancyRecord]) -> None:
+        batch = list(records)
+        self.batches.append(batch)
+        await self.queue.put(batch)
+
+    @property
+    def records(self) -> List[VacancyRecord]:
+        return [record for batch in self.batches for record in batch]
+
+
+class JsonlSink(RecordSink):
+    """Пачки дописываются в JSONL-файл одной операцией записи в потоке"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    async def start(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def write_batch(self, records: Sequence[VacancyRecord]) -> None:
+        data = b"".join(encode_record(record) + b"\n" for record in records)
+        await asyncio.to_thread(self._write, data)
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BusSink(RecordSink):
+    """
+    Запись в топик шины сообщений (Kafka или шина в процессе): пачка
+    публикуется целиком и подтверждается целиком. Ключ сообщения -
+    source:external_id, чтобы версии вакансии попадали в одну партицию.
+    """
+
+    def __init__(self, producer: Producer, topic: str):
+        self.producer = producer
+        self.topic = topic
+
+    async def start(self) -> None:
+        await self.producer.start()
+
+    async def write_batch(self, records: Sequence[VacancyRecord]) -> None:
+        await self.producer.publish(
+            self.topic,
+            [encode_record(record) for record in records],
+            [record.key.encode("utf-8") for record in records],
+        )
+
+    async def close(self) -> None:
+        await self.producer.close()
+
+
+class ColumnarSink(RecordSink):
+    """
+    Запись в колоночное хранилище аналитики: кодирование и запись пачки в потоке.
+    Слияние сегментов - фоновой задачей после записи (не больше одной сразу):
+    следующие пачки его не ждут.
+    """
+
+    def __init__(self, store: ColumnarStore):
+        self.store = store
+        self._compaction: Optional[asyncio.Task] = None
+
+    async def write_batch(self, records: Sequence[VacancyRecord]) -> None:
+        await asyncio.to_thread(self.store.append, list(records))
+        if self._compaction is None or self._compaction.done():
+            self._compaction = asyncio.create_task(self._compact())
+
+    async def _compact(self) -> None:
+        try:
+            await asyncio.to_thread(self.store.compact)
+        except Exception:
+            logger.exception("Compaction of %s failed", self.store.root)
+
+    async def close(self) -> None:
+        if self._compaction is not None:
+            await self._compaction
+
+
+def create_sink(
+    configs: Configs,
+    kind: Optional[str] = None,
+    store: Optional[ColumnarStore] = None,
+) -> RecordSink:
+    kind = kind or configs.SINK
+    if kind == "columnar":
+        return ColumnarSink(store or ColumnarStore(
+            configs.ANALYTICS_PATH,
+            base_currency=configs.ANALYTICS_BASE_CURRENCY,
+            compact_segments=configs.ANALYTICS_COMPACT_SEGMENTS,
+        ))
+    if kind == "kafka":
+        return BusSink(KafkaBus(configs.KAFKA_BOOTSTRAP_SERVERS).producer(), configs.KAFKA_TOPIC)
+    if kind == "jsonl":
+        return JsonlSink(configs.JSONL_PATH)
+    if kind == "memory":
+        return MemorySink()
+    raise ValueError(f"Неизвестный SINK: {kind}")
@@ -0,0 +1,94 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from services.dataMining_service.core.config import SourceSettings
+from services.dataMining_service.models.vacancy import VacancyRecord
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+@dataclass(slots=True)
+class PageResult:
+    records: List[VacancyRecord]
+    total_pages: Optional[int]
+    invalid: int = 0
+
+
+def _name(value: Any) -> Optional[str]:
+    """{'id': ..., 'name': 'Москва'} -> 'Москва'"""
+    if isinstance(value, dict):
+        return value.get("name")
+    return value if isinstance(value, str) else None
+
+
+def _int(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_vacancy(source: str, raw: Dict[str, Any]) -> Optional[VacancyRecord]:
+    """Вакансия в формате hh.ru -> VacancyRecord (None, если нет id или названия)"""
+    external_id = raw.get("id")
+    title = raw.get("name")
+    if not external_id or not title:
+        return None
+
+    salary = raw.get("salary") or {}
+    skills = tuple(
+        skill["name"].strip()
+        for skill in raw.get("key_skills") or ()
+        if isinstance(skill, dict) and skill.get("name")
+    )
+    return VacancyRecord(
+        source=source,
+        external_id=str(external_id),
+        title=_TAG_RE.sub("", title).strip(),
+        employer=_name(raw.get("employer")),
+        area=_name(raw.get("area")),
+        salary_from=_int(salary.get("from")),
+        salary_to=_int(salary.get("to")),
+        currency=salary.get("currency"),
+        salary_gross=salary.get("gross"),
+        experience=_name(raw.get("experience")),
+        schedule=_name(raw.get("schedule")),
+        skills=skills,
+        published_at=raw.get("published_at"),
+        url=raw.get("alternate_url") or raw.get("url"),
+    )
+
+
+class PagedJsonSource:
+    """
+    Постраничный JSON API: GET base_url?page=N&per_page=M.
+    Ответ: {"items": [...], "pages": <всего страниц>, ...}.
+    """
+
+    def __init__(self, name: str, settings: SourceSettings):
+        self.name = name
+        self.settings = settings
+
+    def page_params(self, page: int) -> Dict[str, str]:
+        return {
+            **self.settings.params,
+            "page": str(page),
+            "per_page": str(self.settings.per_page),
+        }
+
+    def parse_page(self, payload: Dict[str, Any]) -> PageResult:
+        records = []
+        invalid = 0
+        for raw in payload.get("items") or ():
+            record = normalize_vacancy(self.name, raw) if isinstance(raw, dict) else None
+            if record is None:
+                invalid += 1
+            else:
+                records.append(record)
+        pages = _int(payload.get("pages"))
+        if pages is not None:
+            pages = min(pages, self.settings.max_pages)
+        return PageResult(records=records, total_pages=pages, invalid=invalid)
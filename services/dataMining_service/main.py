@@ -0,0 +1,227 @@
+# main.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import date
+from typing import Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from services.dataMining_service.analytics.store import ColumnarStore
+from services.dataMining_service.core.config import configs
+from services.dataMining_service.dedup.index import DedupIndex
+from services.dataMining_service.ingestion.checkpoint import CheckpointStore
+from services.dataMining_service.ingestion.pipeline import IngestionPipeline, IngestionStats
+from services.dataMining_service.ingestion.sinks import create_sink
+from infra.monitoring.monitoring import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from infra.server import serve
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionRunner:
+    """Запуски конвейера: по расписанию INGEST_INTERVAL и по запросу, не более одного одновременно"""
+
+    def __init__(self, store: ColumnarStore):
+        self.sink = create_sink(configs, store=store)
+        self.checkpoints = CheckpointStore(configs.CHECKPOINT_PATH)
+        self.dedup = DedupIndex(
+            configs.DEDUP_PATH,
+            ttl=configs.DEDUP_TTL_HOURS * 3600,
+            generations=configs.DEDUP_GENERATIONS,
+            max_entries=configs.DEDUP_MAX_ENTRIES,
+            near_threshold=configs.DEDUP_NEAR_THRESHOLD,
+            save_interval=configs.DEDUP_SAVE_INTERVAL,
+        ) if configs.DEDUP_ENABLED else None
+        self.pipeline = IngestionPipeline(configs, self.sink, self.checkpoints, dedup=self.dedup)
+        self.last_stats: Optional[IngestionStats] = None
+        self.last_error: Optional[str] = None
+        self._current: Optional[asyncio.Task] = None
+        self._scheduler: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    async def start(self) -> None:
+        await self.sink.start()
+        if configs.INGEST_INTERVAL > 0:
+            self._scheduler = asyncio.create_task(self._schedule())
+
+    def trigger(self) -> bool:
+        if self.running:
+            return False
+        self._current = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        try:
+            self.last_stats = await self.pipeline.run()
+            self.last_error = None
+        except Exception as e:
+            logger.exception("Ingestion failed")
+            self.last_error = repr(e)
+
+    async def _schedule(self) -> None:
+        while True:
+            if self.trigger():
+                await self._current
+            await asyncio.sleep(configs.INGEST_INTERVAL)
+
+    async def stop(self) -> None:
+        for task in (self._scheduler, self._current):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        await self.pipeline.aclose()
+        await self.sink.close()
+        if self.dedup is not None:
+            self.dedup.save()
+
+
+runner: Optional[IngestionRunner] = None
+store: Optional[ColumnarStore] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global runner, store
+    store = ColumnarStore(
+        configs.ANALYTICS_PATH,
+        base_currency=configs.ANALYTICS_BASE_CURRENCY,
+        compact_segments=configs.ANALYTICS_COMPACT_SEGMENTS,
+    )
+    runner = IngestionRunner(store)
+    await runner.start()
+    try:
+        yield
+    finally:
+        await runner.stop()
+
+
+app = FastAPI(
+    lifespan=lifespan,
+    title=configs.PROJECT_NAME,
+    docs_url="/api/v1/mining/docs",
+    openapi_url="/api/v1/mining/openapi.json"
+)
+
+app.add_middleware(MetricsMiddleware, service="dataMining_service")
+
+
+@app.post("/api/v1/mining/ingestion/run", status_code=202)
+async def run_ingestion():
+    """Запуск сбора вакансий по всем источникам"""
+    if not runner.trigger():
+        raise HTTPException(status_code=409, detail="Сбор уже выполняется")
+    return {"status": "started"}
+
+
+@app.get("/api/v1/mining/ingestion/status")
+async def ingestion_status():
+    """Состояние сбора: последний запуск и контрольные точки источников"""
+    return {
+        "running": runner.running,
+        "last_run": asdict(runner.last_stats) if runner.last_stats else None,
+        "last_error": runner.last_error,
+        "checkpoints": runner.checkpoints.snapshot(),
+        "dedup_entries": runner.dedup.entries if runner.dedup is not None else None,
+    }
+
+
+def analytics_filters(
+    area: Optional[str],
+    experience: Optional[str],
+    schedule: Optional[str],
+    source: Optional[str],
+    skill: Optional[str],
+) -> Dict[str, str]:
+    filters = {"area": area, "experience": experience, "schedule": schedule, "source": source, "skill": skill}
+    return {name: value for name, value in filters.items() if value is not None}
+
+
+@app.get("/api/v1/mining/analytics/summary")
+async def analytics_summary():
+    """Объем колоночного хранилища: строки, сегменты, партиции, размеры словарей"""
+    return store.summary()
+
+
+@app.get("/api/v1/mining/analytics/salary")
+async def salary_stats(
+    by: str = Query("skill", description="Измерение группировки"),
+    area: Optional[str] = None,
+    experience: Optional[str] = None,
+    schedule: Optional[str] = None,
+    source: Optional[str] = None,
+    skill: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    exact: bool = Query(False, description="Точные перцентили сканированием вместо агрегатов"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Статистика зарплат с группировкой по измерению"""
+    try:
+        rows = await asyncio.to_thread(
+            store.salary_stats,
+            by,
+            filters=analytics_filters(area, experience, schedule, source, skill),
+            since=since,
+            until=until,
+            exact=exact,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"by": by, "currency": store.base_currency, "groups": rows}
+
+
+@app.get("/api/v1/mining/analytics/salary/histogram")
+async def salary_histogram(
+    by: str,
+    value: str,
+    area: Optional[str] = None,
+    experience: Optional[str] = None,
+    schedule: Optional[str] = None,
+    source: Optional[str] = None,
+    skill: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+):
+    """Распределение зарплат для значения измерения"""
+    try:
+        return await asyncio.to_thread(
+            store.salary_histogram,
+            by,
+            value,
+            filters=analytics_filters(area, experience, schedule, source, skill),
+            since=since,
+            until=until,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики сервиса в формате Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+if __name__ == "__main__":
+    serve(
+        "main:app",
+        host=configs.HOST,
+        port=configs.PORT,
+        workers=configs.WORKERS,
+        loop=configs.LOOP,
+        http=configs.HTTP,
+        reload=configs.RELOAD,
+        graceful_timeout=configs.GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=True,
+    )
@@ -0,0 +1,33 @@
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(slots=True, frozen=True)
+class VacancyRecord:
+    """
+    Нормализованная вакансия.
+    slots и кортежи вместо списков: записи живут в пачках и очередях,
+    поэтому важен размер объекта.
+    """
+    source: str
+    external_id: str
+    title: str
+    employer: Optional[str]
+    area: Optional[str]
+    salary_from: Optional[int]
+    salary_to: Optional[int]
+    currency: Optional[str]
+    salary_gross: Optional[bool]
+    experience: Optional[str]
+    schedule: Optional[str]
+    skills: Tuple[str, ...]
+    published_at: Optional[str]
+    url: Optional[str]
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.external_id}"
+
+    def to_dict(self) -> dict:
+        """Словарь без пустых полей (компактная сериализация)"""
+        return {k: v for k, v in asdict(self).items() if v is not None and v != ()}
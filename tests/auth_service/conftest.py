@@ -0,0 +1,15 @@
+"""
+auth_service импортируется как в контейнере: deps и repository - модули
+верхнего уровня из каталога сервиса, остальное - через пакет services.
+"""
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "services", "auth_service")
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("bcrypt")
+if SERVICE_DIR not in sys.path:
+    sys.path.append(SERVICE_DIR)
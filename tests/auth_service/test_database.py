@@ -0,0 +1,86 @@
+"""Сессии и пул БД: ленивое создание сессии, время ожидания соединения, спаны запросов"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from infra.monitoring.tracing import InMemoryExporter, Tracer  # noqa: E402
+from services.auth_service.core.database import LazySession, TimedQueuePool, trace_queries  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}",
+        poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=5,
+    )
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+async def test_lazy_session_checks_out_connection_on_first_query(engine):
+    pool = engine.sync_engine.pool
+    session = LazySession(async_sessionmaker(engine, class_=AsyncSession))
+
+    await session.rollback()
+    assert not session.created
+    assert pool.checkouts == 0
+
+    assert (await session.execute(text("SELECT 1"))).scalar() == 1
+    assert session.created
+    assert pool.checkedout() == 1
+
+    await session.close()
+    assert not session.created
+    assert pool.checkedout() == 0
+    assert pool.checkouts == 1
+
+
+async def test_pool_measures_checkout_wait(engine):
+    pool = engine.sync_engine.pool
+
+    async def query():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async with engine.connect() as held:
+        await held.execute(text("SELECT 1"))
+        # Единственное соединение занято: второй запрос ждет его возврата
+        waiting = asyncio.create_task(query())
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+    await waiting
+
+    assert pool.checkouts == 2
+    assert pool.wait_max >= 0.15
+    assert pool.wait_total >= pool.wait_max
+
+
+async def test_query_spans_are_recorded_for_failed_queries(engine):
+    exporter = InMemoryExporter()
+    trace_queries(engine.sync_engine, Tracer("auth_service", exporter=exporter))
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing"))
+        # Начало упавших запросов не копится в info соединения
+        assert conn.info["query_start_ns"] == []
+        await conn.execute(text("SELECT 2"))
+        assert conn.info["query_start_ns"] == []
+
+    spans = list(exporter.spans)
+    assert [span.name for span in spans] == ["db.query"] * 5
+    errors = [span.attributes.get("error") for span in spans]
+    assert errors == [None, "OperationalError", "OperationalError", "OperationalError", None]
+    assert spans[1].attributes["statement"] == "SELECT * FROM missing"
+    assert all(span.end_ns >= span.start_ns for span in spans)
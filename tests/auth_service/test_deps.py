@@ -0,0 +1,170 @@
+"""
+Проверка идентичности: права администратора - по БД, /me - по claims и кешу
+профилей, заголовки шлюза - только с верным X-Gateway-Token
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from deps import get_current_admin, get_token_data, get_user_repository
+from services.auth_service.core.config import configs
+from services.auth_service.main import app
+from services.auth_service.schemas.users_schema import TokenData, UserRole
+from services.auth_service.utils.identity import deny_list, is_revoked, revoke_user, user_cache
+from services.auth_service.utils.security import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+class Users:
+    """Репозиторий с одним пользователем в памяти"""
+
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+
+    async def get_user_by_uuid(self, user_uuid):
+        self.queries += 1
+        return self.user if self.user is not None and self.user.uuid == user_uuid else None
+
+    async def get_user_by_email(self, email):
+        self.queries += 1
+        return self.user if self.user is not None and self.user.email == email else None
+
+
+def admin_token(user_uuid) -> TokenData:
+    # Токен выдан, когда пользователь был администратором
+    return TokenData(uuid=user_uuid, email="admin@example.com", role=UserRole.ADMIN)
+
+
+async def test_active_admin_is_allowed():
+    user = SimpleNamespace(uuid=uuid4(), email="admin@example.com", role=UserRole.ADMIN, is_active=True)
+
+    assert (await get_current_admin(admin_token(user.uuid), Users(user))).uuid == user.uuid
+
+
+async def test_demoted_admin_is_forbidden_despite_token_role():
+    user = SimpleNamespace(uuid=uuid4(), email="admin@example.com", role=UserRole.USER, is_active=True)
+
+    with pytest.raises(HTTPException) as error:
+        await get_current_admin(admin_token(user.uuid), Users(user))
+    assert error.value.status_code == 403
+
+
+async def test_deactivated_admin_is_rejected_and_revoked():
+    user = SimpleNamespace(uuid=uuid4(), email="admin@example.com", role=UserRole.ADMIN, is_active=False)
+
+    with pytest.raises(HTTPException) as error:
+        await get_current_admin(admin_token(user.uuid), Users(user))
+    assert error.value.status_code == 401
+    assert is_revoked(user.uuid)
+    deny_list.invalidate(user.uuid)
+
+
+async def test_deleted_admin_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        await get_current_admin(admin_token(uuid4()), Users(None))
+    assert error.value.status_code == 401
+
+
+def make_user(**fields):
+    return SimpleNamespace(**{
+        "uuid": uuid4(),
+        "email": "anna@example.com",
+        "full_name": "Анна",
+        "role": UserRole.USER,
+        "is_active": True,
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        **fields,
+    })
+
+
+def access_token(user) -> str:
+    return create_access_token(data={
+        "sub": user.email, "uuid": str(user.uuid), "role": user.role.value, "active": user.is_active,
+    })
+
+
+def request_with(headers: dict) -> Request:
+    return Request({"type": "http", "headers": [(k.encode(), v.encode()) for k, v in headers.items()]})
+
+
+@pytest.fixture
+def users():
+    """Репозиторий сервиса подменяется репозиторием в памяти"""
+    repo = Users(make_user())
+    app.dependency_overrides[get_user_repository] = lambda: repo
+    try:
+        yield repo
+    finally:
+        app.dependency_overrides.pop(get_user_repository, None)
+        user_cache.invalidate(repo.user.uuid)
+        deny_list.invalidate(repo.user.uuid)
+
+
+async def get_me(token: str) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://auth") as client:
+        return await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+async def test_me_uses_claims_and_profile_cache(users):
+    token = access_token(users.user)
+
+    first = await get_me(token)
+    second = await get_me(token)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.json()["uuid"] == str(users.user.uuid)
+    # Второй запрос - из кеша профилей, без обращения к БД
+    assert users.queries == 1
+
+
+async def test_deactivated_user_is_rejected_by_deny_list(users):
+    token = access_token(users.user)
+    assert (await get_me(token)).status_code == 200
+
+    # Деактивация отзывает токены: проверка по claims отклоняет их без БД
+    revoke_user(users.user.uuid)
+    users.user.is_active = False
+    queries = users.queries
+    response = await get_me(token)
+
+    assert response.status_code == 401
+    assert users.queries == queries
+
+
+@pytest.mark.parametrize("gateway_token", [None, "forged"])
+async def test_gateway_headers_without_valid_token_are_ignored(monkeypatch, gateway_token):
+    monkeypatch.setattr(configs, "GATEWAY_SHARED_SECRET", "gateway-secret")
+    user = make_user()
+    headers = {"x-user-uuid": str(uuid4()), "x-user-role": "admin", "x-user-email": "admin@example.com"}
+    if gateway_token is not None:
+        headers["x-gateway-token"] = gateway_token
+
+    # Заголовки не приняты: идентичность берется из JWT
+    token_data = await get_token_data(request_with(headers), access_token(user))
+    assert (token_data.uuid, token_data.role) == (user.uuid, UserRole.USER)
+
+    with pytest.raises(HTTPException) as error:
+        await get_token_data(request_with(headers), "not-a-jwt")
+    assert error.value.status_code == 401
+
+
+async def test_gateway_headers_with_valid_token_are_trusted(monkeypatch):
+    monkeypatch.setattr(configs, "GATEWAY_SHARED_SECRET", "gateway-secret")
+    user_uuid = uuid4()
+    headers = {"x-user-uuid": str(user_uuid), "x-user-role": "analyst", "x-gateway-token": "gateway-secret"}
+
+    token_data = await get_token_data(request_with(headers), "not-checked")
+    assert (token_data.uuid, token_data.role) == (user_uuid, UserRole.ANALYST)
+
+    # Без общего секрета у сервиса заголовки шлюза не принимаются вовсе
+    monkeypatch.setattr(configs, "GATEWAY_SHARED_SECRET", None)
+    with pytest.raises(HTTPException):
+        await get_token_data(request_with(headers), "not-a-jwt")
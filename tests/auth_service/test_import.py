@@ -0,0 +1,43 @@
+"""Разбор файла массового импорта: ошибки отдельных строк не прерывают импорт"""
+import io
+
+from admin_router import iter_import_rows
+
+
+def rows(data: bytes, is_csv: bool) -> list:
+    return [
+        (line_no, type(row).__name__ if isinstance(row, ValueError) else row)
+        for line_no, row in iter_import_rows(io.BytesIO(data), is_csv)
+    ]
+
+
+def test_jsonl_bad_lines_are_reported_and_skipped():
+    data = (
+        b'{"email": "a@example.com", "password": "secret-1"}\n'
+        b'\xff\xfe not utf-8\n'
+        b'\n'
+        b'{broken json\n'
+        b'{"email": "b@example.com", "password": "secret-2"}\n'
+    )
+
+    assert rows(data, is_csv=False) == [
+        (1, {"email": "a@example.com", "password": "secret-1"}),
+        (2, "UnicodeDecodeError"),
+        (4, "JSONDecodeError"),
+        (5, {"email": "b@example.com", "password": "secret-2"}),
+    ]
+
+
+def test_csv_undecodable_line_does_not_stop_import():
+    data = (
+        b"email,password,full_name\r\n"
+        b"a@example.com,secret-1,\xd0\x90\xd0\xbd\xd0\xbd\xd0\xb0\r\n"
+        b"b@example.com,secret-2,\xff\r\n"
+        b'c@example.com,secret-3,"Multi\r\nline"\r\n'
+    )
+
+    assert rows(data, is_csv=True) == [
+        (2, {"email": "a@example.com", "password": "secret-1", "full_name": "Анна"}),
+        (3, "UnicodeDecodeError"),
+        (5, {"email": "c@example.com", "password": "secret-3", "full_name": "Multi\r\nline"}),
+    ]
@@ -0,0 +1,62 @@
+"""Регистрация против SQLite: один INSERT ... ON CONFLICT на запрос, конфликт email -> 400"""
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from services.auth_service.core.database import get_async_session  # noqa: E402
+from services.auth_service.main import app  # noqa: E402
+from services.auth_service.models.users_model import User  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def statements(tmp_path):
+    """SQL запросы к БД за время теста; сессии сервиса - к файлу SQLite"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(User.metadata.create_all)
+    executed = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split()[0].upper())
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def session():
+        async with session_maker() as db:
+            yield db
+
+    app.dependency_overrides[get_async_session] = session
+    try:
+        yield executed
+    finally:
+        app.dependency_overrides.pop(get_async_session, None)
+        await engine.dispose()
+
+
+async def register(email: str) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://auth") as client:
+        return await client.post(
+            "/api/v1/auth/register", json={"email": email, "password": "secret-1", "full_name": "Анна"},
+        )
+
+
+async def test_register_then_duplicate_email(statements):
+    created = await register("anna@example.com")
+
+    assert created.status_code == 201
+    assert created.json()["email"] == "anna@example.com"
+    assert created.json()["role"] == "user"
+    assert statements == ["INSERT"]
+
+    statements.clear()
+    duplicate = await register("anna@example.com")
+
+    assert duplicate.status_code == 400
+    # Конфликт определяется самим INSERT, без SELECT перед ним или после
+    assert statements == ["INSERT"]
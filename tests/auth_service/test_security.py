@@ -0,0 +1,59 @@
+"""Хеширование паролей: 503 при переполненной очереди bcrypt, отдельный пул для импорта"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from services.auth_service.core.config import configs
+from services.auth_service.main import app
+from services.auth_service.utils import security
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def saturated(monkeypatch):
+    """Очередь bcrypt на одну операцию, занятая зависшим хешированием"""
+    release = threading.Event()
+    threads = []
+    hash_password = security.get_password_hash
+
+    def get_password_hash(password: str) -> str:
+        threads.append(threading.current_thread().name)
+        if password == "blocked":
+            release.wait(10)
+        return hash_password(password)
+
+    monkeypatch.setattr(configs, "BCRYPT_MAX_PENDING", 1)
+    monkeypatch.setattr(security, "get_password_hash", get_password_hash)
+    blocked = asyncio.create_task(security.get_password_hash_async("blocked"))
+    while security.hashing_stats()["pending"] < 1:
+        await asyncio.sleep(0.01)
+    try:
+        yield threads
+    finally:
+        release.set()
+        await blocked
+
+
+async def test_register_returns_503_when_hashing_is_saturated(saturated):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://auth") as client:
+        response = await client.post(
+            "/api/v1/auth/register", json={"email": "anna@example.com", "password": "secret-1"},
+        )
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    # Отклонено до хеширования и до запроса в БД
+    assert len(saturated) == 1 and saturated[0].startswith("bcrypt_")
+
+
+async def test_bulk_hashing_uses_own_pool(saturated):
+    hashes = await asyncio.wait_for(security.hash_passwords_async(["secret-1", "secret-2", "secret-3"]), 10)
+
+    assert len(hashes) == 3
+    assert all(security.verify_password(f"secret-{i}", hashed) for i, hashed in enumerate(hashes, 1))
+    assert all(name.startswith("bcrypt-bulk") for name in saturated[1:])
+    # Импорт не занимает очередь логинов и не отклоняется ею
+    assert security.hashing_stats()["pending"] == 1
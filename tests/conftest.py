@@ -0,0 +1,74 @@
+"""
+Общие фикстуры тестов.
+
+Сервисы поднимаются настоящим uvicorn в фоновом потоке на свободном порту:
+шлюз и клиенты ходят к ним через обычный TCP, как в работе.
+"""
+import asyncio
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import pytest
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve_app(app, port: int = 0) -> Iterator[str]:
+    """Запускает ASGI-приложение в фоновом потоке и возвращает его адрес"""
+    uvicorn = pytest.importorskip("uvicorn")
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("uvicorn не запустился")
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+class FlakyUpstream:
+    """
+    Отвечает статусами из script по очереди (затем 200), delay - пауза перед
+    ответом, headers - дополнительные заголовки ответов не 200
+    """
+
+    def __init__(self, script=(), delay: float = 0, headers=()):
+        self.script = list(script)
+        self.delay = delay
+        self.headers = list(headers)
+        self.requests = 0
+        self.active = 0
+
+    async def __call__(self, scope, receive, send):
+        self.requests += 1
+        self.active += 1
+        try:
+            more_body = True
+            while more_body:
+                more_body = (await receive()).get("more_body", False)
+            await asyncio.sleep(self.delay)
+            status = self.script.pop(0) if self.script else 200
+            headers = [(b"content-length", b"2")] + (self.headers if status != 200 else [])
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": b"ok"})
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,7 @@
+"""
+dataMining_service импортируется через пакет services из корня репозитория;
+аналитика и дедупликация требуют numpy из requirements сервиса.
+"""
+import pytest
+
+pytest.importorskip("numpy")
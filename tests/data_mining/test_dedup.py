@@ -0,0 +1,87 @@
+"""Индекс дубликатов: сохранение без окна потери данных, вытеснение только при commit"""
+import os
+
+import pytest
+
+from services.dataMining_service.dedup import index as dedup_index
+from services.dataMining_service.dedup.index import EXACT, UNIQUE, DedupIndex
+from services.dataMining_service.models.vacancy import VacancyRecord
+
+HOUR = 3600
+
+
+def vacancy(index: int) -> VacancyRecord:
+    return VacancyRecord(
+        source="fixture",
+        external_id=str(index),
+        title=f"Вакансия {index}: инженер данных",
+        employer=f"Компания {index}",
+        area="Москва",
+        salary_from=None,
+        salary_to=None,
+        currency=None,
+        salary_gross=None,
+        experience=None,
+        schedule=None,
+        skills=(f"skill-{index}",),
+        published_at=None,
+        url=None,
+    )
+
+
+def make_index(path, **kwargs) -> DedupIndex:
+    return DedupIndex(str(path), ttl=6 * HOUR, generations=6, max_entries=600, save_interval=3600, **kwargs)
+
+
+def add(index: DedupIndex, records, now: float) -> None:
+    index.commit(index.check(records, now=now), now=now)
+
+
+def test_crash_during_save_keeps_previous_state(tmp_path, monkeypatch):
+    index = make_index(tmp_path)
+    add(index, [vacancy(0), vacancy(1)], now=0)
+    index.save()
+    add(index, [vacancy(2)], now=60)
+
+    replace = os.replace
+
+    def crash_on_generation(src, dst):
+        if os.path.isdir(src):
+            raise OSError("disk failure")
+        replace(src, dst)
+
+    monkeypatch.setattr(dedup_index.os, "replace", crash_on_generation)
+    with pytest.raises(OSError):
+        index.save()
+    monkeypatch.undo()
+
+    reopened = make_index(tmp_path)
+    result = reopened.check([vacancy(0), vacancy(1), vacancy(2)], now=120)
+    assert result.results.tolist() == [EXACT, EXACT, UNIQUE]
+    # Недописанный каталог удален при открытии
+    assert sorted(os.listdir(tmp_path)) == ["gen-000001-000001", "index.json"]
+
+
+def test_save_replaces_generation_directory(tmp_path):
+    index = make_index(tmp_path)
+    add(index, [vacancy(0)], now=0)
+    index.save()
+    add(index, [vacancy(1)], now=60)
+    index.save()
+
+    assert sorted(os.listdir(tmp_path)) == ["gen-000001-000002", "index.json"]
+    assert make_index(tmp_path).entries == 2
+
+
+def test_check_does_not_evict(tmp_path):
+    index = make_index(tmp_path)
+    add(index, [vacancy(0)], now=0)
+
+    # Поколение старше ttl не учитывается, но остается до commit
+    result = index.check([vacancy(0)], now=7 * HOUR)
+    assert result.results.tolist() == [UNIQUE]
+    assert len(index.generations) == 1 and index.entries == 1
+
+    index.commit(result, now=7 * HOUR)
+    assert [generation.created_at for generation in index.generations] == [7 * HOUR]
+    assert index.entries == 1
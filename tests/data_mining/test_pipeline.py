@@ -0,0 +1,109 @@
+"""Конвейер сбора против фикстурного источника по HTTP и очереди в процессе вместо Kafka"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from services.dataMining_service.core.config import Configs, SourceSettings
+from services.dataMining_service.ingestion.checkpoint import CheckpointStore
+from services.dataMining_service.ingestion.fixtures import FixtureSource
+from services.dataMining_service.ingestion.pipeline import IngestionPipeline, retry_after_seconds
+from services.dataMining_service.ingestion.sinks import MemorySink, RecordSink
+from tests.conftest import serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+def make_configs(url: str, **settings) -> Configs:
+    source = SourceSettings(base_url=f"{url}/vacancies", per_page=10, max_pages=100, rate=1000, burst=100)
+    return Configs(SOURCES={"fixture": source}, BATCH_SIZE=25, BATCH_FLUSH_INTERVAL=0.2, **settings)
+
+
+class FailingSink(RecordSink):
+    async def write_batch(self, records):
+        raise RuntimeError("sink is down")
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("-1") == 0.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < retry_after_seconds(later) <= 30
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
+
+
+async def test_run_writes_all_pages_and_retries_with_http_date(tmp_path):
+    upstream = FixtureSource(total_items=95, fail_once={3}, retry_after="Wed, 21 Oct 2015 07:28:00 GMT")
+    sink = MemorySink()
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    with serve_app(upstream) as url:
+        pipeline = IngestionPipeline(make_configs(url), sink, checkpoints)
+        try:
+            stats = await asyncio.wait_for(pipeline.run(), 10)
+        finally:
+            await pipeline.aclose()
+
+    assert sorted(int(record.external_id) for record in sink.records) == list(range(100000, 100095))
+    assert upstream.requests[3] == 2
+    assert stats.sources["fixture"].pages == 10
+    assert stats.sources["fixture"].completed
+    # Полный проход сбрасывает контрольную точку
+    assert checkpoints.get("fixture") is None
+    batch = sink.queue.get_nowait()
+    assert batch == sink.batches[0]
+
+
+async def test_run_resumes_after_checkpoint(tmp_path):
+    upstream = FixtureSource(total_items=50)
+    sink = MemorySink()
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    checkpoints.set("fixture", 2)
+    with serve_app(upstream) as url:
+        pipeline = IngestionPipeline(make_configs(url), sink, checkpoints)
+        try:
+            await asyncio.wait_for(pipeline.run(), 10)
+        finally:
+            await pipeline.aclose()
+
+    assert sorted(upstream.requests) == [3, 4]
+    assert len(sink.records) == 20
+
+
+async def test_malformed_page_is_recorded_as_failed(tmp_path):
+    upstream = FixtureSource(total_items=50, malformed={2})
+    sink = MemorySink()
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    with serve_app(upstream) as url:
+        pipeline = IngestionPipeline(make_configs(url), sink, checkpoints)
+        try:
+            stats = await asyncio.wait_for(pipeline.run(), 10)
+        finally:
+            await pipeline.aclose()
+
+    source_stats = stats.sources["fixture"]
+    assert source_stats.failed_pages == [2]
+    assert not source_stats.completed
+    # Остальные страницы записаны, битая не повторялась
+    assert len(sink.records) == 40
+    assert upstream.requests[2] == 1
+    assert checkpoints.get("fixture") == 1
+
+
+async def test_writer_failure_does_not_hang_producers(tmp_path):
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    tasks_before = asyncio.all_tasks()
+    with serve_app(FixtureSource(total_items=500)) as url:
+        # Очередь на одну страницу: загрузчики упираются в нее, пока писатель падает
+        pipeline = IngestionPipeline(make_configs(url, QUEUE_MAX_PAGES=1), FailingSink(), checkpoints)
+        try:
+            with pytest.raises(RuntimeError, match="sink is down"):
+                await asyncio.wait_for(pipeline.run(), 10)
+        finally:
+            await pipeline.aclose()
+
+    assert checkpoints.get("fixture") is None
+    # Загрузчики отменены, а не оставлены висеть на заполненной очереди
+    assert asyncio.all_tasks() == tasks_before
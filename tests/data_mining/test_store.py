@@ -0,0 +1,107 @@
+"""Колоночное хранилище: слияние по уровням размера, снимки для чтения при слиянии, неизменяемые агрегаты"""
+import os
+
+import numpy as np
+import pytest
+
+from services.dataMining_service.analytics.store import ColumnarStore
+from services.dataMining_service.models.vacancy import VacancyRecord
+
+
+def vacancy(index: int, area: str = "Москва") -> VacancyRecord:
+    return VacancyRecord(
+        source="fixture",
+        external_id=str(index),
+        title=f"Python разработчик #{index}",
+        employer=None,
+        area=area,
+        salary_from=100000 + index * 1000,
+        salary_to=None,
+        currency="RUR",
+        salary_gross=None,
+        experience=None,
+        schedule=None,
+        skills=("Python",),
+        published_at="2024-01-15T10:00:00+0300",
+        url=None,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Слияние не входит в append: тесты вызывают compact сами
+    return ColumnarStore(str(tmp_path / "analytics"), compact_segments=2)
+
+
+def test_compact_keeps_segments_of_open_snapshot(store):
+    for index in range(3):
+        store.append([vacancy(index)])
+    old_paths = [segment.path for segment in store.segments]
+
+    with store._snapshot() as segments:
+        store.compact("2024-01")
+        # Снимок по-прежнему читает старые сегменты
+        assert all(os.path.isdir(path) for path in old_paths)
+        assert [int(segment.column("salary")[0]) for segment in segments] == [100000, 101000, 102000]
+    assert not any(os.path.exists(path) for path in old_paths)
+    # Три однострочных сегмента одного уровня слиты в один
+    assert len(store.segments) == 1
+
+    [row] = store.salary_stats("area", filters={"skill": "Python"})
+    assert row["count"] == 3
+
+
+def test_compact_without_readers_removes_segments_at_once(store):
+    store.append([vacancy(0)])
+    store.append([vacancy(1)])
+    old_paths = [segment.path for segment in store.segments]
+
+    store.compact("2024-01")
+
+    assert not any(os.path.exists(path) for path in old_paths)
+    assert ColumnarStore(store.root, compact_segments=0).rows == 2
+
+
+def test_append_does_not_compact(store):
+    for index in range(4):
+        store.append([vacancy(index)])
+
+    assert len(store.segments) == 4
+    assert store.compact() == 4
+    assert len(store.segments) == 1
+    assert store.compact() == 0
+
+
+def test_size_tiered_compaction_bounds_rewrites(tmp_path):
+    store = ColumnarStore(str(tmp_path / "analytics"), compact_segments=4)
+    for batch in range(128):
+        store.append([vacancy(batch * 20 + index) for index in range(20)])
+        store.compact()
+
+    assert store.rows == 2560
+    # Слитый сегмент не переписывается заново при каждом слиянии: каждая строка
+    # переписана не больше раза на уровень (log4(2560 / 20) = 3.5)
+    assert store.compacted_rows <= 4 * store.rows
+    assert len(store.segments) < 4 * 4
+    assert sum(segment.rows for segment in store.segments) == store.rows
+    [row] = store.salary_stats("area")
+    assert row["count"] == 2560
+
+
+def test_append_publishes_new_aggregates(store):
+    store.append([vacancy(0)])
+    published = store.aggregates["area"]
+    counts = published.arrays["count"]
+
+    store.append([vacancy(1), vacancy(2, area="Казань")])
+
+    # Ранее опубликованные агрегаты не меняются и не могут быть изменены
+    assert store.aggregates["area"] is not published
+    assert counts.tolist() == [0, 1]
+    assert not counts.flags.writeable
+    with pytest.raises(ValueError):
+        counts[1] = 0
+    rows = {row["area"]: row["count"] for row in store.salary_stats("area")}
+    assert rows == {"Москва": 2, "Казань": 1}
+    reopened = ColumnarStore(store.root, compact_segments=0)
+    assert np.array_equal(reopened.aggregates["area"].arrays["count"], store.aggregates["area"].arrays["count"])
@@ -0,0 +1,66 @@
+"""
+Шлюз импортируется как в контейнере (модули API_GATEWAY - верхнего уровня),
+настройки - из окружения. Тесты меняют маршруты через reload_routes() с
+адресами своих заглушек; у каждой заглушки свой порт, поэтому предохранители
+и пулы разных тестов не пересекаются.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+GATEWAY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "API_GATEWAY")
+
+pytest.importorskip("fastapi")
+if GATEWAY_DIR not in sys.path:
+    sys.path.insert(0, GATEWAY_DIR)
+
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+os.environ.setdefault("RETRY_BACKOFF_BASE", "0.001")
+
+# В корне репозитория тоже есть main.py: модуль шлюза импортируется сразу
+import main as gateway_main  # noqa: E402
+
+assert gateway_main.__file__.startswith(GATEWAY_DIR)
+
+
+@pytest.fixture
+def gateway():
+    return gateway_main
+
+
+# Настройки, которые reload_routes перечитывает из окружения
+RELOADED_SETTINGS = {"SERVICE_ROUTE_METHODS", "ROUTE_TIMEOUTS", "ROUTE_LOAD_BALANCING", "RATE_LIMITS"}
+
+
+@pytest.fixture
+def set_routes(gateway, monkeypatch):
+    """
+    Маршруты шлюза из словаря префикс -> адрес(а). Настройки маршрутов
+    передаются через окружение и reload_routes, остальные - подменой configs.
+    """
+
+    def apply(routes: dict, **settings) -> None:
+        monkeypatch.setenv("SERVICE_ROUTES", json.dumps(routes))
+        for name, value in settings.items():
+            if name in RELOADED_SETTINGS:
+                monkeypatch.setenv(name, json.dumps(value))
+            else:
+                monkeypatch.setattr(gateway.configs, name, value)
+        gateway.reload_routes()
+
+    yield apply
+    monkeypatch.undo()
+    gateway.reload_routes()
+
+
+@pytest.fixture
+async def client(gateway):
+    import httpx
+
+    transport = httpx.ASGITransport(app=gateway.app, client=("203.0.113.7", 51000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client
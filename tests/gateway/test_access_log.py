@@ -0,0 +1,61 @@
+"""Access-лог шлюза: одна строка на запрос, время до начала ответа, выборка"""
+import logging
+
+import httpx
+import pytest
+
+from middleware import LoggingMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+async def upstream(scope, receive, send):
+    if scope["path"] == "/boom":
+        raise RuntimeError("boom")
+    status = 503 if scope["path"] == "/unavailable" else 200
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    # Тело частями, как у потокового ответа шлюза
+    for chunk in (b"a", b"b", b"c"):
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def client_for(app) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=("198.51.100.4", 40000), raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://gateway")
+
+
+@pytest.fixture
+def access_log(caplog):
+    """Записи access-лога (caplog ловит и логи httpx)"""
+    caplog.set_level(logging.INFO, logger="gateway.access")
+    return lambda: [r for r in caplog.records if r.name == "gateway.access"]
+
+
+async def test_one_structured_line_per_streamed_request(access_log):
+    async with client_for(LoggingMiddleware(upstream)) as client:
+        response = await client.get("/items")
+
+    assert response.text == "abc"
+    assert float(response.headers["x-process-time"]) >= 0
+    [record] = access_log()
+    message = record.getMessage()
+    assert message.startswith("method=GET path=/items status=200 duration_ms=")
+    assert message.endswith("client=198.51.100.4")
+
+
+async def test_unhandled_error_is_logged_as_500(access_log):
+    async with client_for(LoggingMiddleware(upstream)) as client:
+        await client.get("/boom")
+
+    [record] = access_log()
+    assert "path=/boom status=500" in record.getMessage()
+
+
+async def test_sampling_keeps_server_errors(access_log):
+    async with client_for(LoggingMiddleware(upstream, sample_rate=0)) as client:
+        for _ in range(20):
+            await client.get("/items")
+        await client.get("/unavailable")
+
+    assert [r.getMessage().split()[2] for r in access_log()] == ["status=503"]
@@ -0,0 +1,81 @@
+"""Заголовки идентичности: шлюз удаляет присланные клиентом X-User-* и выставляет свои"""
+import json
+
+import pytest
+from jose import jwt
+
+from auth import TokenVerifier
+from tests.conftest import serve_app
+
+pytestmark = pytest.mark.anyio
+
+SECRET_KEY = "test-secret"
+FORGED = {
+    "x-user-uuid": "00000000-0000-0000-0000-000000000000",
+    "x-user-email": "root@example.com",
+    "x-user-role": "admin",
+    "x-gateway-token": "forged",
+}
+
+
+class HeaderEcho:
+    """Отвечает JSON с заголовками, полученными от шлюза: имя -> список значений"""
+
+    async def __call__(self, scope, receive, send):
+        received = {}
+        for name, value in scope["headers"]:
+            received.setdefault(name.decode(), []).append(value.decode())
+        body = json.dumps(received).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def bearer(**claims) -> str:
+    return "Bearer " + jwt.encode(claims, SECRET_KEY, algorithm="HS256")
+
+
+@pytest.fixture
+def verifier(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "token_verifier", TokenVerifier(SECRET_KEY, "HS256", "gateway-secret"))
+
+
+async def echo(client, set_routes, **headers) -> dict:
+    with serve_app(HeaderEcho()) as url:
+        set_routes({"/api/v1/echo": url})
+        response = await client.get("/api/v1/echo/me", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_client_identity_headers_are_stripped(client, set_routes):
+    received = await echo(client, set_routes, **FORGED)
+
+    assert not set(FORGED) & set(received)
+
+
+async def test_anonymous_request_gets_no_identity(client, set_routes, verifier):
+    received = await echo(client, set_routes, **FORGED)
+
+    assert not set(FORGED) & set(received)
+
+
+async def test_verified_token_replaces_forged_identity(client, set_routes, verifier):
+    authorization = bearer(sub="anna@example.com", uuid="7d1f2a4e-0000-4000-8000-000000000001", role="user")
+    received = await echo(client, set_routes, authorization=authorization, **FORGED)
+
+    assert received["x-user-uuid"] == ["7d1f2a4e-0000-4000-8000-000000000001"]
+    assert received["x-user-email"] == ["anna@example.com"]
+    assert received["x-user-role"] == ["user"]
+    assert received["x-gateway-token"] == ["gateway-secret"]
+
+
+async def test_invalid_token_is_rejected(client, set_routes, verifier):
+    with serve_app(HeaderEcho()) as url:
+        set_routes({"/api/v1/echo": url})
+        response = await client.get("/api/v1/echo/me", headers={"authorization": "Bearer broken", **FORGED})
+
+    assert response.status_code == 401
@@ -0,0 +1,110 @@
+"""Балансировка между экземплярами upstream: распределение, исключение, health check"""
+from collections import Counter
+
+import pytest
+
+from balancer import LEAST_OUTSTANDING, POWER_OF_TWO, ROUND_ROBIN, LoadBalancer
+from config import PoolSettings
+from health import HealthChecker
+from pools import PoolManager
+from tests.conftest import FlakyUpstream, free_port, serve_app
+
+pytestmark = pytest.mark.anyio
+
+INSTANCES = ("http://a", "http://b", "http://c")
+
+
+def balancer(strategy, outstanding=None, unavailable=()):
+    load = outstanding or {}
+    return LoadBalancer(
+        INSTANCES,
+        strategy,
+        outstanding=lambda url: load.get(url, 0),
+        is_available=lambda url: url not in unavailable,
+    )
+
+
+def picks(lb: LoadBalancer, count: int, exclude=()) -> Counter:
+    return Counter(lb.pick(exclude) for _ in range(count))
+
+
+def test_round_robin_spreads_evenly():
+    assert picks(balancer(ROUND_ROBIN), 300) == {"http://a": 100, "http://b": 100, "http://c": 100}
+
+
+def test_least_outstanding_picks_least_loaded():
+    lb = balancer(LEAST_OUTSTANDING, {"http://a": 3, "http://b": 1, "http://c": 2})
+
+    assert picks(lb, 10) == {"http://b": 10}
+
+
+def test_power_of_two_never_picks_most_loaded():
+    lb = balancer(POWER_OF_TWO, {"http://a": 0, "http://b": 5, "http://c": 10})
+
+    counts = picks(lb, 600)
+    assert counts["http://c"] == 0
+    # a выигрывает в обеих парах, где он есть (2 из 3), b - только в паре с c
+    assert 350 < counts["http://a"] < 450
+
+
+@pytest.mark.parametrize("strategy", [ROUND_ROBIN, LEAST_OUTSTANDING, POWER_OF_TWO])
+def test_retry_excludes_tried_instances(strategy):
+    lb = balancer(strategy)
+
+    assert set(picks(lb, 50, exclude={"http://a", "http://b"})) == {"http://c"}
+    assert set(picks(lb, 50, exclude={"http://a"})) <= {"http://b", "http://c"}
+    # Опробованы все - выбор среди всех, запрос не теряется
+    assert set(picks(lb, 50, exclude=set(INSTANCES))) <= set(INSTANCES)
+
+
+@pytest.mark.parametrize("strategy", [ROUND_ROBIN, LEAST_OUTSTANDING, POWER_OF_TWO])
+def test_unavailable_instances_are_skipped(strategy):
+    assert set(picks(balancer(strategy, unavailable={"http://b"}), 60)) <= {"http://a", "http://c"}
+    # Недоступны все - проверки могли ошибиться, выбор среди всех
+    assert picks(balancer(ROUND_ROBIN, unavailable=set(INSTANCES)), 30) == {url: 10 for url in INSTANCES}
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        balancer("random")
+
+
+async def test_health_check_removes_dead_instance():
+    dead = f"http://127.0.0.1:{free_port()}"
+    with serve_app(FlakyUpstream()) as live:
+        pools = PoolManager(defaults=PoolSettings(max_connections=10))
+        checker = HealthChecker(pools, interval=1, timeout=1, unhealthy_threshold=2)
+        checker.set_instances([live, dead])
+        lb = LoadBalancer([live, dead], ROUND_ROBIN, outstanding=lambda url: 0, is_available=checker.is_healthy)
+        try:
+            await checker.check_all()
+            assert checker.is_healthy(dead)  # Одной ошибки мало для исключения
+            await checker.check_all()
+        finally:
+            await pools.aclose()
+
+    assert not checker.is_healthy(dead)
+    assert checker.snapshot()[dead]["status"] == "unreachable"
+    assert checker.snapshot()[live]["status"] == "healthy"
+    assert set(picks(lb, 10)) == {live}
+
+
+async def test_gateway_spreads_requests_across_instances(gateway, client, set_routes):
+    upstreams = [FlakyUpstream() for _ in range(3)]
+    with serve_app(upstreams[0]) as a, serve_app(upstreams[1]) as b, serve_app(upstreams[2]) as c:
+        set_routes({"/api/v1/pool": [a, b, c]}, ROUTE_LOAD_BALANCING={"/api/v1/pool": ROUND_ROBIN})
+        statuses = [(await client.get("/api/v1/pool/items")).status_code for _ in range(30)]
+
+    assert statuses == [200] * 30
+    assert [upstream.requests for upstream in upstreams] == [10, 10, 10]
+
+
+async def test_gateway_retries_on_another_instance(gateway, client, set_routes):
+    failing, healthy = FlakyUpstream([503] * 10), FlakyUpstream()
+    with serve_app(failing) as a, serve_app(healthy) as b:
+        set_routes({"/api/v1/pool": [a, b]}, ROUTE_LOAD_BALANCING={"/api/v1/pool": ROUND_ROBIN})
+        statuses = [(await client.get("/api/v1/pool/items")).status_code for _ in range(4)]
+
+    assert statuses == [200] * 4
+    # Повтор после 503 уходит на другой экземпляр, а не на тот же
+    assert healthy.requests == 4
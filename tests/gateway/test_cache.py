@@ -0,0 +1,177 @@
+"""Кеш ответов шлюза: попадания, объединение промахов, перепроверка по ETag, вытеснение"""
+import asyncio
+
+import httpx
+import pytest
+
+from cache import ResponseCache
+from tests.conftest import serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+class CachingUpstream:
+    """
+    Отвечает body с заголовками headers; на If-None-Match, совпавший с etag,
+    отвечает 304. chunked - тело несколькими частями без Content-Length
+    """
+
+    def __init__(self, body: bytes = b"payload", headers=(), etag=None, delay: float = 0, chunked=False):
+        self.body = body
+        self.headers = [(name.encode(), value.encode()) for name, value in headers]
+        self.etag = etag
+        self.delay = delay
+        self.chunked = chunked
+        self.requests = 0
+        self.conditional = 0
+
+    async def __call__(self, scope, receive, send):
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        request_headers = dict(scope["headers"])
+        headers = [(b"content-type", b"application/octet-stream"), *self.headers]
+        if self.etag is not None:
+            headers.append((b"etag", self.etag.encode()))
+            if request_headers.get(b"if-none-match") == self.etag.encode():
+                self.conditional += 1
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+        if not self.chunked:
+            headers.append((b"content-length", str(len(self.body)).encode()))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": self.body})
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for start in range(0, len(self.body), 100):
+            await send({"type": "http.response.body", "body": self.body[start:start + 100], "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+@pytest.fixture
+def response_cache(gateway, monkeypatch):
+    cache = ResponseCache(max_entries=100, max_bytes=1 << 20, max_entry_size=1000, key_headers=("accept",))
+    monkeypatch.setattr(gateway, "response_cache", cache)
+    return cache
+
+
+def upstream_response(body: bytes, **headers) -> httpx.Response:
+    return httpx.Response(200, headers={"cache-control": "max-age=60", **headers}, content=body)
+
+
+async def test_hit_after_miss(client, set_routes, response_cache):
+    upstream = CachingUpstream(headers=[("cache-control", "max-age=60")])
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/data": url})
+        first = await client.get("/api/v1/data/items")
+        second = await client.get("/api/v1/data/items")
+        other = await client.get("/api/v1/data/items", params={"page": 2})
+
+    assert first.content == second.content == other.content == b"payload"
+    assert upstream.requests == 2
+    stats = response_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+async def test_concurrent_misses_make_one_upstream_call(client, set_routes, response_cache):
+    upstream = CachingUpstream(headers=[("cache-control", "max-age=60")], delay=0.2)
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/data": url})
+        responses = await asyncio.gather(*(client.get("/api/v1/data/items") for _ in range(10)))
+
+    assert [response.status_code for response in responses] == [200] * 10
+    assert all(response.content == b"payload" for response in responses)
+    assert upstream.requests == 1
+    assert response_cache.stats()["coalesced"] == 9
+    assert response_cache.stats()["inflight"] == 0
+
+
+async def test_not_modified_refreshes_stale_entry(client, set_routes, response_cache):
+    # max-age=0: запись сразу устаревает и перепроверяется условным запросом
+    upstream = CachingUpstream(headers=[("cache-control", "max-age=0")], etag='"v1"')
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/data": url})
+        await client.get("/api/v1/data/items")
+        upstream.headers = [(b"cache-control", b"max-age=60")]
+        refreshed = await client.get("/api/v1/data/items")
+        cached = await client.get("/api/v1/data/items")
+        not_modified = await client.get("/api/v1/data/items", headers={"if-none-match": '"v1"'})
+
+    assert refreshed.status_code == cached.status_code == 200
+    assert refreshed.content == cached.content == b"payload"
+    assert not_modified.status_code == 304
+    assert (upstream.requests, upstream.conditional) == (2, 1)
+    assert response_cache.stats()["revalidated"] == 1
+    assert response_cache.stats()["hits"] == 2
+
+
+@pytest.mark.parametrize("headers", [
+    [("cache-control", "no-store")],
+    [("cache-control", "private, max-age=60")],
+    [("cache-control", "max-age=60"), ("vary", "Cookie")],
+    [("cache-control", "max-age=60"), ("vary", "*")],
+])
+async def test_uncacheable_responses_are_not_stored(client, set_routes, response_cache, headers):
+    upstream = CachingUpstream(headers=headers)
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/data": url})
+        responses = [await client.get("/api/v1/data/items") for _ in range(2)]
+
+    assert all(response.content == b"payload" for response in responses)
+    assert upstream.requests == 2
+    assert response_cache.stats()["entries"] == 0
+
+
+async def test_vary_on_key_header_stores_variants(client, set_routes, response_cache):
+    upstream = CachingUpstream(headers=[("cache-control", "max-age=60"), ("vary", "Accept")])
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/data": url})
+        for accept in ("application/json", "text/csv", "application/json"):
+            await client.get("/api/v1/data/items", headers={"accept": accept})
+
+    assert upstream.requests == 2
+    assert response_cache.stats()["entries"] == 2
+
+
+async def test_chunked_response_is_buffered_up_to_entry_size(client, set_routes, response_cache):
+    small = CachingUpstream(body=b"s" * 500, headers=[("cache-control", "max-age=60")], chunked=True)
+    large = CachingUpstream(body=b"l" * 2500, headers=[("cache-control", "max-age=60")], chunked=True)
+    with serve_app(small) as small_url, serve_app(large) as large_url:
+        set_routes({"/api/v1/small": small_url, "/api/v1/large": large_url})
+        small_responses = [await client.get("/api/v1/small/items") for _ in range(2)]
+        large_responses = [await client.get("/api/v1/large/items") for _ in range(2)]
+
+    assert all(response.content == small.body for response in small_responses)
+    assert small.requests == 1
+    # Больше max_entry_size: отдан целиком потоком и не закеширован
+    assert all(response.content == large.body for response in large_responses)
+    assert large.requests == 2
+    assert response_cache.stats()["entries"] == 1
+
+
+def test_eviction_by_entry_count():
+    cache = ResponseCache(max_entries=2, max_bytes=1 << 20, max_entry_size=1000)
+    for key in ("a", "b"):
+        cache.store(key, upstream_response(b"x"), b"x", 60)
+    cache.get("a")
+    cache.store("c", upstream_response(b"x"), b"x", 60)
+
+    # Вытесняется давно не использованная запись
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_by_bytes():
+    cache = ResponseCache(max_entries=100, max_bytes=2500, max_entry_size=2000)
+    for key in ("a", "b", "c"):
+        cache.store(key, upstream_response(b"x" * 1000), b"x" * 1000, 60)
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= 2500
+    assert cache.stats()["evictions"] == 1
+
+    cache.store("b", upstream_response(b"y"), b"y", 60)
+    # Замена записи уменьшает занятый объем
+    assert cache.stats()["bytes"] < 1200
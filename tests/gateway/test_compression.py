@@ -0,0 +1,160 @@
+"""Сжатие ответов и фильтрация hop-by-hop заголовков шлюзом"""
+import gzip
+import json
+
+import pytest
+
+from compression import ResponseCompressor, parse_accept_encoding
+from headers import filter_raw_headers
+from tests.conftest import serve_app
+
+pytestmark = pytest.mark.anyio
+
+JSON_TYPES = ("application/json", "text/plain")
+
+
+class EchoUpstream:
+    """Отвечает JSON с заголовками запроса; headers - дополнительные заголовки ответа"""
+
+    def __init__(self, headers=(), padding: int = 4000):
+        self.headers = [(name.encode(), value.encode()) for name, value in headers]
+        self.padding = padding
+
+    async def __call__(self, scope, receive, send):
+        received = {name.decode(): value.decode() for name, value in scope["headers"]}
+        body = json.dumps({"headers": received, "padding": "x" * self.padding}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *self.headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def make_compressor(**kwargs) -> ResponseCompressor:
+    compressor = ResponseCompressor(min_size=1024, content_types=JSON_TYPES, **kwargs)
+    # Выбор кодировки проверяется и без пакета brotli
+    compressor.encodings = ("br", "gzip")
+    return compressor
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def compressed(compressor: ResponseCompressor, encoding: str, *parts: bytes) -> bytes:
+    return b"".join([data async for data in compressor.compress(chunks(*parts), encoding)])
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.8, *;q=0") == {"gzip": 1.0, "br": 0.8, "*": 0.0}
+    assert parse_accept_encoding("GZIP;q=bad") == {"gzip": 0.0}
+    assert parse_accept_encoding(None) == {}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("*;q=0.3", "br"),
+    ("*, br;q=0", "gzip"),
+    ("gzip;q=0, identity", None),
+    ("deflate", None),
+    ("", None),
+])
+def test_negotiate_by_q_value(accept_encoding, expected):
+    assert make_compressor().negotiate(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("method, status, headers, expected", [
+    ("GET", 200, [(b"content-type", b"application/json"), (b"content-length", b"4096")], "gzip"),
+    ("GET", 200, [(b"content-type", b"application/problem+json")], "gzip"),
+    ("GET", 200, [(b"content-type", b"Text/Plain; charset=utf-8")], "gzip"),
+    ("GET", 200, [(b"content-type", b"application/json"), (b"content-length", b"100")], None),
+    ("GET", 200, [(b"content-type", b"image/png"), (b"content-length", b"4096")], None),
+    ("GET", 200, [(b"content-length", b"4096")], None),
+    ("GET", 200, [(b"content-type", b"application/json"), (b"content-encoding", b"br")], None),
+    ("HEAD", 200, [(b"content-type", b"application/json")], None),
+    ("GET", 304, [(b"content-type", b"application/json")], None),
+    ("GET", 206, [(b"content-type", b"application/json")], None),
+])
+def test_select_gates(method, status, headers, expected):
+    assert make_compressor().select(method, "gzip", status, headers) == expected
+
+
+def test_rewrite_headers_weakens_etag_and_adds_vary():
+    headers = ResponseCompressor.rewrite_headers(
+        [(b"content-type", b"application/json"), (b"content-length", b"4096"), (b"etag", b'"v1"')], "gzip",
+    )
+    assert headers == [
+        (b"content-type", b"application/json"),
+        (b"etag", b'W/"v1"'),
+        (b"content-encoding", b"gzip"),
+        (b"vary", b"Accept-Encoding"),
+    ]
+
+    headers = dict(ResponseCompressor.rewrite_headers([(b"etag", b'W/"v1"'), (b"vary", b"Accept")], "br"))
+    assert headers[b"etag"] == b'W/"v1"'
+    assert headers[b"vary"] == b"Accept, Accept-Encoding"
+    assert dict(ResponseCompressor.rewrite_headers([(b"vary", b"*")], "br"))[b"vary"] == b"*"
+
+
+async def test_gzip_round_trip():
+    parts = [b'{"items": [', b"1, " * 5000, b"2]}"]
+    assert gzip.decompress(await compressed(make_compressor(), "gzip", *parts)) == b"".join(parts)
+
+
+async def test_brotli_round_trip():
+    brotli = pytest.importorskip("brotli")
+    parts = [b'{"items": [', b"1, " * 5000, b"2]}"]
+    assert brotli.decompress(await compressed(make_compressor(), "br", *parts)) == b"".join(parts)
+
+
+def test_filter_strips_hop_by_hop_and_connection_tokens():
+    raw = [
+        (b"Connection", b"close, X-Internal"),
+        (b"Keep-Alive", b"timeout=5"),
+        (b"Transfer-Encoding", b"chunked"),
+        (b"X-Internal", b"secret"),
+        (b"Set-Cookie", b"a=1"),
+        (b"Set-Cookie", b"b=2"),
+        (b"X-Request-Id", b"42"),
+    ]
+    assert filter_raw_headers(raw) == [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2"), (b"x-request-id", b"42")]
+    assert filter_raw_headers(raw, drop={b"x-request-id"}) == [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2")]
+
+
+async def test_gateway_compresses_and_strips_hop_by_hop(client, set_routes, gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "response_compressor", make_compressor())
+    upstream = EchoUpstream(headers=[("connection", "x-upstream-secret"), ("x-upstream-secret", "1"), ("etag", '"v1"')])
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/echo": url})
+        response = await client.get(
+            "/api/v1/echo/items",
+            headers={"accept-encoding": "gzip", "connection": "x-client-secret", "x-client-secret": "1", "te": "trailers"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert "x-upstream-secret" not in response.headers
+    # httpx распаковывает тело сам
+    received = response.json()["headers"]
+    assert "x-client-secret" not in received and "te" not in received
+    assert received.get("connection") != "x-client-secret"
+
+
+async def test_gateway_passes_through_without_accept_encoding(client, set_routes, gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "response_compressor", make_compressor())
+    with serve_app(EchoUpstream()) as url:
+        set_routes({"/api/v1/echo": url})
+        response = await client.get("/api/v1/echo/items", headers={"accept-encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.content)
@@ -0,0 +1,40 @@
+"""/health шлюза: снимок фоновой проверки экземпляров"""
+import pytest
+
+from tests.conftest import FlakyUpstream, free_port, serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+async def route_health(client, prefix: str) -> dict:
+    response = await client.get("/health")
+    assert response.status_code == 200
+    return response.json()["services"][prefix]
+
+
+async def test_unchecked_instances_are_unknown(client, set_routes):
+    set_routes({"/api/v1/svc": ["http://127.0.0.1:1", "http://127.0.0.1:2"]})
+
+    health = await route_health(client, "/api/v1/svc")
+
+    assert health["status"] == "unknown"
+    assert health["healthy_instances"] == 0
+
+
+async def test_status_follows_checks(gateway, client, set_routes, monkeypatch):
+    monkeypatch.setattr(gateway.health_checker, "unhealthy_threshold", 1)
+    dead = f"http://127.0.0.1:{free_port()}"
+    with serve_app(FlakyUpstream()) as live:
+        set_routes({"/api/v1/live": live, "/api/v1/mixed": [live, dead], "/api/v1/dead": dead})
+        await gateway.health_checker.check_all()
+
+        assert (await route_health(client, "/api/v1/live"))["status"] == "healthy"
+        mixed = await route_health(client, "/api/v1/mixed")
+        assert mixed["status"] == "degraded"
+        assert mixed["healthy_instances"] == 1
+        assert (await route_health(client, "/api/v1/dead"))["status"] == "unavailable"
+
+        # Новый экземпляр еще не проверен: маршрут без здоровых - unknown, а не unavailable
+        other = f"http://127.0.0.1:{free_port()}"
+        set_routes({"/api/v1/dead": [dead, other]})
+        assert (await route_health(client, "/api/v1/dead"))["status"] == "unknown"
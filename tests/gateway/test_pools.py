@@ -0,0 +1,122 @@
+"""Пулы соединений по upstream: лимиты соединений и изоляция сервисов"""
+import asyncio
+import time
+
+import pytest
+
+from config import PoolSettings
+from pools import PoolManager
+from tests.conftest import serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowUpstream:
+    """Заглушка, отвечающая через delay секунд и считающая одновременные запросы"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, scope, receive, send):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"2")]})
+            await send({"type": "http.response.body", "body": b"ok"})
+        finally:
+            self.active -= 1
+
+
+async def fetch(pools: PoolManager, url: str) -> float:
+    pool = pools.get(url)
+    started = time.perf_counter()
+    response = await pool.send(pool.client.build_request("GET", f"{url}/items"))
+    try:
+        await response.aread()
+    finally:
+        await pool.release(response)
+    assert response.status_code == 200
+    return time.perf_counter() - started
+
+
+def test_override_merges_with_defaults():
+    pools = PoolManager(
+        defaults=PoolSettings(max_connections=100, max_keepalive_connections=10, keepalive_expiry=5.0, http2=False),
+        overrides={"http://busy": PoolSettings(max_connections=2)},
+    )
+
+    assert pools.get("http://busy").settings == PoolSettings(
+        max_connections=2, max_keepalive_connections=10, keepalive_expiry=5.0, http2=False,
+    )
+    assert pools.get("http://other").settings.max_connections == 100
+
+
+async def test_pool_limit_caps_upstream_connections():
+    slow = SlowUpstream(delay=0.2)
+    with serve_app(slow) as url:
+        pools = PoolManager(
+            defaults=PoolSettings(max_connections=100, max_keepalive_connections=10, keepalive_expiry=5.0),
+            overrides={url: PoolSettings(max_connections=2, max_keepalive_connections=2)},
+        )
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(*(fetch(pools, url) for _ in range(6)))
+            elapsed = time.perf_counter() - started
+            stats = pools.stats()[url]
+        finally:
+            await pools.aclose()
+
+    # Шесть запросов через два соединения - три волны по 0.2 с
+    assert slow.peak == 2
+    assert elapsed >= 0.55
+    assert stats["peak_in_flight"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["connections"] <= 2
+    assert stats["requests_total"] == 6
+
+
+async def test_saturated_pool_does_not_stall_other_upstreams():
+    slow, fast = SlowUpstream(delay=0.5), SlowUpstream(delay=0)
+    with serve_app(slow) as slow_url, serve_app(fast) as fast_url:
+        pools = PoolManager(
+            defaults=PoolSettings(max_connections=2, max_keepalive_connections=2, keepalive_expiry=5.0),
+        )
+        try:
+            busy = [asyncio.create_task(fetch(pools, slow_url)) for _ in range(8)]
+            await asyncio.sleep(0.05)
+            assert pools.stats()[slow_url]["saturation"] == 4.0
+
+            # Пул медленного сервиса занят, запросы к другому идут без очереди
+            latencies = [await fetch(pools, fast_url) for _ in range(5)]
+            await asyncio.gather(*busy)
+        finally:
+            await pools.aclose()
+
+    assert max(latencies) < 0.25
+    assert slow.peak == 2
+
+
+async def test_cancelled_send_releases_in_flight():
+    slow = SlowUpstream(delay=0.5)
+    with serve_app(slow) as url:
+        pools = PoolManager(
+            defaults=PoolSettings(max_connections=2, max_keepalive_connections=2, keepalive_expiry=5.0),
+        )
+        try:
+            pending = [asyncio.create_task(fetch(pools, url)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            assert pools.stats()[url]["in_flight"] == 3
+
+            # Клиент ушел, пока запросы ждали ответа или соединения
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            stats = pools.stats()[url]
+        finally:
+            await pools.aclose()
+
+    assert stats["in_flight"] == 0
+    assert stats["errors_total"] == 0
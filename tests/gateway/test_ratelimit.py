@@ -0,0 +1,76 @@
+"""Лимиты частоты шлюза: ключи корзин, X-Forwarded-For, проверка правил"""
+import pytest
+from jose import jwt
+from pydantic import ValidationError
+from starlette.requests import Request
+
+from auth import TokenVerifier
+from config import RateLimitRule
+from ratelimit import InMemoryBackend, RateLimited, RateLimiter
+from router import Route
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "test-secret"
+ROUTE = Route(prefix="/api/v1/vacancies", targets=("http://upstream",))
+
+
+def make_request(headers=(), client="203.0.113.7") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/vacancies",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "client": (client, 40000),
+        "state": {},
+    })
+
+
+def bearer(claims, secret=SECRET):
+    return ("authorization", f"Bearer {jwt.encode(claims, secret, algorithm='HS256')}")
+
+
+def limiter(key="subject", burst=1, **kwargs) -> RateLimiter:
+    rule = RateLimitRule(prefix="/api/v1/vacancies", key=key, rate=1, burst=burst)
+    return RateLimiter([rule], InMemoryBackend(), **kwargs)
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (-1, 1), (1, 0)])
+def test_rule_rejects_non_positive_rate_and_burst(rate, burst):
+    with pytest.raises(ValidationError):
+        RateLimitRule(prefix="/", rate=rate, burst=burst)
+
+
+@pytest.mark.parametrize("trusted_proxies, expected", [
+    (0, "203.0.113.7"),  # Заголовок не учитывается
+    (1, "198.51.100.2"),  # Запись последнего прокси, а не подставленная клиентом
+    (2, "198.51.100.1"),
+    (5, "10.0.0.1"),  # Записей меньше, чем прокси - самая левая
+])
+def test_client_ip_uses_trusted_hops(trusted_proxies, expected):
+    request = make_request([("x-forwarded-for", "10.0.0.1, 198.51.100.1, 198.51.100.2")])
+
+    assert limiter(trusted_proxies=trusted_proxies).client_ip(request) == expected
+
+
+def test_subject_uses_only_verified_claims():
+    rate_limiter = limiter(verifier=TokenVerifier(SECRET, "HS256", None))
+
+    assert rate_limiter.subject(make_request([bearer({"uuid": "u-1"})])) == "u-1"
+    assert rate_limiter.subject(make_request([bearer({"uuid": "u-1"}, secret="forged")])) is None
+    assert rate_limiter.subject(make_request()) is None
+    # Без проверки подписи пользователь не определяется
+    assert limiter().subject(make_request([bearer({"uuid": "u-1"})])) is None
+
+
+async def test_forged_tokens_share_client_bucket():
+    rate_limiter = limiter(verifier=TokenVerifier(SECRET, "HS256", None))
+
+    await rate_limiter.check(make_request([bearer({"uuid": "a"}, secret="forged")]), "/api/v1/vacancies", ROUTE)
+    with pytest.raises(RateLimited) as exc_info:
+        await rate_limiter.check(make_request([bearer({"uuid": "b"}, secret="forged")]), "/api/v1/vacancies", ROUTE)
+    assert exc_info.value.retry_after > 0
+
+    # У проверенного пользователя своя корзина
+    await rate_limiter.check(make_request([bearer({"uuid": "a"})]), "/api/v1/vacancies", ROUTE)
+    assert rate_limiter.rejected_total == 1
@@ -0,0 +1,135 @@
+"""Предохранитель и повторы шлюза против нестабильной заглушки upstream"""
+import asyncio
+import time
+
+import pytest
+
+from resilience import CircuitBreaker
+from tests.conftest import FlakyUpstream, free_port, serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def breaker_settings(gateway, monkeypatch):
+    # Новые предохранители (у каждой заглушки свой адрес) создаются с этими порогами
+    monkeypatch.setattr(gateway.breakers, "failure_threshold", 2)
+    monkeypatch.setattr(gateway.breakers, "recovery_timeout", 30.0)
+    monkeypatch.setattr(gateway.breakers, "half_open_max_calls", 1)
+
+
+def half_open(breaker: CircuitBreaker) -> None:
+    breaker.state = CircuitBreaker.OPEN
+    breaker.opened_at = time.monotonic() - breaker.recovery_timeout - 1
+
+
+def test_release_frees_half_open_slot():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30, half_open_max_calls=1)
+    half_open(breaker)
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    breaker.record_success()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_retry_reaches_healthy_response(gateway, client, set_routes, breaker_settings):
+    upstream = FlakyUpstream([503])
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/flaky": url})
+        response = await client.get("/api/v1/flaky/items")
+
+    assert response.status_code == 200
+    assert upstream.requests == 2
+    assert gateway.breakers.get(url).state == CircuitBreaker.CLOSED
+
+
+async def test_breaker_opens_and_rejects_without_upstream(gateway, client, set_routes, breaker_settings):
+    upstream = FlakyUpstream([503, 503, 503])
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/flaky": url}, RETRY_MAX_ATTEMPTS=0)
+        statuses = [(await client.get("/api/v1/flaky/items")).status_code for _ in range(2)]
+        rejected = await client.get("/api/v1/flaky/items")
+
+    assert statuses == [503, 503]
+    assert rejected.status_code == 503
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert upstream.requests == 2
+    assert gateway.breakers.get(url).is_open()
+
+
+async def test_load_shedding_does_not_open_breaker(gateway, client, set_routes, breaker_settings):
+    upstream = FlakyUpstream([503] * 5, headers=[(b"retry-after", b"1")])
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/auth": url}, RETRY_MAX_ATTEMPTS=0)
+        statuses = [(await client.post("/api/v1/auth/login")).status_code for _ in range(6)]
+
+    # Все запросы дошли до сервиса: сброс нагрузки не размыкает цепь
+    assert statuses == [503] * 5 + [200]
+    assert upstream.requests == 6
+    assert gateway.breakers.get(url).state == CircuitBreaker.CLOSED
+
+
+async def test_load_shedding_probe_keeps_breaker_half_open(gateway, client, set_routes, breaker_settings):
+    upstream = FlakyUpstream([503], headers=[(b"retry-after", b"1")])
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/auth": url}, RETRY_MAX_ATTEMPTS=0)
+        breaker = gateway.breakers.get(url)
+        half_open(breaker)
+
+        assert (await client.post("/api/v1/auth/login")).status_code == 503
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert (await client.post("/api/v1/auth/login")).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_refused_connections_open_breaker(gateway, client, set_routes, breaker_settings):
+    url = f"http://127.0.0.1:{free_port()}"
+    set_routes({"/api/v1/down": url}, RETRY_MAX_ATTEMPTS=0)
+    statuses = [(await client.get("/api/v1/down/items")).status_code for _ in range(3)]
+
+    assert statuses == [502, 502, 503]
+    assert gateway.breakers.get(url).is_open()
+
+
+async def test_probe_rejected_before_response_releases_slot(gateway, client, set_routes, breaker_settings):
+    upstream = FlakyUpstream()
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/flaky": url}, MAX_REQUEST_BODY_SIZE=1024)
+        breaker = gateway.breakers.get(url)
+        half_open(breaker)
+
+        async def oversized():
+            for _ in range(4):
+                yield b"x" * 512
+
+        # Проба обрывается на чтении тела - ни ошибки транспорта, ни ответа upstream
+        assert (await client.post("/api/v1/flaky/items", content=oversized())).status_code == 413
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.half_open_calls == 0
+
+        assert (await client.get("/api/v1/flaky/items")).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_cancelled_probe_releases_slot(gateway, client, set_routes, breaker_settings):
+    upstream = FlakyUpstream(delay=0.3)
+    with serve_app(upstream) as url:
+        set_routes({"/api/v1/flaky": url})
+        breaker = gateway.breakers.get(url)
+        half_open(breaker)
+
+        probe = asyncio.create_task(client.get("/api/v1/flaky/items"))
+        while not upstream.active:
+            await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert breaker.half_open_calls == 0
+        upstream.delay = 0
+        assert (await client.get("/api/v1/flaky/items")).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
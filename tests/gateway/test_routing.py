@@ -0,0 +1,94 @@
+"""Таблица маршрутов (префиксное дерево) и горячая перезагрузка маршрутов шлюза"""
+import pytest
+from jose import jwt
+
+from benchmarks import stub_upstream
+from router import RouteTable
+from tests.conftest import serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+def token(gateway, role: str) -> dict:
+    claims = {"sub": "ops@example.com", "uuid": "00000000-0000-0000-0000-000000000001", "role": role}
+    encoded = jwt.encode(claims, gateway.configs.JWT_SECRET_KEY, algorithm=gateway.configs.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {encoded}"}
+
+
+def test_longest_prefix_wins_regardless_of_order():
+    table = RouteTable({
+        "/api": "http://a",
+        "/api/v1/auth/admin": "http://c",
+        "/api/v1/auth": "http://b",
+    })
+
+    assert table.match("/api/v1/auth/login")[0].target == "http://b"
+    assert table.match("/api/v1/auth/admin/users")[0].target == "http://c"
+    assert table.match("/api/v2/other")[0].target == "http://a"
+
+
+def test_prefix_matches_whole_segments_only():
+    table = RouteTable({"/api/v1/auth": "http://b"})
+
+    assert table.match("/api/v1/authx") == (None, False)
+    assert table.match("/api/v1/auth")[0].prefix == "/api/v1/auth"
+    assert table.match("//api/v1/auth/")[0].prefix == "/api/v1/auth"
+
+
+def test_method_filter_falls_back_to_shorter_prefix():
+    table = RouteTable(
+        {"/api": "http://a", "/api/v1/auth": "http://b"},
+        {"/api/v1/auth": ["post"]},
+    )
+
+    assert table.match("/api/v1/auth/login", "POST")[0].target == "http://b"
+    assert table.match("/api/v1/auth/login", "GET")[0].target == "http://a"
+
+
+def test_method_not_allowed_reports_matched_path():
+    table = RouteTable({"/api/v1/auth": "http://b"}, {"/api/v1/auth": ["POST"]})
+
+    assert table.match("/api/v1/auth/login", "GET") == (None, True)
+
+
+def test_lookup_with_hundreds_of_routes():
+    routes = {f"/api/v{i % 7}/service{i}/items": f"http://upstream-{i}" for i in range(500)}
+    table = RouteTable({**routes, "/api": "http://fallback"})
+
+    for i in range(500):
+        route, _ = table.match(f"/api/v{i % 7}/service{i}/items/42/details", "GET")
+        assert route.target == f"http://upstream-{i}"
+    assert table.match("/api/v1/service1/other")[0].target == "http://fallback"
+
+
+async def test_reload_requires_admin_token(gateway, client):
+    assert (await client.post("/routes/reload")).status_code == 401
+    assert (await client.post("/routes/reload", headers={"Authorization": "Bearer broken"})).status_code == 401
+    assert (await client.post("/routes/reload", headers=token(gateway, "user"))).status_code == 403
+
+
+async def test_reload_swaps_routes_and_balancers_together(gateway, client, set_routes, monkeypatch):
+    with serve_app(stub_upstream.app) as first, serve_app(stub_upstream.app) as second:
+        set_routes({"/api/v1/old": first})
+        before = gateway.routing
+        assert (await client.get("/api/v1/old/items")).status_code == 200
+
+        monkeypatch.setenv("SERVICE_ROUTES", f'{{"/api/v1/new": ["{first}", "{second}"]}}')
+        monkeypatch.setenv("ROUTE_LOAD_BALANCING", '{"/api/v1/new": "least_outstanding"}')
+        response = await client.post("/routes/reload", headers=token(gateway, "admin"))
+
+        assert response.status_code == 200
+        assert response.json() == [{
+            "prefix": "/api/v1/new",
+            "targets": [first, second],
+            "strategy": "least_outstanding",
+            "methods": None,
+        }]
+        # Старый снимок не изменился: запросы, начатые до перезагрузки, его дорабатывают
+        assert [route.prefix for route in before.table.routes] == ["/api/v1/old"]
+        assert set(before.balancers) == {"/api/v1/old"}
+        assert gateway.routing is not before
+        assert set(gateway.routing.balancers) == {"/api/v1/new"}
+
+        assert (await client.get("/api/v1/old/items")).status_code == 404
+        assert (await client.get("/api/v1/new/items")).status_code == 200
@@ -0,0 +1,52 @@
+"""Трассировка исходящих запросов шлюза через настоящий httpx.AsyncClient"""
+import httpx
+import pytest
+
+from benchmarks import stub_upstream
+from infra.monitoring.tracing import HttpxTrace, InMemoryExporter, Tracer
+from tests.conftest import serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def exporter(gateway, monkeypatch):
+    exporter = InMemoryExporter()
+    monkeypatch.setattr(gateway.tracer, "exporter", exporter)
+    monkeypatch.setattr(gateway.tracer, "sample_rate", 1.0)
+    return exporter
+
+
+async def test_trace_extension_with_async_client():
+    exporter = InMemoryExporter()
+    tracer = Tracer("test", exporter=exporter)
+    span = tracer.start_span("upstream.request")
+    trace = HttpxTrace(tracer, span)
+
+    with serve_app(stub_upstream.app) as url:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{url}/items", extensions={"trace": trace})
+            trace.response_started(response.status_code)
+            trace.finish()
+
+    assert response.status_code == 200
+    assert {"connect_tcp.started", "receive_response_headers.complete"} <= set(trace.events)
+    assert {s.name for s in exporter.spans} == {
+        "upstream.request", "upstream.connect", "upstream.ttfb", "upstream.body",
+    }
+
+
+async def test_sampled_request_is_proxied_and_traced(client, set_routes, exporter):
+    with serve_app(stub_upstream.app) as url:
+        set_routes({"/api/v1/stub": url})
+        response = await client.get("/api/v1/stub/items")
+        body = response.json()
+
+    assert response.status_code == 200
+    assert body["items"]
+    [upstream] = [span for span in exporter.spans if span.name == "upstream.request"]
+    assert upstream.sampled
+    assert upstream.attributes["http.status_code"] == 200
+    assert "error" not in upstream.attributes
+    names = {span.name for span in exporter.by_trace(upstream.trace_id)}
+    assert {"upstream.connect", "upstream.ttfb", "upstream.body"} <= names
@@ -0,0 +1,7 @@
+"""
+Ml_processing_service импортируется через пакет services из корня
+репозитория; модель и признаки требуют numpy из requirements сервиса.
+"""
+import pytest
+
+pytest.importorskip("numpy")
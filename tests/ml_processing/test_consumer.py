@@ -0,0 +1,74 @@
+"""Обогащение потока: проверка сообщений перед инференсом, dead letter и /health"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from infra.messaging.bus import InMemoryBus
+from services.Ml_processing_service import main as ml_main
+from services.Ml_processing_service.core.config import Configs
+from services.Ml_processing_service.inference.consumer import StreamEnricher
+from services.Ml_processing_service.inference.engine import InferenceEngine
+
+pytestmark = pytest.mark.anyio
+
+INPUT, OUTPUT, DEAD_LETTER = "vacancies.raw", "vacancies.enriched", "vacancies.raw.dlq"
+
+
+def make_configs() -> Configs:
+    return Configs(
+        INFERENCE_PROCESSES=0,
+        FEATURE_CACHE_ENABLED=False,
+        MAX_BATCH_DELAY_MS=1,
+        KAFKA_INPUT_TOPIC=INPUT,
+        KAFKA_OUTPUT_TOPIC=OUTPUT,
+        KAFKA_DEAD_LETTER_TOPIC=DEAD_LETTER,
+        KAFKA_BATCH_SIZE=10,
+    )
+
+
+def topic_values(bus: InMemoryBus, topic: str):
+    return [message.value for partition in bus.topic(topic) for message in partition.messages]
+
+
+async def test_invalid_messages_are_dead_lettered_before_predict():
+    configs = make_configs()
+    engine = InferenceEngine(configs)
+    engine.start()
+    bus = InMemoryBus(partitions=1)
+    enricher = StreamEnricher(configs, engine, bus)
+    bad = [b"[1, 2]", b'"text"', b'{"title": ""}', b"{not json", b'{"title": "QA", "skills": "SQL"}']
+    good = json.dumps({"title": "Python разработчик", "skills": ["Python"], "source": "hh"}).encode()
+    await enricher.start()
+    try:
+        await bus.producer().publish(INPUT, [bad[0], good, *bad[1:]])
+        for _ in range(500):
+            if enricher.consumer.processed == 6:
+                break
+            await asyncio.sleep(0.01)
+
+        [enriched] = [json.loads(value) for value in topic_values(bus, OUTPUT)]
+        assert enriched["source"] == "hh"
+        assert "Python" in enriched["skills"]
+        assert sorted(topic_values(bus, DEAD_LETTER)) == sorted(bad)
+        assert enricher.running
+    finally:
+        await enricher.stop()
+        await engine.stop()
+
+
+async def test_health_reports_stopped_stream(monkeypatch):
+    configs = make_configs()
+    enricher = StreamEnricher(configs, InferenceEngine(configs), InMemoryBus(partitions=1))
+    monkeypatch.setattr(ml_main, "enricher", enricher)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=ml_main.app), base_url="http://ml") as client:
+        response = await client.get("/health")
+
+    assert response.status_code == 503
+    assert response.json()["stream"]["running"] is False
+
+    monkeypatch.setattr(ml_main, "enricher", None)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=ml_main.app), base_url="http://ml") as client:
+        assert (await client.get("/health")).json() == {"status": "ok"}
@@ -0,0 +1,58 @@
+"""Движок инференса: восстановление пула процессов и отмена сбора пачки"""
+import asyncio
+import os
+import signal
+
+import pytest
+
+from services.Ml_processing_service.core.config import Configs
+from services.Ml_processing_service.inference.batcher import MicroBatcher, Overloaded
+from services.Ml_processing_service.inference.engine import InferenceEngine
+
+pytestmark = pytest.mark.anyio
+
+VACANCY = {"title": "Python разработчик", "description": "Django, PostgreSQL, Docker", "skills": ["Python"]}
+
+
+@pytest.fixture
+async def engine():
+    engine = InferenceEngine(Configs(INFERENCE_PROCESSES=1, FEATURE_CACHE_ENABLED=False, MAX_BATCH_DELAY_MS=1))
+    engine.start()
+    try:
+        yield engine
+    finally:
+        await engine.stop()
+
+
+async def test_engine_recovers_from_killed_worker(engine):
+    [first] = await engine.predict([VACANCY])
+    broken = engine.executor
+    [pid] = engine.pids
+    os.kill(pid, signal.SIGKILL)
+
+    [second] = await asyncio.wait_for(engine.predict([VACANCY]), 60)
+
+    assert second == first
+    assert engine.executor is not broken
+    assert engine.pids and pid not in engine.pids
+
+
+async def test_stop_fails_items_taken_into_unfinished_batch():
+    processed = []
+
+    async def process(items):
+        processed.append(items)
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=10, max_delay=30, max_queue_size=100, max_in_flight=1)
+    batcher.start()
+    pending = asyncio.ensure_future(batcher.submit_many([1, 2]))
+    await asyncio.sleep(0.05)
+    # Коллектор забрал элементы из очереди и ждет добора пачки
+    assert batcher.queued == 0 and not pending.done()
+
+    await batcher.stop()
+
+    with pytest.raises(Overloaded):
+        await asyncio.wait_for(pending, 1)
+    assert processed == []
@@ -0,0 +1,136 @@
+"""Кэш признаков: журнал сегментов, вытеснение по бюджету и восстановление после сбоя"""
+import os
+
+import numpy as np
+import pytest
+
+from services.Ml_processing_service.inference.feature_cache import FeatureCache
+
+
+def features(index: int):
+    # 4 признака по 4 байта и навык из 6 байт: 22 байта данных на запись
+    return ["Python"], np.array([index, index + 1, index + 2, index + 3], dtype=np.uint32)
+
+
+def put(cache: FeatureCache, keys) -> None:
+    cache.put_many(list(keys), [features(key) for key in keys])
+
+
+def get(cache: FeatureCache, keys):
+    return cache.get_many(np.array(list(keys), dtype=np.uint64))
+
+
+def assert_features(result, index: int) -> None:
+    skills, columns = features(index)
+    assert result is not None
+    assert result[0] == skills
+    assert result[1].tolist() == columns.tolist()
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(**kwargs) -> FeatureCache:
+        # Сегмент - 10 записей: 220 байт данных и 240 байт индекса
+        return FeatureCache(str(tmp_path / "features"), **{"max_bytes": 2000, "segment_bytes": 220, **kwargs})
+
+    return make
+
+
+def test_round_trip(make_cache):
+    cache = make_cache()
+    keys = [7, 2**63 + 1, 42]
+    cache.put_many(keys, [
+        features(1),
+        (["Анализ данных", "SQL"], np.array([], dtype=np.uint32)),
+        ([], np.array([5], dtype=np.uint32)),
+    ])
+
+    for _ in range(2):
+        first, second, third, missing = get(cache, [*keys, 8])
+        assert_features(first, 1)
+        assert second[0] == ["Анализ данных", "SQL"] and second[1].tolist() == []
+        assert third[0] == [] and third[1].tolist() == [5]
+        assert missing is None
+        # Второй проход читает из записанного сегмента
+        cache.close()
+
+    assert cache.stats()["segments"] == 1
+    assert (cache.hits, cache.misses) == (6, 2)
+
+
+def test_reopen_after_close(make_cache):
+    cache = make_cache()
+    put(cache, range(25))
+    cache.close()
+
+    reopened = make_cache()
+    results = get(reopened, range(26))
+    for key in range(25):
+        assert_features(results[key], key)
+    assert results[25] is None
+    assert len(reopened.segments) == 3
+
+
+def test_open_segment_is_lost_without_close(make_cache):
+    cache = make_cache()
+    put(cache, range(15))
+
+    # Первые 10 записей - в записанном сегменте, остальные - только в памяти
+    results = get(make_cache(), range(15))
+    assert all(result is not None for result in results[:10])
+    assert all(result is None for result in results[10:])
+
+
+def test_eviction_keeps_cache_within_budget(make_cache, tmp_path):
+    cache = make_cache()
+    for start in range(0, 100, 10):
+        put(cache, range(start, start + 10))
+        assert cache.nbytes <= cache.max_bytes
+
+    results = get(cache, range(100))
+    # Вытеснены старейшие сегменты целиком, новые записи на месте
+    assert results[0] is None
+    assert_features(results[99], 99)
+    present = [key for key, result in enumerate(results) if result is not None]
+    assert present == list(range(present[0], 100))
+    assert len(os.listdir(tmp_path / "features")) == len(cache.segments) + 1
+
+
+def test_reads_from_expiring_segment_are_promoted(make_cache):
+    cache = make_cache()
+    put(cache, range(40))
+    oldest = cache.segments[0].id
+
+    # Старейший сегмент вытеснится следующим: прочитанная запись копируется в открытый
+    assert_features(get(cache, [0])[0], 0)
+    put(cache, range(100, 120))
+
+    assert cache.segments[0].id != oldest
+    kept, evicted = get(cache, [0, 1])
+    assert_features(kept, 0)
+    assert evicted is None
+
+
+def test_segments_missing_from_manifest_are_removed(make_cache, tmp_path, monkeypatch):
+    cache = make_cache()
+    put(cache, range(10))
+    saved = sorted(os.listdir(tmp_path / "features"))
+
+    def crash():
+        raise OSError("disk failure")
+
+    # Сбой после записи сегмента, но до фиксации манифеста
+    monkeypatch.setattr(cache, "_save_manifest", crash)
+    with pytest.raises(OSError):
+        put(cache, range(10, 20))
+    os.makedirs(tmp_path / "features" / "seg-000009.tmp")
+    assert len(os.listdir(tmp_path / "features")) == len(saved) + 2
+
+    reopened = make_cache()
+    assert sorted(os.listdir(tmp_path / "features")) == saved
+    results = get(reopened, range(20))
+    assert all(result is not None for result in results[:10])
+    assert all(result is None for result in results[10:])
+    # Каталог удаленного сегмента снова доступен для записи
+    put(reopened, range(20, 30))
+    assert len(reopened.segments) == 2
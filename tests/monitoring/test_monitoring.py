@@ -0,0 +1,90 @@
+"""Метрики по потокам: значения всех shard суммируются в выдаче /metrics"""
+import threading
+
+import pytest
+
+from infra.monitoring.monitoring import Registry
+
+THREADS = 8
+PER_THREAD = 1000
+
+
+def run_in_threads(target) -> None:
+    start = threading.Barrier(THREADS)
+
+    def worker(index: int) -> None:
+        start.wait()
+        target(index)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def sample_lines(text: str, name: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith(name) and not line.startswith("#"):
+            series, _, value = line.rpartition(" ")
+            samples[series] = value
+    return samples
+
+
+def test_counter_sums_shards_of_all_threads():
+    registry = Registry()
+    requests = registry.counter("test_requests_total", "Запросы", ("status",))
+
+    def work(index: int) -> None:
+        for _ in range(PER_THREAD):
+            requests.labels("200").inc()
+        requests.labels("500").inc(index)
+
+    run_in_threads(work)
+
+    assert len(requests.labels("200")._values.shards()) == THREADS
+    text = registry.render()
+    assert "# TYPE test_requests_total counter" in text
+    assert sample_lines(text, "test_requests_total") == {
+        'test_requests_total{status="200"}': str(THREADS * PER_THREAD),
+        'test_requests_total{status="500"}': str(sum(range(THREADS))),
+    }
+
+
+def test_histogram_sums_shards_of_all_threads():
+    registry = Registry()
+    latency = registry.histogram("test_latency_seconds", "Задержка", buckets=(0.1, 1.0))
+
+    def work(index: int) -> None:
+        for _ in range(PER_THREAD):
+            latency.observe(0.05 if index % 2 else 0.5)
+        latency.observe(5.0)
+
+    run_in_threads(work)
+
+    fast = slow = THREADS // 2 * PER_THREAD
+    samples = sample_lines(registry.render(), "test_latency_seconds")
+    assert float(samples.pop("test_latency_seconds_sum")) == pytest.approx(fast * 0.05 + slow * 0.5 + THREADS * 5.0)
+    assert samples == {
+        'test_latency_seconds_bucket{le="0.1"}': str(fast),
+        'test_latency_seconds_bucket{le="1"}': str(fast + slow),
+        'test_latency_seconds_bucket{le="+Inf"}': str(fast + slow + THREADS),
+        "test_latency_seconds_count": str(fast + slow + THREADS),
+    }
+
+
+def test_gauge_inc_and_dec_from_different_threads():
+    registry = Registry()
+    in_flight = registry.gauge("test_in_flight", "Запросы в обработке", ("service",))
+
+    def work(index: int) -> None:
+        if index % 2:
+            in_flight.labels("gateway").inc(2)
+        else:
+            in_flight.labels("gateway").dec()
+
+    # Запрос начат в одном потоке и завершен в другом: shard уходят в минус, сумма верна
+    run_in_threads(work)
+
+    assert 'test_in_flight{service="gateway"} 4' in registry.render()